@@ -0,0 +1,421 @@
+"""Segmented delivery of School Communications.
+
+Sending a communication only queues a planning job. The planner resolves
+the recipients once and splits them into Communication Delivery Segments
+of ``SEGMENT_SIZE`` recipients, each delivered by its own background job:
+
+- emails go through the notification dispatcher (rate limits apply),
+- portal messages are bulk inserted as one private thread per recipient,
+  with the participant index and unread counters filled in,
+- acknowledgment rows are bulk inserted when the communication needs them.
+
+Each segment commits its own work and counters, so a failed segment can be
+retried on its own without re-sending the others. The communication's
+delivered and failed counters are incremented as segments finish and
+progress is published to the form; the final status is set once no
+segment is left to run.
+"""
+
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import cint, now
+
+from easygo_education.administration_comms.messaging import clear_unread_cache
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+from easygo_education.api.realtime import MESSAGE_EVENT, get_message_data, publish
+from easygo_education.utils.naming import make_series_names
+
+
+SEGMENT_SIZE = 500
+SEGMENT_SERIES = "CDS-.#####"
+ACKNOWLEDGMENT_SERIES = "ACK-.#####"
+
+# Failed recipients listed on the communication itself; segments keep the full list
+MAX_REPORT_LINES = 200
+
+STANDARD_FIELDS = ["name", "creation", "modified", "owner", "modified_by", "docstatus"]
+
+
+def start_delivery(communication_name):
+    """Mark a communication as sending and plan its delivery in the background."""
+    frappe.db.set_value("School Communication", communication_name, {
+        "status": "Sending",
+        "delivery_status": _("Preparing recipients"),
+        "delivered_count": 0,
+        "failed_count": 0
+    })
+    frappe.enqueue(
+        "easygo_education.administration_comms.communication_delivery.plan_delivery",
+        queue="long",
+        job_id=f"communication_delivery::{communication_name}",
+        deduplicate=True,
+        communication_name=communication_name,
+        enqueue_after_commit=True
+    )
+
+
+def plan_delivery(communication_name):
+    """Split a communication's recipients into segments and queue them.
+    
+    Segments that already exist are reused, so running the planner again
+    only re-queues the segments that haven't completed.
+    """
+    communication = frappe.get_doc("School Communication", communication_name)
+    
+    if not frappe.db.exists("Communication Delivery Segment", {"communication": communication_name}):
+        recipients = [get_recipient_row(recipient) for recipient in communication.get_recipients()]
+        if not recipients:
+            communication.db_set({"status": "Failed", "delivery_status": _("No recipients found for this communication")})
+            frappe.db.commit()
+            return
+        
+        insert_segments(communication_name, recipients)
+        communication.db_set({"total_recipients": len(recipients), "delivery_status": get_progress_label(0, 0, len(recipients))})
+        frappe.db.commit()
+    
+    for segment_name in frappe.get_all("Communication Delivery Segment",
+        filters={"communication": communication_name, "status": ["in", ["Queued", "In Progress"]]},
+        pluck="name",
+        order_by="segment_index asc"
+    ):
+        enqueue_segment(segment_name)
+
+
+def get_recipient_row(recipient):
+    """Keep the recipient fields a segment needs."""
+    return {
+        "name": recipient.get("name"),
+        "student_name": recipient.get("student_name"),
+        "email": recipient.get("email"),
+        "user_id": recipient.get("user_id")
+    }
+
+
+def insert_segments(communication_name, recipients):
+    """Bulk insert the delivery segments of a communication."""
+    chunks = [recipients[start:start + SEGMENT_SIZE] for start in range(0, len(recipients), SEGMENT_SIZE)]
+    names = make_series_names(SEGMENT_SERIES, len(chunks))
+    timestamp = now()
+    user = frappe.session.user
+    
+    frappe.db.bulk_insert(
+        "Communication Delivery Segment",
+        fields=[*STANDARD_FIELDS, "communication", "segment_index", "status", "recipient_count", "recipients"],
+        values=[
+            (name, timestamp, timestamp, user, user, 0, communication_name, index, "Queued", len(chunk), json.dumps(chunk))
+            for index, (name, chunk) in enumerate(zip(names, chunks), 1)
+        ]
+    )
+
+
+def enqueue_segment(segment_name):
+    """Queue one segment for delivery once the current transaction commits."""
+    frappe.enqueue(
+        "easygo_education.administration_comms.communication_delivery.process_segment",
+        queue="long",
+        job_id=f"communication_segment::{segment_name}",
+        deduplicate=True,
+        segment_name=segment_name,
+        enqueue_after_commit=True
+    )
+
+
+def process_segment(segment_name):
+    """Deliver one segment and record its counters as a checkpoint."""
+    segment = frappe.get_doc("Communication Delivery Segment", segment_name, for_update=True)
+    if segment.status not in ("Queued", "In Progress"):
+        return
+    
+    segment.db_set({"status": "In Progress", "started_on": now()})
+    frappe.db.commit()
+    
+    communication = frappe.get_doc("School Communication", segment.communication)
+    try:
+        results = deliver_segment(communication, json.loads(segment.recipients or "[]"))
+    except Exception:
+        frappe.db.rollback()
+        segment.db_set({"status": "Failed", "error_log": frappe.get_traceback()})
+        frappe.db.commit()
+        frappe.log_error(f"School Communication {communication.name}: segment {segment.segment_index} failed", "Communication Delivery")
+        finish_if_complete(communication.name)
+        return
+    
+    delivered = sum(1 for result in results if result["status"] == "Delivered")
+    failed = len(results) - delivered
+    segment.db_set({
+        "status": "Completed",
+        "completed_on": now(),
+        "delivered_count": delivered,
+        "failed_count": failed,
+        "delivery_report": "\n".join(get_report_line(result) for result in results if result["status"] != "Delivered")
+    })
+    
+    # Concurrent segments update the same row, so increment in SQL
+    frappe.db.sql("""
+        UPDATE `tabSchool Communication`
+        SET delivered_count = delivered_count + %(delivered)s,
+            failed_count = failed_count + %(failed)s
+        WHERE name = %(name)s
+    """, {"delivered": delivered, "failed": failed, "name": communication.name})
+    frappe.db.commit()
+    
+    publish_delivery_progress(communication.name)
+    finish_if_complete(communication.name)
+
+
+def deliver_segment(communication, recipients):
+    """Deliver a communication to a list of recipients.
+    
+    Returns one result per recipient with its status and a message.
+    """
+    method = communication.delivery_method
+    send_email = method in ("Email", "All Methods")
+    send_portal = method in ("Portal Message", "All Methods")
+    
+    # Attachments are referenced by File name so each queued email stays small
+    attachments = None
+    if communication.attachments:
+        attachments = [{"fid": name} for name in frappe.get_all("File",
+            filters={"file_url": communication.attachments},
+            pluck="name",
+            limit=1
+        )]
+    
+    results = []
+    for recipient in recipients:
+        result = {
+            "recipient": recipient.get("name"),
+            "recipient_name": recipient.get("student_name"),
+            "email": recipient.get("email"),
+            "status": "Failed",
+            "message": _("No email address or portal user")
+        }
+        
+        if send_email and recipient.get("email"):
+            queue_notification(
+                [recipient["email"]],
+                subject=communication.subject,
+                message=communication.get_formatted_message(recipient),
+                reference_doctype=communication.doctype,
+                reference_name=communication.name,
+                attachments=attachments,
+                log=False
+            )
+            result.update({"status": "Delivered", "message": _("Email queued")})
+        
+        if send_portal and recipient.get("user_id"):
+            result.update({"status": "Delivered", "message": _("Portal message created")})
+        
+        if method == "SMS":
+            result["message"] = _("SMS delivery is not available")
+        
+        results.append(result)
+    
+    portal_users = [recipient for recipient in recipients if recipient.get("user_id")]
+    if send_portal:
+        insert_portal_messages(communication, portal_users)
+    
+    if communication.requires_acknowledgment:
+        insert_acknowledgments(communication, portal_users)
+    
+    return results
+
+
+def insert_portal_messages(communication, recipients):
+    """Bulk insert a private portal thread with one message for each recipient."""
+    if not recipients:
+        return
+    
+    thread_series = get_naming_series("Message Thread")
+    message_series = get_naming_series("Message")
+    thread_names = make_series_names(thread_series, len(recipients))
+    message_names = make_series_names(message_series, len(recipients))
+    timestamp = now()
+    user = frappe.session.user
+    sender = communication.sender or user
+    standard = [timestamp, timestamp, user, user, 0]
+    
+    frappe.db.bulk_insert(
+        "Message Thread",
+        fields=[
+            *STANDARD_FIELDS, "naming_series", "thread_title", "thread_type", "status", "priority",
+            "created_by", "reference_doctype", "reference_name", "last_message_date", "last_message_by",
+            "message_count", "is_private", "notifications_enabled"
+        ],
+        values=[
+            (
+                name, *standard, thread_series, communication.subject, "General Discussion", "Open",
+                communication.priority or "Medium", sender, communication.doctype, communication.name,
+                timestamp, sender, 1, 1, 0
+            )
+            for name in thread_names
+        ]
+    )
+    
+    frappe.db.bulk_insert(
+        "Message Thread Participant",
+        fields=[
+            *STANDARD_FIELDS, "parent", "parenttype", "parentfield", "idx", "user", "role",
+            "notifications_enabled", "joined_date", "last_message_date", "unread_count"
+        ],
+        values=[
+            (
+                frappe.generate_hash(length=10), *standard, thread, "Message Thread", "participants", idx,
+                participant, role, 1, timestamp, timestamp, unread
+            )
+            for thread, recipient in zip(thread_names, recipients)
+            for idx, (participant, role, unread) in enumerate(((sender, "Creator", 0), (recipient["user_id"], "Participant", 1)), 1)
+        ]
+    )
+    
+    frappe.db.bulk_insert(
+        "Message",
+        fields=[*STANDARD_FIELDS, "naming_series", "thread", "message_type", "sender", "sent_date", "content", "is_read", "status"],
+        values=[
+            (
+                name, *standard, message_series, thread, "Text", sender, timestamp,
+                communication.get_formatted_message(recipient), 0, "Delivered"
+            )
+            for name, thread, recipient in zip(message_names, thread_names, recipients)
+        ]
+    )
+    clear_unread_cache([recipient["user_id"] for recipient in recipients])
+    
+    for name, thread, recipient in zip(message_names, thread_names, recipients):
+        publish(MESSAGE_EVENT, [recipient["user_id"]], get_message_data(
+            thread, name, sender, timestamp, communication.get_formatted_message(recipient)
+        ))
+
+
+def insert_acknowledgments(communication, recipients):
+    """Bulk insert pending acknowledgment rows for portal users not yet holding one."""
+    existing = set(frappe.get_all("Communication Acknowledgment",
+        filters={"communication": communication.name, "recipient": ["in", [r["user_id"] for r in recipients]]},
+        pluck="recipient"
+    )) if recipients else set()
+    recipients = [recipient for recipient in recipients if recipient["user_id"] not in existing]
+    if not recipients:
+        return
+    
+    names = make_series_names(ACKNOWLEDGMENT_SERIES, len(recipients))
+    timestamp = now()
+    user = frappe.session.user
+    
+    frappe.db.bulk_insert(
+        "Communication Acknowledgment",
+        fields=[*STANDARD_FIELDS, "communication", "recipient", "recipient_name", "status", "acknowledgment_deadline"],
+        values=[
+            (
+                name, timestamp, timestamp, user, user, 0, communication.name, recipient["user_id"],
+                recipient.get("student_name"), "Pending", communication.acknowledgment_deadline
+            )
+            for name, recipient in zip(names, recipients)
+        ]
+    )
+
+
+def get_naming_series(doctype):
+    """Get the default naming series of a DocType."""
+    return (frappe.get_meta(doctype).get_field("naming_series").options or "").split("\n")[0]
+
+
+def get_report_line(result):
+    """Format one recipient's delivery result."""
+    return _("{0} ({1}): {2} - {3}").format(
+        result["recipient_name"] or result["recipient"],
+        result["email"] or _("No email"),
+        _(result["status"]),
+        result["message"]
+    )
+
+
+def get_progress_label(delivered, failed, total):
+    """Format a communication's delivery counters."""
+    return _("Total: {0}, Delivered: {1}, Failed: {2}").format(total, delivered, failed)
+
+
+def publish_delivery_progress(communication_name):
+    """Publish a communication's delivery progress to its form."""
+    counters = frappe.db.get_value("School Communication", communication_name,
+        ["total_recipients", "delivered_count", "failed_count"], as_dict=True)
+    done = cint(counters.delivered_count) + cint(counters.failed_count)
+    total = cint(counters.total_recipients)
+    
+    frappe.publish_progress(
+        done * 100 / max(total, 1),
+        title=_("Delivering Communication"),
+        doctype="School Communication",
+        docname=communication_name,
+        description=get_progress_label(counters.delivered_count, counters.failed_count, total)
+    )
+
+
+def finish_if_complete(communication_name):
+    """Set a communication's final status once none of its segments are left to run."""
+    segments = frappe.get_all("Communication Delivery Segment",
+        filters={"communication": communication_name},
+        fields=["status", "recipient_count", "delivered_count", "failed_count", "delivery_report"],
+        order_by="segment_index asc"
+    )
+    if not segments or any(segment.status in ("Queued", "In Progress") for segment in segments):
+        return
+    
+    status, delivered, failed, report = summarize_segments(segments)
+    frappe.db.set_value("School Communication", communication_name, {
+        "status": status,
+        "delivered_count": delivered,
+        "failed_count": failed,
+        "delivery_status": get_progress_label(delivered, failed, delivered + failed),
+        "delivery_report": report
+    })
+    frappe.db.commit()
+
+
+def summarize_segments(segments):
+    """Get a communication's final status, counters and report from its finished segments.
+    
+    Recipients of failed segments count as failed until the segment is retried.
+    """
+    delivered = sum(cint(segment.delivered_count) for segment in segments if segment.status == "Completed")
+    failed = sum(
+        cint(segment.failed_count) if segment.status == "Completed" else cint(segment.recipient_count)
+        for segment in segments
+    )
+    failed_segments = sum(1 for segment in segments if segment.status == "Failed")
+    
+    report_lines = [line for segment in segments for line in (segment.delivery_report or "").splitlines()]
+    if len(report_lines) > MAX_REPORT_LINES:
+        report_lines = report_lines[:MAX_REPORT_LINES] + [_("... and {0} more").format(len(report_lines) - MAX_REPORT_LINES)]
+    if failed_segments:
+        report_lines.append(_("{0} segment(s) failed and can be retried").format(failed_segments))
+    
+    if not failed:
+        status = "Delivered"
+    elif delivered:
+        status = "Partially Delivered"
+    else:
+        status = "Failed"
+    
+    return status, delivered, failed, "\n".join(report_lines)
+
+
+@frappe.whitelist()
+def retry_failed_segments(communication):
+    """Queue every failed segment of a communication again."""
+    frappe.only_for(["System Manager", "Education Manager"])
+    
+    segments = frappe.get_all("Communication Delivery Segment",
+        filters={"communication": communication, "status": "Failed"},
+        pluck="name"
+    )
+    if not segments:
+        frappe.throw(_("No failed segments to retry"))
+    
+    for segment_name in segments:
+        frappe.db.set_value("Communication Delivery Segment", segment_name, {"status": "Queued", "error_log": None})
+        enqueue_segment(segment_name)
+    frappe.db.set_value("School Communication", communication, "status", "Sending")
+    
+    return {"message": _("{0} segment(s) queued again").format(len(segments))}
@@ -0,0 +1,13 @@
+"""Communication Acknowledgment doctype controller.
+
+One row per portal user a School Communication requiring acknowledgment
+was delivered to, bulk inserted by
+easygo_education.administration_comms.communication_delivery.
+"""
+
+from frappe.model.document import Document
+
+
+class CommunicationAcknowledgment(Document):
+    """Communication Acknowledgment doctype controller (maintained by the system)."""
+    pass
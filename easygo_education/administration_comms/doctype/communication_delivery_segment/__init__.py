@@ -0,0 +1 @@
+# Communication Delivery Segment
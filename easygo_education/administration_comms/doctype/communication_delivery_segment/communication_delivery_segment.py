@@ -0,0 +1,32 @@
+"""Communication Delivery Segment doctype controller.
+
+A slice of a School Communication's recipients, delivered by one
+background job of easygo_education.administration_comms.communication_delivery.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+
+class CommunicationDeliverySegment(Document):
+    """Communication Delivery Segment doctype controller (maintained by the system)."""
+    
+    @frappe.whitelist()
+    def retry(self):
+        """Deliver a failed segment again."""
+        frappe.only_for(["System Manager", "Education Manager"])
+        
+        if self.status != "Failed":
+            frappe.throw(_("Only failed segments can be retried"))
+        
+        self.db_set({"status": "Queued", "error_log": None})
+        frappe.db.set_value("School Communication", self.communication, "status", "Sending")
+        frappe.enqueue(
+            "easygo_education.administration_comms.communication_delivery.process_segment",
+            queue="long",
+            job_id=f"communication_segment::{self.name}",
+            deduplicate=True,
+            segment_name=self.name,
+            enqueue_after_commit=True
+        )
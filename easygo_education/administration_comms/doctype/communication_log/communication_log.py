@@ -141,3 +141,8 @@ class CommunicationLog(Document):
         except Exception as e:
             frappe.log_error(f"Failed to log communication: {str(e)}")
             return None
+
+
+def on_doctype_update():
+    """Index logs by tag and send date for the fee reminder window check."""
+    frappe.db.add_index("Communication Log", ["tags", "sent_date"])
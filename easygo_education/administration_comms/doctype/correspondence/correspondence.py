@@ -3,6 +3,8 @@ from frappe.model.document import Document
 from frappe.utils import nowdate, add_days, get_datetime
 from frappe import _
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Correspondence(Document):
     def validate(self):
@@ -60,7 +62,7 @@ class Correspondence(Document):
             recipients.append(self.recipient_email)
             
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=f"Important Correspondence: {self.subject}",
                 message=f"""
@@ -113,7 +115,7 @@ def send_response_reminder(correspondence_name):
     
     if doc.status not in ["Completed", "Archived"] and doc.response_required:
         if doc.recipient_email:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[doc.recipient_email],
                 subject=f"Response Reminder: {doc.subject}",
                 message=f"""
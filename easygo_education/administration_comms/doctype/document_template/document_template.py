@@ -3,10 +3,21 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import getdate, now_datetime, cstr
+from frappe.utils import getdate, now_datetime
 import re
 import json
 
+from easygo_education.administration_comms.document_rendering import (
+    CompiledTemplate,
+    compile_template,
+    get_documents_context,
+    get_pdf_options,
+    get_system_variables,
+    start_documents_pdf,
+    validate_template_syntax,
+)
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class DocumentTemplate(Document):
     """Document template management for standardized document generation."""
@@ -41,6 +52,8 @@ class DocumentTemplate(Document):
             # Check for balanced tags (basic validation)
             self.validate_html_structure()
         
+        validate_template_syntax(self.template_content)
+        
         # Validate template variables in content
         self.validate_template_variables_in_content()
     
@@ -188,7 +201,7 @@ class DocumentTemplate(Document):
         if managers:
             recipients = [user.parent for user in managers]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Document Template Submitted - {0}").format(self.template_name),
                 message=self.get_manager_notification_message(),
@@ -244,7 +257,7 @@ class DocumentTemplate(Document):
             if role_users:
                 recipients = [user.parent for user in role_users]
                 
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("New Document Template Available - {0}").format(self.template_name),
                     message=self.get_user_notification_message(),
@@ -290,7 +303,7 @@ class DocumentTemplate(Document):
                 if role_users:
                     recipients = [user.parent for user in role_users]
                     
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=recipients,
                         subject=_("Template Activated - {0}").format(self.template_name),
                         message=_("Document template '{0}' has been activated and is now available for use.").format(self.template_name),
@@ -310,7 +323,7 @@ class DocumentTemplate(Document):
                 if role_users:
                     recipients = [user.parent for user in role_users]
                     
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=recipients,
                         subject=_("Template Deactivated - {0}").format(self.template_name),
                         message=_("Document template '{0}' has been deactivated and is no longer available for use.").format(self.template_name),
@@ -367,8 +380,13 @@ class DocumentTemplate(Document):
         if not sample_data:
             sample_data = self.get_sample_data()
         
-        # Render template
-        rendered_content = self.render_template(sample_data)
+        if isinstance(sample_data, str):
+            sample_data = json.loads(sample_data)
+        
+        # Compile the unsaved content being previewed without caching it
+        rendered_content = CompiledTemplate(
+            self.name, self.template_content, self.css_styles, self.javascript_code
+        ).render(sample_data)
         
         return {
             "content": rendered_content,
@@ -412,28 +430,13 @@ class DocumentTemplate(Document):
         if not self.template_content:
             return ""
         
-        content = self.template_content
-        
-        # Replace variables in template
         if isinstance(data, str):
             data = json.loads(data)
         
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"
-            content = content.replace(placeholder, cstr(value))
-        
-        # Add CSS and JavaScript if present
-        if self.css_styles:
-            content = f"<style>{self.css_styles}</style>\n{content}"
-        
-        if self.javascript_code:
-            content = f"{content}\n<script>{self.javascript_code}</script>"
-        
-        return content
+        return compile_template(self).render(data)
     
-    @frappe.whitelist()
-    def generate_document(self, doctype, docname, output_format="HTML"):
-        """Generate document using this template."""
+    def validate_generation(self, doctype):
+        """Check the template can generate documents of a doctype."""
         if self.status != "Active":
             frappe.throw(_("Template is not active"))
         
@@ -442,18 +445,20 @@ class DocumentTemplate(Document):
             applicable = any(dt.doctype == doctype for dt in self.applicable_doctypes)
             if not applicable:
                 frappe.throw(_("Template is not applicable to {0}").format(doctype))
+    
+    @frappe.whitelist()
+    def generate_document(self, doctype, docname, output_format="HTML"):
+        """Generate document using this template."""
+        self.validate_generation(doctype)
+        frappe.has_permission(doctype, "read", docname, throw=True)
         
-        # Get document data
-        doc = frappe.get_doc(doctype, docname)
-        doc_data = doc.as_dict()
+        # Fetch only the fields the template references
+        doc_data = get_documents_context(doctype, [docname], compile_template(self).variables).get(docname)
+        if doc_data is None:
+            frappe.throw(_("{0} {1} not found").format(doctype, docname))
         
         # Add system variables
-        doc_data.update({
-            "current_date": frappe.utils.today(),
-            "current_time": frappe.utils.now(),
-            "current_user": frappe.session.user,
-            "company": frappe.defaults.get_user_default("Company")
-        })
+        doc_data.update(get_system_variables())
         
         # Render template
         rendered_content = self.render_template(doc_data)
@@ -465,9 +470,31 @@ class DocumentTemplate(Document):
     
     def generate_pdf(self, content):
         """Generate PDF from HTML content."""
-        # This would use a PDF generation library
-        # For now, return the HTML content
-        return content
+        from frappe.utils.pdf import get_pdf
+        
+        return get_pdf(content, get_pdf_options(self))
+    
+    @frappe.whitelist()
+    def generate_documents(self, doctype, names):
+        """Render this template for many documents into one merged PDF in the background."""
+        self.validate_generation(doctype)
+        frappe.has_permission(doctype, "read", throw=True)
+        
+        names = frappe.parse_json(names) if isinstance(names, str) else names
+        names = list(dict.fromkeys(name for name in names or [] if name))
+        if not names:
+            frappe.throw(_("Select at least one {0}").format(doctype))
+        
+        # The job reads records without permission checks, so check each one for the user here
+        readable = set(frappe.get_list(doctype, filters={"name": ["in", names]}, pluck="name",
+            limit_page_length=0))
+        denied = [name for name in names if name not in readable]
+        if denied:
+            frappe.throw(_("You don't have permission to read {0} {1}").format(doctype, ", ".join(denied[:10])),
+                frappe.PermissionError)
+        
+        start_documents_pdf(self.name, doctype, names)
+        return {"message": _("{0} documents are being generated").format(len(names))}
     
     @frappe.whitelist()
     def duplicate_template(self, new_name):
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, today, now
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class MeetingRequest(Document):
     """Meeting Request doctype controller with business rules."""
@@ -233,7 +235,7 @@ class MeetingRequest(Document):
                     school_name
                 )
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.email],
                 subject=subject,
                 message=message
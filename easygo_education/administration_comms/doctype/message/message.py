@@ -5,6 +5,10 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now
 
+from easygo_education.administration_comms.messaging import is_participant, mark_message_read, record_message
+from easygo_education.api.realtime import publish_message
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Message(Document):
     """Message doctype controller for portal messaging."""
@@ -19,16 +23,7 @@ class Message(Document):
         if not self.thread:
             frappe.throw(_("Thread is required"))
         
-        # Check if sender is participant in the thread
-        thread_doc = frappe.get_doc("Message Thread", self.thread)
-        
-        sender_is_participant = False
-        for participant in thread_doc.participants:
-            if participant.user == self.sender:
-                sender_is_participant = True
-                break
-        
-        if not sender_is_participant:
+        if not is_participant(self.thread, self.sender or frappe.session.user):
             frappe.throw(_("You are not a participant in this thread"))
     
     def set_defaults(self):
@@ -48,21 +43,8 @@ class Message(Document):
         self.send_notifications()
     
     def update_thread_stats(self):
-        """Update thread statistics."""
-        try:
-            thread_doc = frappe.get_doc("Message Thread", self.thread)
-            thread_doc.last_message_date = self.sent_date
-            thread_doc.last_message_by = self.sender
-            thread_doc.message_count = frappe.db.count("Message", {"thread": self.thread})
-            
-            # Update thread status if it was resolved/closed
-            if thread_doc.status in ["Resolved", "Closed"]:
-                thread_doc.status = "In Progress"
-            
-            thread_doc.save(ignore_permissions=True)
-            
-        except Exception as e:
-            frappe.log_error(f"Failed to update thread stats: {str(e)}")
+        """Update thread statistics and the participants' unread counters, then push the message."""
+        publish_message(self, record_message(self))
     
     def send_notifications(self):
         """Send notifications to thread participants."""
@@ -78,7 +60,7 @@ class Message(Document):
                     user_email = frappe.db.get_value("User", participant.user, "email")
                     
                     if user_email:
-                        frappe.sendmail(
+                        queue_notification(
                             recipients=[user_email],
                             subject=_("New Message in Thread: {0}").format(thread_doc.thread_title),
                             message=_("You have received a new message in the thread '{0}' from {1}.").format(
@@ -108,6 +90,7 @@ class Message(Document):
             })
             
             self.save(ignore_permissions=True)
+            mark_message_read(self, user)
         
         return True
     
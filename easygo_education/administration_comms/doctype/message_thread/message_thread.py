@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class MessageThread(Document):
     """Message Thread doctype controller for portal messaging."""
@@ -29,6 +31,11 @@ class MessageThread(Document):
         
         if not self.last_message_date:
             self.last_message_date = now()
+        
+        # New members show up in their inbox from the thread's last activity
+        for participant in self.participants:
+            if not participant.last_message_date:
+                participant.last_message_date = self.last_message_date
     
     def after_insert(self):
         """Actions after thread creation."""
@@ -45,7 +52,7 @@ class MessageThread(Document):
                     user_email = frappe.db.get_value("User", participant.user, "email")
                     
                     if user_email:
-                        frappe.sendmail(
+                        queue_notification(
                             recipients=[user_email],
                             subject=_("New Message Thread: {0}").format(self.thread_title),
                             message=_("A new message thread has been created: {0}").format(self.thread_title),
@@ -0,0 +1,14 @@
+"""Message Thread Participant doctype controller."""
+
+import frappe
+from frappe.model.document import Document
+
+
+class MessageThreadParticipant(Document):
+    """Member of a message thread with its unread counter."""
+    pass
+
+
+def on_doctype_update():
+    """Index participant rows for the per-user inbox."""
+    frappe.db.add_index("Message Thread Participant", ["user", "last_message_date"])
@@ -6,6 +6,9 @@ from frappe.model.document import Document
 from frappe.utils import now_datetime, cint, flt, add_to_date
 import json
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+from easygo_education.utils.condition_engine import DocumentRecord, compile_condition, validate_condition
+
 
 class NotificationRule(Document):
     """Automated notification rule management."""
@@ -25,12 +28,9 @@ class NotificationRule(Document):
         if not self.document_type:
             frappe.throw(_("Document type is required"))
         
-        # Validate condition script if provided
-        if self.condition_script:
-            try:
-                compile(self.condition_script, '<string>', 'exec')
-            except SyntaxError as e:
-                frappe.throw(_("Invalid condition script: {0}").format(str(e)))
+        # Validate conditions if provided
+        validate_condition(self.trigger_condition, _("trigger condition"))
+        validate_condition(self.condition_script, _("condition script"))
     
     def validate_notification_settings(self):
         """Validate notification configuration."""
@@ -127,29 +127,30 @@ class NotificationRule(Document):
     
     def check_trigger_condition(self, doc):
         """Check if trigger condition is met."""
+        return bool(self.filter_triggered_documents([doc]))
+    
+    def filter_triggered_documents(self, docs):
+        """Get the documents meeting the trigger condition, evaluated as one batch.
+        
+        Conditions can refer to the document as ``doc`` or to its fields by
+        name, e.g. ``status == "Approved"``. A condition script sets
+        ``result`` or ends with an expression.
+        """
         if not self.trigger_condition and not self.condition_script:
-            return True
+            return list(docs)
         
-        # Simple condition check
-        if self.trigger_condition:
-            try:
-                # Parse simple conditions like "status == 'Approved'"
-                condition = self.trigger_condition.replace("doc.", "")
-                return eval(f"doc.{condition}")
-            except:
-                pass
-        
-        # Advanced script condition
-        if self.condition_script:
-            try:
-                local_vars = {"doc": doc, "frappe": frappe}
-                exec(self.condition_script, {"__builtins__": {}}, local_vars)
-                return local_vars.get("result", True)
-            except Exception as e:
-                frappe.log_error(f"Condition script error: {str(e)}", "Notification Rule Condition")
-                return False
+        records = [DocumentRecord(doc) for doc in docs]
+        try:
+            if self.trigger_condition:
+                values = compile_condition(self.trigger_condition).evaluate_batch(records)
+            else:
+                condition = compile_condition(self.condition_script)
+                values = [condition.evaluate(record).get("result", True) for record in records]
+        except Exception as e:
+            frappe.log_error(f"Condition error: {str(e)}", "Notification Rule Condition")
+            return []
         
-        return True
+        return [doc for doc, value in zip(docs, values) if value]
     
     def get_recipients(self, doc):
         """Get notification recipients."""
@@ -251,38 +252,20 @@ class NotificationRule(Document):
             self.send_system_notifications(doc, recipients["users"])
     
     def send_email_notifications(self, doc, email_recipients):
-        """Send email notifications."""
-        try:
-            subject = self.render_template(self.subject_template or "Notification", doc)
-            message = self.get_email_message(doc)
-            
-            frappe.sendmail(
-                recipients=email_recipients,
-                subject=subject,
-                message=message,
-                reference_doctype=doc.doctype,
-                reference_name=doc.name,
-                retry=self.retry_attempts
-            )
-            
-        except Exception as e:
-            frappe.log_error(f"Email notification failed: {str(e)}", "Notification Rule Email")
-            raise
-    
-    def get_email_message(self, doc):
-        """Get email message content."""
+        """Queue email notifications; templates are rendered by the dispatcher."""
         if self.email_template:
-            # Use email template
-            template_doc = frappe.get_doc("Email Template", self.email_template)
-            return frappe.render_template(template_doc.response, {"doc": doc})
-        
-        elif self.message_template:
-            # Use custom message template
-            return self.render_template(self.message_template, doc)
-        
+            template = frappe.db.get_value("Email Template", self.email_template, "response")
         else:
-            # Default message
-            return f"Notification for {doc.doctype}: {doc.name}"
+            template = self.message_template or f"Notification for {doc.doctype}: {doc.name}"
+        
+        queue_notification(
+            recipients=email_recipients,
+            subject_template=self.subject_template or "Notification",
+            template=template,
+            context={"doc": doc.as_dict(convert_dates_to_str=True)},
+            reference_doctype=doc.doctype,
+            reference_name=doc.name
+        )
     
     def send_sms_notifications(self, doc, sms_recipients):
         """Send SMS notifications."""
@@ -7,6 +7,8 @@ from frappe.utils import now
 import json
 import re
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class NotificationTemplate(Document):
     """Notification Template doctype controller."""
@@ -185,7 +187,7 @@ class NotificationTemplate(Document):
             
             # Send based on template type
             if self.template_type in ["Email", "Multi-Channel"]:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=subject,
                     message=message,
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class ParentConsent(Document):
     """Parent Consent doctype controller."""
@@ -99,7 +101,7 @@ class ParentConsent(Document):
                     recipients.append(admin.email)
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Consent Confirmation - {0}").format(self.activity_event or self.consent_type),
                     message=_("Consent has been provided for {0}.\n\nDetails:\nStudent: {1}\nGuardian: {2}\nActivity: {3}\nConsent Type: {4}\nDate: {5}").format(
@@ -156,7 +158,7 @@ class ParentConsent(Document):
                     recipients.append(admin.email)
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Consent Revoked - {0}").format(self.activity_event or self.consent_type),
                     message=_("Consent has been revoked for {0}.\n\nDetails:\nStudent: {1}\nGuardian: {2}\nActivity: {3}\nRevocation Date: {4}").format(
@@ -3,6 +3,8 @@ from frappe.model.document import Document
 from frappe.utils import nowdate, add_days, get_datetime
 from frappe import _
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class RectorateCorrespondence(Document):
     def validate(self):
@@ -71,7 +73,7 @@ class RectorateCorrespondence(Document):
         recipients = [user.email for user in management_users if user.email]
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=f"Important Rectorate Correspondence: {self.subject}",
                 message=f"""
@@ -98,7 +100,7 @@ class RectorateCorrespondence(Document):
             recipients = [emp.user_id for emp in all_employees if emp.user_id]
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=f"New Circular: {self.subject}",
                     message=f"""
@@ -182,7 +184,7 @@ def send_response_reminder(correspondence_name):
         recipients = [user.email for user in management_users if user.email]
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=f"Response Reminder: {doc.subject}",
                 message=f"""
@@ -0,0 +1,18 @@
+"""Scheduled Job Run doctype controller.
+
+One run of a daily, weekly or monthly job on this site, queued and
+recorded by easygo_education.jobs.orchestrator.
+"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class ScheduledJobRun(Document):
+    """Scheduled Job Run doctype controller (maintained by the system)."""
+    pass
+
+
+def on_doctype_update():
+    """Index runs by job and period for the once-per-period check."""
+    frappe.db.add_index("Scheduled Job Run", ["job", "period"])
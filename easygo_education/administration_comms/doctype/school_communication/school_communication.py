@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, add_days
 
+from easygo_education.administration_comms.communication_delivery import start_delivery
+
 
 class SchoolCommunication(Document):
     """School Communication management."""
@@ -64,30 +66,16 @@ class SchoolCommunication(Document):
             self.save()
             self.schedule_delivery()
         else:
+            # on_update starts the delivery once the status changes to Sent
             self.status = "Sent"
             self.save()
-            self.process_communication()
         
-        frappe.msgprint(_("Communication processed successfully"))
+        frappe.msgprint(_("Communication queued for delivery"))
         return self
     
     def process_communication(self):
-        """Process and deliver the communication."""
-        recipients = self.get_recipients()
-        
-        if not recipients:
-            frappe.throw(_("No recipients found for this communication"))
-        
-        delivery_results = []
-        
-        for recipient in recipients:
-            result = self.deliver_to_recipient(recipient)
-            delivery_results.append(result)
-        
-        self.update_delivery_status(delivery_results)
-        
-        if self.requires_acknowledgment:
-            self.create_acknowledgment_records(recipients)
+        """Deliver the communication in background segments."""
+        start_delivery(self.name)
     
     def get_recipients(self):
         """Get list of recipients based on target audience."""
@@ -132,65 +120,6 @@ class SchoolCommunication(Document):
         
         return recipients
     
-    def deliver_to_recipient(self, recipient):
-        """Deliver communication to a specific recipient."""
-        delivery_result = {
-            "recipient": recipient.get("name"),
-            "recipient_name": recipient.get("student_name"),
-            "email": recipient.get("email"),
-            "status": "Failed",
-            "message": ""
-        }
-        
-        try:
-            if self.delivery_method in ["Email", "All Methods"] and recipient.get("email"):
-                self.send_email(recipient)
-                delivery_result["status"] = "Delivered"
-                delivery_result["message"] = "Email sent successfully"
-            
-            if self.delivery_method in ["Portal Message", "All Methods"] and recipient.get("user_id"):
-                self.create_portal_message(recipient)
-                delivery_result["status"] = "Delivered"
-                delivery_result["message"] = "Portal message created"
-            
-            if self.delivery_method in ["SMS", "All Methods"]:
-                # SMS delivery would be implemented here
-                delivery_result["message"] += " (SMS not implemented)"
-            
-        except Exception as e:
-            delivery_result["status"] = "Failed"
-            delivery_result["message"] = str(e)
-        
-        return delivery_result
-    
-    def send_email(self, recipient):
-        """Send email to recipient."""
-        frappe.sendmail(
-            recipients=[recipient.get("email")],
-            subject=self.subject,
-            message=self.get_formatted_message(recipient),
-            reference_doctype=self.doctype,
-            reference_name=self.name,
-            attachments=self.get_attachments()
-        )
-    
-    def create_portal_message(self, recipient):
-        """Create portal message for recipient."""
-        if not recipient.get("user_id"):
-            return
-        
-        message_doc = frappe.get_doc({
-            "doctype": "Message",
-            "sender": self.sender,
-            "recipient": recipient.get("user_id"),
-            "subject": self.subject,
-            "message": self.message_content,
-            "reference_doctype": self.doctype,
-            "reference_name": self.name
-        })
-        
-        message_doc.insert(ignore_permissions=True)
-    
     def get_formatted_message(self, recipient):
         """Get formatted message for recipient."""
         message = self.message_content
@@ -201,66 +130,6 @@ class SchoolCommunication(Document):
         
         return message
     
-    def get_attachments(self):
-        """Get attachments for email."""
-        attachments = []
-        
-        if self.attachments:
-            file_doc = frappe.get_doc("File", {"file_url": self.attachments})
-            attachments.append({
-                "fname": file_doc.file_name,
-                "fcontent": file_doc.get_content()
-            })
-        
-        return attachments
-    
-    def update_delivery_status(self, delivery_results):
-        """Update delivery status based on results."""
-        total_recipients = len(delivery_results)
-        successful_deliveries = len([r for r in delivery_results if r["status"] == "Delivered"])
-        failed_deliveries = total_recipients - successful_deliveries
-        
-        self.delivery_status = _("Total: {0}, Delivered: {1}, Failed: {2}").format(
-            total_recipients, successful_deliveries, failed_deliveries
-        )
-        
-        # Create detailed delivery report
-        report_lines = []
-        for result in delivery_results:
-            report_lines.append(_("{0} ({1}): {2} - {3}").format(
-                result["recipient_name"] or result["recipient"],
-                result["email"] or "No email",
-                result["status"],
-                result["message"]
-            ))
-        
-        self.delivery_report = "\n".join(report_lines)
-        
-        # Update overall status
-        if failed_deliveries == 0:
-            self.status = "Delivered"
-        elif successful_deliveries > 0:
-            self.status = "Partially Delivered"
-        else:
-            self.status = "Failed"
-        
-        self.save()
-    
-    def create_acknowledgment_records(self, recipients):
-        """Create acknowledgment records for recipients."""
-        for recipient in recipients:
-            if recipient.get("user_id"):
-                ack_doc = frappe.get_doc({
-                    "doctype": "Communication Acknowledgment",
-                    "communication": self.name,
-                    "recipient": recipient.get("user_id"),
-                    "recipient_name": recipient.get("student_name"),
-                    "acknowledgment_deadline": self.acknowledgment_deadline,
-                    "status": "Pending"
-                })
-                
-                ack_doc.insert(ignore_permissions=True)
-    
     def schedule_delivery(self):
         """Schedule communication delivery."""
         # Create a scheduled job for delivery
@@ -320,4 +189,3 @@ def deliver_scheduled_communication(communication_name):
     if comm_doc.status == "Scheduled":
         comm_doc.status = "Sent"
         comm_doc.save()
-        comm_doc.process_communication()
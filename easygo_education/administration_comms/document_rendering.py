@@ -0,0 +1,254 @@
+"""Compiled Document Template rendering and batch PDFs.
+
+A template's content is compiled once per template version (its name and
+``modified`` timestamp) into a Jinja template of the sandboxed Frappe
+environment. The variables it references are read from the compiled
+syntax tree, so rendering fetches only those fields of the target
+documents (plus the rows of any child table it loops over) instead of
+loading whole documents.
+
+``build_documents_pdf`` renders many documents of one doctype, such as
+certificates or letters, into a single merged PDF. The HTML is rendered
+in the job itself; the PDF conversion of each part of ``PART_SIZE``
+documents runs in a pool of ``PDF_WORKERS`` threads, and the parts are
+merged in order into one private File attached to the template.
+"""
+
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe import _
+from frappe.model import default_fields
+from frappe.utils import cstr, now, today
+
+from easygo_education.api.realtime import DOCUMENTS_EVENT, publish
+
+
+CACHE_SIZE = 128
+
+# Documents per PDF part and threads converting parts at once
+PART_SIZE = 25
+PDF_WORKERS = 4
+
+PAGE_BREAK = '<div style="page-break-after: always;"></div>'
+
+_compiled_templates = {}
+
+
+class CompiledTemplate:
+    """A Document Template's content compiled to Jinja, with the variables it references."""
+    
+    def __init__(self, name, content, css_styles=None, javascript_code=None):
+        from jinja2 import meta
+        
+        jenv = frappe.get_jenv()
+        self.name = name
+        self.template = jenv.from_string(content or "")
+        self.variables = frozenset(meta.find_undeclared_variables(jenv.parse(content or "")))
+        self.css_styles = css_styles
+        self.javascript_code = javascript_code
+    
+    def render(self, context):
+        """Render the template, wrapped with its CSS and JavaScript."""
+        content = self.template.render(context)
+        
+        if self.css_styles:
+            content = f"<style>{self.css_styles}</style>\n{content}"
+        
+        if self.javascript_code:
+            content = f"{content}\n<script>{self.javascript_code}</script>"
+        
+        return content
+
+
+def compile_template(template):
+    """Get the compiled form of a Document Template, compiling it once per version."""
+    key = (template.name, str(template.modified))
+    compiled = _compiled_templates.get(key)
+    if compiled is None:
+        if len(_compiled_templates) >= CACHE_SIZE:
+            _compiled_templates.clear()
+        compiled = _compiled_templates[key] = CompiledTemplate(
+            template.name, template.template_content, template.css_styles, template.javascript_code
+        )
+    return compiled
+
+
+def validate_template_syntax(content):
+    """Throw if a template's content is not valid Jinja."""
+    from jinja2 import TemplateSyntaxError
+    
+    try:
+        frappe.get_jenv().parse(content or "")
+    except TemplateSyntaxError as e:
+        frappe.throw(_("Template syntax error on line {0}: {1}").format(e.lineno, e.message))
+
+
+def get_system_variables():
+    """Get the variables every template can use besides document fields."""
+    return {
+        "current_date": today(),
+        "current_time": now(),
+        "current_user": frappe.session.user,
+        "company": frappe.defaults.get_user_default("Company")
+    }
+
+
+def get_documents_context(doctype, names, variables):
+    """Fetch the fields a template references for many documents.
+    
+    Returns ``{name: row}`` in the order of ``names``. Referenced child
+    tables are loaded as lists of rows; other variables are ignored.
+    """
+    meta = frappe.get_meta(doctype)
+    table_fields = [df for df in meta.get_table_fields() if df.fieldname in variables]
+    table_fieldnames = {df.fieldname for df in table_fields}
+    fields = ["name"] + sorted(
+        variable for variable in variables
+        if variable != "name" and variable not in table_fieldnames
+        and (variable in default_fields or meta.has_field(variable))
+    )
+    
+    rows = {
+        row.name: row
+        for row in frappe.get_all(doctype, filters={"name": ["in", list(names)]}, fields=fields)
+    }
+    for row in rows.values():
+        for df in table_fields:
+            row[df.fieldname] = []
+    
+    for df in table_fields:
+        for child in frappe.get_all(df.options,
+            filters={"parenttype": doctype, "parentfield": df.fieldname, "parent": ["in", list(rows)]},
+            fields=["*"],
+            order_by="idx asc"
+        ):
+            rows[child.parent][df.fieldname].append(child)
+    
+    return {name: rows[name] for name in names if name in rows}
+
+
+def render_documents(template, doctype, names):
+    """Render a template for many documents.
+    
+    Returns ``(pages, errors)``: the HTML of each rendered document in
+    order and a ``{name: error}`` map of those that failed or don't exist.
+    """
+    compiled = compile_template(template)
+    context = get_documents_context(doctype, names, compiled.variables)
+    system_variables = get_system_variables()
+    
+    pages = []
+    errors = {}
+    for name in names:
+        row = context.get(name)
+        if row is None:
+            errors[name] = _("{0} {1} not found").format(doctype, name)
+            continue
+        try:
+            pages.append(compiled.render({**row, **system_variables}))
+        except Exception as e:
+            errors[name] = cstr(e) or type(e).__name__
+    return pages, errors
+
+
+def get_pdf_options(template):
+    """Get the wkhtmltopdf page options of a template."""
+    return {
+        "page-size": template.page_size or "A4",
+        "orientation": template.orientation or "Portrait"
+    }
+
+
+def start_documents_pdf(template, doctype, names):
+    """Queue the merged PDF of a template rendered for many documents."""
+    digest = hashlib.sha1("\n".join(names).encode()).hexdigest()[:12]
+    frappe.enqueue(
+        "easygo_education.administration_comms.document_rendering.build_documents_pdf",
+        queue="long",
+        job_id=f"document_template_pdf::{template}::{doctype}::{digest}",
+        deduplicate=True,
+        template=template,
+        doctype=doctype,
+        names=names,
+        user=frappe.session.user,
+        enqueue_after_commit=True
+    )
+
+
+def build_documents_pdf(template, doctype, names, user):
+    """Render a template for many documents into one PDF File and notify the user."""
+    template = frappe.get_doc("Document Template", template)
+    pages, errors = render_documents(template, doctype, names)
+    
+    file_url = None
+    if pages:
+        parts = [PAGE_BREAK.join(pages[i:i + PART_SIZE]) for i in range(0, len(pages), PART_SIZE)]
+        pdf = merge_pdfs(convert_parts(parts, get_pdf_options(template)))
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": f"{template.template_name}-{doctype}-{now()[:19]}.pdf".replace(" ", "_").replace(":", "-"),
+            "attached_to_doctype": "Document Template",
+            "attached_to_name": template.name,
+            "is_private": 1,
+            "content": pdf
+        })
+        file_doc.save(ignore_permissions=True)
+        file_url = file_doc.file_url
+    
+    if errors:
+        frappe.log_error(
+            "\n".join(f"{name}: {error}" for name, error in errors.items()),
+            "Document Template Batch"
+        )
+    
+    publish(DOCUMENTS_EVENT, [user], {
+        "template": template.name,
+        "doctype": doctype,
+        "file_url": file_url,
+        "rendered": len(pages),
+        "failed": len(errors)
+    })
+    frappe.db.commit()
+    return file_url
+
+
+def convert_parts(parts, options):
+    """Convert HTML parts to PDFs in a thread pool, keeping their order."""
+    site = frappe.local.site
+    sites_path = frappe.local.sites_path
+    
+    if len(parts) == 1:
+        from frappe.utils.pdf import get_pdf
+        
+        return [get_pdf(parts[0], options)]
+    
+    with ThreadPoolExecutor(max_workers=PDF_WORKERS) as pool:
+        return list(pool.map(lambda html: convert_part(site, sites_path, html, options), parts))
+
+
+def convert_part(site, sites_path, html, options):
+    """Convert one HTML part to PDF in a worker thread with its own site connection."""
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+    try:
+        from frappe.utils.pdf import get_pdf
+        
+        return get_pdf(html, dict(options))
+    finally:
+        frappe.destroy()
+
+
+def merge_pdfs(pdfs):
+    """Merge PDFs into one, in order."""
+    from pypdf import PdfReader, PdfWriter
+    
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(PdfReader(io.BytesIO(pdf)))
+    
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
@@ -0,0 +1,215 @@
+"""Portal message threads served from the participant index.
+
+Thread membership lives in the indexed ``Message Thread Participant``
+rows. Each row also carries the user's unread count for the thread and a
+copy of the thread's last message date. That way the inbox and the unread
+badge are read from one user's rows instead of scanning threads. Counters
+are incremented for the other participants when a message is inserted
+and reset or decremented when the user reads. A user's total unread count
+is cached in Redis and, with their cached teacher dashboard, dropped
+whenever one of their counters changes.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import cint, now
+
+from easygo_education.api.portal_cache import invalidate_users
+
+
+UNREAD_CACHE_KEY = "easygo_message_unread"
+
+INBOX_PAGE_LENGTH = 20
+
+
+def is_participant(thread, user):
+    """Check whether a user takes part in a thread."""
+    return bool(frappe.db.exists("Message Thread Participant", {
+        "parenttype": "Message Thread",
+        "parent": thread,
+        "user": user
+    }))
+
+
+def get_thread_participants(thread):
+    """Get the users of a thread."""
+    return frappe.get_all("Message Thread Participant",
+        filters={"parenttype": "Message Thread", "parent": thread},
+        pluck="user"
+    )
+
+
+def record_message(message):
+    """Update thread stats and the other participants' unread counters for a new message.
+    
+    Returns the participants the message is addressed to.
+    """
+    frappe.db.sql("""
+        UPDATE `tabMessage Thread`
+        SET last_message_date = %(sent_date)s,
+            last_message_by = %(sender)s,
+            message_count = IFNULL(message_count, 0) + 1,
+            status = IF(status IN ('Resolved', 'Closed'), 'In Progress', status)
+        WHERE name = %(thread)s
+    """, {"thread": message.thread, "sender": message.sender, "sent_date": message.sent_date})
+    
+    frappe.db.sql("""
+        UPDATE `tabMessage Thread Participant`
+        SET last_message_date = %(sent_date)s,
+            unread_count = IFNULL(unread_count, 0) + IF(user = %(sender)s, 0, 1)
+        WHERE parenttype = 'Message Thread'
+        AND parent = %(thread)s
+    """, {"thread": message.thread, "sender": message.sender, "sent_date": message.sent_date})
+    
+    recipients = [user for user in get_thread_participants(message.thread) if user != message.sender]
+    clear_unread_cache(recipients)
+    invalidate_users("Teacher", recipients + [message.sender])
+    return recipients
+
+
+@frappe.whitelist()
+def mark_thread_read(thread):
+    """Mark every message of a thread as read by the session user."""
+    user = frappe.session.user
+    participant = frappe.db.get_value("Message Thread Participant",
+        {"parenttype": "Message Thread", "parent": thread, "user": user},
+        ["name", "last_read_on"],
+        as_dict=True
+    )
+    if not participant:
+        frappe.throw(_("You are not a participant in this thread"), frappe.PermissionError)
+    
+    read_on = now()
+    insert_read_receipts(thread, user, participant.last_read_on, read_on)
+    frappe.db.set_value("Message Thread Participant", participant.name,
+        {"unread_count": 0, "last_read_on": read_on},
+        update_modified=False
+    )
+    clear_unread_cache([user])
+    invalidate_users("Teacher", [user])
+    return {"unread_count": get_unread_count()}
+
+
+def mark_message_read(message, user):
+    """Count one message as read by a user, unless the thread was already read past it."""
+    frappe.db.sql("""
+        UPDATE `tabMessage Thread Participant`
+        SET unread_count = GREATEST(IFNULL(unread_count, 0) - 1, 0)
+        WHERE parenttype = 'Message Thread'
+        AND parent = %(thread)s
+        AND user = %(user)s
+        AND (last_read_on IS NULL OR last_read_on < %(sent_date)s)
+    """, {"thread": message.thread, "user": user, "sent_date": message.sent_date})
+    clear_unread_cache([user])
+    invalidate_users("Teacher", [user])
+
+
+def insert_read_receipts(thread, user, since, read_on):
+    """Bulk insert read receipts for the messages of a thread a user hasn't read yet."""
+    conditions = ["m.thread = %(thread)s", "m.sender != %(user)s"]
+    if since:
+        conditions.append("m.sent_date > %(since)s")
+    
+    messages = frappe.db.sql(f"""
+        SELECT m.name, COUNT(r.name) as receipts, SUM(r.user = %(user)s) as read_by_user
+        FROM `tabMessage` m
+        LEFT JOIN `tabMessage Read Receipt` r ON r.parent = m.name AND r.parenttype = 'Message'
+        WHERE {' AND '.join(conditions)}
+        GROUP BY m.name
+    """, {"thread": thread, "user": user, "since": since}, as_dict=True)
+    messages = [message for message in messages if not cint(message.read_by_user)]
+    if not messages:
+        return
+    
+    session_user = frappe.session.user
+    frappe.db.bulk_insert(
+        "Message Read Receipt",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "parent", "parenttype", "parentfield", "idx", "user", "read_date", "read_status"
+        ],
+        values=[
+            (
+                frappe.generate_hash(length=10), read_on, read_on, session_user, session_user, 0,
+                message.name, "Message", "read_by", cint(message.receipts) + 1, user, read_on, "Read"
+            )
+            for message in messages
+        ]
+    )
+
+
+@frappe.whitelist()
+def get_unread_count():
+    """Get the session user's total number of unread messages."""
+    user = frappe.session.user
+    count = frappe.cache.hget(UNREAD_CACHE_KEY, user)
+    if count is None:
+        count = cint(frappe.db.sql("""
+            SELECT SUM(unread_count)
+            FROM `tabMessage Thread Participant`
+            WHERE user = %s
+            AND parenttype = 'Message Thread'
+        """, user)[0][0])
+        frappe.cache.hset(UNREAD_CACHE_KEY, user, count)
+    return cint(count)
+
+
+def clear_unread_cache(users):
+    """Drop the cached unread totals of users."""
+    for user in set(users):
+        if user:
+            frappe.cache.hdel(UNREAD_CACHE_KEY, user)
+
+
+@frappe.whitelist()
+def get_inbox(start=0, page_length=INBOX_PAGE_LENGTH, unread_only=0):
+    """Get the session user's threads, most recently active first."""
+    conditions = ["p.user = %(user)s", "p.parenttype = 'Message Thread'"]
+    if cint(unread_only):
+        conditions.append("p.unread_count > 0")
+    
+    return frappe.db.sql(f"""
+        SELECT mt.name, mt.thread_title, mt.thread_type, mt.status, mt.priority,
+               mt.student_context, mt.last_message_by, mt.message_count,
+               p.last_message_date, p.unread_count
+        FROM `tabMessage Thread Participant` p
+        INNER JOIN `tabMessage Thread` mt ON mt.name = p.parent
+        WHERE {' AND '.join(conditions)}
+        ORDER BY p.last_message_date DESC
+        LIMIT %(start)s, %(page_length)s
+    """, {
+        "user": frappe.session.user,
+        "start": cint(start),
+        "page_length": cint(page_length) or INBOX_PAGE_LENGTH
+    }, as_dict=True)
+
+
+@frappe.whitelist()
+def rebuild_message_index():
+    """Recompute every participant's unread count and last message date."""
+    frappe.only_for("System Manager")
+    
+    rebuild_participant_counters()
+    frappe.db.commit()
+    return {"message": _("Message index rebuilt")}
+
+
+def rebuild_participant_counters():
+    """Recompute the participant counters without a permission check."""
+    frappe.db.sql("""
+        UPDATE `tabMessage Thread Participant` p
+        INNER JOIN `tabMessage Thread` mt ON mt.name = p.parent
+        SET p.last_message_date = mt.last_message_date,
+            p.unread_count = (
+                SELECT COUNT(*)
+                FROM `tabMessage` m
+                WHERE m.thread = p.parent
+                AND m.sender != p.user
+                AND NOT EXISTS (
+                    SELECT 1 FROM `tabMessage Read Receipt` r
+                    WHERE r.parent = m.name AND r.parenttype = 'Message' AND r.user = p.user
+                )
+            )
+        WHERE p.parenttype = 'Message Thread'
+    """)
+    frappe.cache.delete_value(UNREAD_CACHE_KEY)
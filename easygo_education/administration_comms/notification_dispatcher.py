@@ -0,0 +1,335 @@
+"""Central notification dispatcher.
+
+Documents queue emails with ``queue_notification`` instead of calling
+``frappe.sendmail`` inline. Queued messages are pushed to Redis after the
+transaction commits and delivered by a background job that:
+
+- coalesces messages sharing a digest key into one email per recipient,
+- renders Jinja templates once per batch,
+- applies the per-minute and per-recipient rate limits from School Settings,
+- bulk-inserts Communication Log rows for everything it sent.
+
+Set ``frappe.flags.sync_notifications`` (or "Send Notifications
+Synchronously" in School Settings) to deliver immediately, e.g. in tests.
+"""
+
+import json
+import time
+from functools import partial
+
+import frappe
+from frappe import _
+from frappe.utils import cint, now
+
+from easygo_education.utils.naming import make_series_names
+
+
+QUEUE_KEY = "easygo_notification_queue"
+RATE_KEY = "easygo_notification_rate"
+RECIPIENT_KEY = "easygo_notification_recipient"
+DISPATCH_JOB_ID = "easygo_notification_dispatch"
+DISPATCH_LOCK_KEY = "easygo_notification_dispatch_lock"
+COMMUNICATION_LOG_SERIES = "COMM-.YYYY.-.MM.-.#####"
+
+DEFAULT_BATCH_SIZE = 500
+
+# Seconds a dispatcher may hold the queue before another one can take over
+DISPATCH_LOCK_TIMEOUT = 300
+
+
+def queue_notification(recipients, subject=None, message=None, template=None, subject_template=None,
+        context=None, reference_doctype=None, reference_name=None, attachments=None, digest=None,
+        log=True):
+    """Queue an email for background delivery.
+    
+    Either pass a rendered ``message`` or a Jinja ``template`` (and optional
+    ``subject_template``) with a ``context`` to render it in the worker.
+    Messages with the same ``digest`` key going to the same single recipient
+    are merged into one email per dispatch batch.
+    """
+    if isinstance(recipients, str):
+        recipients = [r.strip() for r in recipients.replace(";", ",").split(",")]
+    recipients = [r for r in (recipients or []) if r]
+    if not recipients:
+        return
+    
+    payload = {
+        "recipients": recipients,
+        "subject": subject,
+        "message": message,
+        "template": template,
+        "subject_template": subject_template,
+        "context": context,
+        "reference_doctype": reference_doctype,
+        "reference_name": reference_name,
+        "attachments": attachments,
+        "digest": digest,
+        "log": log,
+        "queued_at": time.time()
+    }
+    
+    if is_sync_mode():
+        dispatch([payload])
+        return
+    
+    frappe.db.after_commit.add(partial(push_to_queue, [json.dumps(payload, default=str)]))
+
+
+def is_sync_mode():
+    """Check whether notifications should be delivered inline."""
+    if frappe.flags.sync_notifications or frappe.flags.in_test:
+        return True
+    return cint(frappe.db.get_single_value("School Settings", "notification_sync_mode"))
+
+
+def push_to_queue(serialized):
+    """Append serialized payloads to the Redis queue and make sure a worker drains it."""
+    for item in serialized:
+        frappe.cache.rpush(QUEUE_KEY, item)
+    
+    frappe.enqueue(
+        "easygo_education.administration_comms.notification_dispatcher.dispatch_pending",
+        queue="short",
+        job_id=DISPATCH_JOB_ID,
+        deduplicate=True
+    )
+
+
+def dispatch_pending(batch_size=DEFAULT_BATCH_SIZE):
+    """Drain queued notifications within the per-minute rate limit.
+    
+    Runs as a background job and from the scheduler, which also picks up
+    messages left over by the rate limits. Only one dispatcher drains the
+    queue at a time: reading and trimming it, sending and counting against
+    the rate limit all happen under one lock, and a dispatcher that can't
+    take the lock leaves the queue to the one holding it.
+    """
+    lock = frappe.cache.lock(frappe.cache.make_key(DISPATCH_LOCK_KEY), timeout=DISPATCH_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return
+    
+    try:
+        batch_size = cint(batch_size) or DEFAULT_BATCH_SIZE
+        allowance = get_rate_allowance()
+        if allowance is not None:
+            batch_size = min(batch_size, allowance)
+        if batch_size <= 0:
+            return
+        
+        raw = frappe.cache.lrange(QUEUE_KEY, 0, batch_size - 1)
+        if not raw:
+            return
+        frappe.cache.ltrim(QUEUE_KEY, len(raw), -1)
+        
+        dispatch([json.loads(item) for item in raw])
+        frappe.db.commit()
+    finally:
+        release_lock(lock)
+
+
+def release_lock(lock):
+    """Release the dispatch lock unless it already expired."""
+    try:
+        lock.release()
+    except Exception:
+        # Expired and possibly taken over; the new holder owns the queue now
+        pass
+
+
+def get_rate_allowance():
+    """Get how many emails may still be sent this minute, or None if unlimited."""
+    limit = cint(frappe.db.get_single_value("School Settings", "notification_rate_limit"))
+    if not limit:
+        return None
+    
+    used = cint(frappe.cache.get(get_rate_key()))
+    return max(limit - used, 0)
+
+
+def get_rate_key():
+    """Get the Redis key counting emails sent in the current minute."""
+    return frappe.cache.make_key(f"{RATE_KEY}|{int(time.time() // 60)}")
+
+
+def dispatch(payloads):
+    """Coalesce, render, rate-limit and send a batch of payloads."""
+    deferred = []
+    recipient_limit = cint(frappe.db.get_single_value("School Settings", "notification_recipient_limit"))
+    recipient_counts = {}
+    
+    emails = []
+    for group in coalesce(payloads):
+        recipient = group[0]["recipients"][0] if len(group[0]["recipients"]) == 1 else None
+        if recipient and recipient_limit and not is_sync_mode():
+            sent = recipient_counts.setdefault(recipient, get_recipient_count(recipient))
+            if sent >= recipient_limit:
+                deferred.extend(group)
+                continue
+            recipient_counts[recipient] = sent + 1
+        emails.append(group)
+    
+    renderer = TemplateRenderer()
+    logs = []
+    for group in emails:
+        try:
+            email = build_email(group, renderer)
+            frappe.sendmail(
+                recipients=email["recipients"],
+                subject=email["subject"],
+                message=email["message"],
+                reference_doctype=email["reference_doctype"],
+                reference_name=email["reference_name"],
+                attachments=email["attachments"]
+            )
+        except Exception as e:
+            frappe.log_error(f"Failed to send notification to {group[0]['recipients']}: {str(e)}",
+                "Notification Dispatcher")
+            continue
+        
+        for payload in group:
+            if payload.get("log", True):
+                logs.append((
+                    payload.get("reference_doctype"),
+                    payload.get("reference_name"),
+                    ", ".join(payload["recipients"]),
+                    email["subject"] if len(group) > 1 else renderer.subject(payload)
+                ))
+    
+    record_sent(emails, recipient_counts)
+    insert_communication_logs(logs)
+    
+    if deferred:
+        push_to_queue([json.dumps(payload, default=str) for payload in deferred])
+
+
+def coalesce(payloads):
+    """Group payloads into emails.
+    
+    Payloads with a digest key, a single recipient and no attachments are
+    merged per (recipient, digest); everything else is sent as is.
+    """
+    groups = {}
+    singles = []
+    for payload in payloads:
+        if payload.get("digest") and len(payload["recipients"]) == 1 and not payload.get("attachments"):
+            groups.setdefault((payload["recipients"][0], payload["digest"]), []).append(payload)
+        else:
+            singles.append([payload])
+    return list(groups.values()) + singles
+
+
+def build_email(group, renderer):
+    """Build one email from a group of coalesced payloads."""
+    first = group[0]
+    if len(group) == 1:
+        return {
+            "recipients": first["recipients"],
+            "subject": renderer.subject(first),
+            "message": renderer.message(first),
+            "reference_doctype": first.get("reference_doctype"),
+            "reference_name": first.get("reference_name"),
+            "attachments": first.get("attachments")
+        }
+    
+    sections = []
+    for payload in group:
+        sections.append(f"<h4>{renderer.subject(payload)}</h4>{renderer.message(payload)}")
+    
+    return {
+        "recipients": first["recipients"],
+        "subject": _("{0}: {1} notifications").format(_(first["digest"]), len(group)),
+        "message": "<hr>".join(sections),
+        "reference_doctype": first.get("reference_doctype"),
+        "reference_name": None,
+        "attachments": None
+    }
+
+
+class TemplateRenderer:
+    """Render payload templates, compiling each distinct template once per batch."""
+    
+    def __init__(self):
+        self.compiled = {}
+    
+    def render(self, template, context):
+        """Render a Jinja template string with a context."""
+        if template not in self.compiled:
+            self.compiled[template] = frappe.get_jenv().from_string(template)
+        return self.compiled[template].render(**(context or {}))
+    
+    def subject(self, payload):
+        """Get the rendered subject of a payload."""
+        if payload.get("subject_template"):
+            return self.render(payload["subject_template"], payload.get("context"))
+        return payload.get("subject") or _("Notification")
+    
+    def message(self, payload):
+        """Get the rendered body of a payload."""
+        if payload.get("template"):
+            return self.render(payload["template"], payload.get("context"))
+        return payload.get("message") or ""
+
+
+def get_recipient_key(recipient):
+    """Get the Redis key counting emails to a recipient this hour."""
+    return frappe.cache.make_key(f"{RECIPIENT_KEY}|{recipient}|{int(time.time() // 3600)}")
+
+
+def get_recipient_count(recipient):
+    """Get the number of emails sent to a recipient this hour."""
+    return cint(frappe.cache.get(get_recipient_key(recipient)))
+
+
+def record_sent(emails, recipient_counts):
+    """Update the rate-limit counters after sending."""
+    if not emails:
+        return
+    
+    pipe = frappe.cache.pipeline()
+    pipe.incrby(get_rate_key(), len(emails))
+    pipe.expire(get_rate_key(), 120)
+    for recipient in recipient_counts:
+        pipe.set(get_recipient_key(recipient), recipient_counts[recipient], ex=7200)
+    pipe.execute()
+
+
+def insert_communication_logs(logs, tags=None):
+    """Bulk insert sent-email Communication Log rows.
+    
+    ``logs`` is a list of (reference_doctype, reference_name, recipients,
+    subject) tuples; ``tags`` is set on every row.
+    """
+    if not logs:
+        return
+    
+    timestamp = now()
+    user = frappe.session.user
+    names = make_series_names(COMMUNICATION_LOG_SERIES, len(logs))
+    frappe.db.bulk_insert(
+        "Communication Log",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "naming_series", "communication_type", "reference_doctype", "reference_name",
+            "recipients", "subject", "status", "priority", "sender", "created_by", "sent_date",
+            "retry_count", "tags"
+        ],
+        values=[
+            (
+                name, timestamp, timestamp, user, user, 0,
+                COMMUNICATION_LOG_SERIES, "Email", reference_doctype, reference_name,
+                recipients, subject, "Sent", "Medium", user, user, timestamp, 0, tags
+            )
+            for name, (reference_doctype, reference_name, recipients, subject) in zip(names, logs)
+        ]
+    )
+
+
+@frappe.whitelist()
+def get_dispatch_status():
+    """Get the number of queued notifications and this minute's send count."""
+    frappe.only_for("System Manager")
+    return {
+        "queued": frappe.cache.llen(QUEUE_KEY),
+        "sent_this_minute": cint(frappe.cache.get(get_rate_key())),
+        "rate_limit": cint(frappe.db.get_single_value("School Settings", "notification_rate_limit"))
+    }
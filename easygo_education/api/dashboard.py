@@ -16,13 +16,13 @@ def get_attendance_rate():
         # Get attendance data for current month
         attendance_data = frappe.db.sql("""
             SELECT 
-                COUNT(*) as total_records,
-                SUM(CASE WHEN status IN ('Present', 'Late') THEN 1 ELSE 0 END) as present_count
-            FROM `tabStudent Attendance`
+                SUM(total_count) as total_records,
+                SUM(present_count + late_count) as present_count
+            FROM `tabClass Attendance Rollup`
             WHERE attendance_date >= %s AND attendance_date <= %s
         """, (month_start, today_date), as_dict=True)
         
-        if attendance_data and attendance_data[0].total_records > 0:
+        if attendance_data and attendance_data[0].total_records:
             rate = (attendance_data[0].present_count / attendance_data[0].total_records) * 100
             return f"{rate:.1f}%"
         
@@ -170,9 +170,9 @@ def get_performance_analytics():
         attendance_trend = frappe.db.sql("""
             SELECT 
                 attendance_date,
-                COUNT(*) as total,
-                SUM(CASE WHEN status IN ('Present', 'Late') THEN 1 ELSE 0 END) as present
-            FROM `tabStudent Attendance`
+                SUM(total_count) as total,
+                SUM(present_count + late_count) as present
+            FROM `tabClass Attendance Rollup`
             WHERE attendance_date >= %s
             GROUP BY attendance_date
             ORDER BY attendance_date
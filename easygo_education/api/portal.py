@@ -5,6 +5,8 @@ from frappe import _
 from frappe.utils import getdate, today, add_days
 import json
 
+from easygo_education.api.portal_cache import get_cached_dashboard
+
 
 @frappe.whitelist(allow_guest=False)
 def get_portal_home(role=None):
@@ -23,11 +25,11 @@ def get_portal_home(role=None):
             frappe.throw(_("Access denied. Invalid role."))
     
     if role == "Student":
-        return get_student_dashboard()
+        return get_cached_dashboard(role, get_student_dashboard)
     elif role == "Parent":
-        return get_parent_dashboard()
+        return get_cached_dashboard(role, get_parent_dashboard)
     elif role == "Teacher":
-        return get_teacher_dashboard()
+        return get_cached_dashboard(role, get_teacher_dashboard)
     else:
         frappe.throw(_("Invalid role specified"))
 
@@ -125,17 +127,72 @@ def get_parent_dashboard():
     if not children:
         frappe.throw(_("No student records found for this parent"))
     
+    children_data = build_parent_dashboard(children)
+    
+    return {
+        "children": children_data
+    }
+
+
+def build_parent_dashboard(children):
+    """Build dashboard entries for all children of a guardian in one pass.
+    
+    Alerts, overdue fees and the latest published grade are fetched with one
+    grouped query each, so the number of queries does not grow with the
+    number of children.
+    """
+    if not children:
+        return []
+    
+    student_ids = [child.name for child in children]
+    
+    # Recent absences and late arrivals per child
+    absence_counts = dict(frappe.db.sql("""
+        SELECT student, COUNT(*)
+        FROM `tabStudent Attendance`
+        WHERE student IN %(students)s
+        AND status IN ('Absent', 'Late')
+        AND attendance_date >= %(since)s
+        GROUP BY student
+    """, {"students": student_ids, "since": add_days(today(), -7)}))
+    
+    # Overdue fees per child
+    overdue_fees = {
+        row.student: row for row in frappe.db.sql("""
+            SELECT student, COUNT(*) as count, SUM(outstanding_amount) as amount
+            FROM `tabFee Bill`
+            WHERE student IN %(students)s
+            AND outstanding_amount > 0
+            AND due_date < CURDATE()
+            AND docstatus = 1
+            GROUP BY student
+        """, {"students": student_ids}, as_dict=True)
+    }
+    
+    # Latest published grade per child
+    latest_grades = {}
+    for row in frappe.db.sql("""
+        SELECT student, subject, grade, max_grade
+        FROM (
+            SELECT g.student, g.subject, g.grade, g.max_grade,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY g.student ORDER BY a.assessment_date DESC
+                   ) as row_num
+            FROM `tabGrade` g
+            JOIN `tabAssessment` a ON g.assessment = a.name
+            WHERE g.student IN %(students)s
+            AND g.is_published = 1
+        ) ranked
+        WHERE row_num = 1
+    """, {"students": student_ids}, as_dict=True):
+        student = row.pop("student")
+        latest_grades[student] = row
+    
     children_data = []
     for child in children:
-        # Get alerts for this child
         alerts = []
         
-        # Check for recent absences
-        recent_absences = frappe.db.count("Student Attendance", {
-            "student": child.name,
-            "status": ["in", ["Absent", "Late"]],
-            "attendance_date": [">=", add_days(today(), -7)]
-        })
+        recent_absences = absence_counts.get(child.name, 0)
         if recent_absences > 0:
             alerts.append({
                 "type": "attendance",
@@ -143,43 +200,21 @@ def get_parent_dashboard():
                 "severity": "warning"
             })
         
-        # Check for overdue fees
-        overdue_fees = frappe.db.sql("""
-            SELECT COUNT(*) as count, SUM(outstanding_amount) as amount
-            FROM `tabFee Bill`
-            WHERE student = %s
-            AND outstanding_amount > 0
-            AND due_date < CURDATE()
-            AND docstatus = 1
-        """, child.name, as_dict=True)[0]
-        
-        if overdue_fees.count > 0:
+        fees = overdue_fees.get(child.name)
+        if fees and fees.count > 0:
             alerts.append({
                 "type": "fees",
-                "message": f"{overdue_fees.amount:.2f} MAD overdue",
+                "message": f"{fees.amount:.2f} MAD overdue",
                 "severity": "danger"
             })
         
-        # Get latest grades
-        latest_grade = frappe.db.sql("""
-            SELECT g.subject, g.grade, g.max_grade
-            FROM `tabGrade` g
-            JOIN `tabAssessment` a ON g.assessment = a.name
-            WHERE g.student = %s
-            AND g.is_published = 1
-            ORDER BY a.assessment_date DESC
-            LIMIT 1
-        """, child.name, as_dict=True)
-        
         children_data.append({
             "student_info": child,
             "alerts": alerts,
-            "latest_grade": latest_grade[0] if latest_grade else None
+            "latest_grade": latest_grades.get(child.name)
         })
     
-    return {
-        "children": children_data
-    }
+    return children_data
 
 
 def get_teacher_dashboard():
@@ -231,13 +266,15 @@ def get_teacher_dashboard():
     
     # Get recent messages
     recent_messages = frappe.db.sql("""
-        SELECT mt.subject, mt.participants, m.content, m.creation
-        FROM `tabMessage Thread` mt
-        JOIN `tabMessage` m ON mt.name = m.thread
-        WHERE mt.participants LIKE %s
+        SELECT mt.name as thread, mt.thread_title as subject, p.unread_count, m.sender, m.content, m.creation
+        FROM `tabMessage Thread Participant` p
+        JOIN `tabMessage Thread` mt ON mt.name = p.parent
+        JOIN `tabMessage` m ON m.thread = p.parent
+        WHERE p.user = %s
+        AND p.parenttype = 'Message Thread'
         ORDER BY m.creation DESC
         LIMIT 5
-    """, f"%{user}%", as_dict=True)
+    """, user, as_dict=True)
     
     return {
         "teacher_info": {
@@ -0,0 +1,188 @@
+"""Per-user cache for portal dashboards with event-driven invalidation.
+
+Invalidation runs from document events on the write path, so its errors
+are logged and never abort the save that triggered it.
+"""
+
+from functools import wraps
+
+import frappe
+from frappe import _
+from frappe.utils import today
+
+
+CACHE_PREFIX = "easygo_portal_dashboard"
+STATS_KEY = "easygo_portal_dashboard_stats"
+CACHE_TTL = 6 * 60 * 60
+
+
+def get_cache_key(role, user):
+    """Get the dashboard cache key for a user.
+    
+    The current date is part of the key because dashboards show today's
+    schedule, so entries roll over at midnight without an explicit flush.
+    """
+    return f"{CACHE_PREFIX}|{role}|{user}|{today()}"
+
+
+def get_cached_dashboard(role, builder):
+    """Return the cached dashboard for the session user, building it on a miss."""
+    user = frappe.session.user
+    key = get_cache_key(role, user)
+    
+    dashboard = frappe.cache.get_value(key)
+    if dashboard is not None:
+        record_cache_event("hits")
+        return dashboard
+    
+    record_cache_event("misses")
+    dashboard = builder()
+    frappe.cache.set_value(key, dashboard, expires_in_sec=CACHE_TTL)
+    return dashboard
+
+
+def record_cache_event(event):
+    """Increment the hit or miss counter."""
+    try:
+        frappe.cache.incr(frappe.cache.make_key(f"{STATS_KEY}|{event}"))
+    except Exception:
+        # Counters are informational only and must never break a page load
+        pass
+
+
+@frappe.whitelist()
+def get_dashboard_cache_stats():
+    """Get portal dashboard cache hit/miss counters."""
+    frappe.only_for("System Manager")
+    
+    hits = int(frappe.cache.get(frappe.cache.make_key(f"{STATS_KEY}|hits")) or 0)
+    misses = int(frappe.cache.get(frappe.cache.make_key(f"{STATS_KEY}|misses")) or 0)
+    total = hits + misses
+    
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 1) if total else 0
+    }
+
+
+@frappe.whitelist()
+def reset_dashboard_cache_stats():
+    """Reset portal dashboard cache counters."""
+    frappe.only_for("System Manager")
+    frappe.cache.delete(*[frappe.cache.make_key(f"{STATS_KEY}|{event}") for event in ("hits", "misses")])
+    return {"message": _("Dashboard cache counters reset")}
+
+
+def log_invalidation_errors(fn):
+    """Log errors of a cache invalidation instead of raising them."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), "Portal Cache Invalidation")
+    return wrapper
+
+
+def get_student_users(filters):
+    """Get the portal users (student and guardian) of students matching filters, by student."""
+    return {
+        row.name: [row.user_id, row.guardian_email]
+        for row in frappe.get_all("Student", filters=filters, fields=["name", "user_id", "guardian_email"])
+    }
+
+
+def invalidate_student_users(student_users):
+    """Drop cached dashboards of students and guardians from ``get_student_users``."""
+    invalidate_users("Student", [users[0] for users in student_users.values()])
+    invalidate_users("Parent", [users[1] for users in student_users.values()])
+
+
+@log_invalidation_errors
+def invalidate_users(role, users):
+    """Drop today's cached dashboards for the given users of a role."""
+    keys = [get_cache_key(role, user) for user in set(users) if user]
+    if keys:
+        frappe.cache.delete_value(keys)
+
+
+@log_invalidation_errors
+def invalidate_students(students):
+    """Drop cached dashboards of students and their guardians."""
+    students = [s for s in set(students or []) if s]
+    if not students:
+        return
+    
+    invalidate_student_users(get_student_users({"name": ["in", students]}))
+
+
+@log_invalidation_errors
+def invalidate_classes(school_classes):
+    """Drop cached dashboards of every student (and guardian) in the given classes."""
+    school_classes = [c for c in set(school_classes or []) if c]
+    if not school_classes:
+        return
+    
+    invalidate_student_users(get_student_users({"school_class": ["in", school_classes], "status": "Active"}))
+
+
+@log_invalidation_errors
+def invalidate_teachers(employees):
+    """Drop cached dashboards of the given instructors."""
+    employees = [e for e in set(employees or []) if e]
+    if not employees:
+        return
+    
+    users = frappe.get_all("Employee",
+        filters={"name": ["in", employees]},
+        pluck="user_id"
+    )
+    invalidate_users("Teacher", users)
+
+
+def get_previous_values(doc, fieldname):
+    """Get current and pre-save values of a field so moves invalidate both sides."""
+    values = [doc.get(fieldname)]
+    previous = doc.get_doc_before_save()
+    if previous:
+        values.append(previous.get(fieldname))
+    return values
+
+
+# Document event handlers (wired in hooks.py)
+
+@log_invalidation_errors
+def on_student_record_change(doc, method=None):
+    """Invalidate dashboards for docs linked to a single student.
+    
+    Used for Student Attendance, Homework Submission and Fee Bill.
+    """
+    invalidate_students(get_previous_values(doc, "student"))
+
+
+@log_invalidation_errors
+def on_grade_change(doc, method=None):
+    """Invalidate dashboards when a published grade changes."""
+    previous = doc.get_doc_before_save()
+    was_published = previous.is_published if previous else 0
+    
+    if doc.is_published or was_published:
+        invalidate_students(get_previous_values(doc, "student"))
+    
+    # Teacher pending-grading counts depend on every grade row
+    if doc.assessment:
+        invalidate_teachers([frappe.db.get_value("Assessment", doc.assessment, "instructor")])
+
+
+@log_invalidation_errors
+def on_homework_change(doc, method=None):
+    """Invalidate dashboards of the classes a homework is assigned to."""
+    invalidate_classes(get_previous_values(doc, "school_class"))
+
+
+@log_invalidation_errors
+def on_course_schedule_change(doc, method=None):
+    """Invalidate dashboards of the classes and instructors of a schedule slot."""
+    invalidate_classes(get_previous_values(doc, "school_class"))
+    invalidate_teachers(get_previous_values(doc, "instructor"))
@@ -2,13 +2,19 @@
 
 import frappe
 from frappe import _
-from frappe.utils import getdate, today, add_days
+from frappe.utils import getdate, today, add_days, cint
 import json
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 @frappe.whitelist(allow_guest=False)
-def save_bulk_attendance(attendance_data):
-    """Save bulk attendance records for teachers."""
+def save_bulk_attendance(attendance_data, bulk=0):
+    """Save bulk attendance records for teachers.
+    
+    With ``bulk`` set, records are upserted with grouped queries and guardian
+    notifications are sent by a single background job after commit.
+    """
     user = frappe.session.user
     user_roles = frappe.get_roles(user)
     
@@ -17,6 +23,13 @@ def save_bulk_attendance(attendance_data):
     
     attendance_records = json.loads(attendance_data) if isinstance(attendance_data, str) else attendance_data
     
+    if cint(bulk):
+        from easygo_education.vie_scolaire.doctype.student_attendance.student_attendance import (
+            bulk_upsert_attendance
+        )
+        created_records = bulk_upsert_attendance(attendance_records, marked_by=user)
+        return {"message": _("Attendance saved successfully"), "records": created_records}
+    
     created_records = []
     for record in attendance_records:
         # Check if attendance already exists
@@ -109,11 +122,19 @@ def send_message(message_data):
     
     data = json.loads(message_data) if isinstance(message_data, str) else message_data
     
-    # Create message thread
+    recipient_user = data["recipient"]
+    if data["recipient_type"] == "student":
+        recipient_user = frappe.db.get_value("Student", data["recipient"], "user_id")
+    
+    participants = [{"user": user, "role": "Creator", "notifications_enabled": 0}]
+    if recipient_user and frappe.db.exists("User", recipient_user):
+        participants.append({"user": recipient_user, "role": "Participant", "notifications_enabled": 0})
+    
+    # Create message thread; membership is indexed through its participant rows
     thread = frappe.get_doc({
         "doctype": "Message Thread",
-        "subject": data["subject"],
-        "participants": f"{user},{data['recipient']}",
+        "thread_title": data["subject"],
+        "participants": participants,
         "created_by": user
     })
     thread.insert(ignore_permissions=True)
@@ -135,7 +156,7 @@ def send_message(message_data):
             recipient_email = frappe.db.get_value("Student", data["recipient"], "guardian_email")
         
         if recipient_email:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[recipient_email],
                 subject=f"Message from Teacher: {data['subject']}",
                 message=f"""
@@ -288,7 +309,7 @@ def create_meeting_request(meeting_data):
         student_name = frappe.db.get_value("Student", data["student"], "student_name")
         
         if teacher_email:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[teacher_email],
                 subject=f"Meeting Request - {student_name}",
                 message=f"""
@@ -0,0 +1,104 @@
+"""Realtime push to the portals.
+
+Portal pages subscribe to a few ``easygo_*`` socket.io events instead of
+polling ``get_portal_home``. Each event carries a compact delta: enough
+for the page to update a badge or list, or to decide to refetch. Events
+are published to the personal room of every affected user (a message's
+other participants, a student and their guardian) after the transaction
+commits, so a rolled back change is never announced. Publishing runs on
+the write path of attendance and grades, so its errors are logged and
+never abort the save.
+"""
+
+from functools import wraps
+
+import frappe
+from frappe.utils import strip_html
+
+from easygo_education.api import portal_cache
+
+
+MESSAGE_EVENT = "easygo_message"
+ATTENDANCE_EVENT = "easygo_attendance"
+GRADE_EVENT = "easygo_grade"
+DOCUMENTS_EVENT = "easygo_documents"
+
+PREVIEW_LENGTH = 140
+
+
+def log_publish_errors(fn):
+    """Log errors of a realtime push instead of raising them."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), "Portal Realtime")
+    return wrapper
+
+
+def publish(event, users, data):
+    """Publish an event to the personal rooms of users."""
+    for user in set(users):
+        if user and user != "Guest":
+            frappe.publish_realtime(event, data, user=user, after_commit=True)
+
+
+def get_student_users(students):
+    """Get the portal users (student and guardian) of each student."""
+    students = [student for student in set(students) if student]
+    if not students:
+        return {}
+    
+    return portal_cache.get_student_users({"name": ["in", students]})
+
+
+def get_message_data(thread, message, sender, sent_date, content):
+    """Build a new-message event."""
+    return {
+        "thread": thread,
+        "message": message,
+        "sender": sender,
+        "sent_date": str(sent_date),
+        "preview": strip_html(content or "")[:PREVIEW_LENGTH]
+    }
+
+
+@log_publish_errors
+def publish_message(message, recipients):
+    """Push a new message to the other participants of its thread."""
+    publish(MESSAGE_EVENT, recipients, get_message_data(
+        message.thread, message.name, message.sender, message.sent_date, message.content
+    ))
+
+
+@log_publish_errors
+def publish_attendance(records):
+    """Push marked attendance to the students and guardians concerned.
+    
+    ``records`` are Student Attendance documents or rows with name,
+    student, student_name, attendance_date and status.
+    """
+    users = get_student_users([record.get("student") for record in records])
+    for record in records:
+        publish(ATTENDANCE_EVENT, users.get(record.get("student"), []), {
+            "attendance": record.get("name"),
+            "student": record.get("student"),
+            "student_name": record.get("student_name"),
+            "attendance_date": str(record.get("attendance_date")),
+            "status": record.get("status")
+        })
+
+
+@log_publish_errors
+def publish_grade(grade):
+    """Push a published grade to the student and guardian."""
+    publish(GRADE_EVENT, get_student_users([grade.student]).get(grade.student, []), {
+        "grade": grade.name,
+        "student": grade.student,
+        "subject": grade.subject,
+        "assessment": grade.assessment,
+        "grade_value": grade.grade,
+        "max_grade": grade.max_grade,
+        "letter_grade": grade.letter_grade
+    })
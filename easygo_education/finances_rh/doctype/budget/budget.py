@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, date_diff
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Budget(Document):
     """Budget management for school financial planning."""
@@ -90,7 +92,7 @@ class Budget(Document):
         approvers = self.get_budget_approvers()
         
         if approvers:
-            frappe.sendmail(
+            queue_notification(
                 recipients=approvers,
                 subject=_("Budget Approval Required - {0}").format(self.budget_name),
                 message=self.get_approval_request_message(),
@@ -179,7 +181,7 @@ class Budget(Document):
             if manager:
                 manager_user = frappe.db.get_value("Employee", manager, "user_id")
                 if manager_user:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[manager_user],
                         subject=_("Budget Activated - {0}").format(self.budget_name),
                         message=self.get_activation_message(),
@@ -264,7 +266,7 @@ class Budget(Document):
     def send_rejection_notification(self, reason):
         """Send budget rejection notification."""
         if self.created_by:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.created_by],
                 subject=_("Budget Rejected - {0}").format(self.budget_name),
                 message=self.get_rejection_message(reason),
@@ -364,7 +366,7 @@ class Budget(Document):
         recipients = self.get_budget_approvers()
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Budget Alert - {0}% Utilization").format(int(current_utilization)),
                 message=self.get_budget_alert_message(threshold, current_utilization),
@@ -438,7 +440,7 @@ class Budget(Document):
         recipients = self.get_budget_approvers()
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Budget Revised - {0}").format(self.budget_name),
                 message=self.get_revision_message(reason),
@@ -493,7 +495,7 @@ class Budget(Document):
         recipients = self.get_budget_approvers()
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Budget Closed - {0}").format(self.budget_name),
                 message=self.get_closure_message(reason),
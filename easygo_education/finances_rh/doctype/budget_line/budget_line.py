@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class BudgetLine(Document):
     """Budget Line management."""
@@ -180,7 +182,7 @@ class BudgetLine(Document):
             subject = _("Budget Alert ({0}): {1}").format(alert_type, self.budget_line_name)
             email_message = self.get_alert_message(alert_type, message)
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[budget_manager],
                 subject=subject,
                 message=email_message,
@@ -277,7 +279,7 @@ class BudgetLine(Document):
         budget_manager = frappe.db.get_single_value("School Settings", "budget_manager")
         
         if budget_manager:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[budget_manager],
                 subject=_("Budget Line Frozen: {0}").format(self.budget_line_name),
                 message=_("""
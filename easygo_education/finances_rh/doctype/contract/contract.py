@@ -3,6 +3,8 @@ from frappe.model.document import Document
 from frappe.utils import nowdate, add_days, getdate, date_diff
 from frappe import _
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Contract(Document):
     def validate(self):
@@ -73,7 +75,7 @@ class Contract(Document):
         """Send contract notification to employee"""
         employee_email = frappe.db.get_value("Employee", self.employee, "user_id")
         if employee_email:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[employee_email],
                 subject=f"Contract {self.status}: {self.name}",
                 message=f"""
@@ -213,7 +215,7 @@ def check_contract_expiry_daily():
                 days_remaining = date_diff(contract.end_date, nowdate())
                 contract_list += f"<li>{contract.employee_name} ({contract.position}) - Expires in {days_remaining} days</li>"
                 
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipient_emails,
                 subject="Contracts Expiring Soon",
                 message=f"""
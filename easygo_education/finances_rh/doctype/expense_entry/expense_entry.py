@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class ExpenseEntry(Document):
     """Expense Entry management."""
@@ -205,7 +207,7 @@ class ExpenseEntry(Document):
         approver = self.get_approver()
         
         if approver:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[approver],
                 subject=_("Expense Approval Required: {0}").format(self.expense_title),
                 message=self.get_approval_message(),
@@ -219,7 +221,7 @@ class ExpenseEntry(Document):
             subject = _("Expense {0}: {1}").format(action.title(), self.expense_title)
             message = self.get_status_message(action, reason)
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.requested_by],
                 subject=subject,
                 message=message,
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, add_days, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class FeeBill(Document):
     """Fee Bill doctype controller with business rules."""
@@ -117,7 +119,7 @@ class FeeBill(Document):
         try:
             school_name = frappe.db.get_single_value("School Settings", "school_name") or "School"
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.guardian_email],
                 subject=_("Fee Bill Generated - {0}").format(self.student_name),
                 message=_("""
@@ -0,0 +1 @@
+# Fee Bill Run
@@ -0,0 +1,281 @@
+"""Fee Bill Run doctype controller.
+
+A Fee Bill Run generates the draft fee bills of a Fee Structure in the
+background. Students are processed in chunks ordered by name; after each
+chunk the counters and the last processed student are committed, so a run
+that fails can be resumed from its checkpoint without redoing earlier
+chunks.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, flt, getdate, now
+
+from easygo_education.utils.naming import make_series_names
+
+
+CHUNK_SIZE = 200
+
+
+class FeeBillRun(Document):
+    """Fee Bill Run doctype controller."""
+    
+    @frappe.whitelist()
+    def resume(self):
+        """Resume a failed or interrupted run from its checkpoint."""
+        if self.status == "Completed":
+            frappe.throw(_("Fee Bill Run {0} is already completed").format(self.name))
+        
+        self.db_set("status", "Queued")
+        enqueue_run(self.name)
+        return {"message": _("Fee Bill Run {0} resumed after {1}").format(self.name, self.last_student or _("the start"))}
+
+
+def start_fee_bill_run(fee_structure):
+    """Create a run for a fee structure and process it in the background.
+    
+    Returns the existing run if one is already queued or running.
+    """
+    active = frappe.db.get_value("Fee Bill Run",
+        {"fee_structure": fee_structure, "status": ["in", ["Queued", "Running"]]},
+        "name"
+    )
+    if active:
+        return active
+    
+    run = frappe.get_doc({
+        "doctype": "Fee Bill Run",
+        "fee_structure": fee_structure,
+        "academic_year": frappe.db.get_value("Fee Structure", fee_structure, "academic_year"),
+        "status": "Queued"
+    })
+    run.insert(ignore_permissions=True)
+    enqueue_run(run.name)
+    return run.name
+
+
+def enqueue_run(run_name):
+    """Queue a run for processing once the current transaction commits."""
+    frappe.enqueue(
+        "easygo_education.finances_rh.doctype.fee_bill_run.fee_bill_run.process_fee_bill_run",
+        queue="long",
+        timeout=3600,
+        job_id=f"fee_bill_run::{run_name}",
+        deduplicate=True,
+        run_name=run_name,
+        enqueue_after_commit=True
+    )
+
+
+def process_fee_bill_run(run_name):
+    """Generate the bills of a run chunk by chunk, committing a checkpoint after each."""
+    run = frappe.get_doc("Fee Bill Run", run_name)
+    if run.status == "Completed":
+        return
+    
+    structure = frappe.get_doc("Fee Structure", run.fee_structure)
+    run.db_set({
+        "status": "Running",
+        "started_on": run.started_on or now(),
+        "total_students": count_applicable_students(structure),
+        "error_log": None
+    })
+    frappe.db.commit()
+    
+    # Built once and reused for every bill in the run
+    fee_items = build_fee_items(structure)
+    
+    while True:
+        students = get_student_chunk(structure, run.last_student, CHUNK_SIZE)
+        if not students:
+            break
+        
+        try:
+            result = generate_bills(structure, students, fee_items)
+        except Exception:
+            frappe.db.rollback()
+            run.db_set({"status": "Failed", "error_log": frappe.get_traceback()})
+            frappe.db.commit()
+            frappe.log_error(f"Fee Bill Run {run_name} failed after {run.last_student or 'start'}", "Fee Bill Run")
+            return
+        
+        run.db_set({
+            "processed_students": cint(run.processed_students) + len(students),
+            "created_count": cint(run.created_count) + result["created"],
+            "updated_count": cint(run.updated_count) + result["updated"],
+            "skipped_count": cint(run.skipped_count) + result["skipped"],
+            "last_student": students[-1].name
+        })
+        frappe.db.commit()
+    
+    run.db_set({"status": "Completed", "completed_on": now()})
+    frappe.db.commit()
+
+
+def get_student_filters(structure):
+    """Get the SQL conditions selecting a fee structure's students."""
+    conditions = ["status = 'Active'", "academic_year = %(academic_year)s"]
+    values = {"academic_year": structure.academic_year}
+    if structure.program:
+        conditions.append("program = %(program)s")
+        values["program"] = structure.program
+    return conditions, values
+
+
+def count_applicable_students(structure):
+    """Count the students a fee structure applies to."""
+    conditions, values = get_student_filters(structure)
+    return cint(frappe.db.sql(f"""
+        SELECT COUNT(*) FROM `tabStudent` WHERE {' AND '.join(conditions)}
+    """, values)[0][0])
+
+
+def get_student_chunk(structure, after, limit):
+    """Get the next chunk of applicable students after the checkpoint."""
+    conditions, values = get_student_filters(structure)
+    if after:
+        conditions.append("name > %(after)s")
+        values["after"] = after
+    values["limit"] = cint(limit)
+    
+    return frappe.db.sql(f"""
+        SELECT name, student_name, school_class, massar_code,
+               guardian_name, guardian_phone, guardian_email
+        FROM `tabStudent`
+        WHERE {' AND '.join(conditions)}
+        ORDER BY name
+        LIMIT %(limit)s
+    """, values, as_dict=True)
+
+
+def build_fee_items(structure):
+    """Build the fee item rows of a structure's bills once per run."""
+    items = []
+    for component in structure.components:
+        amount = flt(component.amount)
+        items.append(frappe._dict({
+            "fee_type": component.get("fee_type") or component.component_name,
+            "description": component.description,
+            "amount": amount,
+            "quantity": 1,
+            "total_amount": amount
+        }))
+    return items
+
+
+def generate_bills(structure, students, fee_items):
+    """Create or refresh the draft bills of a chunk of students.
+    
+    New bills and their items are bulk inserted. Existing draft bills get
+    the structure's current items and totals; submitted bills are skipped.
+    Returns created, updated and skipped counts.
+    """
+    existing = {
+        row.student: row for row in frappe.db.sql("""
+            SELECT name, student, docstatus, paid_amount
+            FROM `tabFee Bill`
+            WHERE fee_structure = %(fee_structure)s
+            AND academic_year = %(academic_year)s
+            AND student IN %(students)s
+            AND docstatus < 2
+        """, {
+            "fee_structure": structure.name,
+            "academic_year": structure.academic_year,
+            "students": [student.name for student in students]
+        }, as_dict=True)
+    }
+    
+    total_amount = sum(item.amount for item in fee_items)
+    new_students = [student for student in students if student.name not in existing]
+    drafts = [bill for bill in existing.values() if bill.docstatus == 0]
+    skipped = len(existing) - len(drafts)
+    
+    if new_students:
+        insert_bills(structure, new_students, fee_items, total_amount)
+    
+    if drafts:
+        refresh_draft_bills(drafts, fee_items, total_amount)
+    
+    return {"created": len(new_students), "updated": len(drafts), "skipped": skipped}
+
+
+def insert_bills(structure, students, fee_items, total_amount):
+    """Bulk insert draft bills, mirroring what FeeBill.validate would set."""
+    meta = frappe.get_meta("Fee Bill")
+    naming_series = (meta.get_field("naming_series").options or "").split("\n")[0]
+    names = make_series_names(naming_series, len(students))
+    
+    posting_date = getdate()
+    payment_terms = frappe.db.get_single_value("Finance Settings", "default_payment_terms") or 30
+    due_date = add_days(posting_date, payment_terms)
+    timestamp = now()
+    user = frappe.session.user
+    
+    frappe.db.bulk_insert(
+        "Fee Bill",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus", "naming_series",
+            "student", "student_name", "school_class", "massar_code", "academic_year",
+            "posting_date", "due_date", "status", "payment_status", "fee_structure",
+            "total_amount", "paid_amount", "outstanding_amount",
+            "guardian_name", "guardian_phone", "guardian_email"
+        ],
+        values=[
+            (
+                name, timestamp, timestamp, user, user, 0, naming_series,
+                student.name, student.student_name, student.school_class, student.massar_code,
+                structure.academic_year, posting_date, due_date, "Draft", "Draft", structure.name,
+                total_amount, 0, total_amount,
+                student.guardian_name, student.guardian_phone, student.guardian_email
+            )
+            for name, student in zip(names, students)
+        ]
+    )
+    insert_fee_items(names, fee_items, timestamp, user)
+
+
+def refresh_draft_bills(bills, fee_items, total_amount):
+    """Replace the items and totals of existing draft bills."""
+    names = [bill.name for bill in bills]
+    item_doctype = frappe.get_meta("Fee Bill").get_field("fee_items").options
+    timestamp = now()
+    
+    frappe.db.sql(f"""
+        DELETE FROM `tab{item_doctype}`
+        WHERE parenttype = 'Fee Bill' AND parentfield = 'fee_items' AND parent IN %(names)s
+    """, {"names": names})
+    insert_fee_items(names, fee_items, timestamp, frappe.session.user)
+    
+    frappe.db.sql("""
+        UPDATE `tabFee Bill`
+        SET total_amount = %(total)s,
+            outstanding_amount = %(total)s - IFNULL(paid_amount, 0),
+            modified = %(modified)s, modified_by = %(user)s
+        WHERE name IN %(names)s
+    """, {"total": total_amount, "modified": timestamp, "user": frappe.session.user, "names": names})
+
+
+def insert_fee_items(bill_names, fee_items, timestamp, user):
+    """Bulk insert the same fee item rows under many bills."""
+    if not fee_items:
+        return
+    
+    item_doctype = frappe.get_meta("Fee Bill").get_field("fee_items").options
+    frappe.db.bulk_insert(
+        item_doctype,
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "parent", "parenttype", "parentfield", "idx",
+            "fee_type", "description", "amount", "quantity", "total_amount"
+        ],
+        values=[
+            (
+                frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0,
+                bill_name, "Fee Bill", "fee_items", idx,
+                item.fee_type, item.description, item.amount, item.quantity, item.total_amount
+            )
+            for bill_name in bill_names
+            for idx, item in enumerate(fee_items, 1)
+        ]
+    )
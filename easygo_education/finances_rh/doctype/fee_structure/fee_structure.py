@@ -5,6 +5,9 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate, add_months, flt
 
+from easygo_education.finances_rh.doctype.fee_bill_run.fee_bill_run import start_fee_bill_run
+from easygo_education.scolarite.household import get_sibling_counts
+
 
 class FeeStructure(Document):
     """Fee Structure doctype controller."""
@@ -66,16 +69,22 @@ class FeeStructure(Document):
             self.update_related_fee_bills()
     
     def update_related_fee_bills(self):
-        """Update related fee bills when structure becomes active."""
+        """Generate the related fee bills in a background Fee Bill Run."""
         try:
-            # Find students who should use this fee structure
-            students = self.get_applicable_students()
-            
-            for student in students:
-                self.create_or_update_fee_bill(student)
+            start_fee_bill_run(self.name)
         
         except Exception as e:
-            frappe.log_error(f"Failed to update related fee bills: {str(e)}")
+            frappe.log_error(f"Failed to queue fee bill generation: {str(e)}")
+    
+    @frappe.whitelist()
+    def generate_fee_bills(self):
+        """Queue fee bill generation for all applicable students."""
+        frappe.only_for(["System Manager", "Accountant", "Principal"])
+        
+        if not self.is_active:
+            frappe.throw(_("Fee Structure must be active to generate fee bills"))
+        
+        return start_fee_bill_run(self.name)
     
     def get_applicable_students(self):
         """Get students applicable for this fee structure."""
@@ -94,49 +103,62 @@ class FeeStructure(Document):
         
         return students
     
-    def create_or_update_fee_bill(self, student):
-        """Create or update fee bill for student."""
-        try:
-            # Check if fee bill already exists
-            existing_bill = frappe.db.get_value("Fee Bill", {
-                "student": student.name,
-                "academic_year": self.academic_year,
-                "fee_structure": self.name
-            }, "name")
-            
-            if existing_bill:
-                # Update existing bill
-                bill_doc = frappe.get_doc("Fee Bill", existing_bill)
-                bill_doc.fee_structure = self.name
-                bill_doc.save(ignore_permissions=True)
-            else:
-                # Create new bill
-                bill_doc = frappe.get_doc({
-                    "doctype": "Fee Bill",
-                    "student": student.name,
-                    "academic_year": self.academic_year,
-                    "fee_structure": self.name,
-                    "total_amount": self.total_amount,
-                    "outstanding_amount": self.total_amount,
-                    "status": "Unpaid"
-                })
-                
-                # Add fee components
-                for component in self.components:
-                    bill_doc.append("components", {
-                        "component_name": component.component_name,
-                        "amount": component.amount,
-                        "description": component.description
-                    })
-                
-                bill_doc.insert(ignore_permissions=True)
-        
-        except Exception as e:
-            frappe.log_error(f"Failed to create fee bill for student {student.name}: {str(e)}")
-    
     @frappe.whitelist()
     def calculate_student_fee(self, student, discount_percentage=0):
         """Calculate fee for a specific student with discounts."""
+        return self.price_student(student, self.get_pricing_context([student]), discount_percentage)
+    
+    @frappe.whitelist()
+    def calculate_fees(self, students=None, school_class=None, discount_percentage=0):
+        """Calculate the fees of many students in one call.
+        
+        Prices the given students, the active students of a class, or by
+        default every student the structure applies to.
+        """
+        if isinstance(students, str):
+            students = frappe.parse_json(students)
+        
+        if not students:
+            if school_class:
+                students = frappe.get_all("Student",
+                    filters={"school_class": school_class, "status": "Active", "academic_year": self.academic_year},
+                    pluck="name"
+                )
+            else:
+                students = [student.name for student in self.get_applicable_students()]
+        
+        context = self.get_pricing_context(students)
+        fees = []
+        for student in students:
+            fee = self.price_student(student, context, discount_percentage)
+            fee["student"] = student
+            fees.append(fee)
+        
+        return {
+            "fees": fees,
+            "total_amount": sum(fee["final_amount"] for fee in fees)
+        }
+    
+    def get_pricing_context(self, students):
+        """Prefetch what discounts depend on for a set of students."""
+        context = frappe._dict({"sibling_counts": {}, "average_grades": {}})
+        
+        if self.sibling_discount:
+            context.sibling_counts = get_sibling_counts(students, self.academic_year)
+        
+        if any(rule.criteria == "Academic Performance" for rule in self.discount_rules or []):
+            context.average_grades = dict(frappe.db.sql("""
+                SELECT student, AVG(percentage)
+                FROM `tabGrade`
+                WHERE student IN %(students)s
+                    AND academic_year = %(academic_year)s
+                GROUP BY student
+            """, {"students": list(students), "academic_year": self.academic_year}))
+        
+        return context
+    
+    def price_student(self, student, context, discount_percentage=0):
+        """Price one student using a prefetched pricing context."""
         base_amount = self.total_amount
         discount_amount = 0
         
@@ -144,20 +166,14 @@ class FeeStructure(Document):
         if discount_percentage:
             discount_amount += (flt(discount_percentage) / 100) * base_amount
         
-        # Apply sibling discount
-        if self.sibling_discount:
-            siblings_count = frappe.db.count("Student", {
-                "status": "Active",
-                "academic_year": self.academic_year
-            })
-            
-            if siblings_count > 1:
-                discount_amount += (flt(self.sibling_discount) / 100) * base_amount
+        # Apply sibling discount when another active student shares the household
+        if self.sibling_discount and context.sibling_counts.get(student):
+            discount_amount += (flt(self.sibling_discount) / 100) * base_amount
         
         # Apply discount rules
         if self.discount_rules:
             for rule in self.discount_rules:
-                if self.check_discount_eligibility(student, rule):
+                if self.check_discount_eligibility(student, rule, context.average_grades.get(student)):
                     if rule.discount_type == "Percentage":
                         discount_amount += (flt(rule.discount_value) / 100) * base_amount
                     else:  # Fixed Amount
@@ -178,20 +194,22 @@ class FeeStructure(Document):
             ]
         }
     
-    def check_discount_eligibility(self, student, discount_rule):
+    def check_discount_eligibility(self, student, discount_rule, average_grade=None):
         """Check if student is eligible for discount rule."""
         try:
             if discount_rule.criteria == "Academic Performance":
                 # Check student's average grade
-                avg_grade = frappe.db.sql("""
-                    SELECT AVG(percentage) 
-                    FROM `tabGrade` 
-                    WHERE student = %s 
-                        AND academic_year = %s
-                """, (student, self.academic_year))
+                if average_grade is None:
+                    avg_grade = frappe.db.sql("""
+                        SELECT AVG(percentage) 
+                        FROM `tabGrade` 
+                        WHERE student = %s 
+                            AND academic_year = %s
+                    """, (student, self.academic_year))
+                    average_grade = avg_grade[0][0] if avg_grade else None
                 
-                if avg_grade and avg_grade[0][0]:
-                    return avg_grade[0][0] >= flt(discount_rule.threshold_value)
+                if average_grade:
+                    return average_grade >= flt(discount_rule.threshold_value)
             
             elif discount_rule.criteria == "Financial Need":
                 # This would require additional implementation based on family income
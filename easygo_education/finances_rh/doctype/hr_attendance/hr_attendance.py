@@ -4,6 +4,8 @@ from frappe.utils import nowdate, get_datetime, time_diff_in_hours, flt
 from frappe import _
 from datetime import datetime, timedelta
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class HRAttendance(Document):
     def validate(self):
@@ -131,7 +133,7 @@ class HRAttendance(Document):
                 if self.remarks:
                     message += f"<p><strong>Remarks:</strong> {self.remarks}</p>"
                     
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=subject,
                     message=message,
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, add_months, add_days, flt, cint
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class InstallmentPlan(Document):
     """Installment Plan management."""
@@ -132,7 +134,7 @@ class InstallmentPlan(Document):
             guardian = frappe.get_doc("Guardian", guardian_link.guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Installment Plan Approved - {0}").format(self.student_name),
                     message=self.get_installment_plan_message(),
@@ -264,7 +266,7 @@ class InstallmentPlan(Document):
             guardian = frappe.get_doc("Guardian", guardian_link.guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Installment Plan Completed - {0}").format(self.student_name),
                     message=self.get_completion_message(),
@@ -346,7 +348,7 @@ class InstallmentPlan(Document):
             guardian = frappe.get_doc("Guardian", guardian_link.guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Payment Reminder - {0}").format(self.student_name),
                     message=self.get_payment_reminder_message(installments_to_remind),
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, date_diff, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class LeaveApplication(Document):
     """Employee leave application management."""
@@ -200,7 +202,7 @@ class LeaveApplication(Document):
     
     def send_approver_notification(self):
         """Send notification to leave approver."""
-        frappe.sendmail(
+        queue_notification(
             recipients=[self.leave_approver],
             subject=_("Leave Application for Approval - {0}").format(self.employee_name),
             message=self.get_approver_notification_message(),
@@ -253,7 +255,7 @@ class LeaveApplication(Document):
         if hr_users:
             recipients = [user.parent for user in hr_users]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("New Leave Application - {0}").format(self.employee_name),
                 message=self.get_hr_notification_message(),
@@ -305,7 +307,7 @@ class LeaveApplication(Document):
         employee = frappe.get_doc("Employee", self.employee)
         
         if employee.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[employee.user_id],
                 subject=_("Leave Application Submitted"),
                 message=self.get_employee_confirmation_message(),
@@ -386,7 +388,7 @@ class LeaveApplication(Document):
         # Notify employee
         employee = frappe.get_doc("Employee", self.employee)
         if employee.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[employee.user_id],
                 subject=_("Leave Application Approved"),
                 message=self.get_approval_notification_message(),
@@ -402,7 +404,7 @@ class LeaveApplication(Document):
         
         if hr_users:
             recipients = [user.parent for user in hr_users]
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Leave Approved - {0}").format(self.employee_name),
                 message=self.get_hr_approval_message(),
@@ -508,7 +510,7 @@ class LeaveApplication(Document):
         employee = frappe.get_doc("Employee", self.employee)
         
         if employee.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[employee.user_id],
                 subject=_("Leave Application Rejected"),
                 message=self.get_rejection_notification_message(reason),
@@ -582,7 +584,7 @@ class LeaveApplication(Document):
         recipients.extend([user.parent for user in hr_users])
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=list(set(recipients)),
                 subject=_("Leave Application Cancelled - {0}").format(self.employee_name),
                 message=self.get_cancellation_notification_message(reason),
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class PaymentEntry(Document):
     """Payment Entry doctype controller."""
@@ -134,7 +136,7 @@ class PaymentEntry(Document):
                 recipients.append(student_email)
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Payment Confirmation - {0}").format(self.student_name),
                     message=_("Payment of {0} {1} has been received for {2}.\n\nPayment Details:\nAmount: {3}\nDate: {4}\nMethod: {5}\nReference: {6}").format(
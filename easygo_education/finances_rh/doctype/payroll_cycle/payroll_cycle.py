@@ -4,6 +4,8 @@ from frappe.utils import nowdate, getdate, date_diff, flt, cint, add_days
 from frappe import _
 from datetime import datetime, timedelta
 
+from easygo_education.finances_rh.payroll_engine import start_payroll_run
+
 
 class PayrollCycle(Document):
     def validate(self):
@@ -44,7 +46,7 @@ class PayrollCycle(Document):
             self.total_working_days = working_days
             
     def on_submit(self):
-        self.status = "Processing"
+        self.db_set("status", "Processing")
         self.create_salary_slips()
         
     def on_cancel(self):
@@ -72,117 +74,25 @@ class PayrollCycle(Document):
             conditions.append("designation = %s")
             values.append(self.designation)
             
-        employees = frappe.db.sql(f"""
+        # Only employees who joined before payroll end date
+        conditions.append("(date_of_joining IS NULL OR date_of_joining <= %s)")
+        values.append(self.end_date)
+            
+        return frappe.db.sql(f"""
             SELECT name, employee_name, department, designation, date_of_joining
             FROM `tabEmployee`
             WHERE {' AND '.join(conditions)}
             ORDER BY employee_name
         """, values, as_dict=True)
         
-        # Filter employees who joined before payroll end date
-        eligible_employees = []
-        for emp in employees:
-            if emp.date_of_joining <= getdate(self.end_date):
-                eligible_employees.append(emp)
-                
-        return eligible_employees
-        
     @frappe.whitelist()
     def create_salary_slips(self):
-        """Create salary slips for all eligible employees"""
+        """Create salary slips for all eligible employees in the background"""
         if self.status != "Processing":
             frappe.throw(_("Payroll cycle must be in Processing status"))
             
-        employees = self.get_employees()
-        created_count = 0
-        
-        for employee in employees:
-            # Check if salary slip already exists
-            existing = frappe.db.exists("Salary Slip", {
-                "employee": employee.name,
-                "start_date": self.start_date,
-                "end_date": self.end_date,
-                "payroll_cycle": self.name
-            })
-            
-            if not existing:
-                salary_slip = self.create_salary_slip(employee)
-                if salary_slip:
-                    created_count += 1
-                    
-        self.salary_slips_created = created_count
-        self.total_employees = len(employees)
-        self.save()
-        
-        frappe.msgprint(_("Created {0} salary slips").format(created_count))
-        
-    def create_salary_slip(self, employee):
-        """Create individual salary slip"""
-        try:
-            # Get salary structure assignment
-            salary_assignment = frappe.db.get_value("Salary Structure Assignment", {
-                "employee": employee.name,
-                "docstatus": 1
-            }, ["salary_structure", "base"], order_by="from_date desc")
-            
-            if not salary_assignment:
-                frappe.msgprint(_("No salary structure found for {0}").format(employee.employee_name))
-                return None
-                
-            salary_slip = frappe.new_doc("Salary Slip")
-            salary_slip.employee = employee.name
-            salary_slip.employee_name = employee.employee_name
-            salary_slip.start_date = self.start_date
-            salary_slip.end_date = self.end_date
-            salary_slip.salary_structure = salary_assignment[0]
-            salary_slip.payroll_cycle = self.name
-            salary_slip.posting_date = self.payment_date
-            
-            # Calculate attendance and leave days
-            attendance_data = self.get_employee_attendance(employee.name)
-            salary_slip.payment_days = attendance_data["working_days"]
-            salary_slip.leave_without_pay = attendance_data["lwp_days"]
-            
-            salary_slip.insert()
-            return salary_slip
-            
-        except Exception as e:
-            frappe.log_error(f"Error creating salary slip for {employee.name}: {str(e)}")
-            return None
-            
-    def get_employee_attendance(self, employee):
-        """Get employee attendance data for the payroll period"""
-        attendance = frappe.db.sql("""
-            SELECT 
-                COUNT(*) as total_days,
-                SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) as present_days,
-                SUM(CASE WHEN status = 'Absent' THEN 1 ELSE 0 END) as absent_days,
-                SUM(CASE WHEN status = 'Half Day' THEN 0.5 ELSE 0 END) as half_days,
-                SUM(CASE WHEN status = 'On Leave' THEN 1 ELSE 0 END) as leave_days
-            FROM `tabHR Attendance`
-            WHERE employee = %s 
-            AND attendance_date BETWEEN %s AND %s
-            AND docstatus = 1
-        """, (employee, self.start_date, self.end_date), as_dict=True)
-        
-        if attendance:
-            att_data = attendance[0]
-            working_days = att_data.present_days + att_data.half_days
-            
-            # Calculate leave without pay days
-            lwp_days = max(0, self.total_working_days - working_days - att_data.leave_days)
-            
-            return {
-                "working_days": working_days,
-                "lwp_days": lwp_days,
-                "leave_days": att_data.leave_days
-            }
-            
-        return {
-            "working_days": self.total_working_days,
-            "lwp_days": 0,
-            "leave_days": 0
-        }
+        start_payroll_run(self.name)
+        frappe.msgprint(_("Salary slips are being created in the background"), alert=True)
         
     @frappe.whitelist()
     def submit_salary_slips(self):
@@ -214,10 +124,9 @@ class PayrollCycle(Document):
         """Calculate payroll summary totals"""
         summary = frappe.db.sql("""
             SELECT 
-                SUM(gross_pay) as gross_pay,
-                SUM(total_deduction) as total_deduction,
-                SUM(net_pay) as net_pay,
-                SUM(employer_contribution) as employer_contribution
+                SUM(gross_salary) as gross_pay,
+                SUM(total_deductions) as total_deduction,
+                SUM(net_salary) as net_pay
             FROM `tabSalary Slip`
             WHERE payroll_cycle = %s AND docstatus = 1
         """, (self.name,), as_dict=True)
@@ -227,7 +136,6 @@ class PayrollCycle(Document):
             self.gross_pay = data.gross_pay or 0
             self.total_deduction = data.total_deduction or 0
             self.net_pay = data.net_pay or 0
-            self.employer_contribution = data.employer_contribution or 0
             self.total_amount = self.net_pay
             
     def cancel_salary_slips(self):
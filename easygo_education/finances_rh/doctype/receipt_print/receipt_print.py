@@ -5,6 +5,14 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days, format_datetime
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+from easygo_education.finances_rh.receipt_rendering import (
+    ensure_receipt_pdf,
+    get_receipt,
+    get_stored_receipt,
+    queue_receipt_pdf,
+)
+
 
 class ReceiptPrint(Document):
     """Receipt print management for fee payment receipts."""
@@ -199,8 +207,8 @@ class ReceiptPrint(Document):
     
     def send_receipt_notifications(self):
         """Send receipt notifications."""
-        # Send to student/guardian
-        self.send_student_notification()
+        # Send to student/guardian once the PDF is rendered in the background
+        queue_receipt_pdf(self.name, notify=True)
         
         # Send to accounts team
         self.send_accounts_notification()
@@ -209,7 +217,7 @@ class ReceiptPrint(Document):
         if self.contact_number:
             self.send_sms_notification()
     
-    def send_student_notification(self):
+    def send_student_notification(self, attachments=None):
         """Send receipt notification to student/guardian."""
         recipients = []
         
@@ -222,15 +230,35 @@ class ReceiptPrint(Document):
             recipients.append(student_email)
         
         if recipients:
-            frappe.sendmail(
+            if attachments is None:
+                attachments = self.get_receipt_attachments()
+            
+            queue_notification(
                 recipients=recipients,
                 subject=_("Fee Payment Receipt - {0}").format(self.name),
                 message=self.get_student_notification_message(),
                 reference_doctype=self.doctype,
                 reference_name=self.name,
-                attachments=[self.get_receipt_pdf()]
+                attachments=attachments
             )
     
+    def get_receipt_attachments(self):
+        """Get the receipt PDF to attach, from the store or rendered by the email queue at send time."""
+        stored = self.docstatus == 1 and get_stored_receipt(self)
+        if stored:
+            return [{"fid": stored}]
+        
+        if self.print_format:
+            return [{
+                "print_format_attachment": 1,
+                "doctype": self.doctype,
+                "name": self.name,
+                "print_format": self.print_format,
+                "print_letterhead": bool(self.letterhead)
+            }]
+        
+        return None
+    
     def get_student_notification_message(self):
         """Get student notification message."""
         return _("""
@@ -278,7 +306,7 @@ class ReceiptPrint(Document):
         if accounts_users:
             recipients = [user.parent for user in accounts_users]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Fee Payment Received - {0}").format(self.name),
                 message=self.get_accounts_notification_message(),
@@ -365,21 +393,14 @@ class ReceiptPrint(Document):
     
     def get_receipt_pdf(self):
         """Get receipt PDF attachment."""
-        # Generate PDF using print format
-        if self.print_format:
-            pdf = frappe.get_print(
-                self.doctype,
-                self.name,
-                print_format=self.print_format,
-                letterhead=self.letterhead
-            )
-            
-            return {
-                "fname": f"Receipt_{self.receipt_number}.pdf",
-                "fcontent": pdf
-            }
+        if self.docstatus != 1:
+            return None
         
-        return None
+        file_doc = frappe.get_doc("File", ensure_receipt_pdf(get_receipt(self.name)))
+        return {
+            "fname": f"Receipt_{self.receipt_number}.pdf",
+            "fcontent": file_doc.get_content()
+        }
     
     @frappe.whitelist()
     def approve_receipt(self):
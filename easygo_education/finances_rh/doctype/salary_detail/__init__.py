@@ -0,0 +1 @@
+# Salary Detail
@@ -5,6 +5,10 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days, get_first_day, get_last_day
 
+from easygo_education.finances_rh.payroll_engine import get_attendance_summary, get_detail_rows, get_employee_structures, get_leave_days
+from easygo_education.finances_rh.salary_formula import SalaryFormulaError, get_compiled_structure
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class SalarySlip(Document):
     """Employee salary slip management."""
@@ -36,70 +40,45 @@ class SalarySlip(Document):
         """Validate salary structure assignment."""
         if not self.salary_structure:
             # Auto-assign current salary structure
-            current_structure = frappe.db.get_value("Salary Structure Assignment",
-                {"employee": self.employee, "docstatus": 1},
-                "salary_structure",
-                order_by="from_date desc"
-            )
+            payroll_date = getdate()
+            current_structure = get_employee_structures([self.employee], payroll_date, payroll_date).get(self.employee)
             
             if current_structure:
-                self.salary_structure = current_structure
+                self.salary_structure = current_structure.name
             else:
                 frappe.throw(_("No active salary structure found for employee {0}").format(self.employee_name))
     
     def calculate_salary_components(self):
-        """Calculate earnings and deductions."""
+        """Calculate earnings and deductions with the structure's compiled formulas."""
         if not self.salary_structure:
             return
         
-        structure = frappe.get_doc("Salary Structure", self.salary_structure)
+        # Structures rarely change between slips, so reuse the cached document
+        structure = frappe.get_cached_doc("Salary Structure", self.salary_structure)
         
-        # Clear existing components
+        # Formulas may use attendance, so fetch it before evaluating them
+        if not self.working_days:
+            self.set_attendance_details()
+        
+        try:
+            result = get_compiled_structure(structure).evaluate({
+                "working_days": self.working_days,
+                "attendance_days": self.attendance_days,
+                "leave_days": self.leave_days,
+                "absent_days": self.absent_days,
+            })
+        except SalaryFormulaError as e:
+            frappe.throw(_("Salary Structure {0} could not be calculated for {1}: {2}").format(
+                self.salary_structure, self.employee_name or self.employee, str(e)
+            ))
+        
+        self.basic_salary = result.basic_salary
         self.earnings = []
         self.deductions = []
-        
-        # Calculate earnings
-        for earning in structure.earnings:
-            amount = self.calculate_component_amount(earning)
-            if amount > 0:
-                self.append("earnings", {
-                    "salary_component": earning.salary_component,
-                    "amount": amount,
-                    "formula": earning.formula,
-                    "condition": earning.condition
-                })
-        
-        # Calculate deductions
-        for deduction in structure.deductions:
-            amount = self.calculate_component_amount(deduction)
-            if amount > 0:
-                self.append("deductions", {
-                    "salary_component": deduction.salary_component,
-                    "amount": amount,
-                    "formula": deduction.formula,
-                    "condition": deduction.condition
-                })
-    
-    def calculate_component_amount(self, component):
-        """Calculate individual component amount."""
-        # Check condition if specified
-        if component.condition:
-            try:
-                condition_result = eval(component.condition, {"doc": self})
-                if not condition_result:
-                    return 0
-            except:
-                return 0
-        
-        # Calculate amount based on formula
-        if component.formula:
-            try:
-                amount = eval(component.formula, {"doc": self, "basic_salary": self.basic_salary or 0})
-                return flt(amount, 2)
-            except:
-                return flt(component.amount or 0, 2)
-        
-        return flt(component.amount or 0, 2)
+        for row in get_detail_rows(result.earnings):
+            self.append("earnings", row)
+        for row in get_detail_rows(result.deductions):
+            self.append("deductions", row)
     
     def calculate_totals(self):
         """Calculate salary totals."""
@@ -133,39 +112,20 @@ class SalarySlip(Document):
         if not self.payroll_cycle:
             return
         
-        cycle = frappe.get_doc("Payroll Cycle", self.payroll_cycle)
-        
-        # Get attendance records for the period
-        attendance_records = frappe.get_all("Attendance",
-            filters={
-                "employee": self.employee,
-                "attendance_date": ["between", [cycle.start_date, cycle.end_date]]
-            },
-            fields=["status", "attendance_date"]
-        )
-        
-        # Calculate attendance days
-        present_days = len([a for a in attendance_records if a.status == "Present"])
-        absent_days = len([a for a in attendance_records if a.status == "Absent"])
+        cycle = frappe.get_cached_doc("Payroll Cycle", self.payroll_cycle)
         
-        # Get leave days
-        leave_days = frappe.db.sql("""
-            SELECT SUM(total_leave_days) as leave_days
-            FROM `tabLeave Application`
-            WHERE employee = %s
-            AND status = 'Approved'
-            AND from_date <= %s
-            AND to_date >= %s
-        """, (self.employee, cycle.end_date, cycle.start_date))[0][0] or 0
+        # Same grouped queries the payroll run uses for a whole cycle
+        attendance = get_attendance_summary([self.employee], cycle.start_date, cycle.end_date).get(self.employee) or frappe._dict()
+        leave_days = get_leave_days([self.employee], cycle.start_date, cycle.end_date).get(self.employee) or 0
         
         # Calculate working days (excluding weekends and holidays)
         total_days = (getdate(cycle.end_date) - getdate(cycle.start_date)).days + 1
         working_days = total_days - self.get_weekend_holidays(cycle.start_date, cycle.end_date)
         
-        self.attendance_days = present_days
+        self.attendance_days = flt(attendance.attendance_days)
         self.working_days = working_days
         self.leave_days = flt(leave_days)
-        self.absent_days = absent_days
+        self.absent_days = flt(attendance.absent_days)
     
     def get_weekend_holidays(self, start_date, end_date):
         """Calculate weekend and holiday days."""
@@ -205,7 +165,7 @@ class SalarySlip(Document):
         employee = frappe.get_doc("Employee", self.employee)
         
         if employee.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[employee.user_id],
                 subject=_("Salary Slip Generated - {0}").format(self.pay_period),
                 message=self.get_employee_notification_message(),
@@ -267,7 +227,7 @@ class SalarySlip(Document):
         if hr_managers:
             recipients = [user.parent for user in hr_managers]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Salary Slip Processed - {0}").format(self.employee_name),
                 message=self.get_hr_notification_message(),
@@ -326,7 +286,7 @@ class SalarySlip(Document):
         if accounts_managers:
             recipients = [user.parent for user in accounts_managers]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Payment Required - Salary Slip {0}").format(self.name),
                 message=self.get_accounts_notification_message(),
@@ -419,7 +379,7 @@ class SalarySlip(Document):
         if accounts_managers:
             recipients = [user.parent for user in accounts_managers]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Salary Slip Approved - {0}").format(self.employee_name),
                 message=self.get_approval_notification_message(),
@@ -485,7 +445,7 @@ class SalarySlip(Document):
         employee = frappe.get_doc("Employee", self.employee)
         
         if employee.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[employee.user_id],
                 subject=_("Salary Payment Processed - {0}").format(self.pay_period),
                 message=self.get_payment_confirmation_message(),
@@ -5,6 +5,9 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, flt
 
+from easygo_education.finances_rh.salary_formula import CompiledStructure, SalaryFormulaError, get_nominal_record
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class SalaryStructure(Document):
     """Salary Structure management."""
@@ -48,27 +51,16 @@ class SalaryStructure(Document):
                 frappe.throw(_("Overlapping salary structure found: {0}").format(overlapping[0][0]))
     
     def calculate_totals(self):
-        """Calculate total earnings, deductions, and net salary."""
-        total_earnings = flt(self.base_salary)
-        total_deductions = 0
-        
-        # Calculate earnings
-        for earning in self.earnings:
-            if earning.component_type == "Fixed":
-                total_earnings += flt(earning.amount)
-            elif earning.component_type == "Percentage":
-                total_earnings += (flt(self.base_salary) * flt(earning.percentage)) / 100
-        
-        # Calculate deductions
-        for deduction in self.deductions:
-            if deduction.component_type == "Fixed":
-                total_deductions += flt(deduction.amount)
-            elif deduction.component_type == "Percentage":
-                total_deductions += (total_earnings * flt(deduction.percentage)) / 100
+        """Compile the component formulas and value them for a full month's attendance."""
+        try:
+            compiled = CompiledStructure(self.name, self.base_salary, self.earnings, self.deductions)
+            result = compiled.evaluate(get_nominal_record())
+        except SalaryFormulaError as e:
+            frappe.throw(_("Invalid salary component: {0}").format(str(e)))
         
-        self.total_earnings = total_earnings
-        self.total_deductions = total_deductions
-        self.net_salary = total_earnings - total_deductions
+        self.total_earnings = result.gross_salary
+        self.total_deductions = result.total_deductions
+        self.net_salary = result.net_salary
     
     def set_defaults(self):
         """Set default values."""
@@ -216,7 +208,7 @@ class SalaryStructure(Document):
         employee_user = frappe.db.get_value("Employee", self.employee, "user_id")
         
         if employee_user:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[employee_user],
                 subject=_("Salary Structure Approved: {0}").format(self.salary_structure_name),
                 message=self.get_approval_message(),
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import flt, getdate
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class SchoolAccount(Document):
     """School Account management."""
@@ -272,7 +274,7 @@ class SchoolAccount(Document):
             
             # Notify account manager
             if self.account_manager:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[self.account_manager],
                     subject=_("Budget Alert: {0}").format(self.account_name),
                     message=_("Budget utilization for account {0} is at {1}%").format(
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class SchoolCostCenter(Document):
     """School Cost Center management."""
@@ -271,7 +273,7 @@ class SchoolCostCenter(Document):
         manager_user = frappe.db.get_value("Employee", self.manager, "user_id")
         
         if manager_user:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[manager_user],
                 subject=_("Budget Alert: {0}").format(self.cost_center_name),
                 message=self.get_budget_alert_message(utilization),
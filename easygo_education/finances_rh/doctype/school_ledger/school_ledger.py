@@ -1,8 +1,13 @@
 import frappe
 from frappe.model.document import Document
-from frappe.utils import nowdate, flt, cint
+from frappe.utils import nowdate, flt, cint, add_days
 from frappe import _
 
+from easygo_education.finances_rh.doctype.school_ledger_balance.school_ledger_balance import (
+    apply_ledger_movement,
+    get_cumulative_totals,
+)
+
 
 class SchoolLedger(Document):
     def validate(self):
@@ -51,39 +56,47 @@ class SchoolLedger(Document):
             
     def get_previous_balance(self):
         """Get previous balance for the account"""
-        previous_entry = frappe.db.sql("""
-            SELECT balance
-            FROM `tabSchool Ledger`
-            WHERE account = %s AND posting_date <= %s
-            AND docstatus = 1 AND name != %s
-            ORDER BY posting_date DESC, creation DESC
-            LIMIT 1
-        """, (self.account, self.posting_date, self.name))
+        opening_balance = frappe.db.get_value("School Account", self.account, "opening_balance") or 0
         
-        if previous_entry:
-            return previous_entry[0][0] or 0
-        else:
-            # Get opening balance from account
-            opening_balance = frappe.db.get_value("School Account", self.account, "opening_balance")
-            return opening_balance or 0
+        # Latest snapshot before this month plus this month's submitted entries
+        totals = get_cumulative_totals([self.account], self.posting_date)
+        movement = totals[self.account].net if self.account in totals else 0
+        
+        return flt(opening_balance) + flt(movement)
             
     def on_submit(self):
-        self.update_account_balance()
+        self.apply_movement(1)
         
     def on_cancel(self):
+        self.apply_movement(-1)
+        
+    def apply_movement(self, sign):
+        """Apply this entry to balance snapshots, later running balances and the account"""
+        debit, credit = sign * flt(self.debit), sign * flt(self.credit)
+        apply_ledger_movement(self.account, self.posting_date, debit, credit)
+        self.repair_later_balances(debit - credit)
         self.update_account_balance()
         
+    def repair_later_balances(self, net):
+        """Shift running balances of entries posted after a back-dated entry"""
+        frappe.db.sql("""
+            UPDATE `tabSchool Ledger`
+            SET balance = balance + %(net)s
+            WHERE account = %(account)s AND docstatus = 1 AND name != %(name)s
+            AND (posting_date > %(posting_date)s
+                OR (posting_date = %(posting_date)s AND creation > %(creation)s))
+        """, {
+            "net": net,
+            "account": self.account,
+            "name": self.name,
+            "posting_date": self.posting_date,
+            "creation": self.creation
+        })
+        
     def update_account_balance(self):
         """Update account balance in School Account"""
-        # Calculate current balance for the account
-        balance = frappe.db.sql("""
-            SELECT 
-                SUM(CASE WHEN debit > 0 THEN debit ELSE -credit END) as balance
-            FROM `tabSchool Ledger`
-            WHERE account = %s AND docstatus = 1
-        """, (self.account,))
-        
-        current_balance = balance[0][0] if balance and balance[0][0] else 0
+        totals = get_cumulative_totals([self.account])
+        current_balance = totals[self.account].net if self.account in totals else 0
         
         # Get opening balance
         opening_balance = frappe.db.get_value("School Account", self.account, "opening_balance") or 0
@@ -128,115 +141,81 @@ def make_gl_entry(voucher_type, voucher_no, entries):
 @frappe.whitelist()
 def get_account_balance(account, from_date=None, to_date=None):
     """Get account balance for specified period"""
-    conditions = ["account = %s", "docstatus = 1"]
-    values = [account]
+    opening_balance, movement = get_period_movement([account], from_date, to_date)
+    data = movement.get(account) or frappe._dict(debit=0, credit=0, net=0)
+    opening = opening_balance.get(account, 0)
     
-    if from_date:
-        conditions.append("posting_date >= %s")
-        values.append(from_date)
-        
-    if to_date:
-        conditions.append("posting_date <= %s")
-        values.append(to_date)
-        
-    result = frappe.db.sql(f"""
-        SELECT 
-            SUM(debit) as total_debit,
-            SUM(credit) as total_credit,
-            SUM(CASE WHEN debit > 0 THEN debit ELSE -credit END) as net_balance
-        FROM `tabSchool Ledger`
-        WHERE {' AND '.join(conditions)}
-    """, values, as_dict=True)
-    
-    if result:
-        data = result[0]
-        # Add opening balance if from_date is specified
-        opening_balance = 0
-        if from_date:
-            opening_result = frappe.db.sql("""
-                SELECT SUM(CASE WHEN debit > 0 THEN debit ELSE -credit END) as balance
-                FROM `tabSchool Ledger`
-                WHERE account = %s AND posting_date < %s AND docstatus = 1
-            """, (account, from_date))
-            
-            if opening_result and opening_result[0][0]:
-                opening_balance = opening_result[0][0]
-            else:
-                # Get account opening balance
-                account_opening = frappe.db.get_value("School Account", account, "opening_balance")
-                opening_balance = account_opening or 0
-                
-        return {
-            "opening_balance": opening_balance,
-            "total_debit": data.total_debit or 0,
-            "total_credit": data.total_credit or 0,
-            "net_movement": data.net_balance or 0,
-            "closing_balance": opening_balance + (data.net_balance or 0)
-        }
-        
     return {
-        "opening_balance": 0,
-        "total_debit": 0,
-        "total_credit": 0,
-        "net_movement": 0,
-        "closing_balance": 0
+        "opening_balance": opening,
+        "total_debit": data.debit,
+        "total_credit": data.credit,
+        "net_movement": data.net,
+        "closing_balance": opening + data.net
     }
 
 
 @frappe.whitelist()
 def get_trial_balance(from_date=None, to_date=None):
     """Get trial balance for all accounts"""
-    conditions = ["docstatus = 1"]
-    values = []
+    opening_balance, movement = get_period_movement(None, from_date, to_date)
     
-    if from_date:
-        conditions.append("posting_date >= %s")
-        values.append(from_date)
-        
-    if to_date:
-        conditions.append("posting_date <= %s")
-        values.append(to_date)
+    account_names = dict(frappe.get_all("School Account",
+        filters={"name": ["in", list(movement)]},
+        fields=["name", "account_name"],
+        as_list=True
+    )) if movement else {}
+    
+    accounts = []
+    for account, data in movement.items():
+        if not data.debit and not data.credit:
+            continue
         
-    accounts = frappe.db.sql(f"""
-        SELECT 
-            account,
-            account_name,
-            SUM(debit) as total_debit,
-            SUM(credit) as total_credit,
-            SUM(CASE WHEN debit > 0 THEN debit ELSE -credit END) as balance
-        FROM `tabSchool Ledger`
-        WHERE {' AND '.join(conditions)}
-        GROUP BY account, account_name
-        HAVING (total_debit > 0 OR total_credit > 0)
-        ORDER BY account_name
-    """, values, as_dict=True)
+        opening = opening_balance.get(account, 0) if from_date else 0
+        accounts.append(frappe._dict({
+            "account": account,
+            "account_name": account_names.get(account),
+            "total_debit": data.debit,
+            "total_credit": data.credit,
+            "balance": data.net,
+            "opening_balance": opening,
+            "closing_balance": opening + data.net
+        }))
     
-    # Add opening balances if from_date is specified
-    for account in accounts:
-        if from_date:
-            opening_result = frappe.db.sql("""
-                SELECT SUM(CASE WHEN debit > 0 THEN debit ELSE -credit END) as balance
-                FROM `tabSchool Ledger`
-                WHERE account = %s AND posting_date < %s AND docstatus = 1
-            """, (account.account, from_date))
-            
-            opening_balance = 0
-            if opening_result and opening_result[0][0]:
-                opening_balance = opening_result[0][0]
-            else:
-                # Get account opening balance
-                account_opening = frappe.db.get_value("School Account", account.account, "opening_balance")
-                opening_balance = account_opening or 0
-                
-            account.opening_balance = opening_balance
-            account.closing_balance = opening_balance + account.balance
-        else:
-            account.opening_balance = 0
-            account.closing_balance = account.balance
-            
+    accounts.sort(key=lambda row: row.account_name or "")
     return accounts
 
 
+def get_period_movement(accounts, from_date=None, to_date=None):
+    """Get opening balances and period movement per account from balance snapshots.
+    
+    Movement over the period is the difference of the cumulative totals at
+    ``to_date`` and the day before ``from_date``. Opening balances include the
+    School Account opening balance. Returns ``(opening_balance, movement)``.
+    """
+    closing_totals = get_cumulative_totals(accounts, to_date)
+    before_totals = get_cumulative_totals(accounts, add_days(from_date, -1)) if from_date else {}
+    
+    account_openings = dict(frappe.get_all("School Account",
+        filters={"name": ["in", list(accounts or closing_totals)]},
+        fields=["name", "opening_balance"],
+        as_list=True
+    )) if (accounts or closing_totals) else {}
+    
+    opening_balance = {}
+    movement = {}
+    for account in set(closing_totals) | set(accounts or []):
+        closing = closing_totals.get(account) or frappe._dict(debit=0, credit=0, net=0)
+        before = before_totals.get(account) or frappe._dict(debit=0, credit=0, net=0)
+        opening_balance[account] = flt(account_openings.get(account)) + before.net
+        movement[account] = frappe._dict(
+            debit=closing.debit - before.debit,
+            credit=closing.credit - before.credit,
+            net=closing.net - before.net
+        )
+    
+    return opening_balance, movement
+
+
 @frappe.whitelist()
 def get_ledger_analytics():
     """Get ledger analytics"""
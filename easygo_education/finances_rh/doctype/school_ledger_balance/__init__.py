@@ -0,0 +1 @@
+# School Ledger Balance
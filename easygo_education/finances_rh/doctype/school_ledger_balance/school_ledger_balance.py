@@ -0,0 +1,201 @@
+"""School Ledger Balance doctype controller.
+
+One row per account and calendar month holding the month's debit/credit
+movement and the cumulative totals up to the end of that month. Rows are
+maintained incrementally by School Ledger on submit and cancel, so balances
+can be read from one snapshot plus the entries of a single month.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt, get_first_day, getdate, now
+
+
+class SchoolLedgerBalance(Document):
+    """School Ledger Balance doctype controller (maintained by the system)."""
+    pass
+
+
+def get_snapshot_name(account, period_start):
+    """Get the snapshot name, matching the DocType autoname format."""
+    return f"{account}-{period_start}"
+
+
+def apply_ledger_movement(account, posting_date, debit=0, credit=0):
+    """Add a ledger movement to the account's snapshots.
+    
+    The snapshot of the posting month receives the period movement and every
+    snapshot from that month onwards receives the cumulative movement, which
+    also repairs later periods when an entry is back-dated. Pass negative
+    amounts to reverse a cancelled entry.
+    """
+    debit, credit = flt(debit), flt(credit)
+    if not account or (not debit and not credit):
+        return
+    
+    period_start = get_first_day(posting_date)
+    ensure_snapshot(account, period_start)
+    
+    frappe.db.sql("""
+        UPDATE `tabSchool Ledger Balance`
+        SET period_debit = period_debit + %(debit)s,
+            period_credit = period_credit + %(credit)s
+        WHERE name = %(name)s
+    """, {"debit": debit, "credit": credit, "name": get_snapshot_name(account, period_start)})
+    
+    frappe.db.sql("""
+        UPDATE `tabSchool Ledger Balance`
+        SET cumulative_debit = cumulative_debit + %(debit)s,
+            cumulative_credit = cumulative_credit + %(credit)s,
+            closing_balance = closing_balance + %(net)s,
+            modified = %(modified)s
+        WHERE account = %(account)s AND period_start >= %(period_start)s
+    """, {
+        "debit": debit,
+        "credit": credit,
+        "net": debit - credit,
+        "modified": now(),
+        "account": account,
+        "period_start": period_start
+    })
+
+
+def ensure_snapshot(account, period_start):
+    """Create an empty snapshot for the period carrying forward the previous totals."""
+    name = get_snapshot_name(account, period_start)
+    if frappe.db.exists("School Ledger Balance", name):
+        return
+    
+    previous = frappe.db.sql("""
+        SELECT cumulative_debit, cumulative_credit, closing_balance
+        FROM `tabSchool Ledger Balance`
+        WHERE account = %s AND period_start < %s
+        ORDER BY period_start DESC
+        LIMIT 1
+    """, (account, period_start), as_dict=True)
+    previous = previous[0] if previous else frappe._dict()
+    
+    timestamp = now()
+    frappe.db.sql("""
+        INSERT IGNORE INTO `tabSchool Ledger Balance`
+            (name, creation, modified, owner, modified_by, docstatus,
+             account, period_start, period_debit, period_credit,
+             cumulative_debit, cumulative_credit, closing_balance)
+        VALUES (%s, %s, %s, %s, %s, 0, %s, %s, 0, 0, %s, %s, %s)
+    """, (
+        name, timestamp, timestamp, frappe.session.user, frappe.session.user,
+        account, period_start,
+        flt(previous.cumulative_debit), flt(previous.cumulative_credit), flt(previous.closing_balance)
+    ))
+
+
+def get_cumulative_totals(accounts=None, as_of=None):
+    """Get cumulative debit, credit and net movement per account up to a date.
+    
+    Reads the latest snapshot before the month of ``as_of`` and adds the
+    submitted entries of that month only. Returns ``{account: _dict}``.
+    """
+    conditions = []
+    values = {}
+    if accounts:
+        conditions.append("account IN %(accounts)s")
+        values["accounts"] = list(accounts)
+    
+    if as_of:
+        period_start = get_first_day(as_of)
+        conditions.append("period_start < %(period_start)s")
+        values["period_start"] = period_start
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    totals = {}
+    for row in frappe.db.sql(f"""
+        SELECT account, cumulative_debit, cumulative_credit
+        FROM (
+            SELECT account, cumulative_debit, cumulative_credit,
+                   ROW_NUMBER() OVER (PARTITION BY account ORDER BY period_start DESC) as row_num
+            FROM `tabSchool Ledger Balance`
+            {where}
+        ) latest
+        WHERE row_num = 1
+    """, values, as_dict=True):
+        totals[row.account] = frappe._dict(debit=flt(row.cumulative_debit), credit=flt(row.cumulative_credit))
+    
+    if as_of:
+        # Delta: entries posted in the month of as_of
+        delta_conditions = ["docstatus = 1", "posting_date BETWEEN %(period_start)s AND %(as_of)s"]
+        if accounts:
+            delta_conditions.append("account IN %(accounts)s")
+        values["as_of"] = getdate(as_of)
+        
+        for row in frappe.db.sql(f"""
+            SELECT account, SUM(debit) as debit, SUM(credit) as credit
+            FROM `tabSchool Ledger`
+            WHERE {' AND '.join(delta_conditions)}
+            GROUP BY account
+        """, values, as_dict=True):
+            total = totals.setdefault(row.account, frappe._dict(debit=0, credit=0))
+            total.debit += flt(row.debit)
+            total.credit += flt(row.credit)
+    
+    for total in totals.values():
+        total.net = total.debit - total.credit
+    
+    return totals
+
+
+@frappe.whitelist()
+def rebuild_ledger_balances(account=None):
+    """Rebuild balance snapshots from School Ledger history.
+    
+    Used to initialise snapshots for existing data and to repair drift.
+    """
+    frappe.only_for(["Accounts Manager", "System Manager"])
+    
+    filters = {"account": account} if account else {}
+    frappe.db.delete("School Ledger Balance", filters)
+    
+    conditions = ["docstatus = 1"]
+    values = {}
+    if account:
+        conditions.append("account = %(account)s")
+        values["account"] = account
+    
+    periods = frappe.db.sql(f"""
+        SELECT account,
+               DATE_FORMAT(posting_date, '%%Y-%%m-01') as period_start,
+               SUM(debit) as period_debit,
+               SUM(credit) as period_credit
+        FROM `tabSchool Ledger`
+        WHERE {' AND '.join(conditions)}
+        GROUP BY account, period_start
+        ORDER BY account, period_start
+    """, values, as_dict=True)
+    
+    timestamp = now()
+    rows = []
+    running = {}
+    for period in periods:
+        cumulative = running.setdefault(period.account, [0, 0])
+        cumulative[0] += flt(period.period_debit)
+        cumulative[1] += flt(period.period_credit)
+        rows.append((
+            get_snapshot_name(period.account, period.period_start), timestamp, timestamp,
+            frappe.session.user, frappe.session.user, 0,
+            period.account, period.period_start,
+            flt(period.period_debit), flt(period.period_credit),
+            cumulative[0], cumulative[1], cumulative[0] - cumulative[1]
+        ))
+    
+    if rows:
+        frappe.db.bulk_insert(
+            "School Ledger Balance",
+            fields=[
+                "name", "creation", "modified", "owner", "modified_by", "docstatus",
+                "account", "period_start", "period_debit", "period_credit",
+                "cumulative_debit", "cumulative_credit", "closing_balance"
+            ],
+            values=rows
+        )
+    
+    return {"message": _("Rebuilt {0} balance snapshots").format(len(rows)), "count": len(rows)}
@@ -0,0 +1,157 @@
+"""Fee reminders, one digest per guardian household.
+
+Open bills are fetched with their guardian's email and household key in
+one query and grouped by household, so a family with several children
+gets a single email listing all of its bills. Each digest is queued
+through the notification dispatcher, and one Communication Log per bill,
+tagged with the digest, is bulk-inserted.
+
+Households whose guardians were sent the same digest within the last
+``fee_reminder_interval`` days of School Settings are skipped, so the
+daily and weekly runs don't remind a family twice.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, flt, formatdate, today
+
+from easygo_education.administration_comms.notification_dispatcher import (
+    insert_communication_logs,
+    queue_notification,
+)
+from easygo_education.scolarite.household import get_household_key
+
+
+OVERDUE_DIGEST = "Overdue Fees"
+UPCOMING_DIGEST = "Upcoming Fees"
+
+DEFAULT_REMINDER_INTERVAL = 7
+
+
+def get_guardian_bills(conditions, values):
+    """Fetch open submitted bills with their guardian's email and household key."""
+    return frappe.db.sql(f"""
+        SELECT fb.name, fb.student, fb.student_name, fb.due_date, fb.total_amount, fb.outstanding_amount,
+               COALESCE(NULLIF(fb.guardian_email, ''), s.guardian_email) AS guardian_email,
+               s.household_key
+        FROM `tabFee Bill` fb
+        LEFT JOIN `tabStudent` s ON s.name = fb.student
+        WHERE fb.docstatus = 1
+          AND fb.status NOT IN ('Paid', 'Cancelled')
+          AND {' AND '.join(conditions)}
+        ORDER BY fb.student_name, fb.due_date
+    """, values, as_dict=True)
+
+
+def group_by_household(bills):
+    """Group bills by guardian household.
+    
+    Returns ``{household_key: {"recipients": [...], "bills": [...]}}``;
+    bills without a guardian email are left out.
+    """
+    households = {}
+    for bill in bills:
+        email = (bill.guardian_email or "").strip()
+        if not email:
+            continue
+        
+        key = bill.household_key or get_household_key(email)
+        household = households.setdefault(key, frappe._dict({"recipients": [], "bills": []}))
+        if email.lower() not in (recipient.lower() for recipient in household.recipients):
+            household.recipients.append(email)
+        household.bills.append(bill)
+    return households
+
+
+def get_reminded_recipients(digest, interval):
+    """Get the lowercased emails sent a digest in the last ``interval`` days, today included."""
+    if interval <= 0:
+        return set()
+    
+    reminded = set()
+    for recipients in frappe.get_all("Communication Log",
+        filters={"tags": digest, "sent_date": [">=", add_days(today(), 1 - interval)]},
+        distinct=True,
+        pluck="recipients"
+    ):
+        reminded.update(email.strip().lower() for email in (recipients or "").split(","))
+    return reminded
+
+
+def get_amount_due(bill):
+    """Get the amount still due on a bill."""
+    return flt(bill.outstanding_amount) or flt(bill.total_amount)
+
+
+def build_digest(bills, digest):
+    """Build the subject and message of a household's digest."""
+    students = ", ".join(dict.fromkeys(bill.student_name or bill.student for bill in bills))
+    if digest == OVERDUE_DIGEST:
+        subject = _("Overdue Fee Payment - {0}").format(students)
+        intro = _("This is a reminder that the following fee payments are overdue. Please make the payment at your earliest convenience.")
+    else:
+        subject = _("Fee Payment Due Soon - {0}").format(students)
+        intro = _("This is a friendly reminder that the following fee payments are due soon. Please ensure payment is made before the due date.")
+    
+    rows = "".join(
+        f"<tr><td>{bill.student_name or bill.student}</td><td>{bill.name}</td>"
+        f"<td>{formatdate(bill.due_date)}</td><td>{get_amount_due(bill):.2f} MAD</td></tr>"
+        for bill in bills
+    )
+    message = _("Dear Parent,<br><br>{0}<br><br>").format(intro) + (
+        f"<table><tr><th>{_('Student')}</th><th>{_('Bill')}</th><th>{_('Due Date')}</th><th>{_('Amount Due')}</th></tr>"
+        f"{rows}</table><br>"
+    ) + _("Total Due: {0} MAD<br><br>Thank you.").format(f"{sum(get_amount_due(bill) for bill in bills):.2f}")
+    return subject, message
+
+
+def send_household_reminders(bills, digest, interval=0):
+    """Queue one digest per household and log each bill it covers.
+    
+    Returns the number of digests queued.
+    """
+    reminded = get_reminded_recipients(digest, interval)
+    
+    logs = []
+    sent = 0
+    for household in group_by_household(bills).values():
+        if reminded.intersection(recipient.lower() for recipient in household.recipients):
+            continue
+        
+        subject, message = build_digest(household.bills, digest)
+        queue_notification(
+            recipients=household.recipients,
+            subject=subject,
+            message=message,
+            reference_doctype="Fee Bill",
+            reference_name=household.bills[0].name,
+            log=False
+        )
+        
+        recipients = ", ".join(household.recipients)
+        logs.extend(("Fee Bill", bill.name, recipients, subject) for bill in household.bills)
+        sent += 1
+    
+    insert_communication_logs(logs, tags=digest)
+    return sent
+
+
+def get_reminder_interval():
+    """Get the number of days between two reminders of the same guardian."""
+    interval = frappe.db.get_single_value("School Settings", "fee_reminder_interval")
+    return DEFAULT_REMINDER_INTERVAL if interval is None else cint(interval)
+
+
+def send_overdue_fee_reminders():
+    """Remind guardians of their overdue bills, one digest per household."""
+    bills = get_guardian_bills(["fb.due_date < %(today)s"], {"today": today()})
+    return send_household_reminders(bills, OVERDUE_DIGEST, get_reminder_interval())
+
+
+def send_upcoming_fee_reminders(days=7):
+    """Remind guardians of bills due in the next ``days`` days, one digest per household."""
+    bills = get_guardian_bills(
+        ["fb.due_date BETWEEN %(today)s AND %(until)s"],
+        {"today": today(), "until": add_days(today(), days)}
+    )
+    return send_household_reminders(bills, UPCOMING_DIGEST)
@@ -0,0 +1,339 @@
+"""Payroll run engine.
+
+Creates the draft salary slips of a Payroll Cycle in a background job.
+Everything a slip depends on is prefetched for the whole cycle with
+grouped queries: existing slips, each employee's salary structure and its
+components, HR attendance and approved leave. Slips are then computed in
+memory and bulk inserted batch by batch, committing and publishing
+progress after each batch. Employees who already have a slip in the cycle
+are skipped, so a run that stops half way can simply be started again.
+
+Each structure's formulas are compiled once per run (see salary_formula);
+an employee whose formulas fail is logged and left without a slip instead
+of stopping the run.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import flt, now
+
+from easygo_education.finances_rh.salary_formula import SalaryFormulaError, compile_structure
+from easygo_education.utils.naming import make_series_names
+
+
+BATCH_SIZE = 250
+
+SLIP_FIELDS = [
+    "employee", "employee_name", "department", "designation", "joining_date",
+    "salary_structure", "basic_salary", "gross_salary", "total_deductions", "net_salary",
+    "attendance_days", "working_days", "leave_days", "absent_days",
+]
+DETAIL_FIELDS = ["salary_component", "component_type", "percentage", "amount"]
+
+
+def start_payroll_run(cycle_name):
+    """Queue slip creation for a payroll cycle once the current transaction commits."""
+    frappe.enqueue(
+        "easygo_education.finances_rh.payroll_engine.run_payroll_cycle",
+        queue="long",
+        timeout=3600,
+        job_id=f"payroll_run::{cycle_name}",
+        deduplicate=True,
+        cycle_name=cycle_name,
+        enqueue_after_commit=True
+    )
+
+
+def run_payroll_cycle(cycle_name):
+    """Create the missing draft salary slips of a payroll cycle."""
+    cycle = frappe.get_doc("Payroll Cycle", cycle_name)
+    employees = cycle.get_employees()
+    employee_names = [employee.name for employee in employees]
+    
+    existing = set(frappe.get_all("Salary Slip",
+        filters={"payroll_cycle": cycle.name, "docstatus": ["<", 2]},
+        pluck="employee"
+    ))
+    structures = get_employee_structures(employee_names, cycle.start_date, cycle.end_date)
+    
+    pending = [employee for employee in employees if employee.name not in existing]
+    missing = [employee.employee_name or employee.name for employee in pending if employee.name not in structures]
+    pending = [employee for employee in pending if employee.name in structures]
+    
+    if missing:
+        frappe.log_error(
+            f"Payroll Cycle {cycle.name}: no salary structure found for {', '.join(missing)}",
+            "Payroll Run"
+        )
+    
+    compiled, invalid = compile_structures(structures.values())
+    if invalid:
+        frappe.log_error(
+            f"Payroll Cycle {cycle.name}: invalid salary structure formulas\n" + "\n".join(
+                f"{name}: {error}" for name, error in invalid.items()
+            ),
+            "Payroll Run"
+        )
+    pending = [employee for employee in pending if structures[employee.name].name in compiled]
+    
+    pending_names = [employee.name for employee in pending]
+    attendance = get_attendance_summary(pending_names, cycle.start_date, cycle.end_date)
+    leave_days = get_leave_days(pending_names, cycle.start_date, cycle.end_date)
+    
+    created = len(existing)
+    total = created + len(pending)
+    cycle.db_set({"total_employees": len(employees), "salary_slips_created": created})
+    frappe.db.commit()
+    
+    for start in range(0, len(pending), BATCH_SIZE):
+        batch = pending[start:start + BATCH_SIZE]
+        slips = []
+        failed = []
+        try:
+            for employee in batch:
+                structure = structures[employee.name]
+                try:
+                    slips.append(compute_slip(
+                        employee,
+                        structure,
+                        compiled[structure.name],
+                        attendance.get(employee.name),
+                        leave_days.get(employee.name, 0),
+                        cycle.total_working_days
+                    ))
+                except SalaryFormulaError as e:
+                    failed.append(f"{employee.employee_name or employee.name} ({structure.name}): {e}")
+            insert_slips(cycle, slips)
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(f"Payroll Cycle {cycle.name}: slip creation stopped after {created} slips\n{frappe.get_traceback()}", "Payroll Run")
+            return
+        
+        if failed:
+            frappe.log_error(f"Payroll Cycle {cycle.name}: salary formulas failed for\n" + "\n".join(failed), "Payroll Run")
+        
+        created += len(slips)
+        total -= len(failed)
+        cycle.db_set("salary_slips_created", created)
+        frappe.db.commit()
+        
+        frappe.publish_progress(
+            created * 100 / max(total, 1),
+            title=_("Creating Salary Slips"),
+            doctype="Payroll Cycle",
+            docname=cycle.name,
+            description=_("{0} of {1} salary slips created").format(created, total)
+        )
+
+
+def get_employee_structures(employees, start_date, end_date):
+    """Get the salary structure in effect for each employee during a period.
+    
+    Uses the latest active structure overlapping the period, falling back to
+    the structure linked on the Employee. Returns ``{employee: structure}``.
+    """
+    if not employees:
+        return {}
+    
+    structures = {}
+    for structure in frappe.db.sql("""
+        SELECT name, employee, base_salary, modified
+        FROM `tabSalary Structure`
+        WHERE employee IN %(employees)s
+        AND is_active = 1
+        AND (effective_from IS NULL OR effective_from <= %(end_date)s)
+        AND (effective_to IS NULL OR effective_to >= %(start_date)s)
+        ORDER BY effective_from ASC
+    """, {"employees": list(employees), "start_date": start_date, "end_date": end_date}, as_dict=True):
+        # Later rows win, leaving the most recent structure per employee
+        structures[structure.employee] = structure
+    
+    unassigned = [employee for employee in employees if employee not in structures]
+    if unassigned:
+        for structure in frappe.db.sql("""
+            SELECT s.name, e.name as employee, s.base_salary, s.modified
+            FROM `tabEmployee` e
+            INNER JOIN `tabSalary Structure` s ON s.name = e.salary_structure
+            WHERE e.name IN %(employees)s
+        """, {"employees": unassigned}, as_dict=True):
+            structures[structure.employee] = structure
+    
+    return structures
+
+
+def get_structure_components(structure_names):
+    """Get the earnings and deductions of many salary structures in one query.
+    
+    Returns ``{structure: {"earnings": [...], "deductions": [...]}}``.
+    """
+    if not structure_names:
+        return {}
+    
+    components = {}
+    for row in frappe.db.sql("""
+        SELECT parent, parentfield, component, component_type, amount, percentage, formula, `condition`
+        FROM `tabSalary Component`
+        WHERE parenttype = 'Salary Structure'
+        AND parentfield IN ('earnings', 'deductions')
+        AND parent IN %(structures)s
+        ORDER BY parent, parentfield, idx
+    """, {"structures": list(structure_names)}, as_dict=True):
+        components.setdefault(row.parent, {"earnings": [], "deductions": []})[row.parentfield].append(row)
+    
+    return components
+
+
+def compile_structures(structures):
+    """Compile the formulas of many salary structures with one component query.
+    
+    Returns ``(compiled, invalid)``: ``{structure: CompiledStructure}`` and
+    ``{structure: error}`` for structures whose formulas don't compile.
+    """
+    structures = {structure.name: structure for structure in structures}
+    components = get_structure_components(structures)
+    
+    compiled = {}
+    invalid = {}
+    for name, structure in structures.items():
+        rows = components.get(name, {})
+        try:
+            compiled[name] = compile_structure(
+                name, structure.modified, structure.base_salary,
+                rows.get("earnings", []), rows.get("deductions", [])
+            )
+        except SalaryFormulaError as e:
+            invalid[name] = str(e)
+    return compiled, invalid
+
+
+def get_attendance_summary(employees, start_date, end_date):
+    """Get submitted HR attendance counts per employee for a period."""
+    if not employees:
+        return {}
+    
+    return {
+        row.employee: row for row in frappe.db.sql("""
+            SELECT
+                employee,
+                SUM(CASE WHEN status IN ('Present', 'Work From Home') THEN 1
+                         WHEN status = 'Half Day' THEN 0.5 ELSE 0 END) as attendance_days,
+                SUM(CASE WHEN status = 'Absent' THEN 1 ELSE 0 END) as absent_days,
+                SUM(CASE WHEN status = 'On Leave' THEN 1 ELSE 0 END) as leave_days
+            FROM `tabHR Attendance`
+            WHERE employee IN %(employees)s
+            AND attendance_date BETWEEN %(start_date)s AND %(end_date)s
+            AND docstatus = 1
+            GROUP BY employee
+        """, {"employees": list(employees), "start_date": start_date, "end_date": end_date}, as_dict=True)
+    }
+
+
+def get_leave_days(employees, start_date, end_date):
+    """Get approved leave days per employee for leave applications overlapping a period."""
+    if not employees:
+        return {}
+    
+    return dict(frappe.db.sql("""
+        SELECT employee, SUM(total_leave_days)
+        FROM `tabLeave Application`
+        WHERE employee IN %(employees)s
+        AND status = 'Approved'
+        AND docstatus < 2
+        AND from_date <= %(end_date)s
+        AND to_date >= %(start_date)s
+        GROUP BY employee
+    """, {"employees": list(employees), "start_date": start_date, "end_date": end_date}))
+
+
+def compute_slip(employee, structure, compiled, attendance=None, leave_days=0, working_days=0):
+    """Compute one salary slip from prefetched data and a compiled structure.
+    
+    Raises SalaryFormulaError when one of the structure's formulas fails
+    for this employee.
+    """
+    attendance = attendance or frappe._dict()
+    record = {
+        "working_days": flt(working_days),
+        "attendance_days": flt(attendance.get("attendance_days")),
+        "leave_days": flt(leave_days) or flt(attendance.get("leave_days")),
+        "absent_days": flt(attendance.get("absent_days")),
+    }
+    result = compiled.evaluate(record)
+    
+    return frappe._dict({
+        "employee": employee.name,
+        "employee_name": employee.employee_name,
+        "department": employee.department,
+        "designation": employee.designation,
+        "joining_date": employee.date_of_joining,
+        "salary_structure": structure.name,
+        "basic_salary": result.basic_salary,
+        "gross_salary": result.gross_salary,
+        "total_deductions": result.total_deductions,
+        "net_salary": result.net_salary,
+        **record,
+        "earnings": get_detail_rows(result.earnings),
+        "deductions": get_detail_rows(result.deductions),
+    })
+
+
+def get_detail_rows(amounts):
+    """Build salary slip earning or deduction rows from ``(component, amount)`` pairs."""
+    return [
+        frappe._dict({
+            "salary_component": component.component,
+            "component_type": component.component_type,
+            "percentage": component.percentage if component.component_type == "Percentage" else 0,
+            "amount": amount,
+        })
+        for component, amount in amounts
+        if amount > 0
+    ]
+
+
+def insert_slips(cycle, slips):
+    """Bulk insert computed draft salary slips and their earning and deduction rows."""
+    if not slips:
+        return
+    
+    meta = frappe.get_meta("Salary Slip")
+    naming_series = (meta.get_field("naming_series").options or "").split("\n")[0]
+    names = make_series_names(naming_series, len(slips))
+    detail_doctype = meta.get_field("earnings").options
+    timestamp = now()
+    user = frappe.session.user
+    standard = [timestamp, timestamp, user, user, 0]
+    
+    frappe.db.bulk_insert(
+        "Salary Slip",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "naming_series", "payroll_cycle", "pay_period", "payment_date",
+            "status", "approval_status", "payment_status", *SLIP_FIELDS
+        ],
+        values=[
+            (
+                name, *standard,
+                naming_series, cycle.name, cycle.payroll_cycle_name, cycle.payment_date,
+                "Draft", "Pending", "Pending", *(slip[field] for field in SLIP_FIELDS)
+            )
+            for name, slip in zip(names, slips)
+        ]
+    )
+    
+    frappe.db.bulk_insert(
+        detail_doctype,
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "parent", "parenttype", "parentfield", "idx", *DETAIL_FIELDS
+        ],
+        values=[
+            (
+                frappe.generate_hash(length=10), *standard,
+                name, "Salary Slip", parentfield, idx, *(row[field] for field in DETAIL_FIELDS)
+            )
+            for name, slip in zip(names, slips)
+            for parentfield in ("earnings", "deductions")
+            for idx, row in enumerate(slip[parentfield], 1)
+        ]
+    )
@@ -0,0 +1,239 @@
+"""Receipt PDF rendering and storage.
+
+Receipt PDFs are rendered off the payment-posting path: submitting a
+Receipt Print only queues ``store_receipt_pdf``, which renders the PDF
+in the background, keeps it as a private File attached to the receipt
+and then sends the student notification with that file attached.
+
+Stored PDFs are addressed by a render key hashed from the receipt and
+the version (``modified``) of its print format and letter head, and
+the File's content hash lets identical PDFs share one file on disk.
+Downloads are served from the store and only render when the key is
+missing, i.e. for a new template version. Draft receipts are always
+rendered on demand and never stored.
+
+``build_cashier_batch`` merges every receipt a cashier generated on one
+day into a single print-ready PDF, reusing the stored receipts.
+"""
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, getdate, today
+
+from easygo_education.administration_comms.document_rendering import merge_pdfs
+from easygo_education.api.realtime import DOCUMENTS_EVENT, publish
+
+
+RECEIPT_FILE_PREFIX = "receipt-"
+BATCH_FILE_PREFIX = "receipt-batch-"
+
+RECEIPT_FIELDS = [
+    "name", "receipt_number", "docstatus", "print_format", "receipt_template", "letterhead", "generated_by",
+]
+
+
+def get_print_format(receipt):
+    """Get the print format a receipt is rendered with."""
+    return receipt.print_format or receipt.receipt_template or "Standard"
+
+
+def get_template_version(receipt):
+    """Get the version of a receipt's print format and letter head."""
+    print_format = get_print_format(receipt)
+    version = [print_format, str(frappe.get_cached_value("Print Format", print_format, "modified") or "")]
+    if receipt.letterhead:
+        version += [receipt.letterhead, str(frappe.get_cached_value("Letter Head", receipt.letterhead, "modified") or "")]
+    return version
+
+
+def get_render_key(receipt):
+    """Hash a receipt and its template version into the key its PDF is stored under."""
+    parts = [receipt.name] + get_template_version(receipt)
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:20]
+
+
+def get_receipt_file_name(receipt):
+    """Get the File name a receipt's PDF is stored as."""
+    return f"{RECEIPT_FILE_PREFIX}{get_render_key(receipt)}.pdf"
+
+
+def get_stored_receipt(receipt):
+    """Get the name of a receipt's stored PDF File for its current template version."""
+    return frappe.db.get_value("File", {
+        "attached_to_doctype": "Receipt Print",
+        "attached_to_name": receipt.name,
+        "file_name": get_receipt_file_name(receipt)
+    })
+
+
+def render_receipt(receipt):
+    """Render a receipt to PDF."""
+    return frappe.get_print(
+        "Receipt Print",
+        receipt.name,
+        print_format=get_print_format(receipt),
+        letterhead=receipt.letterhead,
+        no_letterhead=not receipt.letterhead,
+        as_pdf=True
+    )
+
+
+def save_receipt_pdf(receipt, pdf):
+    """Store a receipt's PDF as a private File attached to it."""
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": get_receipt_file_name(receipt),
+        "attached_to_doctype": "Receipt Print",
+        "attached_to_name": receipt.name,
+        "is_private": 1,
+        "content": pdf
+    })
+    file_doc.save(ignore_permissions=True)
+    return file_doc.name
+
+
+def get_receipt(receipt_name):
+    """Get the fields a receipt is rendered and stored with."""
+    receipt = frappe.db.get_value("Receipt Print", receipt_name, RECEIPT_FIELDS, as_dict=True)
+    if not receipt:
+        frappe.throw(_("Receipt {0} not found").format(receipt_name))
+    return receipt
+
+
+def ensure_receipt_pdf(receipt):
+    """Get a submitted receipt's stored PDF File, rendering and storing it if missing."""
+    file_name = get_stored_receipt(receipt)
+    if not file_name:
+        file_name = save_receipt_pdf(receipt, render_receipt(receipt))
+    return file_name
+
+
+def queue_receipt_pdf(receipt_name, notify=False):
+    """Render and store a receipt's PDF in the background, then optionally notify the student."""
+    frappe.enqueue(
+        "easygo_education.finances_rh.receipt_rendering.store_receipt_pdf",
+        queue="short",
+        job_id=f"receipt_pdf::{receipt_name}",
+        deduplicate=True,
+        receipt_name=receipt_name,
+        notify=notify,
+        enqueue_after_commit=True
+    )
+
+
+def store_receipt_pdf(receipt_name, notify=False):
+    """Store a submitted receipt's PDF and send the student notification with it."""
+    receipt = get_receipt(receipt_name)
+    if receipt.docstatus != 1:
+        return
+    
+    file_name = ensure_receipt_pdf(receipt)
+    frappe.db.commit()
+    
+    if notify:
+        frappe.get_doc("Receipt Print", receipt_name).send_student_notification(
+            attachments=[{"fid": file_name}]
+        )
+        frappe.db.commit()
+
+
+@frappe.whitelist()
+def download_receipt(receipt_name):
+    """Download a receipt's PDF, served from the store when it is current."""
+    frappe.has_permission("Receipt Print", "print", receipt_name, throw=True)
+    receipt = get_receipt(receipt_name)
+    
+    if receipt.docstatus == 1:
+        content = frappe.get_doc("File", ensure_receipt_pdf(receipt)).get_content()
+    else:
+        content = render_receipt(receipt)
+    
+    frappe.local.response.filename = f"Receipt_{receipt.receipt_number or receipt.name}.pdf"
+    frappe.local.response.filecontent = content
+    frappe.local.response.type = "pdf"
+
+
+@frappe.whitelist()
+def generate_cashier_batch(date=None):
+    """Build the session user's receipts of a day into one print-ready PDF in the background."""
+    frappe.has_permission("Receipt Print", "print", throw=True)
+    date = str(getdate(date or today()))
+    queue_cashier_batch(frappe.session.user, date)
+    return {"message": _("Receipts of {0} are being prepared for printing").format(date)}
+
+
+def queue_cashier_batch(cashier, date):
+    """Build a cashier's receipts of a day into one PDF in the background."""
+    frappe.enqueue(
+        "easygo_education.finances_rh.receipt_rendering.build_cashier_batch",
+        queue="long",
+        job_id=f"receipt_batch::{cashier}::{date}",
+        deduplicate=True,
+        cashier=cashier,
+        date=date,
+        enqueue_after_commit=True
+    )
+
+
+def build_end_of_day_batches(date=None):
+    """Queue the print-ready batch of every cashier who submitted receipts on a day (yesterday by default)."""
+    date = str(getdate(date or add_days(today(), -1)))
+    for cashier in frappe.get_all("Receipt Print",
+        filters={"docstatus": 1, "date": date, "generated_by": ["is", "set"]},
+        distinct=True,
+        pluck="generated_by"
+    ):
+        queue_cashier_batch(cashier, date)
+
+
+def build_cashier_batch(cashier, date):
+    """Merge a cashier's submitted receipts of a day into one PDF File and notify the cashier.
+    
+    The batch is addressed by the render keys of its receipts, so running
+    it again for an unchanged day returns the existing file.
+    """
+    receipts = frappe.get_all("Receipt Print",
+        filters={"docstatus": 1, "date": date, "generated_by": cashier},
+        fields=RECEIPT_FIELDS,
+        order_by="receipt_number asc, name asc"
+    )
+    if not receipts:
+        return None
+    
+    keys = "\n".join([cashier] + [get_render_key(receipt) for receipt in receipts])
+    batch_name = f"{BATCH_FILE_PREFIX}{date}-{hashlib.sha1(keys.encode()).hexdigest()[:20]}.pdf"
+    file_url = frappe.db.get_value("File", {
+        "attached_to_doctype": "User",
+        "attached_to_name": cashier,
+        "file_name": batch_name
+    }, "file_url")
+    
+    if not file_url:
+        pdfs = []
+        for receipt in receipts:
+            pdfs.append(frappe.get_doc("File", ensure_receipt_pdf(receipt)).get_content())
+            frappe.db.commit()
+        
+        # Attached to the cashier's User so they can open the private file
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": batch_name,
+            "attached_to_doctype": "User",
+            "attached_to_name": cashier,
+            "is_private": 1,
+            "content": merge_pdfs(pdfs)
+        })
+        file_doc.save(ignore_permissions=True)
+        file_url = file_doc.file_url
+    
+    publish(DOCUMENTS_EVENT, [cashier], {
+        "doctype": "Receipt Print",
+        "date": date,
+        "file_url": file_url,
+        "rendered": len(receipts),
+        "failed": 0
+    })
+    frappe.db.commit()
+    return file_url
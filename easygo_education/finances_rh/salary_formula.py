@@ -0,0 +1,188 @@
+"""Compiled salary structure formulas.
+
+Salary Component rows can carry a ``formula`` (for the Formula component
+type) and a ``condition``. Both use the sandboxed expression subset of
+``easygo_education.utils.condition_engine`` and are compiled once per
+structure version (its name and ``modified`` timestamp), with every
+variable reference checked against what is known at that point:
+
+- ``base_salary`` (alias ``basic_salary``), ``working_days``,
+  ``attendance_days``, ``leave_days`` and ``absent_days``;
+- the amount of every earlier component, by its name in lowercase with
+  underscores (``Transport Allowance`` becomes ``transport_allowance``);
+- ``gross_salary``, in deductions only.
+
+A compiled structure evaluates all of its components for one employee
+record, or for a batch of records, without touching the database. Errors
+name the component and never fall back to a silent default.
+"""
+
+import re
+
+import frappe
+from frappe import _
+from frappe.utils import flt
+
+from easygo_education.utils.condition_engine import ConditionError, compile_condition
+
+
+BASE_VARIABLES = ("base_salary", "basic_salary", "working_days", "attendance_days", "leave_days", "absent_days")
+
+# Legal monthly reference used to value formulas on the structure itself
+NOMINAL_WORKING_DAYS = 26
+
+CACHE_SIZE = 256
+
+_compiled_structures = {}
+
+
+class SalaryFormulaError(Exception):
+    """Raised when a salary component's formula or condition is invalid or fails."""
+
+
+def get_component_variable(component):
+    """Get the variable name later formulas use for a component's amount."""
+    variable = re.sub(r"\W+", "_", (component or "").strip().lower()).strip("_")
+    if not variable or variable[0].isdigit():
+        variable = f"c_{variable}"
+    return variable
+
+
+class CompiledComponent:
+    """One earning or deduction with its compiled formula and condition."""
+    
+    def __init__(self, row, parentfield, known):
+        self.component = row.component
+        self.component_type = row.component_type or "Fixed"
+        self.amount = flt(row.amount)
+        self.percentage = flt(row.percentage)
+        self.parentfield = parentfield
+        self.variable = get_component_variable(row.component)
+        
+        self.condition = self.compile(row.condition, _("condition"), known)
+        self.formula = None
+        if self.component_type == "Formula":
+            if not (row.formula or "").strip():
+                raise SalaryFormulaError(_("{0}: a Formula component needs a formula").format(self.component))
+            self.formula = self.compile(row.formula, _("formula"), known)
+    
+    def compile(self, source, label, known):
+        """Compile one expression and check it only uses known variables."""
+        if not (source or "").strip():
+            return None
+        
+        try:
+            condition = compile_condition(source.strip())
+        except ConditionError as e:
+            raise SalaryFormulaError(_("{0}: invalid {1}: {2}").format(self.component, label, str(e)))
+        
+        unknown = condition.names - known
+        if unknown:
+            raise SalaryFormulaError(_("{0}: unknown variable(s) in {1}: {2}").format(
+                self.component, label, ", ".join(sorted(unknown))
+            ))
+        return condition
+    
+    def evaluate(self, namespace, base):
+        """Get the component's amount for an employee's variables."""
+        try:
+            if self.condition and not self.condition(namespace):
+                return 0
+            if self.formula:
+                return flt(self.formula(namespace), 2)
+        except Exception as e:
+            raise SalaryFormulaError(_("{0}: {1}").format(self.component, str(e) or type(e).__name__))
+        
+        if self.component_type == "Percentage":
+            return flt(flt(base) * self.percentage / 100, 2)
+        return flt(self.amount, 2)
+
+
+class CompiledStructure:
+    """A salary structure's components, compiled and validated in order."""
+    
+    def __init__(self, name, base_salary, earnings, deductions):
+        self.name = name
+        self.base_salary = flt(base_salary)
+        self.earnings = []
+        self.deductions = []
+        
+        known = set(BASE_VARIABLES)
+        for parentfield, rows, target in (("earnings", earnings, self.earnings), ("deductions", deductions, self.deductions)):
+            if parentfield == "deductions":
+                known.add("gross_salary")
+            for row in rows:
+                component = CompiledComponent(row, parentfield, frozenset(known))
+                if component.variable in known:
+                    raise SalaryFormulaError(_("{0}: component name clashes with variable {1}").format(
+                        component.component, component.variable
+                    ))
+                known.add(component.variable)
+                target.append(component)
+    
+    def evaluate(self, record=None):
+        """Compute earnings, deductions and totals for one employee.
+        
+        ``record`` supplies working_days, attendance_days, leave_days and
+        absent_days; missing values count as zero.
+        """
+        record = record or {}
+        namespace = {variable: flt(record.get(variable)) for variable in BASE_VARIABLES}
+        namespace["base_salary"] = namespace["basic_salary"] = self.base_salary
+        
+        earnings = []
+        for component in self.earnings:
+            amount = component.evaluate(namespace, self.base_salary)
+            namespace[component.variable] = amount
+            earnings.append((component, amount))
+        
+        gross_salary = self.base_salary + sum(amount for component, amount in earnings)
+        namespace["gross_salary"] = gross_salary
+        
+        deductions = []
+        for component in self.deductions:
+            amount = component.evaluate(namespace, gross_salary)
+            namespace[component.variable] = amount
+            deductions.append((component, amount))
+        
+        total_deductions = sum(amount for component, amount in deductions)
+        return frappe._dict({
+            "basic_salary": self.base_salary,
+            "earnings": earnings,
+            "deductions": deductions,
+            "gross_salary": flt(gross_salary, 2),
+            "total_deductions": flt(total_deductions, 2),
+            "net_salary": flt(gross_salary - total_deductions, 2),
+        })
+    
+    def evaluate_batch(self, records):
+        """Evaluate many employees, returning ``(results, errors)`` keyed by record ``name``."""
+        results = {}
+        errors = {}
+        for record in records:
+            try:
+                results[record["name"]] = self.evaluate(record)
+            except SalaryFormulaError as e:
+                errors[record["name"]] = str(e)
+        return results, errors
+
+
+def compile_structure(name, modified, base_salary, earnings, deductions):
+    """Get a compiled structure, compiling it once per structure version."""
+    key = (name, str(modified))
+    compiled = _compiled_structures.get(key)
+    if compiled is None:
+        if len(_compiled_structures) >= CACHE_SIZE:
+            _compiled_structures.clear()
+        compiled = _compiled_structures[key] = CompiledStructure(name, base_salary, earnings, deductions)
+    return compiled
+
+
+def get_compiled_structure(structure):
+    """Get the compiled form of a Salary Structure document."""
+    return compile_structure(structure.name, structure.modified, structure.base_salary, structure.earnings, structure.deductions)
+
+
+def get_nominal_record():
+    """Get a full-attendance month used to value a structure's formulas on the structure itself."""
+    return {"working_days": NOMINAL_WORKING_DAYS, "attendance_days": NOMINAL_WORKING_DAYS}
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, flt, cint
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class CanteenMenu(Document):
     """Canteen Menu management."""
@@ -210,7 +212,7 @@ class CanteenMenu(Document):
         recipients.extend([s.student_email_id for s in student_emails if s.student_email_id])
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=list(set(recipients)),  # Remove duplicates
                 subject=_("New Menu Available - {0} for {1}").format(
                     self.meal_type, frappe.format(self.menu_date, "Date")
@@ -369,7 +371,7 @@ class CanteenMenu(Document):
         manager_user = frappe.db.get_value("Employee", self.prepared_by, "user_id")
         
         if manager_user:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[manager_user],
                 subject=_("High Food Waste Alert - {0}").format(self.menu_name),
                 message=self.get_waste_alert_message(waste_percentage),
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class MaintenanceRequest(Document):
     """Maintenance Request doctype controller."""
@@ -60,7 +62,7 @@ class MaintenanceRequest(Document):
             
             for recipient in recipients:
                 try:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[recipient],
                         subject=subject,
                         message=message
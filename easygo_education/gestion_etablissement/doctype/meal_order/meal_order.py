@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, get_datetime, now_datetime, flt, cint
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class MealOrder(Document):
     """Meal Order management."""
@@ -136,7 +138,7 @@ class MealOrder(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Meal Order Confirmation - {0}").format(self.name),
                 message=self.get_order_confirmation_message(),
@@ -242,7 +244,7 @@ class MealOrder(Document):
         
         # Send email notification
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Meal Order Ready - {0}").format(self.name),
                 message=self.get_ready_notification_message(),
@@ -291,7 +293,7 @@ class MealOrder(Document):
         student = frappe.get_doc("Student", self.student)
         
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Feedback Request - Meal Order {0}").format(self.name),
                 message=self.get_feedback_request_message(),
@@ -371,7 +373,7 @@ class MealOrder(Document):
         student = frappe.get_doc("Student", self.student)
         
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Meal Order Cancelled - {0}").format(self.name),
                 message=self.get_cancellation_message(reason),
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class PurchaseOrder(Document):
     """Purchase order management for procurement."""
@@ -180,7 +182,7 @@ class PurchaseOrder(Document):
         if purchase_users:
             recipients = [user.parent for user in purchase_users]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Purchase Order Submitted - {0}").format(self.name),
                 message=self.get_purchase_team_notification_message(),
@@ -231,7 +233,7 @@ class PurchaseOrder(Document):
         if accounts_users:
             recipients = [user.parent for user in accounts_users]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Purchase Order for Billing - {0}").format(self.name),
                 message=self.get_accounts_notification_message(),
@@ -323,7 +325,7 @@ class PurchaseOrder(Document):
         if purchase_users:
             recipients = [user.parent for user in purchase_users]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Delivery Update - PO {0}").format(self.name),
                 message=self.get_delivery_update_message(delivery_note),
@@ -390,7 +392,7 @@ class PurchaseOrder(Document):
         if accounts_users:
             recipients = [user.parent for user in accounts_users]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Billing Update - PO {0}").format(self.name),
                 message=self.get_billing_update_message(invoice_reference),
@@ -449,7 +451,7 @@ class PurchaseOrder(Document):
         # Notify supplier
         supplier = frappe.get_doc("Supplier", self.supplier)
         if supplier.email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[supplier.email_id],
                 subject=_("Purchase Order Cancelled - {0}").format(self.name),
                 message=self.get_cancellation_message(reason),
@@ -465,7 +467,7 @@ class PurchaseOrder(Document):
         
         if purchase_users:
             recipients = [user.parent for user in purchase_users]
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("PO Cancelled - {0}").format(self.name),
                 message=self.get_internal_cancellation_message(reason),
@@ -3,6 +3,8 @@ from frappe.model.document import Document
 from frappe.utils import nowdate, flt, cint
 from frappe import _
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class PurchaseRequest(Document):
     def validate(self):
@@ -65,7 +67,7 @@ class PurchaseRequest(Document):
         if self.approver:
             approver_email = frappe.db.get_value("Employee", self.approver, "user_id")
             if approver_email:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[approver_email],
                     subject=f"Purchase Request Approval Required: {self.title}",
                     message=f"""
@@ -97,7 +99,7 @@ class PurchaseRequest(Document):
         # Notify requester
         requester_email = frappe.db.get_value("Employee", self.requested_by, "user_id")
         if requester_email:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[requester_email],
                 subject=f"Purchase Request Approved: {self.title}",
                 message=f"""
@@ -129,7 +131,7 @@ class PurchaseRequest(Document):
         # Notify requester
         requester_email = frappe.db.get_value("Employee", self.requested_by, "user_id")
         if requester_email:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[requester_email],
                 subject=f"Purchase Request Rejected: {self.title}",
                 message=f"""
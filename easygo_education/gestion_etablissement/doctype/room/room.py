@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Room(Document):
     """Room doctype controller."""
@@ -70,7 +72,7 @@ class Room(Document):
             recipients = [user.email for user in facility_managers if user.email]
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Maintenance Due - Room {0}").format(self.room_number),
                     message=_("Room {0} ({1}) is due for maintenance on {2}.\n\nPlease schedule the maintenance accordingly.").format(
@@ -240,7 +242,7 @@ class Room(Document):
             recipients = [user.email for user in facility_managers if user.email]
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Room Issue Report - {0}").format(self.room_number),
                     message=_("An issue has been reported for Room {0} ({1}).\n\nIssue Details:\nType: {2}\nPriority: {3}\nDescription: {4}\nReported by: {5}\nDate: {6}").format(
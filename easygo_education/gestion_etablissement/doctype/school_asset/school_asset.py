@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, add_months, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class SchoolAsset(Document):
     """School Asset management."""
@@ -283,7 +285,7 @@ class SchoolAsset(Document):
             else:
                 return
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[asset_manager],
                 subject=subject,
                 message=message,
@@ -305,7 +307,7 @@ class SchoolAsset(Document):
             recipients.append(asset_manager)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=list(set(recipients)),  # Remove duplicates
                 subject=_("Asset Transfer: {0}").format(self.asset_name),
                 message=self.get_transfer_message(old_assignee, new_assignee, reason),
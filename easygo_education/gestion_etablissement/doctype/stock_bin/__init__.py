@@ -0,0 +1 @@
+# Stock Bin
@@ -0,0 +1,12 @@
+"""Stock Bin doctype controller.
+
+Current quantity, value and moving-average rate of an item in a warehouse,
+maintained from Stock Ledger by easygo_education.gestion_etablissement.stock_valuation.
+"""
+
+from frappe.model.document import Document
+
+
+class StockBin(Document):
+    """Stock Bin doctype controller (maintained by the system)."""
+    pass
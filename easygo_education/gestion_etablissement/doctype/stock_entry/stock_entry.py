@@ -5,6 +5,9 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days
 
+from easygo_education.gestion_etablissement.stock_valuation import get_bin_balances, get_bin_name, get_bin_qty
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class StockEntry(Document):
     """Stock entry management for inventory transactions."""
@@ -149,19 +152,11 @@ class StockEntry(Document):
     
     def get_item_valuation_rate(self, item_code, warehouse):
         """Get item valuation rate."""
-        # Get latest valuation rate from stock ledger
-        valuation_rate = frappe.db.sql("""
-            SELECT valuation_rate
-            FROM `tabStock Ledger Entry`
-            WHERE item_code = %s
-            AND warehouse = %s
-            AND is_cancelled = 0
-            ORDER BY posting_date DESC, posting_time DESC, creation DESC
-            LIMIT 1
-        """, (item_code, warehouse))
+        # Current moving-average rate from the item's stock bin
+        valuation_rate = frappe.db.get_value("Stock Bin", get_bin_name(item_code, warehouse), "valuation_rate")
         
         if valuation_rate:
-            return flt(valuation_rate[0][0])
+            return flt(valuation_rate)
         
         # Fallback to item's last purchase rate
         last_purchase_rate = frappe.db.get_value("Item", item_code, "last_purchase_rate")
@@ -192,16 +187,7 @@ class StockEntry(Document):
     
     def get_available_stock(self, item_code, warehouse):
         """Get available stock quantity."""
-        # Get current stock from stock ledger
-        stock_qty = frappe.db.sql("""
-            SELECT SUM(actual_qty)
-            FROM `tabStock Ledger Entry`
-            WHERE item_code = %s
-            AND warehouse = %s
-            AND is_cancelled = 0
-        """, (item_code, warehouse))[0][0] or 0
-        
-        return flt(stock_qty)
+        return get_bin_qty(item_code, warehouse)
     
     def send_stock_entry_notifications(self):
         """Send stock entry notifications."""
@@ -225,7 +211,7 @@ class StockEntry(Document):
         if stock_managers:
             recipients = [user.parent for user in stock_managers]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Stock Entry Submitted - {0}").format(self.name),
                 message=self.get_stock_manager_notification_message(),
@@ -291,7 +277,7 @@ class StockEntry(Document):
             warehouse_managers = frappe.db.get_value("Warehouse", warehouse, "warehouse_manager")
             
             if warehouse_managers:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[warehouse_managers],
                     subject=_("Stock Movement - Warehouse {0}").format(warehouse),
                     message=self.get_warehouse_notification_message(warehouse),
@@ -344,7 +330,7 @@ class StockEntry(Document):
                 recipients.append(to_manager)
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Material Transfer - {0}").format(self.name),
                     message=self.get_transfer_notification_message(),
@@ -480,18 +466,11 @@ class StockEntry(Document):
             warehouses.add(self.to_warehouse)
         
         for warehouse in warehouses:
-            stock_data = frappe.db.sql("""
-                SELECT item_code, SUM(actual_qty) as qty, AVG(valuation_rate) as rate
-                FROM `tabStock Ledger Entry`
-                WHERE warehouse = %s
-                AND is_cancelled = 0
-                GROUP BY item_code
-                HAVING qty > 0
-            """, warehouse, as_dict=True)
+            stock_data = [b for b in get_bin_balances(warehouse=warehouse) if flt(b.actual_qty) > 0]
             
             warehouse_stock[warehouse] = {
                 "total_items": len(stock_data),
-                "total_value": sum(flt(item.qty) * flt(item.rate) for item in stock_data)
+                "total_value": sum(flt(item.stock_value) for item in stock_data)
             }
         
         # Get recent stock entries
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import flt, getdate, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class StockItem(Document):
     """Stock Item management."""
@@ -203,7 +205,7 @@ class StockItem(Document):
             else:
                 return
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[stock_manager],
                 subject=subject,
                 message=message,
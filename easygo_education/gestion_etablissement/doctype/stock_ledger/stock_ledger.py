@@ -3,6 +3,12 @@ from frappe.model.document import Document
 from frappe.utils import nowdate, nowtime, flt, cint
 from frappe import _
 
+from easygo_education.gestion_etablissement.stock_valuation import (
+    cancel_bin_entry,
+    get_bin_balances,
+    make_bin_entry,
+)
+
 
 class StockLedger(Document):
     def validate(self):
@@ -36,99 +42,14 @@ class StockLedger(Document):
             self.item_name = frappe.db.get_value("Stock Item", self.item_code, "item_name")
             
     def before_submit(self):
-        self.calculate_stock_value()
-        self.update_stock_balance()
-        
-    def calculate_stock_value(self):
-        """Calculate stock value and differences"""
-        if not self.valuation_rate:
-            # Get last valuation rate
-            last_sle = frappe.db.sql("""
-                SELECT valuation_rate, stock_value
-                FROM `tabStock Ledger`
-                WHERE item_code = %s AND warehouse = %s
-                AND posting_date <= %s AND posting_time <= %s
-                AND docstatus = 1 AND name != %s
-                ORDER BY posting_date DESC, posting_time DESC, creation DESC
-                LIMIT 1
-            """, (self.item_code, self.warehouse, self.posting_date, self.posting_time, self.name), as_dict=True)
-            
-            if last_sle:
-                self.valuation_rate = last_sle[0].valuation_rate or 0
-            else:
-                # Get standard rate from item
-                self.valuation_rate = frappe.db.get_value("Stock Item", self.item_code, "standard_rate") or 0
-                
-        # Calculate stock value difference
-        self.stock_value_difference = flt(self.actual_qty) * flt(self.valuation_rate)
-        
-        # Get previous stock value
-        prev_stock_value = self.get_previous_stock_value()
-        self.stock_value = flt(prev_stock_value) + flt(self.stock_value_difference)
-        
-    def get_previous_stock_value(self):
-        """Get previous stock value"""
-        prev_sle = frappe.db.sql("""
-            SELECT stock_value
-            FROM `tabStock Ledger`
-            WHERE item_code = %s AND warehouse = %s
-            AND posting_date <= %s AND posting_time <= %s
-            AND docstatus = 1 AND name != %s
-            ORDER BY posting_date DESC, posting_time DESC, creation DESC
-            LIMIT 1
-        """, (self.item_code, self.warehouse, self.posting_date, self.posting_time, self.name))
-        
-        return prev_sle[0][0] if prev_sle else 0
-        
-    def update_stock_balance(self):
-        """Update quantity after transaction"""
-        prev_qty = self.get_previous_qty()
-        self.qty_after_transaction = flt(prev_qty) + flt(self.actual_qty)
-        
-    def get_previous_qty(self):
-        """Get previous quantity balance"""
-        prev_sle = frappe.db.sql("""
-            SELECT qty_after_transaction
-            FROM `tabStock Ledger`
-            WHERE item_code = %s AND warehouse = %s
-            AND posting_date <= %s AND posting_time <= %s
-            AND docstatus = 1 AND name != %s
-            ORDER BY posting_date DESC, posting_time DESC, creation DESC
-            LIMIT 1
-        """, (self.item_code, self.warehouse, self.posting_date, self.posting_time, self.name))
-        
-        return prev_sle[0][0] if prev_sle else 0
+        """Apply the entry to its stock bin and record the balance after it"""
+        make_bin_entry(self)
         
     def on_submit(self):
-        self.update_item_stock_balance()
         self.create_stock_analytics()
         
     def on_cancel(self):
-        self.revert_stock_balance()
-        
-    def update_item_stock_balance(self):
-        """Update stock balance in Stock Item"""
-        current_stock = frappe.db.sql("""
-            SELECT SUM(actual_qty) as total_qty,
-                   SUM(stock_value_difference) as total_value
-            FROM `tabStock Ledger`
-            WHERE item_code = %s AND warehouse = %s AND docstatus = 1
-        """, (self.item_code, self.warehouse), as_dict=True)
-        
-        if current_stock:
-            total_qty = current_stock[0].total_qty or 0
-            total_value = current_stock[0].total_value or 0
-            
-            # Update item stock balance
-            frappe.db.sql("""
-                UPDATE `tabStock Item`
-                SET current_stock = %s, stock_value = %s
-                WHERE name = %s
-            """, (total_qty, total_value, self.item_code))
-            
-    def revert_stock_balance(self):
-        """Revert stock balance on cancellation"""
-        self.update_item_stock_balance()
+        cancel_bin_entry(self)
         
     def create_stock_analytics(self):
         """Create stock movement analytics"""
@@ -148,17 +69,21 @@ class StockLedger(Document):
 @frappe.whitelist()
 def get_stock_balance(item_code, warehouse=None, posting_date=None):
     """Get current stock balance for item"""
-    conditions = ["item_code = %s", "docstatus = 1"]
-    values = [item_code]
+    if not posting_date:
+        # Current balances are kept in the stock bins
+        bins = get_bin_balances(item_code, warehouse)
+        return {
+            "balance": sum(flt(b.actual_qty) for b in bins),
+            "value": sum(flt(b.stock_value) for b in bins)
+        }
+        
+    conditions = ["item_code = %s", "docstatus = 1", "posting_date <= %s"]
+    values = [item_code, posting_date]
     
     if warehouse:
         conditions.append("warehouse = %s")
         values.append(warehouse)
         
-    if posting_date:
-        conditions.append("posting_date <= %s")
-        values.append(posting_date)
-        
     result = frappe.db.sql("""
         SELECT SUM(actual_qty) as balance,
                SUM(stock_value_difference) as value
@@ -0,0 +1 @@
+# Stock Repost Queue
@@ -0,0 +1,30 @@
+"""Stock Repost Queue doctype controller.
+
+Pending replays of an item's stock ledger after back-dated entries or
+cancellations, processed by easygo_education.gestion_etablissement.stock_valuation.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+
+class StockRepostQueue(Document):
+    """Stock Repost Queue doctype controller (maintained by the system)."""
+    
+    @frappe.whitelist()
+    def retry(self):
+        """Queue a failed repost again."""
+        frappe.only_for("System Manager")
+        
+        if self.status != "Failed":
+            frappe.throw(_("Only failed reposts can be retried"))
+        
+        self.db_set({"status": "Queued", "error_log": None})
+        frappe.enqueue(
+            "easygo_education.gestion_etablissement.stock_valuation.process_repost_queue",
+            queue="long",
+            job_id="stock_repost_queue",
+            deduplicate=True,
+            enqueue_after_commit=True
+        )
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, get_time, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class TransportRoute(Document):
     """Transport Route management."""
@@ -219,7 +221,7 @@ class TransportRoute(Document):
                             self.send_route_sms(guardian.mobile_number, message)
             
             if recipient_list:
-                frappe.sendmail(
+                queue_notification(
                     recipients=list(set(recipient_list)),  # Remove duplicates
                     subject=_("Transport Route Update: {0}").format(self.route_name),
                     message=self.get_route_update_message(message),
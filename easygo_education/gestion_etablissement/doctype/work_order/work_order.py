@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, time_diff_in_hours, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class WorkOrder(Document):
     """Work order management for maintenance and facility operations."""
@@ -156,7 +158,7 @@ class WorkOrder(Document):
         if not self.assigned_to:
             return
         
-        frappe.sendmail(
+        queue_notification(
             recipients=[self.assigned_to],
             subject=_("Work Order Assigned - {0}").format(self.name),
             message=self.get_assignment_notification_message(),
@@ -211,7 +213,7 @@ class WorkOrder(Document):
         if managers:
             recipients = [user.parent for user in managers]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("New Work Order - {0}").format(self.name),
                 message=self.get_manager_notification_message(),
@@ -263,7 +265,7 @@ class WorkOrder(Document):
     
     def send_requester_notification(self):
         """Send notification to work order requester."""
-        frappe.sendmail(
+        queue_notification(
             recipients=[self.requested_by],
             subject=_("Work Order Status Update - {0}").format(self.name),
             message=self.get_requester_notification_message(),
@@ -318,7 +320,7 @@ class WorkOrder(Document):
         """Send completion notifications."""
         # Notify requester
         if self.requested_by:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.requested_by],
                 subject=_("Work Order Completed - {0}").format(self.name),
                 message=self.get_completion_notification_message(),
@@ -335,7 +337,7 @@ class WorkOrder(Document):
         if managers:
             recipients = [user.parent for user in managers]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Work Order Completed - {0}").format(self.name),
                 message=self.get_manager_completion_message(),
@@ -428,7 +430,7 @@ class WorkOrder(Document):
     def send_approval_notification(self):
         """Send approval notification."""
         if self.assigned_to:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.assigned_to],
                 subject=_("Work Order Approved - {0}").format(self.name),
                 message=_("Work order {0} has been approved. You can now proceed with the work.").format(self.name),
@@ -445,7 +447,7 @@ class WorkOrder(Document):
             recipients.append(self.requested_by)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Work Order Cancelled - {0}").format(self.name),
                 message=_("Work order {0} has been cancelled. Reason: {1}").format(
@@ -0,0 +1,329 @@
+"""Stock balance bins with moving-average valuation.
+
+Each item and warehouse has one Stock Bin holding its current quantity,
+value and valuation rate. Submitting or cancelling a Stock Ledger entry
+locks the bin row, applies the entry to it and writes the resulting
+balance back to the entry, so no "latest row before this posting" query
+or history re-sum is needed.
+
+Incoming entries add their quantity at the incoming rate; outgoing entries
+leave at the bin's current moving-average rate. Entries posted before the
+bin's last posting (back-dated entries, and cancellations of older
+entries) change the balance of every later entry, so the bin is updated
+immediately and a Stock Repost Queue row is added to replay the item's
+ledger from that point in the background.
+"""
+
+import datetime
+
+import frappe
+from frappe import _
+from frappe.utils import flt, get_time, getdate, now
+
+
+BIN_DOCTYPE = "Stock Bin"
+REPOST_DOCTYPE = "Stock Repost Queue"
+
+
+def apply_entry(qty, value, rate, actual_qty, incoming_rate=None):
+    """Apply one ledger movement to a moving-average balance.
+    
+    Returns the new (qty, value, rate) and the entry's stock value
+    difference. Incoming quantities are valued at ``incoming_rate`` (the
+    current rate when not given) and outgoing ones at the current rate.
+    """
+    previous_qty, previous_value, rate = flt(qty), flt(value), flt(rate)
+    actual_qty = flt(actual_qty)
+    qty = previous_qty + actual_qty
+    
+    if actual_qty > 0 and incoming_rate is not None:
+        incoming_rate = flt(incoming_rate)
+    else:
+        incoming_rate = rate
+    
+    if actual_qty > 0 and previous_qty > 0:
+        value = previous_value + actual_qty * incoming_rate
+        rate = value / qty
+    else:
+        # Receipts into empty or negative stock restart at the incoming
+        # rate; issues leave at the current rate
+        if actual_qty > 0:
+            rate = incoming_rate
+        value = qty * rate
+    
+    return (qty, value, rate), value - previous_value
+
+
+def get_posting_datetime(posting_date, posting_time=None):
+    """Combine a posting date and time into a comparable datetime."""
+    return datetime.datetime.combine(getdate(posting_date), get_time(posting_time or "00:00:00"))
+
+
+def get_bin_name(item_code, warehouse):
+    """Get the name of an item's bin in a warehouse (autoname format:{item_code}-{warehouse})."""
+    return f"{item_code}-{warehouse}"
+
+
+def get_locked_bin(item_code, warehouse):
+    """Get an item's bin in a warehouse, creating it if needed, locked until commit."""
+    name = get_bin_name(item_code, warehouse)
+    timestamp = now()
+    user = frappe.session.user
+    
+    frappe.db.sql(f"""
+        INSERT IGNORE INTO `tab{BIN_DOCTYPE}`
+            (name, creation, modified, owner, modified_by, docstatus,
+             item_code, warehouse, actual_qty, valuation_rate, stock_value)
+        VALUES (%s, %s, %s, %s, %s, 0, %s, %s, 0, 0, 0)
+    """, (name, timestamp, timestamp, user, user, item_code, warehouse))
+    
+    return frappe.db.sql(f"""
+        SELECT name, actual_qty, valuation_rate, stock_value, posting_date, posting_time
+        FROM `tab{BIN_DOCTYPE}`
+        WHERE name = %s
+        FOR UPDATE
+    """, name, as_dict=True)[0]
+
+
+def set_bin_balance(bin_name, qty, value, rate, posting_date=None, posting_time=None):
+    """Write a bin's balance and, when given, its last posting."""
+    values = {"name": bin_name, "qty": qty, "value": value, "rate": rate, "modified": now()}
+    posting = ""
+    if posting_date:
+        posting = ", posting_date = %(posting_date)s, posting_time = %(posting_time)s"
+        values.update({"posting_date": posting_date, "posting_time": posting_time})
+    
+    frappe.db.sql(f"""
+        UPDATE `tab{BIN_DOCTYPE}`
+        SET actual_qty = %(qty)s, stock_value = %(value)s, valuation_rate = %(rate)s,
+            modified = %(modified)s{posting}
+        WHERE name = %(name)s
+    """, values)
+
+
+def is_backdated(entry, stock_bin):
+    """Check whether an entry is posted before the bin's last posting."""
+    if not stock_bin.posting_date:
+        return False
+    return get_posting_datetime(entry.posting_date, entry.posting_time) < get_posting_datetime(stock_bin.posting_date, stock_bin.posting_time)
+
+
+def make_bin_entry(entry):
+    """Apply a submitted Stock Ledger entry to its bin and set the entry's balance fields."""
+    stock_bin = get_locked_bin(entry.item_code, entry.warehouse)
+    
+    incoming_rate = None
+    if flt(entry.actual_qty) > 0:
+        incoming_rate = (
+            flt(entry.valuation_rate)
+            or flt(stock_bin.valuation_rate)
+            or flt(frappe.db.get_value("Stock Item", entry.item_code, "standard_rate"))
+        )
+    
+    (qty, value, rate), value_difference = apply_entry(
+        stock_bin.actual_qty, stock_bin.stock_value, stock_bin.valuation_rate, entry.actual_qty, incoming_rate
+    )
+    
+    entry.incoming_rate = incoming_rate or 0
+    entry.stock_value_difference = value_difference
+    entry.qty_after_transaction = qty
+    entry.stock_value = value
+    entry.valuation_rate = rate
+    
+    backdated = is_backdated(entry, stock_bin)
+    if backdated:
+        set_bin_balance(stock_bin.name, qty, value, rate)
+        queue_repost(entry.item_code, entry.warehouse, entry.posting_date, entry.posting_time)
+    else:
+        set_bin_balance(stock_bin.name, qty, value, rate, entry.posting_date, entry.posting_time)
+    
+    update_item_stock(entry.item_code)
+
+
+def cancel_bin_entry(entry):
+    """Reverse a cancelled Stock Ledger entry in its bin."""
+    stock_bin = get_locked_bin(entry.item_code, entry.warehouse)
+    
+    qty = flt(stock_bin.actual_qty) - flt(entry.actual_qty)
+    value = flt(stock_bin.stock_value) - flt(entry.stock_value_difference)
+    rate = value / qty if qty > 0 else flt(stock_bin.valuation_rate)
+    set_bin_balance(stock_bin.name, qty, value, rate)
+    
+    # Outgoing entries after it were valued at a rate this entry contributed to
+    if is_backdated(entry, stock_bin):
+        queue_repost(entry.item_code, entry.warehouse, entry.posting_date, entry.posting_time)
+    
+    update_item_stock(entry.item_code)
+
+
+def update_item_stock(item_code):
+    """Set an item's current stock to the total of its bins."""
+    frappe.db.sql(f"""
+        UPDATE `tabStock Item`
+        SET current_stock = (
+            SELECT IFNULL(SUM(actual_qty), 0) FROM `tab{BIN_DOCTYPE}` WHERE item_code = %(item_code)s
+        )
+        WHERE name = %(item_code)s
+    """, {"item_code": item_code})
+
+
+def get_bin_balances(item_code=None, warehouse=None):
+    """Get current bin balances, optionally for one item and/or warehouse."""
+    filters = {}
+    if item_code:
+        filters["item_code"] = item_code
+    if warehouse:
+        filters["warehouse"] = warehouse
+    
+    return frappe.get_all(BIN_DOCTYPE,
+        filters=filters,
+        fields=["item_code", "warehouse", "actual_qty", "valuation_rate", "stock_value"]
+    )
+
+
+def get_bin_qty(item_code, warehouse):
+    """Get the current quantity of an item in a warehouse."""
+    return flt(frappe.db.get_value(BIN_DOCTYPE, get_bin_name(item_code, warehouse), "actual_qty"))
+
+
+def queue_repost(item_code, warehouse, posting_date, posting_time=None):
+    """Queue a repost of an item's ledger from a posting, merging with a pending one."""
+    pending = frappe.db.get_value(REPOST_DOCTYPE,
+        {"item_code": item_code, "warehouse": warehouse, "status": "Queued"},
+        ["name", "posting_date", "posting_time"],
+        as_dict=True
+    )
+    
+    if pending:
+        if get_posting_datetime(posting_date, posting_time) < get_posting_datetime(pending.posting_date, pending.posting_time):
+            frappe.db.set_value(REPOST_DOCTYPE, pending.name,
+                {"posting_date": posting_date, "posting_time": posting_time}
+            )
+    else:
+        frappe.get_doc({
+            "doctype": REPOST_DOCTYPE,
+            "item_code": item_code,
+            "warehouse": warehouse,
+            "posting_date": posting_date,
+            "posting_time": posting_time,
+            "status": "Queued"
+        }).insert(ignore_permissions=True)
+    
+    frappe.enqueue(
+        "easygo_education.gestion_etablissement.stock_valuation.process_repost_queue",
+        queue="long",
+        job_id="stock_repost_queue",
+        deduplicate=True,
+        enqueue_after_commit=True
+    )
+
+
+def process_repost_queue():
+    """Run queued reposts oldest first (also scheduled hourly to pick up stragglers)."""
+    for name in frappe.get_all(REPOST_DOCTYPE, filters={"status": "Queued"}, order_by="creation asc", pluck="name"):
+        repost = frappe.db.get_value(REPOST_DOCTYPE, name,
+            ["item_code", "warehouse", "posting_date", "posting_time"], as_dict=True
+        )
+        frappe.db.set_value(REPOST_DOCTYPE, name, "status", "In Progress")
+        frappe.db.commit()
+        
+        try:
+            count = repost_item_valuation(repost.item_code, repost.warehouse, repost.posting_date, repost.posting_time)
+        except Exception:
+            frappe.db.rollback()
+            frappe.db.set_value(REPOST_DOCTYPE, name, {"status": "Failed", "error_log": frappe.get_traceback()})
+            frappe.db.commit()
+            frappe.log_error(f"Stock repost {name} failed for {repost.item_code} in {repost.warehouse}", "Stock Repost")
+            continue
+        
+        frappe.db.set_value(REPOST_DOCTYPE, name, {"status": "Completed", "reposted_entries": count})
+        frappe.db.commit()
+
+
+def repost_item_valuation(item_code, warehouse, posting_date=None, posting_time=None):
+    """Replay an item's ledger in a warehouse from a posting and reset its bin.
+    
+    Without a posting date the whole ledger is replayed. Returns the number
+    of entries reposted.
+    """
+    # Lock the bin first so entries submitted meanwhile wait for the replay
+    stock_bin = get_locked_bin(item_code, warehouse)
+    values = {"item_code": item_code, "warehouse": warehouse}
+    qty = value = rate = 0
+    after = ""
+    
+    if posting_date:
+        values["posting"] = get_posting_datetime(posting_date, posting_time)
+        after = "AND TIMESTAMP(posting_date, posting_time) >= %(posting)s"
+        opening = frappe.db.sql("""
+            SELECT qty_after_transaction, stock_value, valuation_rate
+            FROM `tabStock Ledger`
+            WHERE item_code = %(item_code)s AND warehouse = %(warehouse)s AND docstatus = 1
+            AND TIMESTAMP(posting_date, posting_time) < %(posting)s
+            ORDER BY posting_date DESC, posting_time DESC, creation DESC
+            LIMIT 1
+        """, values)
+        if opening:
+            qty, value, rate = (flt(v) for v in opening[0])
+    
+    entries = frappe.db.sql(f"""
+        SELECT name, actual_qty, incoming_rate, stock_value_difference, posting_date, posting_time
+        FROM `tabStock Ledger`
+        WHERE item_code = %(item_code)s AND warehouse = %(warehouse)s AND docstatus = 1
+        {after}
+        ORDER BY posting_date ASC, posting_time ASC, creation ASC
+    """, values, as_dict=True)
+    
+    for entry in entries:
+        # An incoming entry keeps the rate it came in at
+        incoming_rate = None
+        if flt(entry.actual_qty) > 0:
+            incoming_rate = flt(entry.incoming_rate) or flt(entry.stock_value_difference) / flt(entry.actual_qty)
+        
+        (qty, value, rate), value_difference = apply_entry(qty, value, rate, entry.actual_qty, incoming_rate)
+        frappe.db.sql("""
+            UPDATE `tabStock Ledger`
+            SET qty_after_transaction = %s, stock_value = %s, valuation_rate = %s, stock_value_difference = %s
+            WHERE name = %s
+        """, (qty, value, rate, value_difference, entry.name))
+    
+    if entries:
+        last = entries[-1]
+        set_bin_balance(stock_bin.name, qty, value, rate, last.posting_date, last.posting_time)
+    else:
+        set_bin_balance(stock_bin.name, qty, value, rate)
+    
+    update_item_stock(item_code)
+    return len(entries)
+
+
+@frappe.whitelist()
+def rebuild_stock_bins():
+    """Queue a full repost of every item and warehouse in the stock ledger."""
+    frappe.only_for("System Manager")
+    
+    pairs = get_ledger_pairs()
+    frappe.enqueue(
+        "easygo_education.gestion_etablissement.stock_valuation.rebuild_bins",
+        queue="long",
+        timeout=3600,
+        pairs=pairs,
+        enqueue_after_commit=True
+    )
+    return {"message": _("Rebuilding {0} stock bins").format(len(pairs)), "count": len(pairs)}
+
+
+def get_ledger_pairs():
+    """Get every item and warehouse with submitted stock ledger entries."""
+    return frappe.db.sql("""
+        SELECT DISTINCT item_code, warehouse
+        FROM `tabStock Ledger`
+        WHERE docstatus = 1
+    """, as_dict=True)
+
+
+def rebuild_bins(pairs):
+    """Replay the full ledger of each item and warehouse, one commit per bin."""
+    for pair in pairs:
+        repost_item_valuation(pair["item_code"], pair["warehouse"])
+        frappe.db.commit()
@@ -129,26 +129,70 @@ after_install = "easygo_education.patches.v1_bootstrap.execute"
 #     },
 # }
 
+doc_events = {
+    "Student Attendance": {
+        "on_update": [
+            "easygo_education.api.portal_cache.on_student_record_change",
+            "easygo_education.vie_scolaire.attendance_rollup.on_attendance_change",
+        ],
+        "on_trash": [
+            "easygo_education.api.portal_cache.on_student_record_change",
+            "easygo_education.vie_scolaire.attendance_rollup.on_attendance_change",
+        ],
+    },
+    "Grade": {
+        "on_update": "easygo_education.api.portal_cache.on_grade_change",
+        "on_trash": "easygo_education.api.portal_cache.on_grade_change",
+    },
+    "Homework": {
+        "on_update": "easygo_education.api.portal_cache.on_homework_change",
+        "on_trash": "easygo_education.api.portal_cache.on_homework_change",
+    },
+    "Homework Submission": {
+        "on_update": "easygo_education.api.portal_cache.on_student_record_change",
+        "on_trash": "easygo_education.api.portal_cache.on_student_record_change",
+    },
+    "Fee Bill": {
+        "on_submit": "easygo_education.api.portal_cache.on_student_record_change",
+        "on_cancel": "easygo_education.api.portal_cache.on_student_record_change",
+        "on_update_after_submit": "easygo_education.api.portal_cache.on_student_record_change",
+    },
+    "Course Schedule": {
+        "on_update": "easygo_education.api.portal_cache.on_course_schedule_change",
+        "on_trash": "easygo_education.api.portal_cache.on_course_schedule_change",
+    },
+}
+
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-#     "daily": [
-#         "easygo_education.jobs.daily.check_overdue_fees",
-#         "easygo_education.jobs.daily.maintenance_reminders",
-#         "easygo_education.jobs.daily.attendance_anomalies",
-#     ],
-#     "weekly": [
-#         "easygo_education.jobs.weekly.attendance_summaries",
-#         "easygo_education.jobs.weekly.teacher_load_analysis",
-#         "easygo_education.jobs.weekly.budget_burn_rate",
-#     ],
-#     "monthly": [
-#         "easygo_education.jobs.monthly.massar_exports",
-#         "easygo_education.jobs.monthly.payroll_checks",
-#         "easygo_education.jobs.monthly.asset_rollup",
-#     ],
-# }
+scheduler_events = {
+    "hourly": [
+        # Pick up stock reposts whose background job was lost
+        "easygo_education.gestion_etablissement.stock_valuation.process_repost_queue",
+    ],
+    "daily": [
+        "easygo_education.vie_scolaire.attendance_rollup.verify_recent_attendance_rollups",
+        # Print-ready receipt batches of the previous day, one per cashier
+        "easygo_education.finances_rh.receipt_rendering.build_end_of_day_batches",
+    ],
+    "cron": {
+        # Drain notifications held back by the dispatcher rate limits
+        "* * * * *": [
+            "easygo_education.administration_comms.notification_dispatcher.dispatch_pending",
+        ],
+        # Nightly window: each site queues its jobs in its own hour (jobs.orchestrator)
+        "0 0-3 * * *": [
+            "easygo_education.jobs.orchestrator.run_daily_jobs",
+        ],
+        "0 0-3 * * 0": [
+            "easygo_education.jobs.orchestrator.run_weekly_jobs",
+        ],
+        "0 0-3 1 * *": [
+            "easygo_education.jobs.orchestrator.run_monthly_jobs",
+        ],
+    },
+}
 
 # Testing
 # -------
@@ -1 +1,120 @@
-# Daily Jobs
+"""Daily scheduled jobs for EasyGo Education."""
+
+import frappe
+from frappe import _
+from frappe.utils import today, add_days, getdate
+
+from easygo_education.finances_rh.fee_reminders import send_overdue_fee_reminders
+
+
+def check_overdue_fees():
+    """Remind guardians of overdue fee bills, one digest per household."""
+    digests = send_overdue_fee_reminders()
+    frappe.db.commit()
+    print(f"Sent {digests} overdue fee digests")
+    return digests
+
+
+def maintenance_reminders():
+    """Send maintenance reminders for scheduled work orders."""
+    # Get maintenance requests due today or overdue
+    due_maintenance = frappe.get_all(
+        "Maintenance Request",
+        filters={
+            "status": ["in", ["Open", "In Progress"]],
+            "scheduled_date": ["<=", today()]
+        },
+        fields=["name", "asset", "description", "assigned_to", "scheduled_date"]
+    )
+    
+    if not due_maintenance:
+        return 0
+        
+    # Group by assigned person
+    assignments = {}
+    for request in due_maintenance:
+        if request.assigned_to:
+            if request.assigned_to not in assignments:
+                assignments[request.assigned_to] = []
+            assignments[request.assigned_to].append(request)
+    
+    # Send reminders
+    for user, requests in assignments.items():
+        try:
+            user_email = frappe.db.get_value("User", user, "email")
+            if user_email:
+                request_list = "<ul>"
+                for req in requests:
+                    request_list += f"<li>{req.name}: {req.description} (Due: {frappe.utils.formatdate(req.scheduled_date)})</li>"
+                request_list += "</ul>"
+                
+                frappe.sendmail(
+                    recipients=[user_email],
+                    subject=_("Maintenance Reminders - {0} items").format(len(requests)),
+                    message=_("Dear Team Member,<br><br>You have {0} maintenance requests that are due or overdue:<br><br>{1}<br><br>Please update the status accordingly.<br><br>Thank you.").format(
+                        len(requests), request_list
+                    )
+                )
+                
+        except Exception as e:
+            frappe.log_error(f"Failed to send maintenance reminder to {user}: {str(e)}")
+            
+    frappe.db.commit()
+    print(f"Sent maintenance reminders to {len(assignments)} users")
+    return len(due_maintenance)
+
+
+def attendance_anomalies():
+    """Check for attendance anomalies and alert administrators."""
+    # Get students with consecutive absences (3+ days)
+    three_days_ago = add_days(today(), -3)
+    
+    # This is a simplified check - in a real implementation, 
+    # we'd need more sophisticated logic
+    anomalies = frappe.db.sql("""
+        SELECT student, student_name, COUNT(*) as consecutive_absences
+        FROM `tabStudent Attendance`
+        WHERE status = 'Absent'
+        AND attendance_date >= %s
+        AND attendance_date <= %s
+        GROUP BY student
+        HAVING COUNT(*) >= 3
+    """, (three_days_ago, today()), as_dict=True)
+    
+    if not anomalies:
+        return 0
+        
+    # Send alert to administrators
+    admin_users = frappe.get_all(
+        "Has Role",
+        filters={"role": "Principal"},
+        fields=["parent"]
+    )
+    
+    if admin_users:
+        admin_emails = [frappe.db.get_value("User", user.parent, "email") 
+                      for user in admin_users]
+        admin_emails = [email for email in admin_emails if email]
+        
+        if admin_emails:
+            anomaly_list = "<ul>"
+            for anomaly in anomalies:
+                anomaly_list += f"<li>{anomaly.student_name} ({anomaly.student}): {anomaly.consecutive_absences} consecutive absences</li>"
+            anomaly_list += "</ul>"
+            
+            frappe.sendmail(
+                recipients=admin_emails,
+                subject=_("Attendance Anomalies Alert - {0} students").format(len(anomalies)),
+                message=_("Dear Administrator,<br><br>The following students have consecutive absences that may require attention:<br><br>{0}<br><br>Please review and take appropriate action.<br><br>Best regards,<br>EasyGo Education System").format(anomaly_list)
+            )
+            
+    frappe.db.commit()
+    print(f"Sent attendance anomaly alerts for {len(anomalies)} students")
+    return len(anomalies)
+
+
+def run_all_daily_jobs():
+    """Queue all daily jobs to run concurrently on their queues."""
+    from easygo_education.jobs.orchestrator import enqueue_jobs
+    
+    return enqueue_jobs("Daily", force=True)
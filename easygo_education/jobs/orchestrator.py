@@ -0,0 +1,187 @@
+"""Scheduled job orchestrator.
+
+The daily, weekly and monthly jobs are registered in ``JOBS`` with the
+RQ queue they run on and their time budget (the RQ job timeout). The
+scheduler calls ``run_daily_jobs``, ``run_weekly_jobs`` and
+``run_monthly_jobs`` every hour of the nightly window; each site only
+starts once the window reaches its shard (its name hashed over
+``SHARD_COUNT`` hours), so a bench hosting many schools doesn't queue
+every site's jobs at midnight.
+
+Each job is queued as its own background job, so independent jobs of a
+site run concurrently on the workers of their queues. Every run is
+recorded as a Scheduled Job Run with its status, duration and the
+number of rows the job reports, and a job is queued at most once per
+period (day, ISO week or month) unless forced. Jobs let their errors
+raise so a failed run is recorded as "Failed" with its traceback.
+"""
+
+import time
+import zlib
+
+import frappe
+from frappe import _
+from frappe.utils import getdate, now, now_datetime
+from frappe.utils.background_jobs import is_job_enqueued
+
+
+# Hours of the nightly window (cron "0 0-3") the sites are spread over
+SHARD_COUNT = 4
+
+
+class ScheduledJob:
+    """A registered job with its queue and time budget in seconds."""
+    
+    def __init__(self, method, queue="default", timeout=600):
+        self.method = method
+        self.queue = queue
+        self.timeout = timeout
+
+
+JOBS = {
+    "Daily": [
+        ScheduledJob("easygo_education.jobs.daily.check_overdue_fees", "short", 900),
+        ScheduledJob("easygo_education.jobs.daily.maintenance_reminders", "short", 600),
+        ScheduledJob("easygo_education.jobs.daily.attendance_anomalies", "default", 900),
+    ],
+    "Weekly": [
+        ScheduledJob("easygo_education.jobs.weekly.attendance_summaries", "long", 1800),
+        ScheduledJob("easygo_education.jobs.weekly.teacher_load_analysis", "default", 1200),
+        ScheduledJob("easygo_education.jobs.weekly.budget_burn_rate", "default", 900),
+    ],
+    "Monthly": [
+        ScheduledJob("easygo_education.jobs.monthly.massar_exports", "long", 3600),
+        ScheduledJob("easygo_education.jobs.monthly.payroll_checks", "default", 1800),
+        ScheduledJob("easygo_education.jobs.monthly.asset_rollup", "default", 900),
+    ],
+}
+
+
+def get_period(frequency, date=None):
+    """Get the period a frequency's jobs run once in."""
+    date = getdate(date)
+    if frequency == "Weekly":
+        year, week, _weekday = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    elif frequency == "Monthly":
+        return date.strftime("%Y-%m")
+    return str(date)
+
+
+def get_site_shard(site):
+    """Get the hour of the nightly window a site starts its jobs in."""
+    return zlib.crc32((site or "").encode()) % SHARD_COUNT
+
+
+def run_daily_jobs():
+    """Queue the daily jobs in this site's slot of the nightly window."""
+    run_scheduled("Daily")
+
+
+def run_weekly_jobs():
+    """Queue the weekly jobs in this site's slot of the nightly window."""
+    run_scheduled("Weekly")
+
+
+def run_monthly_jobs():
+    """Queue the monthly jobs in this site's slot of the nightly window."""
+    run_scheduled("Monthly")
+
+
+def run_scheduled(frequency):
+    """Queue a frequency's jobs once the nightly window reaches this site's shard."""
+    if now_datetime().hour < get_site_shard(frappe.local.site):
+        return
+    enqueue_jobs(frequency)
+
+
+def enqueue_jobs(frequency, force=False):
+    """Queue a frequency's jobs, each on its own queue and time budget.
+    
+    Jobs already queued for the current period are skipped unless
+    ``force`` is set, and a job still waiting in or running on its queue
+    is never queued twice. Returns the names of the Scheduled Job Runs
+    queued.
+    """
+    if frequency not in JOBS:
+        frappe.throw(_("Unknown job frequency {0}").format(frequency))
+    
+    period = get_period(frequency)
+    done = set() if force else set(frappe.get_all("Scheduled Job Run",
+        filters={"frequency": frequency, "period": period},
+        pluck="job"
+    ))
+    
+    runs = []
+    for job in JOBS[frequency]:
+        job_id = f"scheduled_job::{job.method}"
+        if job.method in done or is_job_enqueued(job_id):
+            continue
+        
+        run = frappe.get_doc({
+            "doctype": "Scheduled Job Run",
+            "job": job.method,
+            "frequency": frequency,
+            "period": period,
+            "status": "Queued",
+            "queue": job.queue,
+            "time_budget": job.timeout
+        }).insert(ignore_permissions=True)
+        
+        frappe.enqueue(
+            "easygo_education.jobs.orchestrator.execute_job",
+            queue=job.queue,
+            timeout=job.timeout,
+            job_id=job_id,
+            deduplicate=True,
+            run=run.name,
+            enqueue_after_commit=True
+        )
+        runs.append(run.name)
+    
+    frappe.db.commit()
+    return runs
+
+
+def execute_job(run):
+    """Run a queued job and record its status, duration and row count."""
+    run = frappe.db.get_value("Scheduled Job Run", run, ["name", "job", "time_budget"], as_dict=True)
+    frappe.db.set_value("Scheduled Job Run", run.name, {"status": "Running", "started_on": now()})
+    frappe.db.commit()
+    
+    start = time.monotonic()
+    try:
+        result = frappe.get_attr(run.job)()
+    except Exception as e:
+        from rq.timeouts import JobTimeoutException
+        
+        frappe.db.rollback()
+        finish_run(run, "Timed Out" if isinstance(e, JobTimeoutException) else "Failed", start,
+            error_log=frappe.get_traceback())
+        raise
+    
+    # A job that finished past its budget still shows up as timed out
+    duration = time.monotonic() - start
+    status = "Timed Out" if run.time_budget and duration >= run.time_budget else "Completed"
+    finish_run(run, status, start, row_count=result if isinstance(result, int) else None)
+
+
+def finish_run(run, status, start, row_count=None, error_log=None):
+    """Record the outcome of a run."""
+    frappe.db.set_value("Scheduled Job Run", run.name, {
+        "status": status,
+        "completed_on": now(),
+        "duration": time.monotonic() - start,
+        "row_count": row_count,
+        "error_log": error_log
+    })
+    frappe.db.commit()
+
+
+@frappe.whitelist()
+def run_jobs_now(frequency):
+    """Queue all jobs of a frequency right away, even if they already ran this period."""
+    frappe.only_for("System Manager")
+    
+    runs = enqueue_jobs(frequency, force=True)
+    return {"message": _("{0} jobs queued").format(len(runs)), "runs": runs}
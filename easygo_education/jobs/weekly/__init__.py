@@ -1 +1,237 @@
-# Weekly Jobs
+"""Weekly scheduled jobs for EasyGo Education."""
+
+import frappe
+from frappe import _
+from frappe.utils import today, add_days, getdate
+
+from easygo_education.vie_scolaire.attendance_rollup import get_student_attendance_counts
+
+
+def attendance_summaries():
+    """Generate weekly attendance summaries for teachers and parents."""
+    from frappe.utils import get_first_day_of_week, get_last_day_of_week
+    
+    # Get current week dates
+    week_start = get_first_day_of_week(today())
+    week_end = get_last_day_of_week(today())
+    
+    # Get all active classes
+    classes = frappe.get_all("School Class", filters={"is_active": 1}, fields=["name", "class_teacher"])
+    
+    # Counts for every student in one pass instead of one query per class
+    students = frappe.get_all("Student",
+        filters={"status": "Active", "school_class": ["in", [c.name for c in classes]]},
+        fields=["name", "student_name", "school_class", "guardian_email"]
+    )
+    counts = get_student_attendance_counts([s.name for s in students], week_start, week_end)
+    
+    class_attendance = {}
+    for student in students:
+        student_counts = counts.get(student.name)
+        if not student_counts or not student_counts.total_count:
+            continue
+        class_attendance.setdefault(student.school_class, []).append(frappe._dict({
+            "student": student.name,
+            "student_name": student.student_name,
+            "guardian_email": student.guardian_email,
+            "total_days": student_counts.total_count,
+            "present_days": student_counts.present_count,
+            "absent_days": student_counts.absent_count,
+            "late_days": student_counts.late_count
+        }))
+    
+    for class_doc in classes:
+        try:
+            attendance_data = class_attendance.get(class_doc.name)
+            
+            if not attendance_data:
+                continue
+            
+            # Send summary to class teacher
+            if class_doc.class_teacher:
+                teacher_email = frappe.db.get_value("Employee", class_doc.class_teacher, "company_email")
+                if teacher_email:
+                    summary_table = "<table border='1' style='border-collapse: collapse; width: 100%;'>"
+                    summary_table += "<tr><th>Student</th><th>Present</th><th>Absent</th><th>Late</th><th>Attendance %</th></tr>"
+                    
+                    for student in attendance_data:
+                        attendance_pct = (student.present_days / student.total_days * 100) if student.total_days > 0 else 0
+                        summary_table += f"<tr><td>{student.student_name}</td><td>{student.present_days}</td><td>{student.absent_days}</td><td>{student.late_days}</td><td>{attendance_pct:.1f}%</td></tr>"
+                    
+                    summary_table += "</table>"
+                    
+                    frappe.sendmail(
+                        recipients=[teacher_email],
+                        subject=_("Weekly Attendance Summary - {0}").format(class_doc.name),
+                        message=_("Dear Teacher,<br><br>Here is the weekly attendance summary for class {0} ({1} to {2}):<br><br>{3}<br><br>Best regards,<br>EasyGo Education System").format(
+                            class_doc.name, frappe.utils.formatdate(week_start), frappe.utils.formatdate(week_end), summary_table
+                        )
+                    )
+            
+            # Send individual summaries to parents
+            for student in attendance_data:
+                guardian_email = student.guardian_email
+                if guardian_email and student.absent_days > 0:  # Only send if there are absences
+                    attendance_pct = (student.present_days / student.total_days * 100) if student.total_days > 0 else 0
+                    
+                    frappe.sendmail(
+                        recipients=[guardian_email],
+                        subject=_("Weekly Attendance Report - {0}").format(student.student_name),
+                        message=_("Dear Parent,<br><br>Weekly attendance report for {0} ({1} to {2}):<br><br>Present: {3} days<br>Absent: {4} days<br>Late: {5} days<br>Attendance Rate: {6:.1f}%<br><br>Please contact the school if you have any questions.<br><br>Best regards,<br>EasyGo Education System").format(
+                            student.student_name, frappe.utils.formatdate(week_start), frappe.utils.formatdate(week_end),
+                            student.present_days, student.absent_days, student.late_days, attendance_pct
+                        )
+                    )
+                    
+        except Exception as e:
+            frappe.log_error(f"Failed to generate attendance summary for class {class_doc.name}: {str(e)}")
+    
+    frappe.db.commit()
+    print(f"Generated weekly attendance summaries for {len(classes)} classes")
+    return len(classes)
+
+
+def teacher_load_analysis():
+    """Analyze teacher workload and send alerts for overloaded teachers."""
+    # Get all active teachers
+    teachers = frappe.get_all(
+        "Employee",
+        filters={"status": "Active", "department": "Teaching"},
+        fields=["name", "employee_name", "company_email"]
+    )
+    
+    overloaded_teachers = []
+    
+    for teacher in teachers:
+        try:
+            # Count scheduled classes for this week
+            weekly_hours = frappe.db.sql("""
+                SELECT COUNT(*) * duration_minutes / 60.0 as total_hours
+                FROM `tabCourse Schedule`
+                WHERE instructor = %s
+                AND is_active = 1
+            """, teacher.name)[0][0] or 0
+            
+            # Count assigned classes
+            assigned_classes = frappe.db.count("School Class", {"class_teacher": teacher.name})
+            
+            # Simple overload check (more than 25 hours per week or more than 3 classes)
+            if weekly_hours > 25 or assigned_classes > 3:
+                overloaded_teachers.append({
+                    "name": teacher.employee_name,
+                    "email": teacher.company_email,
+                    "weekly_hours": weekly_hours,
+                    "assigned_classes": assigned_classes
+                })
+                
+        except Exception as e:
+            frappe.log_error(f"Failed to analyze load for teacher {teacher.name}: {str(e)}")
+    
+    # Send alert to administrators if there are overloaded teachers
+    if overloaded_teachers:
+        admin_users = frappe.get_all(
+            "Has Role",
+            filters={"role": "Principal"},
+            fields=["parent"]
+        )
+        
+        if admin_users:
+            admin_emails = [frappe.db.get_value("User", user.parent, "email") 
+                          for user in admin_users]
+            admin_emails = [email for email in admin_emails if email]
+            
+            if admin_emails:
+                teacher_list = "<ul>"
+                for teacher in overloaded_teachers:
+                    teacher_list += f"<li>{teacher['name']}: {teacher['weekly_hours']:.1f} hours/week, {teacher['assigned_classes']} classes</li>"
+                teacher_list += "</ul>"
+                
+                frappe.sendmail(
+                    recipients=admin_emails,
+                    subject=_("Teacher Workload Alert - {0} overloaded teachers").format(len(overloaded_teachers)),
+                    message=_("Dear Administrator,<br><br>The following teachers may be overloaded:<br><br>{0}<br><br>Please review their schedules and consider redistributing workload.<br><br>Best regards,<br>EasyGo Education System").format(teacher_list)
+                )
+    
+    frappe.db.commit()
+    print(f"Analyzed teacher load for {len(teachers)} teachers, found {len(overloaded_teachers)} overloaded")
+    return len(teachers)
+
+
+def budget_burn_rate():
+    """Analyze budget burn rate and send alerts."""
+    # Get current fiscal year
+    current_year = frappe.db.get_single_value("Finance Settings", "fiscal_year_start_date")
+    if not current_year:
+        return 0
+        
+    # Get all active budgets
+    budgets = frappe.get_all(
+        "Budget",
+        filters={"fiscal_year": current_year, "is_active": 1},
+        fields=["name", "total_budget", "department"]
+    )
+    
+    budget_alerts = []
+    
+    for budget in budgets:
+        try:
+            # Calculate actual expenses
+            actual_expenses = frappe.db.sql("""
+                SELECT COALESCE(SUM(amount), 0) as total_spent
+                FROM `tabExpense Entry`
+                WHERE budget = %s
+                AND docstatus = 1
+            """, budget.name)[0][0] or 0
+            
+            # Calculate burn rate
+            if budget.total_budget > 0:
+                burn_rate = (actual_expenses / budget.total_budget) * 100
+                
+                # Alert if burn rate is over 80%
+                if burn_rate > 80:
+                    budget_alerts.append({
+                        "name": budget.name,
+                        "department": budget.department,
+                        "budget": budget.total_budget,
+                        "spent": actual_expenses,
+                        "burn_rate": burn_rate
+                    })
+                    
+        except Exception as e:
+            frappe.log_error(f"Failed to analyze budget {budget.name}: {str(e)}")
+    
+    # Send alerts if needed
+    if budget_alerts:
+        admin_users = frappe.get_all(
+            "Has Role",
+            filters={"role": ["in", ["Director", "Accountant"]]},
+            fields=["parent"]
+        )
+        
+        if admin_users:
+            admin_emails = [frappe.db.get_value("User", user.parent, "email") 
+                          for user in admin_users]
+            admin_emails = [email for email in admin_emails if email]
+            
+            if admin_emails:
+                budget_list = "<ul>"
+                for budget in budget_alerts:
+                    budget_list += f"<li>{budget['name']} ({budget['department']}): {budget['burn_rate']:.1f}% spent ({budget['spent']:.2f} / {budget['budget']:.2f} MAD)</li>"
+                budget_list += "</ul>"
+                
+                frappe.sendmail(
+                    recipients=admin_emails,
+                    subject=_("Budget Alert - {0} budgets over 80%").format(len(budget_alerts)),
+                    message=_("Dear Administrator,<br><br>The following budgets have high burn rates:<br><br>{0}<br><br>Please review and take appropriate action.<br><br>Best regards,<br>EasyGo Education System").format(budget_list)
+                )
+    
+    frappe.db.commit()
+    print(f"Analyzed {len(budgets)} budgets, found {len(budget_alerts)} with high burn rates")
+    return len(budgets)
+
+
+def run_all_weekly_jobs():
+    """Queue all weekly jobs to run concurrently on their queues."""
+    from easygo_education.jobs.orchestrator import enqueue_jobs
+    
+    return enqueue_jobs("Weekly", force=True)
@@ -0,0 +1,8 @@
+"""Backfill attendance rollups for existing Student Attendance."""
+
+from easygo_education.vie_scolaire.attendance_rollup import rebuild_rollups
+
+
+def execute():
+    """Build the class and student rollups attendance counts are read from."""
+    rebuild_rollups()
@@ -0,0 +1,8 @@
+"""Backfill household keys for existing Students and Guardians."""
+
+from easygo_education.scolarite.household import rebuild_household_keys
+
+
+def execute():
+    """Set the household keys sibling discounts and children summaries are grouped by."""
+    rebuild_household_keys()
@@ -0,0 +1,8 @@
+"""Backfill School Ledger Balance snapshots for existing ledger entries."""
+
+from easygo_education.finances_rh.doctype.school_ledger_balance.school_ledger_balance import rebuild_ledger_balances
+
+
+def execute():
+    """Build the monthly balance snapshots cumulative totals are read from."""
+    rebuild_ledger_balances()
@@ -0,0 +1,8 @@
+"""Backfill message participant counters for existing threads."""
+
+from easygo_education.administration_comms.messaging import rebuild_participant_counters
+
+
+def execute():
+    """Set the unread counts and last message dates the inbox is read from."""
+    rebuild_participant_counters()
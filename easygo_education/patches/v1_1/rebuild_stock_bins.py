@@ -0,0 +1,8 @@
+"""Backfill Stock Bins for existing stock ledger entries."""
+
+from easygo_education.gestion_etablissement.stock_valuation import get_ledger_pairs, rebuild_bins
+
+
+def execute():
+    """Build the per-warehouse bins stock balances and valuation are read from."""
+    rebuild_bins(get_ledger_pairs())
@@ -127,8 +127,12 @@ window.EasyGoEducation = {
             messageForm.addEventListener('submit', this.handleMessageSend.bind(this));
         }
         
-        // Auto-refresh messages every 30 seconds
-        setInterval(this.refreshMessages.bind(this), 30000);
+        // New messages are pushed by the server; poll only without realtime
+        if (window.frappe && frappe.realtime) {
+            frappe.realtime.on('easygo_message', this.refreshMessages.bind(this));
+        } else {
+            setInterval(this.refreshMessages.bind(this), 30000);
+        }
     },
     
     handleMessageSend: function(event) {
@@ -70,8 +70,26 @@ function initializeDashboardWidgets() {
         });
     });
     
-    // Refresh widgets periodically
-    setInterval(refreshDashboardData, 300000); // 5 minutes
+    // Refresh widgets when the server pushes a change, polling only without realtime
+    if (frappe.realtime) {
+        ['easygo_message', 'easygo_attendance', 'easygo_grade'].forEach(event => {
+            frappe.realtime.on(event, refreshDashboardData);
+        });
+    } else {
+        setInterval(refreshDashboardData, 300000); // 5 minutes
+    }
+}
+
+function subscribeToUpdates(events, reload) {
+    // The server pushes changes, so reload (debounced) instead of polling
+    if (!frappe.realtime) return;
+    let timer = null;
+    events.forEach(event => {
+        frappe.realtime.on(event, () => {
+            clearTimeout(timer);
+            timer = setTimeout(reload, 1000);
+        });
+    });
 }
 
 function refreshDashboardData() {
@@ -118,16 +136,18 @@ function showErrorMessage(message) {
     });
 }
 
-// Form enhancements
-frappe.ui.form.on('*', {
-    refresh: function(frm) {
-        // Add custom buttons based on doctype
-        addCustomButtons(frm);
-        
-        // Setup field dependencies
-        setupFieldDependencies(frm);
-    }
-});
+// Form enhancements, only in the desk (portal pages load this file too)
+if (frappe.ui && frappe.ui.form) {
+    frappe.ui.form.on('*', {
+        refresh: function(frm) {
+            // Add custom buttons based on doctype
+            addCustomButtons(frm);
+            
+            // Setup field dependencies
+            setupFieldDependencies(frm);
+        }
+    });
+}
 
 function addCustomButtons(frm) {
     const doctype = frm.doc.doctype;
@@ -168,5 +188,6 @@ window.EasyGoEducation = {
     showSuccessMessage,
     showErrorMessage,
     refreshDashboardData,
+    subscribeToUpdates,
     isArabicText
 };
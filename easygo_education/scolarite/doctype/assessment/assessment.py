@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, today
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Assessment(Document):
     """Assessment doctype controller with business rules."""
@@ -132,7 +134,7 @@ class Assessment(Document):
                     recipients.append(student.guardian_email)
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=list(set(recipients)),  # Remove duplicates
                     subject=subject,
                     message=message
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class AssessmentPlan(Document):
     """Assessment Plan management."""
@@ -75,7 +77,7 @@ class AssessmentPlan(Document):
         """Notify teacher and students about scheduled assessment."""
         # Notify teacher
         if self.teacher:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.teacher],
                 subject=_("Assessment Scheduled: {0}").format(self.assessment_plan_name),
                 message=self.get_teacher_notification_message(),
@@ -92,7 +94,7 @@ class AssessmentPlan(Document):
         student_emails = [s.user_id for s in students if s.user_id]
         
         if student_emails:
-            frappe.sendmail(
+            queue_notification(
                 recipients=student_emails,
                 subject=_("Assessment Scheduled: {0} - {1}").format(self.subject, self.assessment_type),
                 message=self.get_student_notification_message(),
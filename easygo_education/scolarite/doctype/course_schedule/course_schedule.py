@@ -5,12 +5,16 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import time_diff_in_hours, get_time
 
+from easygo_education.scolarite.timetable.interval_index import ScheduleIndex
+
 
 class CourseSchedule(Document):
     """Course Schedule doctype controller with business rules."""
     
     def validate(self):
         """Validate course schedule data."""
+        # Reload the index on every validation so a re-saved document sees current slots
+        self._schedule_index = None
         self.validate_time_slots()
         self.validate_instructor_availability()
         self.validate_class_availability()
@@ -30,31 +34,39 @@ class CourseSchedule(Document):
             if duration_hours > 4:
                 frappe.throw(_("Class duration cannot exceed 4 hours"))
     
+    def get_schedule_index(self):
+        """Get an interval index of this slot's instructor and class for the day.
+        
+        Loaded with a single query and shared by the availability checks of
+        one validation. Room clashes are only checked for batches, by
+        ``validate_timetable`` and ``import_timetable``.
+        """
+        if getattr(self, "_schedule_index", None) is None:
+            self._schedule_index = ScheduleIndex.load(
+                self.academic_year,
+                day_of_week=self.day_of_week,
+                instructor=self.instructor,
+                school_class=self.school_class
+            )
+        return self._schedule_index
+    
+    def get_overlapping_schedules(self, resource_type):
+        """Get active schedules overlapping this slot for a resource type."""
+        if self.flags.skip_conflict_check:
+            return []
+        
+        conflicts = self.get_schedule_index().find_conflicts(
+            self.as_dict(), key=self.name or "", resource_types=[resource_type]
+        )
+        return [conflict.other for conflict in conflicts]
+    
     def validate_instructor_availability(self):
         """Check if instructor is available at this time."""
         if not self.instructor or not self.day_of_week or not self.start_time or not self.end_time:
             return
         
         # Check for overlapping schedules for the same instructor
-        overlapping_schedules = frappe.db.sql("""
-            SELECT name, school_class, subject
-            FROM `tabCourse Schedule`
-            WHERE instructor = %s 
-                AND day_of_week = %s
-                AND academic_year = %s
-                AND is_active = 1
-                AND name != %s
-                AND (
-                    (start_time <= %s AND end_time > %s) OR
-                    (start_time < %s AND end_time >= %s) OR
-                    (start_time >= %s AND end_time <= %s)
-                )
-        """, (
-            self.instructor, self.day_of_week, self.academic_year, self.name or '',
-            self.start_time, self.start_time,
-            self.end_time, self.end_time,
-            self.start_time, self.end_time
-        ), as_dict=True)
+        overlapping_schedules = self.get_overlapping_schedules("Instructor")
         
         if overlapping_schedules:
             schedule = overlapping_schedules[0]
@@ -68,25 +80,7 @@ class CourseSchedule(Document):
             return
         
         # Check for overlapping schedules for the same class
-        overlapping_schedules = frappe.db.sql("""
-            SELECT name, instructor, subject
-            FROM `tabCourse Schedule`
-            WHERE school_class = %s 
-                AND day_of_week = %s
-                AND academic_year = %s
-                AND is_active = 1
-                AND name != %s
-                AND (
-                    (start_time <= %s AND end_time > %s) OR
-                    (start_time < %s AND end_time >= %s) OR
-                    (start_time >= %s AND end_time <= %s)
-                )
-        """, (
-            self.school_class, self.day_of_week, self.academic_year, self.name or '',
-            self.start_time, self.start_time,
-            self.end_time, self.end_time,
-            self.start_time, self.end_time
-        ), as_dict=True)
+        overlapping_schedules = self.get_overlapping_schedules("Class")
         
         if overlapping_schedules:
             schedule = overlapping_schedules[0]
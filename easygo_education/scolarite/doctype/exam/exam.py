@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, today, time_diff_in_hours, get_time, now
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Exam(Document):
     """Exam doctype controller with business rules."""
@@ -179,7 +181,7 @@ class Exam(Document):
                         school_name
                     )
                     
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[student.guardian_email],
                         subject=subject,
                         message=message
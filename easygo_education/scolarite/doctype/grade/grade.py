@@ -3,7 +3,11 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import now
+from frappe.utils import flt, now
+
+from easygo_education.api.realtime import publish_grade
+from easygo_education.scolarite.grading import LETTER_GRADE_SCALE, get_default_grading_scale
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
 
 
 class Grade(Document):
@@ -36,40 +40,14 @@ class Grade(Document):
     def calculate_letter_grade(self):
         """Calculate letter grade based on percentage."""
         if self.percentage is not None:
-            if self.percentage >= 97:
-                self.letter_grade = "A+"
-            elif self.percentage >= 93:
-                self.letter_grade = "A"
-            elif self.percentage >= 90:
-                self.letter_grade = "A-"
-            elif self.percentage >= 87:
-                self.letter_grade = "B+"
-            elif self.percentage >= 83:
-                self.letter_grade = "B"
-            elif self.percentage >= 80:
-                self.letter_grade = "B-"
-            elif self.percentage >= 77:
-                self.letter_grade = "C+"
-            elif self.percentage >= 73:
-                self.letter_grade = "C"
-            elif self.percentage >= 70:
-                self.letter_grade = "C-"
-            elif self.percentage >= 67:
-                self.letter_grade = "D+"
-            elif self.percentage >= 60:
-                self.letter_grade = "D"
-            else:
-                self.letter_grade = "F"
+            self.letter_grade = get_default_grading_scale(LETTER_GRADE_SCALE).get_grade(self.percentage)
     
     def calculate_grade_point(self):
-        """Calculate grade point based on letter grade."""
-        grade_points = {
-            "A+": 4.0, "A": 4.0, "A-": 3.7,
-            "B+": 3.3, "B": 3.0, "B-": 2.7,
-            "C+": 2.3, "C": 2.0, "C-": 1.7,
-            "D+": 1.3, "D": 1.0, "F": 0.0
-        }
-        self.grade_point = grade_points.get(self.letter_grade, 0.0)
+        """Calculate grade point based on percentage."""
+        if self.percentage is not None:
+            self.grade_point = flt(get_default_grading_scale(LETTER_GRADE_SCALE).get_grade_point(self.percentage))
+        else:
+            self.grade_point = 0.0
     
     def validate_duplicate_grade(self):
         """Validate no duplicate grade for same student, subject, and assessment."""
@@ -110,6 +88,7 @@ class Grade(Document):
         # Notify student if grade is published for the first time
         if self.has_value_changed("is_published") and self.is_published:
             self.notify_student()
+            publish_grade(self)
     
     def notify_student(self):
         """Send notification to student about new grade."""
@@ -159,7 +138,7 @@ class Grade(Document):
                 school_name
             )
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.guardian_email],
                 subject=subject,
                 message=message
@@ -174,7 +153,7 @@ class Grade(Document):
                 "subject": subject,
                 "status": "Sent"
             }).insert(ignore_permissions=True)
-            
+        
         except Exception as e:
             frappe.log_error(f"Failed to send grade notification for {self.name}: {str(e)}")
     
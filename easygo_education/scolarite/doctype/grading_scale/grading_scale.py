@@ -3,7 +3,9 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import now, flt
+from frappe.utils import now
+
+from easygo_education.scolarite.grading import clear_grading_scale_cache, compile_grading_scale
 
 
 class GradingScale(Document):
@@ -75,44 +77,18 @@ class GradingScale(Document):
         if not self.rounding_method:
             self.rounding_method = "Round to Nearest"
     
+    def on_update(self):
+        """Drop cached scales so lookups pick up the new intervals."""
+        clear_grading_scale_cache()
+    
+    def on_trash(self):
+        """Drop cached scales."""
+        clear_grading_scale_cache()
+    
     @frappe.whitelist()
     def calculate_grade(self, score):
         """Calculate grade based on score."""
-        score = flt(score)
-        
-        if score < self.minimum_score or score > self.maximum_score:
-            return {
-                "letter_grade": "Invalid",
-                "grade_point": 0,
-                "description": "Score out of range"
-            }
-        
-        # Apply rounding
-        if self.rounding_method == "Round Up":
-            import math
-            score = math.ceil(score * (10 ** self.decimal_places)) / (10 ** self.decimal_places)
-        elif self.rounding_method == "Round Down":
-            import math
-            score = math.floor(score * (10 ** self.decimal_places)) / (10 ** self.decimal_places)
-        elif self.rounding_method == "Round to Nearest":
-            score = round(score, self.decimal_places)
-        
-        # Find matching interval
-        for interval in self.intervals:
-            if interval.min_score <= score <= interval.max_score:
-                return {
-                    "letter_grade": interval.grade_letter,
-                    "grade_point": interval.grade_point if self.grade_points_enabled else None,
-                    "description": interval.description,
-                    "is_passing": score >= self.passing_grade,
-                    "is_honor_roll": self.honor_roll_threshold and score >= self.honor_roll_threshold
-                }
-        
-        return {
-            "letter_grade": "N/A",
-            "grade_point": 0,
-            "description": "No matching grade interval"
-        }
+        return compile_grading_scale(self).evaluate(score)
     
     @frappe.whitelist()
     def get_grade_distribution(self, academic_year=None, program=None):
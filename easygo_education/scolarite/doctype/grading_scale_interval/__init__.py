@@ -0,0 +1 @@
+# Grading Scale Interval
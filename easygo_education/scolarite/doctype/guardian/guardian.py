@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now
 
+from easygo_education.scolarite.household import get_household_students, set_household_key
+
 
 class Guardian(Document):
     """Guardian doctype controller with business rules."""
@@ -14,6 +16,7 @@ class Guardian(Document):
         self.validate_contact_information()
         self.validate_primary_guardian()
         self.set_defaults()
+        set_household_key(self)
     
     def validate_contact_information(self):
         """Validate contact information."""
@@ -152,16 +155,7 @@ class Guardian(Document):
     @frappe.whitelist()
     def get_children_summary(self):
         """Get summary of children for portal display."""
-        students = frappe.get_list("Student",
-            filters={
-                "guardian": self.name,
-                "status": "Active"
-            },
-            fields=[
-                "name", "student_name", "school_class", "date_of_birth",
-                "admission_date", "status"
-            ]
-        )
+        students = get_household_students(self.household_key)
         
         # Get additional data for each student
         for student in students:
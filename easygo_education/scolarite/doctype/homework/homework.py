@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, today
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Homework(Document):
     """Homework doctype controller with business rules."""
@@ -129,7 +131,7 @@ class Homework(Document):
                     recipients.append(student.guardian_email)
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=list(set(recipients)),  # Remove duplicates
                     subject=subject,
                     message=message
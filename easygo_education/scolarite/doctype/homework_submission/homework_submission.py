@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class HomeworkSubmission(Document):
     """Homework Submission doctype controller with business rules."""
@@ -122,7 +124,7 @@ class HomeworkSubmission(Document):
                 school_name
             )
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[teacher_email],
                 subject=subject,
                 message=message
@@ -178,7 +180,7 @@ class HomeworkSubmission(Document):
                 school_name
             )
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.guardian_email],
                 subject=subject,
                 message=message
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class OrientationChoice(Document):
     """Student orientation choice management for academic stream selection."""
@@ -141,7 +143,7 @@ class OrientationChoice(Document):
         counselor = frappe.get_doc("Employee", self.counselor)
         
         if counselor.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[counselor.user_id],
                 subject=_("New Orientation Choice Submission - {0}").format(self.student_name),
                 message=self.get_counselor_notification_message(),
@@ -197,7 +199,7 @@ class OrientationChoice(Document):
         guardian = frappe.get_doc("Guardian", self.parent_guardian)
         
         if guardian.email_address:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[guardian.email_address],
                 subject=_("Orientation Choice Submitted - {0}").format(self.student_name),
                 message=self.get_guardian_notification_message(),
@@ -254,7 +256,7 @@ class OrientationChoice(Document):
         student = frappe.get_doc("Student", self.student)
         
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Your Stream Choices Have Been Submitted"),
                 message=self.get_student_confirmation_message(),
@@ -363,7 +365,7 @@ class OrientationChoice(Document):
         student = frappe.get_doc("Student", self.student)
         
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Update on Your Stream Choice"),
                 message=self.get_student_decision_message(),
@@ -451,7 +453,7 @@ class OrientationChoice(Document):
         guardian = frappe.get_doc("Guardian", self.parent_guardian)
         
         if guardian.email_address:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[guardian.email_address],
                 subject=_("Stream Choice Decision - {0}").format(self.student_name),
                 message=self.get_guardian_decision_message(),
@@ -545,7 +547,7 @@ class OrientationChoice(Document):
         # Notify student
         student = frappe.get_doc("Student", self.student)
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Please Revise Your Stream Choice"),
                 message=self.get_revision_request_message(reason),
@@ -557,7 +559,7 @@ class OrientationChoice(Document):
         if self.parent_guardian:
             guardian = frappe.get_doc("Guardian", self.parent_guardian)
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Stream Choice Revision Required - {0}").format(self.student_name),
                     message=self.get_guardian_revision_message(reason),
@@ -644,7 +646,7 @@ class OrientationChoice(Document):
         if self.counselor:
             counselor = frappe.get_doc("Employee", self.counselor)
             if counselor.user_id:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[counselor.user_id],
                     subject=_("Guardian Consent Provided - {0}").format(self.student_name),
                     message=self.get_consent_confirmation_message(),
@@ -655,7 +657,7 @@ class OrientationChoice(Document):
         # Notify student
         student = frappe.get_doc("Student", self.student)
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Guardian Consent Received"),
                 message=self.get_student_consent_message(),
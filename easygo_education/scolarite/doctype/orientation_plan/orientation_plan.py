@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class OrientationPlan(Document):
     """Orientation Plan management for student career guidance."""
@@ -104,7 +106,7 @@ class OrientationPlan(Document):
         counselor = frappe.get_doc("Employee", self.orientation_counselor)
         
         if counselor.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[counselor.user_id],
                 subject=_("New Orientation Plan Assignment - {0}").format(self.student_name),
                 message=self.get_counselor_notification_message(),
@@ -154,7 +156,7 @@ class OrientationPlan(Document):
         teacher = frappe.get_doc("Employee", self.class_teacher)
         
         if teacher.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[teacher.user_id],
                 subject=_("Student Orientation Plan - {0}").format(self.student_name),
                 message=self.get_teacher_notification_message(),
@@ -207,7 +209,7 @@ class OrientationPlan(Document):
             guardian = frappe.get_doc("Guardian", self.parent_guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Academic Orientation Plan - {0}").format(self.student_name),
                     message=self.get_guardian_notification_message(),
@@ -258,7 +260,7 @@ class OrientationPlan(Document):
         student = frappe.get_doc("Student", self.student)
         
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Your Academic Guidance Plan"),
                 message=self.get_student_notification_message(),
@@ -360,7 +362,7 @@ class OrientationPlan(Document):
         if self.parent_guardian:
             guardian = frappe.get_doc("Guardian", self.parent_guardian)
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Assessment Update - {0}").format(self.student_name),
                     message=self.get_assessment_update_message(),
@@ -465,7 +467,7 @@ class OrientationPlan(Document):
                 recipients.append(teacher.user_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Orientation Plan Completed - {0}").format(self.student_name),
                 message=self.get_completion_notification_message(),
@@ -477,7 +479,7 @@ class OrientationPlan(Document):
         if self.parent_guardian:
             guardian = frappe.get_doc("Guardian", self.parent_guardian)
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Orientation Plan Completed - {0}").format(self.student_name),
                     message=self.get_guardian_completion_message(),
@@ -641,7 +643,7 @@ class OrientationPlan(Document):
         if self.orientation_counselor:
             counselor = frappe.get_doc("Employee", self.orientation_counselor)
             if counselor.user_id:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[counselor.user_id],
                     subject=_("Plan Revision Required - {0}").format(self.student_name),
                     message=self.get_revision_request_message(reason),
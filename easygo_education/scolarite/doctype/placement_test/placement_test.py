@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, flt, cint
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class PlacementTest(Document):
     """Placement Test management."""
@@ -120,7 +122,7 @@ class PlacementTest(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Placement Test Results - {0}").format(self.student_name),
                 message=self.get_result_notification_message(),
@@ -135,7 +137,7 @@ class PlacementTest(Document):
         if academic_team_emails:
             email_list = [email.strip() for email in academic_team_emails.split(",")]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=email_list,
                 subject=_("Placement Test Completed - {0}").format(self.student_name),
                 message=self.get_placement_notification_message(),
@@ -320,7 +322,7 @@ class PlacementTest(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Placement Approved - {0}").format(self.student_name),
                 message=self.get_approval_message(),
@@ -370,7 +372,7 @@ class PlacementTest(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Placement Under Review - {0}").format(self.student_name),
                 message=self.get_rejection_message(rejection_reason),
@@ -5,6 +5,17 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, flt
 
+from easygo_education.scolarite.grading import get_default_grading_scale
+from easygo_education.scolarite.report_cards import (
+    compute_card,
+    get_promotion_status,
+    get_subject_totals,
+    get_term,
+    update_class_ranks,
+)
+from easygo_education.vie_scolaire.attendance_rollup import get_student_attendance_counts
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class ReportCard(Document):
     """Report Card management."""
@@ -20,38 +31,33 @@ class ReportCard(Document):
         """Validate academic year and term."""
         if self.academic_year and self.academic_term:
             # Check if term belongs to the academic year
-            term_doc = frappe.get_doc("Academic Term", self.academic_term)
-            if term_doc.academic_year != self.academic_year:
+            term = get_term(self.academic_term)
+            if term and term.academic_year != self.academic_year:
                 frappe.throw(_("Academic term does not belong to the selected academic year"))
     
     def calculate_totals(self):
         """Calculate total marks, obtained marks, and overall percentage."""
-        total_marks = 0
-        obtained_marks = 0
-        total_grade_points = 0
-        subject_count = 0
+        scale = get_default_grading_scale()
+        graded = [subject for subject in self.subjects if subject.total_marks and subject.obtained_marks]
         
-        for subject in self.subjects:
-            if subject.total_marks and subject.obtained_marks:
-                total_marks += flt(subject.total_marks)
-                obtained_marks += flt(subject.obtained_marks)
-                
-                # Calculate grade points (assuming 4.0 scale)
-                percentage = (flt(subject.obtained_marks) / flt(subject.total_marks)) * 100
-                grade_point = self.percentage_to_grade_point(percentage)
-                subject.grade_point = grade_point
-                total_grade_points += grade_point
-                subject_count += 1
+        total_marks = sum(flt(subject.total_marks) for subject in graded)
+        obtained_marks = sum(flt(subject.obtained_marks) for subject in graded)
+        
+        # Grades and grade points of every subject from one batch lookup
+        percentages = [flt(subject.obtained_marks) / flt(subject.total_marks) * 100 for subject in graded]
+        for subject, (letter_grade, grade_point) in zip(graded, scale.get_grades(percentages)):
+            subject.grade = letter_grade
+            subject.grade_point = flt(grade_point)
         
         self.total_marks = total_marks
         self.obtained_marks = obtained_marks
         
         if total_marks > 0:
             self.overall_percentage = (obtained_marks / total_marks) * 100
-            self.overall_grade = self.percentage_to_grade(self.overall_percentage)
+            self.overall_grade = scale.get_grade(self.overall_percentage)
         
-        if subject_count > 0:
-            self.grade_point_average = total_grade_points / subject_count
+        if graded:
+            self.grade_point_average = sum(subject.grade_point for subject in graded) / len(graded)
     
     def calculate_attendance(self):
         """Calculate attendance statistics."""
@@ -59,81 +65,29 @@ class ReportCard(Document):
             return
         
         # Get attendance data for the term
-        term_doc = frappe.get_doc("Academic Term", self.academic_term)
-        
-        attendance_data = frappe.db.sql("""
-            SELECT 
-                COUNT(*) as total_days,
-                SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) as present_days,
-                SUM(CASE WHEN status = 'Absent' THEN 1 ELSE 0 END) as absent_days
-            FROM `tabStudent Attendance`
-            WHERE student = %s
-            AND attendance_date BETWEEN %s AND %s
-        """, [self.student, term_doc.term_start_date, term_doc.term_end_date], as_dict=True)
-        
-        if attendance_data and attendance_data[0].total_days:
-            data = attendance_data[0]
-            self.days_present = data.present_days or 0
-            self.days_absent = data.absent_days or 0
-            
-            if data.total_days > 0:
-                self.attendance_percentage = (self.days_present / data.total_days) * 100
+        term = get_term(self.academic_term)
+        
+        counts = get_student_attendance_counts(
+            [self.student], term.term_start_date, term.term_end_date
+        ).get(self.student)
+        
+        if counts and counts.total_count:
+            self.days_present = counts.present_count
+            self.days_absent = counts.absent_count
+            self.attendance_percentage = (self.days_present / counts.total_count) * 100
     
     def determine_promotion_status(self):
         """Determine promotion status based on grades."""
         if not self.promotion_status and self.overall_percentage:
-            if self.overall_percentage >= 75:
-                self.promotion_status = "Promoted"
-            elif self.overall_percentage >= 50:
-                self.promotion_status = "Conditional Promotion"
-            else:
-                self.promotion_status = "Retained"
+            self.promotion_status = get_promotion_status(self.overall_percentage)
     
     def percentage_to_grade(self, percentage):
         """Convert percentage to letter grade."""
-        if percentage >= 90:
-            return "A+"
-        elif percentage >= 85:
-            return "A"
-        elif percentage >= 80:
-            return "A-"
-        elif percentage >= 75:
-            return "B+"
-        elif percentage >= 70:
-            return "B"
-        elif percentage >= 65:
-            return "B-"
-        elif percentage >= 60:
-            return "C+"
-        elif percentage >= 55:
-            return "C"
-        elif percentage >= 50:
-            return "C-"
-        else:
-            return "F"
+        return get_default_grading_scale().get_grade(percentage)
     
     def percentage_to_grade_point(self, percentage):
-        """Convert percentage to grade point (4.0 scale)."""
-        if percentage >= 90:
-            return 4.0
-        elif percentage >= 85:
-            return 3.7
-        elif percentage >= 80:
-            return 3.3
-        elif percentage >= 75:
-            return 3.0
-        elif percentage >= 70:
-            return 2.7
-        elif percentage >= 65:
-            return 2.3
-        elif percentage >= 60:
-            return 2.0
-        elif percentage >= 55:
-            return 1.7
-        elif percentage >= 50:
-            return 1.0
-        else:
-            return 0.0
+        """Convert percentage to grade point."""
+        return get_default_grading_scale().get_grade_point(percentage)
     
     def on_submit(self):
         """Actions on submit."""
@@ -142,28 +96,12 @@ class ReportCard(Document):
         self.update_student_academic_record()
     
     def calculate_class_rank(self):
-        """Calculate student's rank in class."""
-        if not self.school_class or not self.overall_percentage:
+        """Refresh the dense ranks of the class's report cards for the term."""
+        if not self.school_class or not self.academic_term:
             return
         
-        # Get all submitted report cards for the same class and term
-        class_results = frappe.db.sql("""
-            SELECT name, overall_percentage
-            FROM `tabReport Card`
-            WHERE school_class = %s
-            AND academic_term = %s
-            AND docstatus = 1
-            ORDER BY overall_percentage DESC
-        """, [self.school_class, self.academic_term], as_dict=True)
-        
-        rank = 1
-        for i, result in enumerate(class_results):
-            if result.name == self.name:
-                rank = i + 1
-                break
-        
-        self.class_rank = rank
-        self.save()
+        update_class_ranks(self.school_class, self.academic_term)
+        self.class_rank = frappe.db.get_value("Report Card", self.name, "class_rank")
     
     @frappe.whitelist()
     def generate_from_assessments(self):
@@ -171,37 +109,22 @@ class ReportCard(Document):
         if not self.student or not self.academic_term:
             frappe.throw(_("Student and Academic Term are required"))
         
-        # Get student's class subjects
-        class_subjects = frappe.get_all("Class Subject Teacher",
-            filters={"school_class": self.school_class},
-            fields=["subject"]
+        # Same grouped query the class batch uses, for a single student
+        card = compute_card(
+            get_subject_totals([self.student], get_term(self.academic_term)).get(self.student, []),
+            scale=get_default_grading_scale()
         )
         
-        for class_subject in class_subjects:
-            subject = class_subject.subject
-            
-            # Get assessment results for this subject and term
-            assessments = frappe.get_all("Assessment",
-                filters={
-                    "student": self.student,
-                    "subject": subject,
-                    "academic_term": self.academic_term,
-                    "docstatus": 1
-                },
-                fields=["total_marks", "obtained_marks", "grade"]
-            )
-            
-            if assessments:
-                total_marks = sum(flt(a.total_marks) for a in assessments)
-                obtained_marks = sum(flt(a.obtained_marks) for a in assessments)
-                
-                self.append("subjects", {
-                    "subject": subject,
-                    "total_marks": total_marks,
-                    "obtained_marks": obtained_marks,
-                    "percentage": (obtained_marks / total_marks * 100) if total_marks > 0 else 0,
-                    "grade": self.percentage_to_grade((obtained_marks / total_marks * 100) if total_marks > 0 else 0)
-                })
+        self.subjects = []
+        for subject in card.subjects:
+            self.append("subjects", {
+                "subject": subject.subject,
+                "subject_name": subject.subject_name,
+                "total_marks": subject.total_marks,
+                "obtained_marks": subject.obtained_marks,
+                "percentage": subject.percentage,
+                "grade": subject.grade
+            })
         
         self.save()
         frappe.msgprint(_("Report card generated from assessments"))
@@ -237,7 +160,7 @@ class ReportCard(Document):
             guardian = frappe.get_doc("Guardian", guardian_link.guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Report Card Available: {0}").format(self.student_name),
                     message=self.get_parent_notification_message(),
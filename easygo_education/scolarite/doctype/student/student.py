@@ -6,6 +6,9 @@ from frappe.model.document import Document
 from frappe.utils import getdate, date_diff, today
 import re
 
+from easygo_education.scolarite.household import get_household_students, set_household_key
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class Student(Document):
     """Student doctype controller with business rules."""
@@ -16,6 +19,7 @@ class Student(Document):
         self.validate_age_and_level()
         self.validate_email()
         self.calculate_age()
+        set_household_key(self)
     
     def validate_massar_code(self):
         """Validate MASSAR code format and uniqueness."""
@@ -86,7 +90,7 @@ class Student(Document):
         try:
             school_name = frappe.db.get_single_value("School Settings", "school_name") or "School"
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.guardian_email],
                 subject=_("Welcome to {0} - {1}").format(school_name, self.student_name),
                 message=_("""
@@ -166,6 +170,14 @@ class Student(Document):
         # Update attendance records, fee bills, etc.
         # This is a placeholder for future implementation
         pass
+    
+    @frappe.whitelist()
+    def get_siblings(self):
+        """Get the other active students of this student's household."""
+        return [
+            student for student in get_household_students(self.household_key)
+            if student.name != self.name
+        ]
 
 
 def validate_student(doc, method):
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate, flt
 
+from easygo_education.scolarite.grading import get_grading_scale
+
 
 class StudentAcademicHistory(Document):
     """Student Academic History doctype controller."""
@@ -77,9 +79,9 @@ class StudentAcademicHistory(Document):
                 if self.overall_percentage:
                     grading_scale = frappe.db.get_value("Program", self.program, "grading_scale")
                     if grading_scale:
-                        scale_doc = frappe.get_doc("Grading Scale", grading_scale)
-                        grade_result = scale_doc.calculate_grade(self.overall_percentage)
-                        self.overall_grade = grade_result.get("letter_grade")
+                        scale = get_grading_scale(grading_scale)
+                        if scale:
+                            self.overall_grade = scale.evaluate(self.overall_percentage).get("letter_grade")
             
             # Get attendance data
             attendance_data = frappe.db.sql("""
@@ -101,7 +103,7 @@ class StudentAcademicHistory(Document):
                 "student": self.student,
                 "academic_year": self.academic_year
             })
-            
+        
         except Exception as e:
             frappe.log_error(f"Failed to populate academic data: {str(e)}")
     
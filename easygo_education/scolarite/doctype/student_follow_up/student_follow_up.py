@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class StudentFollowUp(Document):
     """Student Follow-up management."""
@@ -58,7 +60,7 @@ class StudentFollowUp(Document):
     def notify_assigned_user(self):
         """Notify assigned user of follow-up."""
         if self.assigned_to and self.has_value_changed("assigned_to"):
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.assigned_to],
                 subject=_("Student Follow-up Assigned: {0}").format(self.student_name),
                 message=_("You have been assigned a student follow-up for {0}. Priority: {1}").format(
@@ -148,7 +150,7 @@ class StudentFollowUp(Document):
         
         for parent in parent_contacts:
             if parent.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[parent.email_address],
                     subject=_("Student Follow-up: {0}").format(self.student_name),
                     message=self.get_parent_notification_message(parent.guardian_name),
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class StudentTransfer(Document):
     """Student Transfer doctype controller."""
@@ -77,7 +79,7 @@ class StudentTransfer(Document):
             if managers_with_role:
                 recipients = [manager.email for manager in managers_with_role if manager.email]
                 
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Student Transfer Approval Required: {0}").format(self.student_name),
                     message=_("A student transfer request requires your approval.\n\nStudent: {0}\nTransfer Type: {1}\nReason: {2}\nTransfer Date: {3}").format(
@@ -145,7 +147,7 @@ class StudentTransfer(Document):
             requester_email = frappe.db.get_value("User", self.requested_by, "email")
             
             if requester_email:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[requester_email],
                     subject=_("Student Transfer Approved: {0}").format(self.student_name),
                     message=_("The transfer request for student {0} has been approved by {1}.").format(
@@ -166,7 +168,7 @@ class StudentTransfer(Document):
                 guardian_email = frappe.db.get_value("Guardian", self.current_guardian, "email_address")
                 
                 if guardian_email:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[guardian_email],
                         subject=_("Student Transfer Completed: {0}").format(self.student_name),
                         message=_("The transfer process for {0} has been completed successfully.").format(
@@ -0,0 +1,221 @@
+"""Compiled grading scale lookups.
+
+A grading scale is compiled once per version (its name and ``modified``
+timestamp) into parallel lists sorted by minimum score, so a percentage
+is graded with one bisect instead of walking an if/elif ladder or the
+scale's interval rows. The rows of each Grading Scale, and the name of
+the default one, are cached in Redis and dropped whenever a Grading
+Scale is saved or deleted.
+
+Two built-in scales keep the historical ladders for sites without a
+default Grading Scale: ``STANDARD_SCALE`` for report cards and
+``LETTER_GRADE_SCALE`` for individual grades.
+"""
+
+import math
+from bisect import bisect_right
+
+import frappe
+from frappe.utils import cint, flt
+
+
+GRADING_SCALE_CACHE_KEY = "easygo_grading_scale"
+DEFAULT_SCALE_KEY = "__default__"
+
+SCALE_FIELDS = [
+    "name", "modified", "minimum_score", "maximum_score", "passing_grade",
+    "honor_roll_threshold", "grade_points_enabled", "rounding_method", "decimal_places",
+]
+INTERVAL_FIELDS = ["grade_letter", "min_score", "max_score", "grade_point", "description"]
+
+CACHE_SIZE = 64
+
+_compiled_scales = {}
+
+
+class CompiledScale:
+    """A grading scale's intervals as sorted boundaries."""
+    
+    def __init__(self, name, intervals, minimum_score=None, maximum_score=None, passing_grade=None,
+            honor_roll_threshold=None, grade_points_enabled=1, rounding_method="No Rounding", decimal_places=2):
+        intervals = sorted(intervals, key=lambda interval: flt(interval.get("min_score")))
+        
+        self.name = name
+        self.minimum_score = minimum_score
+        self.maximum_score = maximum_score
+        self.passing_grade = passing_grade
+        self.honor_roll_threshold = honor_roll_threshold
+        self.rounding_method = rounding_method or "No Rounding"
+        self.decimal_places = cint(decimal_places) if decimal_places is not None else 2
+        
+        self.boundaries = [flt(interval.get("min_score")) for interval in intervals]
+        self.upper_bounds = [flt(interval.get("max_score")) for interval in intervals]
+        self.letters = [interval.get("grade_letter") for interval in intervals]
+        self.points = [
+            flt(interval.get("grade_point")) if grade_points_enabled else None
+            for interval in intervals
+        ]
+        self.descriptions = [interval.get("description") for interval in intervals]
+    
+    def round(self, score):
+        """Apply the scale's rounding method to a score."""
+        score = flt(score)
+        factor = 10 ** self.decimal_places
+        if self.rounding_method == "Round Up":
+            return math.ceil(score * factor) / factor
+        elif self.rounding_method == "Round Down":
+            return math.floor(score * factor) / factor
+        elif self.rounding_method == "Round to Nearest":
+            return round(score, self.decimal_places)
+        return score
+    
+    def in_range(self, score):
+        """Check a rounded score lies within the scale's minimum and maximum."""
+        if self.minimum_score is not None and score < self.minimum_score:
+            return False
+        if self.maximum_score is not None and score > self.maximum_score:
+            return False
+        return True
+    
+    def find(self, score):
+        """Get the index of the interval a rounded score falls in, or None."""
+        index = bisect_right(self.boundaries, score) - 1
+        if index < 0 or score > self.upper_bounds[index]:
+            return None
+        return index
+    
+    def get_grade(self, score):
+        """Get the letter grade of a score, or None if no interval matches."""
+        score = self.round(score)
+        index = self.find(score) if self.in_range(score) else None
+        return self.letters[index] if index is not None else None
+    
+    def get_grade_point(self, score):
+        """Get the grade point of a score; 0 if no interval matches."""
+        score = self.round(score)
+        index = self.find(score) if self.in_range(score) else None
+        return self.points[index] if index is not None else 0.0
+    
+    def get_grades(self, scores):
+        """Map scores to ``(letter_grade, grade_point)`` pairs, in input order."""
+        grades = []
+        for score in scores:
+            score = self.round(score)
+            index = self.find(score) if self.in_range(score) else None
+            grades.append((self.letters[index], self.points[index]) if index is not None else (None, 0.0))
+        return grades
+    
+    def evaluate(self, score):
+        """Grade a score with its description, passing and honor roll flags."""
+        score = self.round(score)
+        if not self.in_range(score):
+            return {
+                "letter_grade": "Invalid",
+                "grade_point": 0,
+                "description": "Score out of range"
+            }
+        
+        index = self.find(score)
+        if index is None:
+            return {
+                "letter_grade": "N/A",
+                "grade_point": 0,
+                "description": "No matching grade interval"
+            }
+        
+        return {
+            "letter_grade": self.letters[index],
+            "grade_point": self.points[index],
+            "description": self.descriptions[index],
+            "is_passing": self.passing_grade is not None and score >= self.passing_grade,
+            "is_honor_roll": bool(self.honor_roll_threshold) and score >= self.honor_roll_threshold
+        }
+
+
+def make_ladder_scale(name, ladder):
+    """Build an open-ended scale from ``(min_score, letter, grade_point)`` steps, lowest first."""
+    intervals = []
+    for i, (min_score, letter, grade_point) in enumerate(ladder):
+        intervals.append({
+            "grade_letter": letter,
+            "min_score": min_score,
+            "max_score": ladder[i + 1][0] if i + 1 < len(ladder) else math.inf,
+            "grade_point": grade_point
+        })
+    return CompiledScale(name, intervals)
+
+
+STANDARD_SCALE = make_ladder_scale("Standard", [
+    (-math.inf, "F", 0.0), (50, "C-", 1.0), (55, "C", 1.7), (60, "C+", 2.0), (65, "B-", 2.3),
+    (70, "B", 2.7), (75, "B+", 3.0), (80, "A-", 3.3), (85, "A", 3.7), (90, "A+", 4.0),
+])
+
+LETTER_GRADE_SCALE = make_ladder_scale("Letter Grade", [
+    (-math.inf, "F", 0.0), (60, "D", 1.0), (67, "D+", 1.3), (70, "C-", 1.7), (73, "C", 2.0),
+    (77, "C+", 2.3), (80, "B-", 2.7), (83, "B", 3.0), (87, "B+", 3.3), (90, "A-", 3.7),
+    (93, "A", 4.0), (97, "A+", 4.0),
+])
+
+
+def compile_grading_scale(scale):
+    """Get the compiled form of a Grading Scale document or cached row, compiling it once per version."""
+    key = (scale.get("name"), str(scale.get("modified")))
+    compiled = _compiled_scales.get(key)
+    if compiled is None:
+        if len(_compiled_scales) >= CACHE_SIZE:
+            _compiled_scales.clear()
+        compiled = _compiled_scales[key] = CompiledScale(
+            scale.get("name"),
+            [{field: interval.get(field) for field in INTERVAL_FIELDS} for interval in scale.get("intervals") or []],
+            minimum_score=scale.get("minimum_score"),
+            maximum_score=scale.get("maximum_score"),
+            passing_grade=scale.get("passing_grade"),
+            honor_roll_threshold=scale.get("honor_roll_threshold"),
+            grade_points_enabled=scale.get("grade_points_enabled"),
+            rounding_method=scale.get("rounding_method"),
+            decimal_places=scale.get("decimal_places")
+        )
+    return compiled
+
+
+def load_grading_scale(name):
+    """Load a Grading Scale and its intervals as plain values for the cache."""
+    scale = frappe.db.get_value("Grading Scale", name, SCALE_FIELDS, as_dict=True)
+    if not scale:
+        return {}
+    
+    scale.modified = str(scale.modified)
+    scale.intervals = frappe.get_all("Grading Scale Interval",
+        filters={"parenttype": "Grading Scale", "parent": name},
+        fields=INTERVAL_FIELDS,
+        order_by="min_score asc"
+    )
+    return scale
+
+
+def get_grading_scale(name):
+    """Get a compiled Grading Scale by name, or None if it doesn't exist."""
+    if not name:
+        return None
+    
+    scale = frappe.cache.hget(GRADING_SCALE_CACHE_KEY, name, lambda: load_grading_scale(name))
+    return compile_grading_scale(scale) if scale else None
+
+
+def get_default_grading_scale(fallback=STANDARD_SCALE):
+    """Get the active default Grading Scale, or ``fallback`` if there is none."""
+    name = frappe.cache.hget(GRADING_SCALE_CACHE_KEY, DEFAULT_SCALE_KEY, lambda: frappe.db.get_value(
+        "Grading Scale", {"is_default": 1, "is_active": 1}, "name"
+    ) or "")
+    return get_grading_scale(name) or fallback
+
+
+def get_grades(percentages, grading_scale=None, fallback=STANDARD_SCALE):
+    """Map percentages to ``(letter_grade, grade_point)`` pairs with a scale or the default one."""
+    scale = get_grading_scale(grading_scale) if grading_scale else None
+    return (scale or get_default_grading_scale(fallback)).get_grades(percentages)
+
+
+def clear_grading_scale_cache():
+    """Drop the cached Grading Scales and default scale name."""
+    frappe.cache.delete_value(GRADING_SCALE_CACHE_KEY)
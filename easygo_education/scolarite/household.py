@@ -0,0 +1,140 @@
+"""Household index over students and guardians.
+
+Students and guardians are grouped into households by a normalized key
+derived from the guardian's contact details: the lowercased email when
+there is one, otherwise the phone number's digits. The key is stored in
+the indexed ``household_key`` field of both Student and Guardian and kept
+up to date on validate, so finding a student's siblings or a guardian's
+children is a single indexed lookup instead of a table scan.
+"""
+
+import re
+
+import frappe
+from frappe import _
+
+
+INDEXED_DOCTYPES = {
+    "Student": ("guardian_email", "guardian_phone"),
+    "Guardian": ("email_address", "mobile_number"),
+}
+
+
+def get_household_key(email=None, phone=None):
+    """Get the household key for a guardian's contact details."""
+    email = (email or "").strip().lower()
+    if email:
+        return f"email:{email}"
+    
+    digits = re.sub(r"\D", "", phone or "")
+    # Treat local (06...) and international (2126...) Moroccan numbers alike
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith("212"):
+        digits = "0" + digits[3:]
+    if len(digits) >= 8:
+        return f"phone:{digits}"
+    
+    return None
+
+
+def set_household_key(doc):
+    """Set a Student's or Guardian's household key from its contact fields."""
+    email_field, phone_field = INDEXED_DOCTYPES[doc.doctype]
+    doc.household_key = get_household_key(doc.get(email_field), doc.get(phone_field))
+
+
+def get_household_sizes(household_keys, academic_year=None):
+    """Count the active students of each household, optionally in one academic year."""
+    household_keys = [key for key in set(household_keys) if key]
+    if not household_keys:
+        return {}
+    
+    conditions = ["household_key IN %(keys)s", "status = 'Active'"]
+    values = {"keys": household_keys}
+    if academic_year:
+        conditions.append("academic_year = %(academic_year)s")
+        values["academic_year"] = academic_year
+    
+    return dict(frappe.db.sql(f"""
+        SELECT household_key, COUNT(*)
+        FROM `tabStudent`
+        WHERE {' AND '.join(conditions)}
+        GROUP BY household_key
+    """, values))
+
+
+def get_sibling_counts(students, academic_year=None):
+    """Get the number of active siblings of each student.
+    
+    Returns ``{student: count}``; a student without a household has none.
+    """
+    if not students:
+        return {}
+    
+    rows = frappe.db.sql("""
+        SELECT name, household_key, status, academic_year
+        FROM `tabStudent`
+        WHERE name IN %(students)s
+    """, {"students": list(students)}, as_dict=True)
+    sizes = get_household_sizes([row.household_key for row in rows], academic_year)
+    
+    counts = {}
+    for row in rows:
+        size = sizes.get(row.household_key, 0)
+        # Don't count the student as its own sibling
+        if size and row.status == "Active" and (not academic_year or row.academic_year == academic_year):
+            size -= 1
+        counts[row.name] = size
+    return counts
+
+
+def get_household_students(household_key, active_only=True):
+    """Get the students of a household."""
+    if not household_key:
+        return []
+    
+    filters = {"household_key": household_key}
+    if active_only:
+        filters["status"] = "Active"
+    
+    return frappe.get_all("Student",
+        filters=filters,
+        fields=["name", "student_name", "school_class", "academic_year", "date_of_birth", "admission_date", "status"],
+        order_by="date_of_birth asc"
+    )
+
+
+@frappe.whitelist()
+def rebuild_household_index():
+    """Recompute the household key of every Student and Guardian."""
+    frappe.only_for("System Manager")
+    
+    updated = rebuild_household_keys()
+    frappe.db.commit()
+    return {"message": _("Household index rebuilt"), "updated": updated}
+
+
+def rebuild_household_keys():
+    """Recompute household keys without a permission check, returning the rows updated per DocType."""
+    updated = {}
+    for doctype, (email_field, phone_field) in INDEXED_DOCTYPES.items():
+        rows = frappe.db.sql(f"""
+            SELECT name, `{email_field}`, `{phone_field}`, household_key FROM `tab{doctype}`
+        """, as_list=True)
+        
+        # Group names by their new key so each key is written with one UPDATE
+        changes = {}
+        for name, email, phone, current in rows:
+            key = get_household_key(email, phone)
+            if key != current:
+                changes.setdefault(key, []).append(name)
+        
+        for key, names in changes.items():
+            frappe.db.sql(f"""
+                UPDATE `tab{doctype}` SET household_key = %(key)s WHERE name IN %(names)s
+            """, {"key": key, "names": names})
+        
+        updated[doctype] = sum(len(names) for names in changes.values())
+    
+    return updated
@@ -0,0 +1,186 @@
+"""Streaming MASSAR student exports.
+
+Students are read through an unbuffered (server-side) cursor and written
+``CHUNK_SIZE`` rows at a time to a gzip-compressed CSV or a write-only
+XLSX workbook in ``private/files/massar_exports``, so memory stays
+bounded however many students a school group has.
+
+A delta export only contains students with a MASSAR code modified since
+the watermark kept in School Settings, whatever their status, so leavers
+reach the ministry as well. Each export reads up to the time it started
+and then moves the watermark there; changes made while it runs go into
+the next delta. Without a watermark, or when asked for a full export,
+every active student with a MASSAR code is exported.
+"""
+
+import csv
+import gzip
+import os
+from itertools import islice
+
+import frappe
+from frappe import _
+from frappe.utils import cint, now, now_datetime
+
+
+CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    "MASSAR_CODE", "STUDENT_NAME", "DATE_OF_BIRTH", "GENDER", "CLASS",
+    "GUARDIAN_NAME", "GUARDIAN_PHONE", "ADDRESS", "ACADEMIC_YEAR", "STATUS",
+]
+
+
+class CsvExportWriter:
+    """Gzip-compressed CSV written row chunk by row chunk."""
+    
+    extension = "csv.gz"
+    
+    def __init__(self, path):
+        self.file = gzip.open(path, "wt", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+    
+    def write_rows(self, rows):
+        """Append rows to the file."""
+        self.writer.writerows(rows)
+    
+    def close(self):
+        """Flush and close the file."""
+        self.file.close()
+
+
+class XlsxExportWriter:
+    """Write-only XLSX workbook, streamed to disk as rows are appended."""
+    
+    extension = "xlsx"
+    
+    def __init__(self, path):
+        from openpyxl import Workbook
+        
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("MASSAR")
+        self.sheet.append(EXPORT_COLUMNS)
+    
+    def write_rows(self, rows):
+        """Append rows to the sheet."""
+        for row in rows:
+            self.sheet.append(row)
+    
+    def close(self):
+        """Write the workbook to its file."""
+        self.workbook.save(self.path)
+
+
+EXPORT_WRITERS = {"CSV": CsvExportWriter, "XLSX": XlsxExportWriter}
+
+
+def get_export_row(student, academic_year):
+    """Get a student's MASSAR export row."""
+    return [
+        student.massar_code,
+        student.student_name or "",
+        student.date_of_birth.strftime("%Y-%m-%d") if student.date_of_birth else "",
+        student.gender or "",
+        student.school_class or "",
+        student.guardian_name or "",
+        student.guardian_phone or "",
+        student.address or "",
+        academic_year or "",
+        student.status or ""
+    ]
+
+
+def iter_student_chunks(since, until):
+    """Yield chunks of students to export, read with an unbuffered cursor.
+    
+    With ``since`` only students modified after it are read, whatever
+    their status; otherwise every active student. No other query may run
+    until the iteration ends.
+    """
+    conditions = ["massar_code IS NOT NULL", "massar_code != ''", "modified <= %(until)s"]
+    if since:
+        conditions.append("modified > %(since)s")
+    else:
+        conditions.append("status = 'Active'")
+    
+    with frappe.db.unbuffered_cursor():
+        rows = frappe.db.sql(f"""
+            SELECT name, student_name, massar_code, date_of_birth, gender, school_class,
+                   guardian_name, guardian_phone, address, status
+            FROM `tabStudent`
+            WHERE {' AND '.join(conditions)}
+            ORDER BY school_class, student_name
+        """, {"since": since, "until": until}, as_dict=True, as_iterator=True)
+        
+        while chunk := list(islice(rows, CHUNK_SIZE)):
+            yield chunk
+
+
+def export_massar_students(delta=True, file_format="CSV"):
+    """Write a MASSAR export file and move the watermark.
+    
+    Returns a dict with file_name, file_url, count and is_delta, or None
+    when no student needed exporting.
+    """
+    if file_format not in EXPORT_WRITERS:
+        frappe.throw(_("Unsupported MASSAR export format {0}").format(file_format))
+    
+    since = frappe.db.get_single_value("School Settings", "massar_export_watermark") if delta else None
+    until = now()
+    academic_year = frappe.db.get_value("Academic Year", {"is_default": 1}, "name")
+    
+    export_dir = frappe.get_site_path("private", "files", "massar_exports")
+    os.makedirs(export_dir, exist_ok=True)
+    
+    writer_class = EXPORT_WRITERS[file_format]
+    kind = "delta" if since else "full"
+    file_name = f"massar_students_{kind}_{now_datetime().strftime('%Y_%m_%d_%H%M%S')}.{writer_class.extension}"
+    path = os.path.join(export_dir, file_name)
+    
+    count = 0
+    writer = writer_class(path)
+    try:
+        for chunk in iter_student_chunks(since, until):
+            writer.write_rows([get_export_row(student, academic_year) for student in chunk])
+            count += len(chunk)
+    finally:
+        writer.close()
+    
+    export = None
+    settings = {"massar_export_watermark": until}
+    if count:
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": file_name,
+            "file_url": f"/private/files/massar_exports/{file_name}",
+            "is_private": 1,
+            "folder": "Home"
+        })
+        file_doc.insert(ignore_permissions=True)
+        settings["massar_last_export"] = file_name
+        export = frappe._dict({"file_name": file_name, "file_url": file_doc.file_url, "count": count, "is_delta": bool(since)})
+    else:
+        os.remove(path)
+    
+    frappe.db.set_single_value("School Settings", settings)
+    frappe.db.commit()
+    return export
+
+
+@frappe.whitelist()
+def run_massar_export(delta=1, file_format="CSV"):
+    """Run a MASSAR export in the background."""
+    frappe.only_for(["System Manager", "Director"])
+    
+    frappe.enqueue(
+        "easygo_education.scolarite.massar_export.export_massar_students",
+        queue="long",
+        job_id="massar_export",
+        deduplicate=True,
+        delta=bool(cint(delta)),
+        file_format=file_format,
+        enqueue_after_commit=True
+    )
+    return {"message": _("MASSAR export started")}
@@ -0,0 +1,249 @@
+"""Class-level report card batches.
+
+Builds the report cards of every active student of a class for one
+academic term with a fixed number of queries: published grades are
+summed per student and subject in one grouped query, attendance comes
+from the attendance rollups, and totals, GPA and dense class ranks are
+computed in memory with the default grading scale before the cards and
+their subject rows are bulk inserted as drafts. Students who already have a card for the term are
+left alone, so a batch can be run again after grades are added for
+late-comers.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import flt, now, today
+
+from easygo_education.scolarite.grading import STANDARD_SCALE, get_default_grading_scale
+from easygo_education.utils.naming import make_series_names
+from easygo_education.vie_scolaire.attendance_rollup import get_student_attendance_counts
+
+
+REPORT_CARD_SERIES = "RC-.YYYY.-.#####"
+
+CARD_FIELDS = [
+    "student", "student_name", "academic_year", "academic_term", "school_class", "report_date",
+    "total_marks", "obtained_marks", "overall_percentage", "overall_grade", "grade_point_average",
+    "attendance_percentage", "days_present", "days_absent", "promotion_status", "class_rank",
+]
+SUBJECT_FIELDS = ["subject", "subject_name", "total_marks", "obtained_marks", "percentage", "grade", "grade_point"]
+
+
+def get_promotion_status(overall_percentage):
+    """Get the promotion status for an overall percentage."""
+    if overall_percentage >= 75:
+        return "Promoted"
+    elif overall_percentage >= 50:
+        return "Conditional Promotion"
+    return "Retained"
+
+
+def get_term(academic_term):
+    """Get an academic term's year and dates."""
+    return frappe.get_cached_value("Academic Term", academic_term,
+        ["academic_year", "term_start_date", "term_end_date"], as_dict=True)
+
+
+def get_subject_totals(students, term):
+    """Sum published grades per student and subject over a term.
+    
+    Returns ``{student: [row, ...]}`` with subject, subject_name,
+    total_marks and obtained_marks per row, ordered by subject.
+    """
+    if not students:
+        return {}
+    
+    totals = {}
+    for row in frappe.db.sql("""
+        SELECT g.student, g.subject, s.subject_name,
+               SUM(g.max_grade) as total_marks, SUM(g.grade) as obtained_marks
+        FROM `tabGrade` g
+        LEFT JOIN `tabSubject` s ON s.name = g.subject
+        WHERE g.student IN %(students)s
+        AND g.is_published = 1
+        AND g.assessment_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY g.student, g.subject, s.subject_name
+        ORDER BY g.student, g.subject
+    """, {"students": list(students), "start_date": term.term_start_date, "end_date": term.term_end_date}, as_dict=True):
+        totals.setdefault(row.student, []).append(row)
+    return totals
+
+
+def compute_subjects(subject_totals, scale=STANDARD_SCALE):
+    """Compute the percentage, grade and grade point of each subject row."""
+    subjects = []
+    for row in subject_totals:
+        total_marks = flt(row.total_marks)
+        obtained_marks = flt(row.obtained_marks)
+        if not total_marks:
+            continue
+        subjects.append(frappe._dict({
+            "subject": row.subject,
+            "subject_name": row.get("subject_name"),
+            "total_marks": total_marks,
+            "obtained_marks": obtained_marks,
+            "percentage": obtained_marks / total_marks * 100
+        }))
+    
+    for subject, (grade, grade_point) in zip(subjects, scale.get_grades([subject.percentage for subject in subjects])):
+        subject.grade = grade
+        subject.grade_point = flt(grade_point)
+    return subjects
+
+
+def compute_card(subject_totals, attendance=None, scale=STANDARD_SCALE):
+    """Compute a report card's subjects, totals, GPA, attendance and promotion status."""
+    subjects = compute_subjects(subject_totals, scale)
+    total_marks = sum(subject.total_marks for subject in subjects)
+    obtained_marks = sum(subject.obtained_marks for subject in subjects)
+    overall_percentage = obtained_marks / total_marks * 100 if total_marks else 0
+    
+    card = frappe._dict({
+        "subjects": subjects,
+        "total_marks": total_marks,
+        "obtained_marks": obtained_marks,
+        "overall_percentage": overall_percentage,
+        "overall_grade": scale.get_grade(overall_percentage) if total_marks else None,
+        "grade_point_average": sum(subject.grade_point for subject in subjects) / len(subjects) if subjects else 0,
+        "promotion_status": get_promotion_status(overall_percentage) if total_marks else "Pending",
+        "attendance_percentage": 0,
+        "days_present": 0,
+        "days_absent": 0
+    })
+    
+    if attendance and attendance.total_count:
+        card.days_present = attendance.present_count
+        card.days_absent = attendance.absent_count
+        card.attendance_percentage = attendance.present_count / attendance.total_count * 100
+    
+    return card
+
+
+def get_dense_ranks(values):
+    """Rank values from highest to lowest, ties sharing a rank with no gaps.
+    
+    Returns one rank per value in input order; missing values get no rank,
+    while a 0 is ranked last like any other percentage.
+    """
+    ordered = sorted({flt(value, 4) for value in values if value is not None}, reverse=True)
+    ranks = {value: rank for rank, value in enumerate(ordered, 1)}
+    return [ranks.get(flt(value, 4)) if value is not None else None for value in values]
+
+
+@frappe.whitelist()
+def generate_class_report_cards(school_class, academic_term):
+    """Build the missing report cards of a class for a term in the background."""
+    frappe.has_permission("Report Card", "create", throw=True)
+    
+    frappe.enqueue(
+        "easygo_education.scolarite.report_cards.build_class_report_cards",
+        queue="long",
+        job_id=f"report_cards::{school_class}::{academic_term}",
+        deduplicate=True,
+        school_class=school_class,
+        academic_term=academic_term,
+        enqueue_after_commit=True
+    )
+    return {"message": _("Report cards for {0} are being generated").format(school_class)}
+
+
+def build_class_report_cards(school_class, academic_term):
+    """Create draft report cards for the active students of a class without one for the term.
+    
+    Returns the number of cards created.
+    """
+    term = get_term(academic_term)
+    if not term:
+        frappe.throw(_("Academic Term {0} not found").format(academic_term))
+    
+    students = frappe.get_all("Student",
+        filters={"school_class": school_class, "status": "Active"},
+        fields=["name", "student_name"],
+        order_by="name asc"
+    )
+    existing = set(frappe.get_all("Report Card",
+        filters={"school_class": school_class, "academic_term": academic_term, "docstatus": ["<", 2]},
+        pluck="student"
+    ))
+    students = [student for student in students if student.name not in existing]
+    if not students:
+        return 0
+    
+    student_names = [student.name for student in students]
+    subject_totals = get_subject_totals(student_names, term)
+    attendance = get_student_attendance_counts(student_names, term.term_start_date, term.term_end_date)
+    
+    cards = []
+    report_date = today()
+    scale = get_default_grading_scale()
+    for student in students:
+        card = compute_card(subject_totals.get(student.name, []), attendance.get(student.name), scale)
+        card.update({
+            "student": student.name,
+            "student_name": student.student_name,
+            "academic_year": term.academic_year,
+            "academic_term": academic_term,
+            "school_class": school_class,
+            "report_date": report_date,
+            "class_rank": None
+        })
+        cards.append(card)
+    
+    insert_cards(cards)
+    update_class_ranks(school_class, academic_term)
+    frappe.db.commit()
+    return len(cards)
+
+
+def insert_cards(cards):
+    """Bulk insert draft report cards and their subject rows."""
+    names = make_series_names(REPORT_CARD_SERIES, len(cards))
+    timestamp = now()
+    user = frappe.session.user
+    standard = [timestamp, timestamp, user, user, 0]
+    
+    frappe.db.bulk_insert(
+        "Report Card",
+        fields=["name", "creation", "modified", "owner", "modified_by", "docstatus", *CARD_FIELDS],
+        values=[(name, *standard, *(card[field] for field in CARD_FIELDS)) for name, card in zip(names, cards)]
+    )
+    
+    frappe.db.bulk_insert(
+        "Report Card Subject",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by", "docstatus",
+            "parent", "parenttype", "parentfield", "idx", *SUBJECT_FIELDS
+        ],
+        values=[
+            (
+                frappe.generate_hash(length=10), *standard,
+                name, "Report Card", "subjects", idx, *(subject[field] for field in SUBJECT_FIELDS)
+            )
+            for name, card in zip(names, cards)
+            for idx, subject in enumerate(card.subjects, 1)
+        ]
+    )
+
+
+def update_class_ranks(school_class, academic_term):
+    """Recompute the dense class ranks of a class's report cards for a term with one UPDATE."""
+    cards = frappe.db.sql("""
+        SELECT name, overall_percentage, class_rank
+        FROM `tabReport Card`
+        WHERE school_class = %s
+        AND academic_term = %s
+        AND docstatus < 2
+    """, [school_class, academic_term], as_dict=True)
+    
+    ranks = get_dense_ranks([card.overall_percentage for card in cards])
+    changed = {card.name: rank for card, rank in zip(cards, ranks) if card.class_rank != rank}
+    if not changed:
+        return
+    
+    case_sql = " ".join(["WHEN %s THEN %s"] * len(changed))
+    params = [value for pair in changed.items() for value in pair]
+    frappe.db.sql(f"""
+        UPDATE `tabReport Card`
+        SET class_rank = CASE name {case_sql} END
+        WHERE name IN %s
+    """, (*params, tuple(changed)))
@@ -0,0 +1,585 @@
+"""Constraint-based timetable generator.
+
+Builds a conflict-free set of Course Schedule rows from Class Subject Teacher
+assignments. Each weekly hour of a class subject is one lesson that must be
+placed in a (day, period) slot and a room such that no teacher, class or room
+is double-booked, rooms are large enough for the class, teachers are not
+scheduled when unavailable and a class sees the same subject at most
+``max_daily_lessons`` times a day.
+
+The solver places lessons greedily, most constrained first, then repairs
+leftovers with a min-conflicts search until everything is placed or the time
+budget runs out. It keeps no Frappe state so it can be benchmarked offline.
+"""
+
+import random
+import time
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt
+
+
+DEFAULT_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+DEFAULT_PERIODS = [
+    ("08:00:00", "09:00:00"),
+    ("09:00:00", "10:00:00"),
+    ("10:00:00", "11:00:00"),
+    ("11:00:00", "12:00:00"),
+    ("14:00:00", "15:00:00"),
+    ("15:00:00", "16:00:00"),
+    ("16:00:00", "17:00:00"),
+    ("17:00:00", "18:00:00"),
+]
+
+
+class TimetableSolver:
+    """Place lessons into (day, period, room) slots under hard constraints.
+    
+    ``lessons`` is a list of dicts with ``school_class``, ``subject`` and
+    ``instructor``; ``rooms`` maps room to capacity; ``class_sizes`` maps class
+    to student count; ``preferred_rooms`` maps class to its home room and
+    ``unavailable`` maps instructor to a set of (day, period) slots.
+    """
+    
+    def __init__(self, lessons, rooms, days=None, periods=None, class_sizes=None,
+            preferred_rooms=None, unavailable=None, max_daily_lessons=2, seed=None):
+        self.lessons = lessons
+        self.days = days or DEFAULT_DAYS
+        self.periods = periods or DEFAULT_PERIODS
+        self.slots = [(day, period) for day in range(len(self.days)) for period in range(len(self.periods))]
+        self.class_sizes = class_sizes or {}
+        self.preferred_rooms = preferred_rooms or {}
+        self.unavailable = unavailable or {}
+        self.max_daily_lessons = max_daily_lessons
+        self.random = random.Random(seed)
+        
+        # Candidate rooms per class: home room first, then smallest that fits
+        self.rooms_for_class = {}
+        sorted_rooms = sorted(rooms.items(), key=lambda room: (room[1], room[0]))
+        for lesson in lessons:
+            school_class = lesson["school_class"]
+            if school_class in self.rooms_for_class:
+                continue
+            size = self.class_sizes.get(school_class, 0)
+            fitting = [room for room, capacity in sorted_rooms if capacity >= size]
+            home = self.preferred_rooms.get(school_class)
+            if home in fitting:
+                fitting.remove(home)
+                fitting.insert(0, home)
+            self.rooms_for_class[school_class] = fitting
+        
+        self.reset()
+    
+    def reset(self):
+        """Clear all placements."""
+        self.assignment = {}
+        self.teacher_busy = {}
+        self.class_busy = {}
+        self.room_busy = {}
+        self.daily_count = {}
+        self.pinned = set()
+    
+    def is_available(self, lesson_id, slot):
+        """Check the instructor is not marked unavailable for the slot."""
+        return slot not in self.unavailable.get(self.lessons[lesson_id]["instructor"], ())
+    
+    def place(self, lesson_id, slot, room):
+        """Record a placement."""
+        lesson = self.lessons[lesson_id]
+        self.assignment[lesson_id] = (slot, room)
+        self.teacher_busy[(lesson["instructor"], slot)] = lesson_id
+        self.class_busy[(lesson["school_class"], slot)] = lesson_id
+        self.room_busy[(room, slot)] = lesson_id
+        key = (lesson["school_class"], lesson["subject"], slot[0])
+        self.daily_count[key] = self.daily_count.get(key, 0) + 1
+    
+    def unplace(self, lesson_id):
+        """Remove a placement."""
+        slot, room = self.assignment.pop(lesson_id)
+        lesson = self.lessons[lesson_id]
+        del self.teacher_busy[(lesson["instructor"], slot)]
+        del self.class_busy[(lesson["school_class"], slot)]
+        del self.room_busy[(room, slot)]
+        self.daily_count[(lesson["school_class"], lesson["subject"], slot[0])] -= 1
+    
+    def free_room(self, lesson_id, slot):
+        """Get the first candidate room free in the slot."""
+        for room in self.rooms_for_class[self.lessons[lesson_id]["school_class"]]:
+            if (room, slot) not in self.room_busy:
+                return room
+        return None
+    
+    def can_place(self, lesson_id, slot):
+        """Check all hard constraints for a lesson in a slot; returns a room or None."""
+        lesson = self.lessons[lesson_id]
+        if (lesson["instructor"], slot) in self.teacher_busy:
+            return None
+        if (lesson["school_class"], slot) in self.class_busy:
+            return None
+        if not self.is_available(lesson_id, slot):
+            return None
+        if self.daily_count.get((lesson["school_class"], lesson["subject"], slot[0]), 0) >= self.max_daily_lessons:
+            return None
+        return self.free_room(lesson_id, slot)
+    
+    def slot_order(self, lesson_id):
+        """Order slots to spread a class subject over the week."""
+        lesson = self.lessons[lesson_id]
+        slots = list(self.slots)
+        self.random.shuffle(slots)
+        slots.sort(key=lambda slot: self.daily_count.get((lesson["school_class"], lesson["subject"], slot[0]), 0))
+        return slots
+    
+    def greedy(self, lesson_ids):
+        """Place lessons greedily, most constrained first. Returns unplaced ids."""
+        teacher_load = {}
+        for lesson_id in lesson_ids:
+            teacher = self.lessons[lesson_id]["instructor"]
+            teacher_load[teacher] = teacher_load.get(teacher, 0) + 1
+        
+        def difficulty(lesson_id):
+            lesson = self.lessons[lesson_id]
+            free_slots = len(self.slots) - len(self.unavailable.get(lesson["instructor"], ()))
+            return (free_slots - teacher_load[lesson["instructor"]], len(self.rooms_for_class[lesson["school_class"]]))
+        
+        unplaced = []
+        for lesson_id in sorted(lesson_ids, key=difficulty):
+            for slot in self.slot_order(lesson_id):
+                room = self.can_place(lesson_id, slot)
+                if room:
+                    self.place(lesson_id, slot, room)
+                    break
+            else:
+                unplaced.append(lesson_id)
+        return unplaced
+    
+    def repair(self, unplaced, deadline):
+        """Min-conflicts search: place leftovers by evicting the fewest lessons.
+        
+        Stops at the deadline, or once every remaining lesson has been tried
+        without finding any slot it could take, even by evicting others.
+        """
+        unplaced = list(unplaced)
+        best = list(unplaced)
+        best_assignment = dict(self.assignment)
+        tabu = {}
+        step = 0
+        # Lessons with no candidate slot since the last placement changed
+        stuck = set()
+        
+        while unplaced and time.monotonic() < deadline:
+            step += 1
+            lesson_id = unplaced.pop(self.random.randrange(len(unplaced)))
+            lesson = self.lessons[lesson_id]
+            
+            candidates = []
+            waiting_on_tabu = False
+            for slot in self.slots:
+                if not self.is_available(lesson_id, slot):
+                    continue
+                if tabu.get((lesson_id, slot), 0) > step:
+                    waiting_on_tabu = True
+                    continue
+                if self.daily_count.get((lesson["school_class"], lesson["subject"], slot[0]), 0) >= self.max_daily_lessons:
+                    continue
+                
+                evicted = {
+                    self.teacher_busy.get((lesson["instructor"], slot)),
+                    self.class_busy.get((lesson["school_class"], slot)),
+                }
+                room = self.free_room(lesson_id, slot)
+                if not room:
+                    rooms = self.rooms_for_class[lesson["school_class"]]
+                    if not rooms:
+                        continue
+                    room = rooms[0]
+                    evicted.add(self.room_busy.get((room, slot)))
+                evicted.discard(None)
+                if evicted & self.pinned:
+                    continue
+                candidates.append((len(evicted), self.random.random(), slot, room, evicted))
+            
+            if not candidates:
+                unplaced.append(lesson_id)
+                # A tabu slot may open up in later steps; otherwise nothing will change
+                if not waiting_on_tabu:
+                    stuck.add(lesson_id)
+                    if stuck.issuperset(unplaced):
+                        break
+                continue
+            
+            stuck.clear()
+            _count, _tiebreak, slot, room, evicted = min(candidates, key=lambda candidate: candidate[:2])
+            for other in evicted:
+                other_slot = self.assignment[other][0]
+                self.unplace(other)
+                tabu[(other, other_slot)] = step + 10
+                unplaced.append(other)
+            self.place(lesson_id, slot, room)
+            
+            # Re-place evicted lessons cheaply where possible
+            still_unplaced = []
+            for other in unplaced:
+                for other_slot in self.slot_order(other):
+                    other_room = self.can_place(other, other_slot)
+                    if other_room:
+                        self.place(other, other_slot, other_room)
+                        break
+                else:
+                    still_unplaced.append(other)
+            unplaced = still_unplaced
+            
+            if len(unplaced) < len(best):
+                best = list(unplaced)
+                best_assignment = dict(self.assignment)
+        
+        if len(unplaced) > len(best):
+            self.restore(best_assignment)
+            unplaced = best
+        return unplaced
+    
+    def restore(self, assignment):
+        """Reset placements to a saved assignment, keeping pins."""
+        pinned = self.pinned
+        self.reset()
+        self.pinned = pinned
+        for lesson_id, (slot, room) in assignment.items():
+            self.place(lesson_id, slot, room)
+    
+    def solve(self, time_budget=30, fixed=None, pinned=None):
+        """Solve within ``time_budget`` seconds.
+        
+        ``fixed`` maps lesson ids to (slot, room) placements to start from and
+        ``pinned`` lists those of them the search may not move. Returns the
+        list of lesson ids that could not be placed.
+        """
+        deadline = time.monotonic() + flt(time_budget)
+        self.reset()
+        
+        for lesson_id, (slot, room) in (fixed or {}).items():
+            self.place(lesson_id, slot, room)
+        self.pinned = set(pinned or [])
+        
+        todo = [lesson_id for lesson_id in range(len(self.lessons)) if lesson_id not in self.assignment]
+        unplaced = self.greedy(todo)
+        if unplaced:
+            unplaced = self.repair(unplaced, deadline)
+        return unplaced
+    
+    def resolve_instructor(self, previous, instructor, time_budget=10):
+        """Re-solve after one instructor's lessons or availability changed.
+        
+        Lessons of other instructors keep their ``previous`` placement and are
+        pinned; only if that leaves lessons unplaced are the pins lifted for
+        the classes the instructor teaches. Each phase gets half of
+        ``time_budget``, plus whatever the first one leaves unused.
+        """
+        deadline = time.monotonic() + flt(time_budget)
+        fixed = {
+            lesson_id: placement for lesson_id, placement in previous.items()
+            if lesson_id < len(self.lessons) and self.lessons[lesson_id]["instructor"] != instructor
+        }
+        unplaced = self.solve(flt(time_budget) / 2, fixed=fixed, pinned=list(fixed))
+        if not unplaced:
+            return unplaced
+        
+        classes = {self.lessons[lesson_id]["school_class"] for lesson_id in unplaced}
+        self.pinned = {
+            lesson_id for lesson_id in self.pinned
+            if self.lessons[lesson_id]["school_class"] not in classes
+        }
+        return self.repair(unplaced, deadline)
+    
+    def to_schedules(self):
+        """Convert placements to Course Schedule field dicts."""
+        schedules = []
+        for lesson_id, ((day, period), room) in sorted(self.assignment.items()):
+            lesson = self.lessons[lesson_id]
+            start_time, end_time = self.periods[period]
+            schedules.append({
+                "school_class": lesson["school_class"],
+                "subject": lesson["subject"],
+                "instructor": lesson["instructor"],
+                "day_of_week": self.days[day],
+                "start_time": start_time,
+                "end_time": end_time,
+                "room_number": room,
+                "is_active": 1
+            })
+        return schedules
+
+
+def expand_lessons(assignments, weekly_hours):
+    """Expand class/subject/teacher assignments into one lesson per weekly hour."""
+    lessons = []
+    for assignment in assignments:
+        hours = cint(weekly_hours.get((assignment["school_class"], assignment["subject"])))
+        for _hour in range(hours):
+            lessons.append({
+                "school_class": assignment["school_class"],
+                "subject": assignment["subject"],
+                "instructor": assignment["instructor"]
+            })
+    return lessons
+
+
+def get_slot_lookup(days, periods):
+    """Map (day_of_week, start_time) to solver slot tuples."""
+    return {
+        (day, start_time): (day_idx, period_idx)
+        for day_idx, day in enumerate(days)
+        for period_idx, (start_time, _end_time) in enumerate(periods)
+    }
+
+
+def load_problem(academic_year, weekly_hours=None, unavailability=None, days=None, periods=None):
+    """Load the generator inputs for an academic year with grouped queries.
+    
+    ``weekly_hours`` overrides hours per "class|subject" key and defaults to
+    the Subject's credit hours. ``unavailability`` maps an instructor to a list
+    of {"day_of_week", "start_time"} slots.
+    """
+    days = days or DEFAULT_DAYS
+    periods = periods or DEFAULT_PERIODS
+    
+    assignments = frappe.db.sql("""
+        SELECT cst.school_class, cst.subject, cst.teacher as instructor, s.credit_hours
+        FROM `tabClass Subject Teacher` cst
+        JOIN `tabSubject` s ON s.name = cst.subject
+        WHERE cst.academic_year = %s
+        AND cst.is_active = 1
+        AND (cst.is_primary_teacher = 1 OR NOT EXISTS (
+            SELECT 1 FROM `tabClass Subject Teacher` p
+            WHERE p.school_class = cst.school_class AND p.subject = cst.subject
+            AND p.academic_year = cst.academic_year AND p.is_active = 1 AND p.is_primary_teacher = 1
+        ))
+        ORDER BY cst.school_class, cst.subject
+    """, academic_year, as_dict=True)
+    
+    hours = {}
+    for row in assignments:
+        key = (row.school_class, row.subject)
+        override = (weekly_hours or {}).get(f"{row.school_class}|{row.subject}")
+        hours[key] = cint(override if override is not None else row.credit_hours)
+    
+    classes = frappe.get_all("School Class",
+        filters={"name": ["in", list({row.school_class for row in assignments}) or [""]]},
+        fields=["name", "room", "current_students", "max_students"]
+    )
+    rooms = dict(frappe.get_all("Room",
+        filters={"is_active": 1},
+        fields=["name", "capacity"],
+        as_list=True
+    ))
+    
+    slot_lookup = get_slot_lookup(days, periods)
+    unavailable = {}
+    for instructor, blocked in (unavailability or {}).items():
+        unavailable[instructor] = {
+            slot_lookup[(entry["day_of_week"], entry["start_time"])]
+            for entry in blocked
+            if (entry["day_of_week"], entry["start_time"]) in slot_lookup
+        }
+    
+    return {
+        "lessons": expand_lessons(assignments, hours),
+        "rooms": {room: cint(capacity) for room, capacity in rooms.items()},
+        "class_sizes": {row.name: cint(row.current_students or row.max_students) for row in classes},
+        "preferred_rooms": {row.name: row.room for row in classes if row.room},
+        "unavailable": unavailable,
+        "days": days,
+        "periods": periods
+    }
+
+
+def parse_json(value):
+    """Parse a JSON argument passed through the API."""
+    import json
+    
+    return json.loads(value) if isinstance(value, str) and value else value
+
+
+@frappe.whitelist()
+def generate_timetable(academic_year, weekly_hours=None, unavailability=None, time_budget=30,
+        max_daily_lessons=2, commit=0):
+    """Generate a conflict-free timetable for an academic year.
+    
+    Returns the proposed schedules and any lessons that could not be placed
+    within the time budget. With ``commit`` set and every lesson placed, the
+    year's active schedules are deactivated and replaced.
+    """
+    frappe.only_for(["Education Manager", "System Manager"])
+    
+    problem = load_problem(academic_year, parse_json(weekly_hours), parse_json(unavailability))
+    solver = TimetableSolver(
+        problem["lessons"], problem["rooms"],
+        days=problem["days"], periods=problem["periods"],
+        class_sizes=problem["class_sizes"], preferred_rooms=problem["preferred_rooms"],
+        unavailable=problem["unavailable"], max_daily_lessons=cint(max_daily_lessons)
+    )
+    
+    start = time.monotonic()
+    unplaced = solver.solve(time_budget)
+    result = {
+        "schedules": solver.to_schedules(),
+        "unplaced": [problem["lessons"][lesson_id] for lesson_id in unplaced],
+        "total_lessons": len(problem["lessons"]),
+        "solve_seconds": round(time.monotonic() - start, 3)
+    }
+    
+    if cint(commit):
+        if unplaced:
+            frappe.throw(_("{0} lessons could not be placed; timetable not saved").format(len(unplaced)))
+        replace_timetable(academic_year, result["schedules"])
+        result["committed"] = True
+    
+    return result
+
+
+@frappe.whitelist()
+def regenerate_for_instructor(academic_year, instructor, weekly_hours=None, unavailability=None,
+        time_budget=10, max_daily_lessons=2, commit=0):
+    """Re-solve the timetable after one instructor changed, keeping other slots in place."""
+    frappe.only_for(["Education Manager", "System Manager"])
+    
+    problem = load_problem(academic_year, parse_json(weekly_hours), parse_json(unavailability))
+    solver = TimetableSolver(
+        problem["lessons"], problem["rooms"],
+        days=problem["days"], periods=problem["periods"],
+        class_sizes=problem["class_sizes"], preferred_rooms=problem["preferred_rooms"],
+        unavailable=problem["unavailable"], max_daily_lessons=cint(max_daily_lessons)
+    )
+    
+    previous = match_existing_schedules(academic_year, problem)
+    start = time.monotonic()
+    unplaced = solver.resolve_instructor(previous, instructor, time_budget)
+    result = {
+        "schedules": solver.to_schedules(),
+        "unplaced": [problem["lessons"][lesson_id] for lesson_id in unplaced],
+        "total_lessons": len(problem["lessons"]),
+        "solve_seconds": round(time.monotonic() - start, 3)
+    }
+    
+    if cint(commit):
+        if unplaced:
+            frappe.throw(_("{0} lessons could not be placed; timetable not saved").format(len(unplaced)))
+        replace_timetable(academic_year, result["schedules"])
+        result["committed"] = True
+    
+    return result
+
+
+def match_existing_schedules(academic_year, problem):
+    """Map stored active schedules onto lesson ids as a previous solution."""
+    slot_lookup = get_slot_lookup(problem["days"], problem["periods"])
+    open_lessons = {}
+    for lesson_id, lesson in enumerate(problem["lessons"]):
+        key = (lesson["school_class"], lesson["subject"], lesson["instructor"])
+        open_lessons.setdefault(key, []).append(lesson_id)
+    
+    previous = {}
+    for schedule in frappe.db.sql("""
+        SELECT school_class, subject, instructor, day_of_week,
+               TIME_FORMAT(start_time, '%%H:%%i:%%s') as start_time, room_number
+        FROM `tabCourse Schedule`
+        WHERE academic_year = %s AND is_active = 1
+    """, academic_year, as_dict=True):
+        slot = slot_lookup.get((schedule.day_of_week, schedule.start_time))
+        candidates = open_lessons.get((schedule.school_class, schedule.subject, schedule.instructor))
+        if slot and candidates and schedule.room_number:
+            previous[candidates.pop()] = (slot, schedule.room_number)
+    return previous
+
+
+def replace_timetable(academic_year, schedules):
+    """Deactivate the year's active schedules and insert the generated ones."""
+    from easygo_education.scolarite.timetable.interval_index import import_timetable
+    
+    frappe.db.sql("""
+        UPDATE `tabCourse Schedule`
+        SET is_active = 0
+        WHERE academic_year = %s AND is_active = 1
+    """, academic_year)
+    
+    result = import_timetable(academic_year, schedules)
+    if not result["valid"]:
+        frappe.throw(_("Generated timetable has {0} conflicts").format(len(result["conflicts"])))
+    return result
+
+
+def make_synthetic_school(classes=60, teachers=120, seed=42):
+    """Build a synthetic school problem for benchmarking.
+    
+    Ten subjects totalling 28 weekly hours per class, teachers spread evenly
+    over subjects, one home room per class and a few spare rooms.
+    """
+    rng = random.Random(seed)
+    subject_hours = [5, 5, 4, 3, 3, 2, 2, 2, 1, 1]
+    teachers_per_subject = teachers // len(subject_hours)
+    
+    assignments = []
+    weekly_hours = {}
+    for class_idx in range(classes):
+        school_class = f"CLASS-{class_idx:03d}"
+        for subject_idx, hours in enumerate(subject_hours):
+            subject = f"SUBJ-{subject_idx:02d}"
+            teacher = f"EMP-{subject_idx * teachers_per_subject + class_idx % teachers_per_subject:03d}"
+            assignments.append({"school_class": school_class, "subject": subject, "instructor": teacher})
+            weekly_hours[(school_class, subject)] = hours
+    
+    rooms = {f"ROOM-{idx:03d}": 35 for idx in range(classes)}
+    rooms.update({f"HALL-{idx}": 60 for idx in range(max(1, classes // 10))})
+    
+    slots_per_week = len(DEFAULT_DAYS) * len(DEFAULT_PERIODS)
+    unavailable = {}
+    for teacher_idx in range(teachers):
+        # Every teacher has two blocked slots a week
+        blocked = rng.sample(range(slots_per_week), 2)
+        unavailable[f"EMP-{teacher_idx:03d}"] = {
+            (slot // len(DEFAULT_PERIODS), slot % len(DEFAULT_PERIODS)) for slot in blocked
+        }
+    
+    return {
+        "lessons": expand_lessons(assignments, weekly_hours),
+        "rooms": rooms,
+        "class_sizes": {f"CLASS-{idx:03d}": rng.randint(24, 35) for idx in range(classes)},
+        "preferred_rooms": {f"CLASS-{idx:03d}": f"ROOM-{idx:03d}" for idx in range(classes)},
+        "unavailable": unavailable
+    }
+
+
+def run_benchmark(classes=60, teachers=120, time_budget=60, seed=42):
+    """Benchmark the solver on a synthetic school.
+    
+    Run with ``bench execute easygo_education.scolarite.timetable.generator.run_benchmark``.
+    """
+    problem = make_synthetic_school(classes, teachers, seed)
+    solver = TimetableSolver(
+        problem["lessons"], problem["rooms"],
+        class_sizes=problem["class_sizes"], preferred_rooms=problem["preferred_rooms"],
+        unavailable=problem["unavailable"], seed=seed
+    )
+    
+    start = time.monotonic()
+    unplaced = solver.solve(time_budget)
+    solve_seconds = time.monotonic() - start
+    
+    # Incremental re-solve after one teacher loses a day
+    teacher = problem["lessons"][0]["instructor"]
+    solver.unavailable[teacher] = set(solver.unavailable.get(teacher, ())) | {(0, p) for p in range(len(DEFAULT_PERIODS))}
+    previous = dict(solver.assignment)
+    start = time.monotonic()
+    resolve_unplaced = solver.resolve_instructor(previous, teacher, time_budget)
+    resolve_seconds = time.monotonic() - start
+    
+    result = {
+        "classes": classes,
+        "teachers": teachers,
+        "lessons": len(problem["lessons"]),
+        "unplaced": len(unplaced),
+        "solve_seconds": round(solve_seconds, 3),
+        "resolve_unplaced": len(resolve_unplaced),
+        "resolve_seconds": round(resolve_seconds, 3)
+    }
+    return result
@@ -0,0 +1,214 @@
+"""In-memory interval index of Course Schedule slots.
+
+Slots are indexed per resource (instructor, class and room) and weekday as
+lists sorted by start time, so a whole batch of schedules can be checked
+for conflicts against the stored timetable and against each other without
+one query per slot.
+"""
+
+from bisect import bisect_left, insort
+
+import frappe
+from frappe import _
+from frappe.utils import get_time
+
+
+RESOURCES = (
+    ("Instructor", "instructor"),
+    ("Class", "school_class"),
+    ("Room", "room_number"),
+)
+
+
+def to_minutes(value):
+    """Convert a time, timedelta or time string to minutes since midnight."""
+    value = get_time(value)
+    return value.hour * 60 + value.minute
+
+
+class ScheduleIndex:
+    """Interval index of schedule slots by resource and weekday."""
+    
+    def __init__(self, academic_year=None):
+        self.academic_year = academic_year
+        # (resource_type, resource, day_of_week) -> sorted [(start, end, key)]
+        self.slots = {}
+        self.entries = {}
+    
+    @classmethod
+    def load(cls, academic_year, day_of_week=None, instructor=None, school_class=None, room_number=None):
+        """Build an index of active schedules for an academic year with one query.
+        
+        When resources are given, only slots of those resources are loaded,
+        which is what a single-document validation needs.
+        """
+        conditions = ["academic_year = %(academic_year)s", "is_active = 1"]
+        values = {"academic_year": academic_year}
+        
+        if day_of_week:
+            conditions.append("day_of_week = %(day_of_week)s")
+            values["day_of_week"] = day_of_week
+        
+        resource_conditions = []
+        for fieldname, value in (
+            ("instructor", instructor),
+            ("school_class", school_class),
+            ("room_number", room_number),
+        ):
+            if value:
+                resource_conditions.append(f"{fieldname} = %({fieldname})s")
+                values[fieldname] = value
+        if resource_conditions:
+            conditions.append(f"({' OR '.join(resource_conditions)})")
+        
+        schedules = frappe.db.sql(f"""
+            SELECT name, school_class, subject, instructor, room_number,
+                   day_of_week, start_time, end_time
+            FROM `tabCourse Schedule`
+            WHERE {' AND '.join(conditions)}
+        """, values, as_dict=True)
+        
+        index = cls(academic_year)
+        for schedule in schedules:
+            index.add(schedule)
+        return index
+    
+    def add(self, slot, key=None):
+        """Add a slot to the index under ``key`` (defaults to its name)."""
+        key = str(key if key is not None else slot.get("name"))
+        start, end = to_minutes(slot["start_time"]), to_minutes(slot["end_time"])
+        self.entries[key] = slot
+        
+        for resource_type, fieldname in RESOURCES:
+            if slot.get(fieldname):
+                bucket = self.slots.setdefault((resource_type, slot[fieldname], slot["day_of_week"]), [])
+                insort(bucket, (start, end, key))
+    
+    def remove(self, key):
+        """Remove a slot from the index."""
+        key = str(key)
+        slot = self.entries.pop(key, None)
+        if not slot:
+            return
+        
+        for resource_type, fieldname in RESOURCES:
+            bucket = self.slots.get((resource_type, slot.get(fieldname), slot["day_of_week"]))
+            if bucket:
+                bucket[:] = [entry for entry in bucket if entry[2] != key]
+    
+    def find_conflicts(self, slot, key=None, resource_types=None):
+        """Find indexed slots overlapping ``slot`` on any of its resources."""
+        key = str(key if key is not None else slot.get("name"))
+        start, end = to_minutes(slot["start_time"]), to_minutes(slot["end_time"])
+        
+        conflicts = []
+        for resource_type, fieldname in RESOURCES:
+            if resource_types and resource_type not in resource_types:
+                continue
+            if not slot.get(fieldname):
+                continue
+            
+            bucket = self.slots.get((resource_type, slot[fieldname], slot["day_of_week"]), [])
+            # Only slots starting before our end can overlap
+            for _other_start, other_end, other_key in bucket[:bisect_left(bucket, (end,))]:
+                if other_end > start and other_key != key:
+                    conflicts.append(frappe._dict({
+                        "resource_type": resource_type,
+                        "resource": slot[fieldname],
+                        "day_of_week": slot["day_of_week"],
+                        "conflicts_with": other_key,
+                        "other": self.entries.get(other_key)
+                    }))
+        return conflicts
+    
+    def validate_batch(self, slots):
+        """Check a batch of slots against the index and each other.
+        
+        Slots with a ``name`` replace the stored slot of the same name. Every
+        slot is added to the index as it is checked, so conflicts inside the
+        batch are found too. Returns all conflicts, one row per clash.
+        """
+        conflicts = []
+        for idx, slot in enumerate(slots):
+            slot = frappe._dict(slot)
+            key = slot.name or f"row-{idx + 1}"
+            if slot.name:
+                self.remove(slot.name)
+            if slot.get("is_active") in (0, "0"):
+                continue
+            
+            if not (slot.day_of_week and slot.start_time and slot.end_time):
+                conflicts.append(frappe._dict({
+                    "row": idx + 1,
+                    "slot": key,
+                    "message": _("Day of week, start time and end time are required")
+                }))
+                continue
+            
+            if to_minutes(slot.start_time) >= to_minutes(slot.end_time):
+                conflicts.append(frappe._dict({
+                    "row": idx + 1,
+                    "slot": key,
+                    "message": _("End time must be after start time")
+                }))
+                continue
+            
+            for conflict in self.find_conflicts(slot, key):
+                conflict.update({"row": idx + 1, "slot": key})
+                conflict.message = _("{0} {1} is already scheduled on {2} ({3})").format(
+                    _(conflict.resource_type), conflict.resource, slot.day_of_week, conflict.conflicts_with
+                )
+                conflict.pop("other", None)
+                conflicts.append(conflict)
+            
+            self.add(slot, key)
+        
+        return conflicts
+
+
+@frappe.whitelist()
+def validate_timetable(academic_year, schedules):
+    """Validate a batch of Course Schedule slots in memory.
+    
+    Returns every conflict at once, both against the stored timetable and
+    within the batch itself.
+    """
+    import json
+    
+    # Conflicts expose the year's room and instructor schedule
+    frappe.has_permission("Course Schedule", "read", throw=True)
+    
+    schedules = json.loads(schedules) if isinstance(schedules, str) else schedules
+    index = ScheduleIndex.load(academic_year)
+    conflicts = index.validate_batch(schedules)
+    
+    return {
+        "valid": not conflicts,
+        "total": len(schedules),
+        "conflicts": conflicts
+    }
+
+
+@frappe.whitelist()
+def import_timetable(academic_year, schedules):
+    """Validate and insert a batch of Course Schedule slots.
+    
+    Nothing is inserted if any slot conflicts; per-document overlap checks
+    are skipped since the batch was already validated in memory.
+    """
+    import json
+    
+    schedules = json.loads(schedules) if isinstance(schedules, str) else schedules
+    result = validate_timetable(academic_year, schedules)
+    if not result["valid"]:
+        return result
+    
+    created = []
+    for schedule in schedules:
+        doc = frappe.get_doc(dict(schedule, doctype="Course Schedule", academic_year=academic_year))
+        doc.flags.skip_conflict_check = True
+        doc.insert()
+        created.append(doc.name)
+    
+    result["created"] = created
+    return result
@@ -0,0 +1,46 @@
+"""Test incremental attendance rollup deltas."""
+
+import unittest
+from unittest.mock import patch
+
+from easygo_education.vie_scolaire import attendance_rollup
+
+
+class TestAttendanceRollup(unittest.TestCase):
+    """Test how attendance changes are folded into rollup deltas."""
+    
+    def apply(self, changes):
+        """Apply changes and return the class and student deltas passed to the upsert."""
+        with patch.object(attendance_rollup, "upsert_counts") as upsert:
+            attendance_rollup.apply_attendance_changes(changes)
+        return upsert.call_args_list[0].args[2], upsert.call_args_list[1].args[2]
+    
+    def test_insert_counts_status_per_class_day_and_student_month(self):
+        """Test new records add to both rollups."""
+        class_deltas, student_deltas = self.apply([
+            ("STU-1", "6A", "2026-10-05", "Present", 1),
+            ("STU-2", "6A", "2026-10-05", "Absent", 1),
+            ("STU-1", "6A", "2026-10-06", "Late", 1),
+        ])
+        
+        self.assertEqual(class_deltas[("6A", "2026-10-05")]["total_count"], 2)
+        self.assertEqual(class_deltas[("6A", "2026-10-05")]["absent_count"], 1)
+        self.assertEqual(student_deltas[("STU-1", "2026-10-01")]["total_count"], 2)
+        self.assertEqual(student_deltas[("STU-1", "2026-10-01")]["late_count"], 1)
+    
+    def test_justification_moves_count_between_statuses(self):
+        """Test a status change nets out the total and moves one count."""
+        class_deltas, student_deltas = self.apply([
+            ("STU-1", "6A", "2026-10-05", "Absent", -1),
+            ("STU-1", "6A", "2026-10-05", "Absent Justifié", 1),
+        ])
+        
+        counts = student_deltas[("STU-1", "2026-10-01")]
+        self.assertEqual(counts["total_count"], 0)
+        self.assertEqual(counts["absent_count"], -1)
+        self.assertEqual(counts["justified_count"], 1)
+        self.assertEqual(class_deltas[("6A", "2026-10-05")]["total_count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
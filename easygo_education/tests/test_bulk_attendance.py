@@ -0,0 +1,111 @@
+"""Test bulk attendance upserts."""
+
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from easygo_education.vie_scolaire.doctype.student_attendance import student_attendance
+
+
+STATUS_OPTIONS = "Present\nAbsent\nLate\nAbsent Justifié"
+
+
+class TestBulkAttendance(unittest.TestCase):
+    """Test how a batch is split into inserts, updates and no-ops."""
+    
+    def upsert(self, records, existing=()):
+        """Run bulk_upsert_attendance against mocked queries and return the mocks it wrote through."""
+        students = [
+            frappe._dict({"name": record["student"], "student_name": record["student"], "school_class": "6A"})
+            for record in records
+        ]
+        db = MagicMock()
+        db.sql.side_effect = [students, [frappe._dict(row) for row in existing], None]
+        meta = MagicMock()
+        meta.get_options.return_value = STATUS_OPTIONS
+        
+        with patch.object(frappe, "db", db), \
+                patch.object(frappe, "get_meta", return_value=meta), \
+                patch.object(frappe, "session", frappe._dict({"user": "Administrator"})), \
+                patch.object(frappe, "enqueue") as enqueue, \
+                patch.object(frappe.utils, "now", return_value="2025-10-06 09:00:00"), \
+                patch.object(student_attendance, "apply_attendance_changes") as apply_changes, \
+                patch.object(student_attendance, "publish_attendance"), \
+                patch("easygo_education.api.portal_cache.invalidate_students"):
+            affected = student_attendance.bulk_upsert_attendance(records)
+        
+        return frappe._dict({
+            "affected": affected,
+            "db": db,
+            "enqueue": enqueue,
+            "rollup_changes": apply_changes.call_args.args[0],
+        })
+    
+    def test_insert_update_and_noop(self):
+        """Test new rows are inserted, changed rows updated and unchanged rows left alone."""
+        result = self.upsert([
+            {"student": "STU-1", "attendance_date": "2025-10-06", "status": "Present"},
+            {"student": "STU-2", "attendance_date": "2025-10-06", "status": "Absent"},
+            {"student": "STU-3", "attendance_date": "2025-10-06", "status": "Late", "time_in": "08:20:00"},
+            {"student": "STU-4", "attendance_date": "2025-10-06", "status": "Present"},
+        ], existing=[
+            {"name": "STU-2-2025-10-06", "student": "STU-2", "school_class": "6A",
+                "attendance_date": "2025-10-06", "status": "Present", "is_justified": 0},
+            {"name": "STU-3-2025-10-06", "student": "STU-3", "school_class": "6A",
+                "attendance_date": "2025-10-06", "status": "Late", "is_justified": 0},
+            {"name": "STU-4-2025-10-06", "student": "STU-4", "school_class": "6A",
+                "attendance_date": "2025-10-06", "status": "Present", "is_justified": 0,
+                "time_in": datetime.timedelta(hours=8)},
+        ])
+        
+        self.assertEqual(len(result.affected), 4)
+        
+        inserted = result.db.bulk_insert.call_args.kwargs["values"]
+        self.assertEqual([row[0] for row in inserted], ["STU-1-2025-10-06"])
+        
+        # One UPDATE for the status change and the new arrival time, none for the unchanged row
+        update_params = result.db.sql.call_args_list[2].args[1]
+        self.assertEqual(update_params[-1], ("STU-2-2025-10-06", "STU-3-2025-10-06"))
+        self.assertEqual(update_params[:4], ("STU-2-2025-10-06", "Absent", "STU-3-2025-10-06", "Late"))
+        self.assertEqual(update_params[6:8], ("STU-3-2025-10-06", datetime.time(8, 20)))
+        
+        self.assertEqual(result.rollup_changes, [
+            ("STU-1", "6A", "2025-10-06", "Present", 1),
+            ("STU-2", "6A", "2025-10-06", "Present", -1),
+            ("STU-2", "6A", "2025-10-06", "Absent", 1),
+        ])
+        result.enqueue.assert_not_called()
+    
+    def test_unchanged_batch_writes_nothing(self):
+        """Test re-marking the same status and times runs no UPDATE and no rollup delta."""
+        result = self.upsert([
+            {"student": "STU-1", "attendance_date": "2025-10-06", "status": "Late", "time_in": "08:15:00"},
+        ], existing=[
+            {"name": "STU-1-2025-10-06", "student": "STU-1", "school_class": "6A",
+                "attendance_date": "2025-10-06", "status": "Late", "is_justified": 0,
+                "time_in": datetime.timedelta(hours=8, minutes=15)},
+        ])
+        
+        self.assertEqual(result.affected, ["STU-1-2025-10-06"])
+        self.assertEqual(result.db.sql.call_count, 2)
+        result.db.bulk_insert.assert_not_called()
+        self.assertEqual(result.rollup_changes, [])
+    
+    def test_new_absences_notify_guardians(self):
+        """Test new absent rows are queued for guardian notification."""
+        result = self.upsert([
+            {"student": "STU-1", "attendance_date": "2025-10-06", "status": "Absent"},
+        ])
+        
+        self.assertEqual(result.enqueue.call_args.kwargs["attendance_names"], ["STU-1-2025-10-06"])
+    
+    def test_invalid_status_is_rejected(self):
+        """Test a status outside the Select options is refused before anything is written."""
+        with self.assertRaises(frappe.ValidationError):
+            self.upsert([{"student": "STU-1", "attendance_date": "2025-10-06", "status": "Presnt"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Test School Communication segment summaries."""
+
+import unittest
+
+import frappe
+
+from easygo_education.administration_comms.communication_delivery import summarize_segments
+
+
+def make_segment(status, recipient_count, delivered=0, failed=0, report=None):
+    """Build a finished delivery segment row."""
+    return frappe._dict({
+        "status": status,
+        "recipient_count": recipient_count,
+        "delivered_count": delivered,
+        "failed_count": failed,
+        "delivery_report": report
+    })
+
+
+class TestCommunicationDelivery(unittest.TestCase):
+    """Test the final status computed from delivery segments."""
+    
+    def test_all_segments_delivered(self):
+        """Test a communication with no failures is delivered."""
+        status, delivered, failed, report = summarize_segments([
+            make_segment("Completed", 500, delivered=500),
+            make_segment("Completed", 120, delivered=120),
+        ])
+        
+        self.assertEqual((status, delivered, failed, report), ("Delivered", 620, 0, ""))
+    
+    def test_failed_segment_counts_all_its_recipients(self):
+        """Test recipients of a failed segment are counted as failed."""
+        status, delivered, failed, report = summarize_segments([
+            make_segment("Completed", 500, delivered=499, failed=1, report="Amina (No email): Failed"),
+            make_segment("Failed", 120),
+        ])
+        
+        self.assertEqual((status, delivered, failed), ("Partially Delivered", 499, 121))
+        self.assertIn("Amina", report)
+        self.assertIn("can be retried", report)
+    
+    def test_nothing_delivered_is_failed(self):
+        """Test a communication that reached nobody fails."""
+        status, delivered, failed, report = summarize_segments([make_segment("Failed", 50)])
+        
+        self.assertEqual((status, delivered, failed), ("Failed", 0, 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
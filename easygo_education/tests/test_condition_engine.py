@@ -0,0 +1,132 @@
+"""Test the sandboxed rule condition engine."""
+
+import unittest
+
+import frappe
+from frappe.model.base_document import BaseDocument
+
+from easygo_education.utils.condition_engine import (
+    ConditionError,
+    DocumentRecord,
+    compile_condition,
+    parse,
+    to_record,
+)
+
+
+class TestConditionEngine(unittest.TestCase):
+    """Test condition compilation, evaluation and sandboxing."""
+    
+    def test_expression_over_batch(self):
+        """Test a single expression is evaluated once per record."""
+        condition = compile_condition("attendance.attendance_percentage < 80 and behavioral.incident_count >= 2")
+        records = [
+            to_record({"attendance": {"attendance_percentage": 70}, "behavioral": {"incident_count": 3}}),
+            to_record({"attendance": {"attendance_percentage": 95}, "behavioral": {"incident_count": 3}}),
+            to_record({"attendance": {"attendance_percentage": 60}, "behavioral": {"incident_count": 0}}),
+        ]
+        
+        self.assertEqual(condition.evaluate_batch(records), [True, False, False])
+        self.assertEqual(len(condition.filter(records)), 1)
+    
+    def test_assignments_and_reason(self):
+        """Test assignment scripts expose their variables."""
+        condition = compile_condition(
+            "low = flt(academic.average_score) < 50\ntriggered = low\nreason = 'Low average'",
+            "triggered"
+        )
+        values = condition.evaluate(to_record({"academic": {"average_score": 42}}))
+        
+        self.assertTrue(values["triggered"])
+        self.assertEqual(values["reason"], "Low average")
+    
+    def test_missing_names_are_none(self):
+        """Test fields missing from a record resolve to None."""
+        self.assertFalse(compile_condition("status == 'Approved'")(frappe._dict()))
+    
+    def test_compiled_once_per_source(self):
+        """Test the compiled form is cached by source text."""
+        self.assertIs(compile_condition("score > 10"), compile_condition("score > 10"))
+    
+    def test_unsafe_constructs_are_rejected(self):
+        """Test imports, dunder access, arbitrary calls and loops are rejected."""
+        for source in (
+            "import os",
+            "__import__('os')",
+            "doc.__class__",
+            "frappe.db.sql('DELETE FROM tabStudent')",
+            "open('/etc/passwd')",
+            "(lambda: 1)()",
+            "[x for x in range(10)]",
+            "2 ** 1000000",
+            "for i in items: pass",
+        ):
+            with self.assertRaises(ConditionError, msg=source):
+                parse(source)
+    
+    def test_rebinding_helpers_is_rejected(self):
+        """Test helpers and record names can't be rebound to reach a record's methods."""
+        for source in (
+            "len = doc.delete\nlen()",
+            "flt = doc.save\nflt()",
+            "doc = 1\ndoc",
+            "triggered = doc.delete\ntriggered()",
+        ):
+            with self.assertRaises(ConditionError, msg=source):
+                compile_condition(source)
+        
+        deleted = []
+        record = frappe._dict({"doc": frappe._dict({"delete": lambda: deleted.append(True)})})
+        with self.assertRaises(ConditionError):
+            compile_condition("len = doc.delete\nlen()")(record)
+        self.assertEqual(deleted, [])
+    
+    def test_only_last_line_can_be_an_expression(self):
+        """Test a bare expression before the last line is a ConditionError, not a crash."""
+        for source in ("x > 1\ny > 2", "a = 1\na\nb = 2"):
+            with self.assertRaises(ConditionError, msg=source):
+                compile_condition(source)
+        
+        self.assertEqual(compile_condition("a = 1\nb = 2\na + b")(frappe._dict()), 3)
+    
+    def test_keyword_arguments_are_rejected(self):
+        """Test a record's methods can't be passed to a helper as ``key=``."""
+        for source in (
+            "max([1], key=doc.delete) == 0",
+            "min(items, key=doc.save)",
+            "round(score, ndigits=2)",
+        ):
+            with self.assertRaises(ConditionError, msg=source):
+                parse(source)
+        
+        deleted = []
+        record = frappe._dict({"doc": frappe._dict({"delete": lambda *args: deleted.append(args)})})
+        with self.assertRaises(ConditionError):
+            compile_condition("max([1], key=doc.delete) == 0")(record)
+        self.assertEqual(deleted, [])
+    
+    def test_documents_are_exposed_as_values(self):
+        """Test conditions see a copy of a document's values, not the live Document."""
+        doc = frappe.get_doc({"doctype": "ToDo", "description": "Condition test", "status": "Open"})
+        record = DocumentRecord(doc)
+        
+        self.assertTrue(compile_condition("status == 'Open' and doc.description == 'Condition test'")(record))
+        self.assertNotIsInstance(record.get("doc"), BaseDocument)
+        self.assertIsNone(record.get("doc").get("delete"))
+    
+    def test_sequence_growth_is_capped(self):
+        """Test repeating or joining sequences can't build huge values."""
+        self.assertEqual(compile_condition("'ab' * 3")(frappe._dict()), "ababab")
+        self.assertEqual(compile_condition("2 * price + 1")(frappe._dict({"price": 5})), 11)
+        
+        for source in (
+            "'x' * 999999999",
+            "999999999 * [0]",
+            "a = 'x' * 10000\nb = a + a\nb",
+        ):
+            with self.assertRaises(ConditionError, msg=source):
+                compile_condition(source)(frappe._dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Test compiled Document Template rendering."""
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from easygo_education.administration_comms.doctype.document_template import document_template
+from easygo_education.administration_comms.document_rendering import CompiledTemplate
+
+
+class TestDocumentRendering(unittest.TestCase):
+    """Test templates compiled to Jinja."""
+    
+    def test_referenced_variables(self):
+        """Test only top-level names the template reads are collected as variables."""
+        compiled = CompiledTemplate("TMPL-0001", """
+            <h1>{{ student_name }}</h1>
+            {% for row in subjects %}<p>{{ row.subject }}: {{ row.grade }}</p>{% endfor %}
+            <small>{{current_date}}</small>
+        """)
+        
+        self.assertEqual(compiled.variables, {"student_name", "subjects", "current_date"})
+    
+    def test_render_wraps_css_and_javascript(self):
+        """Test rendered content keeps the template's styles and script around it."""
+        compiled = CompiledTemplate("TMPL-0001", "<p>{{student_name}}</p>", "p {color: red}", "print()")
+        
+        self.assertEqual(
+            compiled.render({"student_name": "Amina"}),
+            "<style>p {color: red}</style>\n<p>Amina</p>\n<script>print()</script>"
+        )
+
+    
+    def test_generate_documents_checks_every_name(self):
+        """Test a batch larger than one list page is checked in full before it is queued."""
+        template = frappe.get_doc({"doctype": "Document Template", "status": "Active"})
+        names = [f"STU-{i:05d}" for i in range(45)]
+        
+        def get_list(doctype, filters=None, pluck=None, limit_page_length=20, **kwargs):
+            readable = [name for name in filters["name"][1] if name != "STU-00040"]
+            return readable[:limit_page_length] if limit_page_length else readable
+        
+        with patch.object(frappe, "has_permission", return_value=True), \
+                patch.object(frappe, "get_list", side_effect=get_list), \
+                patch.object(document_template, "start_documents_pdf") as start:
+            with self.assertRaises(frappe.PermissionError):
+                template.generate_documents("Student", names)
+            start.assert_not_called()
+            
+            template.generate_documents("Student", [name for name in names if name != "STU-00040"])
+            self.assertEqual(len(start.call_args.args[2]), 44)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""Test chunked fee bill generation."""
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from easygo_education.finances_rh.doctype.fee_bill_run import fee_bill_run
+
+
+class TestFeeBillRun(unittest.TestCase):
+    """Test how a chunk of students is split into new, refreshed and skipped bills."""
+    
+    def test_chunk_creates_missing_refreshes_drafts_and_skips_submitted(self):
+        """Test each student's existing bill decides what happens to it."""
+        structure = frappe._dict({"name": "FEE-1", "academic_year": "2026-2027"})
+        students = [frappe._dict({"name": name}) for name in ("STU-1", "STU-2", "STU-3")]
+        existing = [
+            frappe._dict({"name": "FB-1", "student": "STU-2", "docstatus": 0, "paid_amount": 0}),
+            frappe._dict({"name": "FB-2", "student": "STU-3", "docstatus": 1, "paid_amount": 100}),
+        ]
+        items = [frappe._dict({"amount": 1000}), frappe._dict({"amount": 250})]
+        
+        with patch.object(frappe, "db", create=True) as db, \
+                patch.object(fee_bill_run, "insert_bills") as insert_bills, \
+                patch.object(fee_bill_run, "refresh_draft_bills") as refresh_draft_bills:
+            db.sql.return_value = existing
+            result = fee_bill_run.generate_bills(structure, students, items)
+        
+        self.assertEqual(result, {"created": 1, "updated": 1, "skipped": 1})
+        self.assertEqual([s.name for s in insert_bills.call_args.args[1]], ["STU-1"])
+        self.assertEqual(insert_bills.call_args.args[3], 1250)
+        self.assertEqual([b.name for b in refresh_draft_bills.call_args.args[0]], ["FB-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
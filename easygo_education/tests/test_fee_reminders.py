@@ -0,0 +1,58 @@
+"""Test household fee reminder digests."""
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from easygo_education.finances_rh import fee_reminders
+from easygo_education.finances_rh.fee_reminders import OVERDUE_DIGEST, group_by_household, send_household_reminders
+
+
+def make_bill(name, student_name, email, household_key=None, amount=1000):
+    """Build an open bill row as fetched with its guardian."""
+    return frappe._dict({
+        "name": name, "student": student_name, "student_name": student_name, "due_date": "2026-09-05",
+        "total_amount": amount, "outstanding_amount": amount, "guardian_email": email,
+        "household_key": household_key
+    })
+
+
+class TestFeeReminders(unittest.TestCase):
+    """Test bills grouped into one digest per guardian household."""
+    
+    def setUp(self):
+        self.bills = [
+            make_bill("FB-1", "Amina", "parent@example.ma", "email:parent@example.ma"),
+            make_bill("FB-2", "Youssef", "Parent@Example.ma", "email:parent@example.ma", 500),
+            make_bill("FB-3", "Amina", "parent@example.ma", "email:parent@example.ma"),
+            make_bill("FB-4", "Salma", "other@example.ma"),
+            make_bill("FB-5", "Omar", None, "phone:0612345678"),
+        ]
+    
+    def test_bills_grouped_per_household(self):
+        """Test siblings' bills share one household and one recipient; bills without email are dropped."""
+        households = group_by_household(self.bills)
+        
+        self.assertEqual(set(households), {"email:parent@example.ma", "email:other@example.ma"})
+        family = households["email:parent@example.ma"]
+        self.assertEqual(family.recipients, ["parent@example.ma"])
+        self.assertEqual([bill.name for bill in family.bills], ["FB-1", "FB-2", "FB-3"])
+    
+    def test_one_digest_per_household_skipping_reminded(self):
+        """Test a digest is queued per household not reminded yet, with one log per bill."""
+        with patch.object(fee_reminders, "get_reminded_recipients", return_value={"other@example.ma"}), \
+                patch.object(fee_reminders, "queue_notification") as queue, \
+                patch.object(fee_reminders, "insert_communication_logs") as insert_logs:
+            sent = send_household_reminders(self.bills, OVERDUE_DIGEST, interval=7)
+        
+        self.assertEqual(sent, 1)
+        self.assertEqual(queue.call_count, 1)
+        email = queue.call_args.kwargs
+        self.assertEqual(email["recipients"], ["parent@example.ma"])
+        self.assertIn("Amina, Youssef", email["subject"])
+        self.assertIn("2500.00 MAD", email["message"])
+        
+        logs, = insert_logs.call_args.args
+        self.assertEqual([log[1] for log in logs], ["FB-1", "FB-2", "FB-3"])
+        self.assertEqual(insert_logs.call_args.kwargs, {"tags": OVERDUE_DIGEST})
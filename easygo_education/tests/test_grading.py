@@ -0,0 +1,39 @@
+"""Test compiled grading scale lookups."""
+
+import unittest
+
+from easygo_education.scolarite.grading import LETTER_GRADE_SCALE, STANDARD_SCALE, CompiledScale
+
+
+class TestGrading(unittest.TestCase):
+    """Test boundary lookups on built-in and configured scales."""
+    
+    def test_ladder_boundaries(self):
+        """Test each boundary belongs to the grade that starts at it."""
+        self.assertEqual(
+            STANDARD_SCALE.get_grades([90, 89.99, 50, 49.99, -5]),
+            [("A+", 4.0), ("A", 3.7), ("C-", 1.0), ("F", 0.0), ("F", 0.0)]
+        )
+        self.assertEqual(LETTER_GRADE_SCALE.get_grade(97), "A+")
+        self.assertEqual(LETTER_GRADE_SCALE.get_grade(96.9), "A")
+        self.assertEqual(LETTER_GRADE_SCALE.get_grade_point(66), 1.0)
+    
+    def test_configured_scale_rounding_gaps_and_range(self):
+        """Test a configured scale rounds, reports gaps and rejects out-of-range scores."""
+        scale = CompiledScale("Pass/Fail", [
+            {"grade_letter": "P", "min_score": 10, "max_score": 20, "grade_point": 1},
+            {"grade_letter": "E", "min_score": 0, "max_score": 9.99, "grade_point": 0},
+        ], minimum_score=0, maximum_score=20, passing_grade=10, rounding_method="Round to Nearest", decimal_places=2)
+        
+        self.assertEqual(scale.evaluate(9.996)["letter_grade"], "P")
+        self.assertTrue(scale.evaluate(9.996)["is_passing"])
+        self.assertEqual(scale.evaluate(9.994)["letter_grade"], "E")
+        self.assertEqual(scale.evaluate(21)["letter_grade"], "Invalid")
+        
+        scale.rounding_method = "No Rounding"
+        self.assertEqual(scale.evaluate(9.995)["letter_grade"], "N/A")
+        self.assertEqual(scale.get_grades([9.995, 15]), [(None, 0.0), ("P", 1.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Test household keys and sibling counts."""
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from easygo_education.scolarite import household
+
+
+class TestHousehold(unittest.TestCase):
+    """Test how guardians' contact details group students into households."""
+    
+    def test_key_prefers_normalized_email(self):
+        """Test email case and spacing don't split a household."""
+        self.assertEqual(household.get_household_key(" Parent@Example.com ", "0612345678"), "email:parent@example.com")
+    
+    def test_key_normalizes_phone_formats(self):
+        """Test local and international numbers give the same key."""
+        self.assertEqual(household.get_household_key(None, "06 12 34 56 78"), "phone:0612345678")
+        self.assertEqual(household.get_household_key(None, "+212 612-345-678"), "phone:0612345678")
+        self.assertEqual(household.get_household_key(None, "00212612345678"), "phone:0612345678")
+        self.assertIsNone(household.get_household_key(None, "123"))
+    
+    def test_sibling_counts_exclude_the_student(self):
+        """Test only other active students of the household are counted."""
+        rows = [
+            frappe._dict({"name": "STU-1", "household_key": "email:a", "status": "Active", "academic_year": "2026"}),
+            frappe._dict({"name": "STU-2", "household_key": "email:b", "status": "Active", "academic_year": "2026"}),
+            frappe._dict({"name": "STU-3", "household_key": None, "status": "Active", "academic_year": "2026"}),
+        ]
+        
+        with patch.object(frappe, "db", create=True) as db, \
+                patch.object(household, "get_household_sizes", return_value={"email:a": 3, "email:b": 1}):
+            db.sql.return_value = rows
+            counts = household.get_sibling_counts(["STU-1", "STU-2", "STU-3"], "2026")
+        
+        self.assertEqual(counts, {"STU-1": 2, "STU-2": 0, "STU-3": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
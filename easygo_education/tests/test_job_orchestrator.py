@@ -0,0 +1,69 @@
+"""Test scheduled job periods and site shards."""
+
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from easygo_education.jobs import orchestrator
+from easygo_education.jobs.orchestrator import JOBS, SHARD_COUNT, get_period, get_site_shard
+
+
+class TestJobOrchestrator(unittest.TestCase):
+    """Test the keys jobs are deduplicated and spread over the nightly window with."""
+    
+    def test_periods(self):
+        """Test daily, weekly and monthly periods, with ISO weeks across the new year."""
+        date = datetime.date(2026, 10, 18)
+        self.assertEqual(get_period("Daily", date), "2026-10-18")
+        self.assertEqual(get_period("Weekly", date), "2026-W42")
+        self.assertEqual(get_period("Monthly", date), "2026-10")
+        self.assertEqual(get_period("Weekly", datetime.date(2027, 1, 1)), "2026-W53")
+    
+    def test_site_shards(self):
+        """Test a site always lands in the same hour of the window."""
+        sites = [f"school{i}.example.ma" for i in range(50)]
+        shards = [get_site_shard(site) for site in sites]
+        
+        self.assertEqual(shards, [get_site_shard(site) for site in sites])
+        self.assertTrue(all(0 <= shard < SHARD_COUNT for shard in shards))
+        self.assertGreater(len(set(shards)), 1)
+    
+    def test_registry(self):
+        """Test every registered job has a queue and a time budget."""
+        for jobs in JOBS.values():
+            for job in jobs:
+                self.assertIn(job.queue, ("short", "default", "long"))
+                self.assertGreater(job.timeout, 0)
+    
+    def test_queued_jobs_get_no_second_run(self):
+        """Test a job still on its queue is skipped without leaving a Queued run behind."""
+        still_queued = "scheduled_job::" + JOBS["Daily"][0].method
+        
+        with patch.object(orchestrator, "is_job_enqueued", side_effect=lambda job_id: job_id == still_queued), \
+                patch.object(frappe, "get_doc") as get_doc, \
+                patch.object(frappe, "enqueue") as enqueue, \
+                patch.object(frappe, "db", MagicMock()):
+            get_doc.return_value.insert.return_value.name = "SJR-0001"
+            runs = orchestrator.enqueue_jobs("Daily", force=True)
+        
+        self.assertEqual(len(runs), len(JOBS["Daily"]) - 1)
+        self.assertEqual(get_doc.call_count, len(JOBS["Daily"]) - 1)
+        self.assertNotIn(still_queued, [call.kwargs["job_id"] for call in enqueue.call_args_list])
+    
+    def test_failing_job_is_recorded_as_failed(self):
+        """Test an exception raised by a job marks its run Failed and reaches the worker."""
+        run = frappe._dict({"name": "SJR-0001", "job": "easygo_education.jobs.daily.check_overdue_fees",
+            "time_budget": 900})
+        db = MagicMock()
+        db.get_value.return_value = run
+        
+        with patch.object(frappe, "db", db), \
+                patch.object(frappe, "get_attr", return_value=MagicMock(side_effect=ValueError("boom"))), \
+                patch.object(frappe, "get_traceback", return_value="Traceback"):
+            with self.assertRaises(ValueError):
+                orchestrator.execute_job(run.name)
+        
+        self.assertEqual(db.set_value.call_args.args[2]["status"], "Failed")
+        self.assertEqual(db.set_value.call_args.args[2]["error_log"], "Traceback")
@@ -0,0 +1,139 @@
+"""Test School Ledger monthly balance snapshots."""
+
+import unittest
+
+import frappe
+from frappe.utils import flt, now
+
+from easygo_education.finances_rh.doctype.school_ledger_balance.school_ledger_balance import (
+    get_cumulative_totals,
+    rebuild_ledger_balances,
+)
+
+
+TEST_ACCOUNT = "Test Snapshot Account"
+
+
+class TestLedgerBalance(unittest.TestCase):
+    """Test snapshots stay equal to a full re-sum of the ledger."""
+    
+    def setUp(self):
+        """Start from an account without entries or snapshots."""
+        frappe.set_user("Administrator")
+        if not frappe.db.exists("School Account", TEST_ACCOUNT):
+            frappe.get_doc({
+                "doctype": "School Account",
+                "account_name": TEST_ACCOUNT,
+                "account_type": "Asset"
+            }).insert(ignore_permissions=True)
+        frappe.db.set_value("School Account", TEST_ACCOUNT, "opening_balance", 0)
+        frappe.db.delete("School Ledger", {"account": TEST_ACCOUNT})
+        frappe.db.delete("School Ledger Balance", {"account": TEST_ACCOUNT})
+    
+    def tearDown(self):
+        """Drop the entries and snapshots the test wrote."""
+        frappe.db.rollback()
+    
+    def post(self, posting_date, debit=0, credit=0):
+        """Submit a ledger entry through its submit hooks, skipping voucher checks."""
+        entry = frappe.get_doc({
+            "doctype": "School Ledger",
+            "account": TEST_ACCOUNT,
+            "posting_date": posting_date,
+            "voucher_type": "Journal Entry",
+            "voucher_no": "TEST-VOUCHER",
+            "debit": debit,
+            "credit": credit
+        })
+        entry.name = frappe.generate_hash(length=10)
+        entry.creation = entry.modified = now()
+        entry.docstatus = 1
+        entry.before_submit()
+        entry.db_insert()
+        entry.on_submit()
+        return entry
+    
+    def cancel(self, entry):
+        """Cancel a ledger entry through its cancel hook."""
+        entry.docstatus = 2
+        entry.db_update()
+        entry.on_cancel()
+    
+    def get_snapshot(self, period_start):
+        """Get the account's snapshot of a month."""
+        return frappe.db.get_value("School Ledger Balance",
+            {"account": TEST_ACCOUNT, "period_start": period_start},
+            ["period_debit", "period_credit", "cumulative_debit", "cumulative_credit", "closing_balance"],
+            as_dict=True
+        )
+    
+    def assert_matches_rebuild(self):
+        """Check the incremental snapshots equal the ones rebuilt from the ledger."""
+        fields = ["period_start", "period_debit", "period_credit", "cumulative_debit", "cumulative_credit",
+            "closing_balance"]
+        incremental = frappe.get_all("School Ledger Balance", filters={"account": TEST_ACCOUNT},
+            fields=fields, order_by="period_start")
+        rebuild_ledger_balances(TEST_ACCOUNT)
+        rebuilt = frappe.get_all("School Ledger Balance", filters={"account": TEST_ACCOUNT},
+            fields=fields, order_by="period_start")
+        
+        # Months that only carry totals forward have no counterpart in the rebuild
+        incremental = [row for row in incremental if flt(row.period_debit) or flt(row.period_credit)]
+        self.assertEqual(incremental, rebuilt)
+    
+    def test_month_without_snapshot(self):
+        """Test a date in a month without entries reads the previous month's totals."""
+        self.post("2025-01-10", debit=100)
+        self.post("2025-03-05", credit=30)
+        
+        self.assertIsNone(self.get_snapshot("2025-02-01"))
+        
+        february = get_cumulative_totals([TEST_ACCOUNT], "2025-02-15")[TEST_ACCOUNT]
+        self.assertEqual((february.debit, february.credit, february.net), (100, 0, 100))
+        
+        # Before the month's entry, then including it
+        march = get_cumulative_totals([TEST_ACCOUNT], "2025-03-01")[TEST_ACCOUNT]
+        self.assertEqual(march.net, 100)
+        march = get_cumulative_totals([TEST_ACCOUNT], "2025-03-31")[TEST_ACCOUNT]
+        self.assertEqual(march.net, 70)
+        
+        self.assertEqual(get_cumulative_totals([TEST_ACCOUNT])[TEST_ACCOUNT].net, 70)
+        self.assertNotIn(TEST_ACCOUNT, get_cumulative_totals([TEST_ACCOUNT], "2024-12-31"))
+        self.assert_matches_rebuild()
+    
+    def test_backdated_entry(self):
+        """Test an entry posted before existing ones updates later snapshots and running balances."""
+        later = self.post("2025-03-05", debit=100)
+        self.assertEqual(flt(later.balance), 100)
+        
+        earlier = self.post("2025-01-10", debit=40)
+        self.assertEqual(flt(earlier.balance), 40)
+        
+        self.assertEqual(flt(self.get_snapshot("2025-01-01").cumulative_debit), 40)
+        self.assertEqual(flt(self.get_snapshot("2025-03-01").cumulative_debit), 140)
+        self.assertEqual(flt(self.get_snapshot("2025-03-01").period_debit), 100)
+        self.assertEqual(flt(frappe.db.get_value("School Ledger", later.name, "balance")), 140)
+        self.assertEqual(flt(frappe.db.get_value("School Account", TEST_ACCOUNT, "balance")), 140)
+        self.assert_matches_rebuild()
+    
+    def test_cancellation(self):
+        """Test cancelling an entry reverses it in its month, later months and later balances."""
+        first = self.post("2025-01-10", debit=100)
+        second = self.post("2025-02-10", credit=50)
+        self.assertEqual(flt(second.balance), 50)
+        
+        self.cancel(first)
+        
+        january = self.get_snapshot("2025-01-01")
+        self.assertEqual((flt(january.period_debit), flt(january.closing_balance)), (0, 0))
+        february = self.get_snapshot("2025-02-01")
+        self.assertEqual((flt(february.cumulative_debit), flt(february.cumulative_credit)), (0, 50))
+        self.assertEqual(flt(february.closing_balance), -50)
+        self.assertEqual(flt(frappe.db.get_value("School Ledger", second.name, "balance")), -50)
+        self.assertEqual(flt(frappe.db.get_value("School Account", TEST_ACCOUNT, "balance")), -50)
+        self.assertEqual(get_cumulative_totals([TEST_ACCOUNT], "2025-02-28")[TEST_ACCOUNT].net, -50)
+        self.assert_matches_rebuild()
+
+
+if __name__ == "__main__":
+    unittest.main()
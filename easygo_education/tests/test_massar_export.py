@@ -0,0 +1,43 @@
+"""Test MASSAR export files."""
+
+import csv
+import datetime
+import gzip
+import os
+import tempfile
+import unittest
+
+import frappe
+
+from easygo_education.scolarite.massar_export import EXPORT_COLUMNS, CsvExportWriter, get_export_row
+
+
+class TestMassarExport(unittest.TestCase):
+    """Test export rows written in chunks to a gzip-compressed CSV."""
+    
+    def test_chunks_written_to_gzip_csv(self):
+        """Test rows appended chunk by chunk come back in order under one header."""
+        student = frappe._dict({
+            "massar_code": "J130000001", "student_name": "Amina Alaoui", "date_of_birth": datetime.date(2012, 5, 3),
+            "gender": "Female", "school_class": "6A", "guardian_name": None, "guardian_phone": None,
+            "address": None, "status": "Left"
+        })
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "massar.csv.gz")
+            writer = CsvExportWriter(path)
+            writer.write_rows([get_export_row(student, "2026-2027")])
+            writer.write_rows([get_export_row(frappe._dict(student, massar_code="J130000002"), None)])
+            writer.close()
+            
+            with gzip.open(path, "rt", newline="", encoding="utf-8") as file:
+                rows = list(csv.reader(file))
+        
+        self.assertEqual(rows[0], EXPORT_COLUMNS)
+        self.assertEqual(rows[1], ["J130000001", "Amina Alaoui", "2012-05-03", "Female", "6A", "", "", "", "2026-2027", "Left"])
+        self.assertEqual((rows[2][0], rows[2][8]), ("J130000002", ""))
+        self.assertEqual(len(rows), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Test message participant counters."""
+
+import unittest
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from easygo_education.administration_comms import messaging
+
+
+class TestMessaging(unittest.TestCase):
+    """Test unread counters are kept on the participant rows."""
+    
+    def setUp(self):
+        """Create a thread between Administrator and Guest."""
+        frappe.set_user("Administrator")
+        self.thread = frappe.get_doc({
+            "doctype": "Message Thread",
+            "thread_title": "Counter test",
+            "thread_type": "General Discussion",
+            "participants": [{"user": "Administrator"}, {"user": "Guest"}]
+        }).insert(ignore_permissions=True)
+    
+    def tearDown(self):
+        """Drop the thread and its messages."""
+        frappe.set_user("Administrator")
+        frappe.db.rollback()
+    
+    def send(self, minutes=0):
+        """Send a message from Administrator, the given minutes from now."""
+        return frappe.get_doc({
+            "doctype": "Message",
+            "thread": self.thread.name,
+            "sender": "Administrator",
+            "sent_date": add_to_date(now_datetime(), minutes=minutes),
+            "content": "Hello"
+        }).insert(ignore_permissions=True)
+    
+    def get_unread(self, user):
+        """Get a participant's unread count for the thread."""
+        return frappe.db.get_value("Message Thread Participant",
+            {"parenttype": "Message Thread", "parent": self.thread.name, "user": user},
+            "unread_count"
+        )
+    
+    def test_insert_counts_for_recipients_only(self):
+        """Test a new message is unread for the other participants, not for its sender."""
+        message = self.send()
+        self.send()
+        
+        self.assertEqual(self.get_unread("Guest"), 2)
+        self.assertEqual(self.get_unread("Administrator"), 0)
+        self.assertEqual(
+            str(frappe.db.get_value("Message Thread Participant",
+                {"parent": self.thread.name, "user": "Guest"}, "last_message_date")),
+            str(frappe.db.get_value("Message Thread", self.thread.name, "last_message_date"))
+        )
+        
+        messaging.mark_message_read(message, "Guest")
+        self.assertEqual(self.get_unread("Guest"), 1)
+    
+    def test_read_thread_resets_count(self):
+        """Test reading a thread clears the user's count and writes read receipts."""
+        message = self.send(minutes=-5)
+        self.send(minutes=-4)
+        
+        frappe.set_user("Guest")
+        messaging.mark_thread_read(self.thread.name)
+        frappe.set_user("Administrator")
+        
+        self.assertEqual(self.get_unread("Guest"), 0)
+        self.assertTrue(frappe.db.exists("Message Read Receipt", {"parent": message.name, "user": "Guest"}))
+    
+    def test_decrement_guard(self):
+        """Test messages older than the last thread read, or a zero count, never go below zero."""
+        message = self.send(minutes=-5)
+        
+        frappe.set_user("Guest")
+        messaging.mark_thread_read(self.thread.name)
+        frappe.set_user("Administrator")
+        
+        # Already read with the thread
+        messaging.mark_message_read(message, "Guest")
+        self.assertEqual(self.get_unread("Guest"), 0)
+        
+        # Sender never had it unread
+        messaging.mark_message_read(message, "Administrator")
+        messaging.mark_message_read(message, "Administrator")
+        self.assertEqual(self.get_unread("Administrator"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Test notification dispatcher batching."""
+
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from easygo_education.administration_comms import notification_dispatcher
+from easygo_education.administration_comms.notification_dispatcher import (
+    TemplateRenderer,
+    build_email,
+    coalesce,
+    dispatch_pending,
+)
+
+
+def make_payload(recipient, subject, digest=None, attachments=None):
+    """Build a queued notification payload."""
+    return {
+        "recipients": [recipient],
+        "subject": subject,
+        "message": f"<p>{subject}</p>",
+        "reference_doctype": "Fee Bill",
+        "reference_name": subject,
+        "attachments": attachments,
+        "digest": digest
+    }
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    """Test payload coalescing and digest emails."""
+    
+    def test_digest_payloads_are_merged_per_recipient(self):
+        """Test payloads sharing a digest key become one email per recipient."""
+        groups = coalesce([
+            make_payload("a@example.com", "FB-1", "Overdue Fees"),
+            make_payload("a@example.com", "FB-2", "Overdue Fees"),
+            make_payload("b@example.com", "FB-3", "Overdue Fees"),
+            make_payload("a@example.com", "ATT-1"),
+        ])
+        
+        self.assertEqual(sorted(len(group) for group in groups), [1, 1, 2])
+    
+    def test_attachments_are_never_merged(self):
+        """Test payloads with attachments are sent on their own."""
+        groups = coalesce([
+            make_payload("a@example.com", "RCP-1", "Receipts", attachments=[{"fname": "a.pdf"}]),
+            make_payload("a@example.com", "RCP-2", "Receipts", attachments=[{"fname": "b.pdf"}]),
+        ])
+        
+        self.assertEqual(len(groups), 2)
+    
+    def test_digest_email_contains_every_message(self):
+        """Test a digest email includes each coalesced message."""
+        group = [make_payload("a@example.com", f"FB-{i}", "Overdue Fees") for i in range(3)]
+        email = build_email(group, TemplateRenderer())
+        
+        self.assertEqual(email["recipients"], ["a@example.com"])
+        for i in range(3):
+            self.assertIn(f"<p>FB-{i}</p>", email["message"])
+        self.assertIsNone(email["attachments"])
+    
+    def test_queue_drained_by_one_dispatcher_at_a_time(self):
+        """Test a dispatcher that can't take the lock leaves the queue alone."""
+        cache = MagicMock()
+        cache.lrange.return_value = [json.dumps(make_payload("a@example.com", "FB-1"))]
+        
+        with patch.object(frappe, "cache", cache, create=True), \
+                patch.object(frappe, "db", MagicMock(), create=True), \
+                patch.object(notification_dispatcher, "get_rate_allowance", return_value=None), \
+                patch.object(notification_dispatcher, "dispatch") as dispatch:
+            cache.lock.return_value.acquire.return_value = False
+            dispatch_pending()
+            cache.lrange.assert_not_called()
+            
+            cache.lock.return_value.acquire.return_value = True
+            dispatch_pending()
+        
+        cache.ltrim.assert_called_once_with(notification_dispatcher.QUEUE_KEY, 1, -1)
+        self.assertEqual(dispatch.call_count, 1)
+        cache.lock.return_value.release.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
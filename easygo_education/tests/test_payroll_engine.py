@@ -0,0 +1,43 @@
+"""Test salary slip computation in the payroll run engine."""
+
+import unittest
+
+import frappe
+
+from easygo_education.finances_rh import payroll_engine
+from easygo_education.finances_rh.salary_formula import compile_structure
+
+
+class TestPayrollEngine(unittest.TestCase):
+    """Test slips computed from prefetched structures and attendance."""
+    
+    def test_compute_slip_applies_fixed_and_percentage_components(self):
+        """Test earnings use the base salary and deductions the gross."""
+        employee = frappe._dict({"name": "EMP-1", "employee_name": "Amina", "department": "Sciences"})
+        structure = frappe._dict({"name": "SS-1", "base_salary": 10000})
+        compiled = compile_structure(
+            "SS-1", "2026-01-01", 10000,
+            [
+                frappe._dict({"component": "Transport", "component_type": "Fixed", "amount": 500}),
+                frappe._dict({"component": "Seniority", "component_type": "Percentage", "percentage": 10}),
+            ],
+            [
+                frappe._dict({"component": "CNSS", "component_type": "Percentage", "percentage": 4}),
+                frappe._dict({"component": "Advance", "component_type": "Fixed", "amount": 0}),
+            ]
+        )
+        attendance = frappe._dict({"attendance_days": 20.5, "absent_days": 1, "leave_days": 0})
+        
+        slip = payroll_engine.compute_slip(employee, structure, compiled, attendance, 2, 22)
+        
+        self.assertEqual(slip.gross_salary, 11500)
+        self.assertEqual(slip.total_deductions, 460)
+        self.assertEqual(slip.net_salary, 11040)
+        self.assertEqual([row.salary_component for row in slip.earnings], ["Transport", "Seniority"])
+        # Zero-amount components are left off the slip
+        self.assertEqual([row.salary_component for row in slip.deductions], ["CNSS"])
+        self.assertEqual((slip.attendance_days, slip.leave_days, slip.working_days), (20.5, 2, 22))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@
 
 import frappe
 import unittest
+from unittest.mock import patch
 from frappe.utils import nowdate
 
 
@@ -111,6 +112,123 @@ class TestPortalAccess(unittest.TestCase):
         frappe.delete_doc("Student Attendance", attendance.name, force=True)
 
 
+class TestParentDashboard(unittest.TestCase):
+    """Test the batched parent dashboard builder."""
+    
+    guardian_email = "parent.dashboard@test.com"
+    
+    def setUp(self):
+        """Set up test environment."""
+        frappe.set_user("Administrator")
+        self.cleanup_test_data()
+        
+        for idx in range(3):
+            frappe.get_doc({
+                "doctype": "Student",
+                "student_name": f"Dashboard Child {idx}",
+                "gender": "Female",
+                "date_of_birth": "2012-01-01",
+                "guardian_email": self.guardian_email,
+                "status": "Active"
+            }).insert()
+        
+        self.children = frappe.db.sql("""
+            SELECT name, student_name, school_class, photo, status
+            FROM `tabStudent`
+            WHERE guardian_email = %s
+            ORDER BY student_name
+        """, self.guardian_email, as_dict=True)
+    
+    def tearDown(self):
+        """Clean up test data."""
+        self.cleanup_test_data()
+    
+    def cleanup_test_data(self):
+        """Clean up test data."""
+        for student in frappe.get_all("Student", {"guardian_email": self.guardian_email}):
+            frappe.delete_doc("Student", student.name, force=True)
+    
+    def test_payload_shape(self):
+        """Test each child entry keeps the dashboard payload shape."""
+        from easygo_education.api.portal import build_parent_dashboard
+        
+        children_data = build_parent_dashboard(self.children)
+        
+        self.assertEqual(len(children_data), 3)
+        for entry in children_data:
+            self.assertEqual(set(entry), {"student_info", "alerts", "latest_grade"})
+            self.assertEqual(entry["alerts"], [])
+            self.assertIsNone(entry["latest_grade"])
+    
+    def test_query_count_is_fixed(self):
+        """Test the number of queries does not grow with family size."""
+        from easygo_education.api.portal import build_parent_dashboard
+        
+        with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+            build_parent_dashboard(self.children[:1])
+        single_child_queries = sql.call_count
+        
+        with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+            build_parent_dashboard(self.children)
+        
+        self.assertEqual(single_child_queries, 3)
+        self.assertEqual(sql.call_count, single_child_queries)
+
+
+class TestPortalDashboardCache(unittest.TestCase):
+    """Test the per-user portal dashboard cache."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        frappe.set_user("Administrator")
+        self.builds = 0
+    
+    def tearDown(self):
+        """Clean up cached entries."""
+        from easygo_education.api.portal_cache import invalidate_users
+        invalidate_users("Teacher", ["Administrator"])
+    
+    def build_dashboard(self):
+        """Stand-in dashboard builder that counts rebuilds."""
+        self.builds += 1
+        return {"builds": self.builds}
+    
+    def test_cache_hit_after_miss(self):
+        """Test a second load is served from cache and counted as a hit."""
+        from easygo_education.api.portal_cache import get_cached_dashboard, get_dashboard_cache_stats
+        
+        before = get_dashboard_cache_stats()
+        get_cached_dashboard("Teacher", self.build_dashboard)
+        dashboard = get_cached_dashboard("Teacher", self.build_dashboard)
+        after = get_dashboard_cache_stats()
+        
+        self.assertEqual(dashboard, {"builds": 1})
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+    
+    def test_invalidation_forces_rebuild(self):
+        """Test invalidating a user's key rebuilds only that dashboard."""
+        from easygo_education.api.portal_cache import get_cached_dashboard, invalidate_users
+        
+        get_cached_dashboard("Teacher", self.build_dashboard)
+        invalidate_users("Teacher", ["Administrator"])
+        dashboard = get_cached_dashboard("Teacher", self.build_dashboard)
+        
+        self.assertEqual(dashboard, {"builds": 2})
+    
+    def test_invalidation_errors_are_logged(self):
+        """Test a failing invalidation is logged instead of aborting the save."""
+        from unittest.mock import patch
+        
+        from easygo_education.api.portal_cache import invalidate_students
+        
+        with patch.object(frappe, "get_all", side_effect=Exception("Unknown column")), \
+                patch.object(frappe, "log_error") as log_error:
+            invalidate_students(["STU-0001"])
+        
+        log_error.assert_called_once()
+
+
 class TestWebForms(unittest.TestCase):
     """Test web form functionality."""
     
@@ -0,0 +1,32 @@
+"""Test receipt PDF render keys."""
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from easygo_education.finances_rh import receipt_rendering
+
+
+class TestReceiptRendering(unittest.TestCase):
+    """Test stored receipt PDFs are addressed by receipt and template version."""
+    
+    def test_render_key_follows_template_version(self):
+        """Test a new print format version gets a new key and other receipts never share one."""
+        receipt = frappe._dict({"name": "RCP-2026-00001", "print_format": "Receipt Print", "letterhead": None})
+        versions = {"Receipt Print": "2026-09-01 10:00:00"}
+        
+        with patch.object(frappe, "get_cached_value", create=True,
+                side_effect=lambda doctype, name, field: versions.get(name)):
+            key = receipt_rendering.get_render_key(receipt)
+            self.assertEqual(receipt_rendering.get_render_key(receipt), key)
+            self.assertNotEqual(receipt_rendering.get_render_key(frappe._dict(receipt, name="RCP-2026-00002")), key)
+            
+            versions["Receipt Print"] = "2026-10-01 09:30:00"
+            self.assertNotEqual(receipt_rendering.get_render_key(receipt), key)
+        
+        self.assertEqual(len(key), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""Test class report card computations."""
+
+import unittest
+
+import frappe
+
+from easygo_education.scolarite.report_cards import compute_card, get_dense_ranks
+
+
+class TestReportCards(unittest.TestCase):
+    """Test card totals and class ranks computed in memory."""
+    
+    def test_compute_card_totals_gpa_and_attendance(self):
+        """Test subject percentages roll up into overall totals and GPA."""
+        card = compute_card([
+            frappe._dict({"subject": "MATH", "total_marks": 40, "obtained_marks": 36}),
+            frappe._dict({"subject": "PHYS", "total_marks": 20, "obtained_marks": 12}),
+            frappe._dict({"subject": "ART", "total_marks": 0, "obtained_marks": 0}),
+        ], frappe._dict({"total_count": 50, "present_count": 45, "absent_count": 5}))
+        
+        self.assertEqual([subject.grade for subject in card.subjects], ["A+", "C+"])
+        self.assertEqual((card.total_marks, card.obtained_marks), (60, 48))
+        self.assertEqual(card.overall_percentage, 80)
+        self.assertEqual(card.overall_grade, "A-")
+        self.assertEqual(card.grade_point_average, 3.0)
+        self.assertEqual(card.promotion_status, "Promoted")
+        self.assertEqual((card.days_present, card.attendance_percentage), (45, 90))
+    
+    def test_card_without_grades_is_pending(self):
+        """Test a student with no published grades gets an empty pending card."""
+        card = compute_card([])
+        
+        self.assertEqual((card.overall_percentage, card.overall_grade, card.promotion_status), (0, None, "Pending"))
+    
+    def test_dense_ranks_share_ties_without_gaps(self):
+        """Test equal percentages share a rank and the next rank follows on."""
+        self.assertEqual(get_dense_ranks([72.5, 91, 72.5, 0, 60]), [2, 1, 2, 4, 3])
+    
+    def test_dense_ranks_skip_missing_values(self):
+        """Test a card without a percentage gets no rank while a 0 is still ranked."""
+        self.assertEqual(get_dense_ranks([None, 0, 55]), [None, 2, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Test compiled salary structure formulas."""
+
+import unittest
+
+import frappe
+
+from easygo_education.finances_rh.salary_formula import CompiledStructure, SalaryFormulaError
+
+
+def component(name, component_type="Formula", **values):
+    """Build a salary structure component row."""
+    return frappe._dict({"component": name, "component_type": component_type, **values})
+
+
+class TestSalaryFormula(unittest.TestCase):
+    """Test formula validation and evaluation."""
+    
+    def test_formulas_see_attendance_and_earlier_components(self):
+        """Test formulas prorate on attendance and reference earlier amounts."""
+        structure = CompiledStructure("SS-1", 10000, [
+            component("Transport", formula="round(600 * attendance_days / working_days, 2)"),
+            component("Overtime Bonus", condition="absent_days == 0", formula="transport * 0.5"),
+        ], [
+            component("CNSS", formula="min(gross_salary, 6000) * 0.0448"),
+        ])
+        
+        results, errors = structure.evaluate_batch([
+            {"name": "EMP-1", "working_days": 24, "attendance_days": 24},
+            {"name": "EMP-2", "working_days": 24, "attendance_days": 12, "absent_days": 12},
+        ])
+        
+        self.assertEqual(errors, {})
+        self.assertEqual([amount for c, amount in results["EMP-1"].earnings], [600, 300])
+        self.assertEqual(results["EMP-1"].gross_salary, 10900)
+        self.assertEqual(results["EMP-1"].total_deductions, 268.8)
+        self.assertEqual([amount for c, amount in results["EMP-2"].earnings], [300, 0])
+    
+    def test_unknown_variables_are_rejected_when_compiling(self):
+        """Test references to undefined or later variables fail with the component name."""
+        with self.assertRaisesRegex(SalaryFormulaError, "Transport: unknown variable"):
+            CompiledStructure("SS-1", 10000, [component("Transport", formula="gross_salary * 0.1")], [])
+        with self.assertRaisesRegex(SalaryFormulaError, "Bonus: invalid formula"):
+            CompiledStructure("SS-1", 10000, [component("Bonus", formula="__import__('os')")], [])
+    
+    def test_runtime_errors_are_reported_per_employee(self):
+        """Test a failing formula is reported instead of silently falling back."""
+        structure = CompiledStructure("SS-1", 10000, [
+            component("Transport", formula="600 * attendance_days / working_days"),
+        ], [])
+        
+        results, errors = structure.evaluate_batch([
+            {"name": "EMP-1", "working_days": 24, "attendance_days": 24},
+            {"name": "EMP-2", "working_days": 0},
+        ])
+        
+        self.assertEqual(list(results), ["EMP-1"])
+        self.assertIn("Transport", errors["EMP-2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Test moving-average stock valuation."""
+
+import unittest
+
+import frappe
+
+from easygo_education.gestion_etablissement import stock_valuation
+
+
+class TestStockValuation(unittest.TestCase):
+    """Test how ledger movements change a bin's balance."""
+    
+    def replay(self, movements):
+        """Apply (qty, incoming_rate) movements from an empty bin."""
+        state = (0, 0, 0)
+        differences = []
+        for actual_qty, incoming_rate in movements:
+            state, difference = stock_valuation.apply_entry(*state, actual_qty, incoming_rate)
+            differences.append(difference)
+        return state, differences
+    
+    def test_receipts_average_and_issues_leave_at_current_rate(self):
+        """Test the rate moves only on receipts."""
+        (qty, value, rate), differences = self.replay([(10, 5), (10, 7), (-5, None)])
+        
+        self.assertEqual((qty, value, rate), (15, 90, 6))
+        self.assertEqual(differences, [50, 70, -30])
+    
+    def test_receipt_into_negative_stock_restarts_at_incoming_rate(self):
+        """Test negative stock doesn't distort the rate of the next receipt."""
+        (qty, value, rate), differences = self.replay([(10, 6), (-15, None), (10, 8)])
+        
+        self.assertEqual((qty, value, rate), (5, 40, 8))
+        self.assertEqual(sum(differences), value)
+    
+    def test_backdated_entry_detection(self):
+        """Test entries before the bin's last posting are back-dated."""
+        stock_bin = frappe._dict({"posting_date": "2026-10-10", "posting_time": "10:00:00"})
+        
+        earlier = frappe._dict({"posting_date": "2026-10-10", "posting_time": "09:30:00"})
+        later = frappe._dict({"posting_date": "2026-10-11", "posting_time": "08:00:00"})
+        self.assertTrue(stock_valuation.is_backdated(earlier, stock_bin))
+        self.assertFalse(stock_valuation.is_backdated(later, stock_bin))
+        self.assertFalse(stock_valuation.is_backdated(earlier, frappe._dict()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Test Support Trigger Rule evaluation over a shared feature frame."""
+
+import datetime
+import unittest
+from unittest.mock import patch
+
+import frappe
+
+from easygo_education.vie_scolaire.doctype.support_trigger_rule import support_trigger_rule
+from easygo_education.vie_scolaire.doctype.support_trigger_rule.support_trigger_rule import build_feature_frame
+
+
+DATE_RANGE = (datetime.date(2026, 9, 1), datetime.date(2026, 9, 30))
+
+
+def make_rule(**values):
+    """Get an unsaved rule."""
+    return frappe.get_doc({
+        "doctype": "Support Trigger Rule",
+        "rule_name": "Test Rule",
+        "time_period": "Current Month",
+        **values
+    })
+
+
+class TestSupportTriggerRule(unittest.TestCase):
+    """Test the feature frame and the rules evaluated against it."""
+    
+    def build_frame(self):
+        """Build a frame for three students from mocked grouped queries."""
+        students = [
+            frappe._dict({"name": name, "student_name": name, "school_class": "6A", "program": None})
+            for name in ("STU-1", "STU-2", "STU-3")
+        ]
+        queries = [
+            # Grades
+            [frappe._dict({"student": "STU-1", "average_score": 42, "grade_count": 4}),
+                frappe._dict({"student": "STU-2", "average_score": 81.5, "grade_count": 6}),
+                frappe._dict({"student": "STU-3", "average_score": 65, "grade_count": 2})],
+            # Attendance
+            [frappe._dict({"student": "STU-1", "total_days": 20, "present_days": 14}),
+                frappe._dict({"student": "STU-2", "total_days": 20, "present_days": 20})],
+            # Disciplinary actions
+            [frappe._dict({"student": "STU-2", "incident_count": 3, "severe_incidents": 1})],
+            # Homework
+            [frappe._dict({"student": "STU-1", "total_assignments": 4, "submitted_assignments": 1,
+                "missed_assignments": 3})],
+        ]
+        
+        with patch.object(frappe, "get_all", return_value=students), \
+                patch.object(frappe.db, "sql", side_effect=queries) as sql:
+            frame = build_feature_frame(DATE_RANGE)
+        
+        self.assertEqual(sql.call_count, 4)
+        return frame
+    
+    def test_feature_frame(self):
+        """Test grouped rows become per-student features with defaults for students without records."""
+        frame = self.build_frame()
+        
+        self.assertEqual(set(frame), {"STU-1", "STU-2", "STU-3"})
+        self.assertEqual(frame["STU-1"].academic.average_score, 42)
+        self.assertEqual(frame["STU-1"].attendance.attendance_percentage, 70)
+        self.assertEqual(frame["STU-1"].attendance.absent_days, 6)
+        self.assertEqual(frame["STU-1"].assignments.submission_rate, 25)
+        self.assertEqual(frame["STU-2"].behavioral.incident_count, 3)
+        
+        # No records reads as full attendance and submissions and no incidents
+        self.assertEqual(frame["STU-3"].attendance.attendance_percentage, 100)
+        self.assertEqual(frame["STU-3"].attendance.total_days, 0)
+        self.assertEqual(frame["STU-3"].assignments.submission_rate, 100)
+        self.assertEqual(frame["STU-3"].behavioral.incident_count, 0)
+    
+    def test_empty_student_list_builds_no_frame(self):
+        """Test an explicit empty student list runs no query."""
+        with patch.object(frappe, "get_all") as get_all:
+            self.assertEqual(build_feature_frame(DATE_RANGE, []), {})
+        get_all.assert_not_called()
+    
+    def test_evaluate_frame(self):
+        """Test each trigger type picks the students it should from the same frame."""
+        frame = self.build_frame()
+        
+        cases = [
+            (make_rule(trigger_type="Grade Below Threshold", academic_threshold=50), {"STU-1"}),
+            (make_rule(trigger_type="Attendance Below Threshold", attendance_threshold=80), {"STU-1"}),
+            (make_rule(trigger_type="Missed Assignments", behavioral_threshold=3), {"STU-1"}),
+            (make_rule(trigger_type="Behavioral Incidents", behavioral_threshold=2), {"STU-2"}),
+            (make_rule(trigger_type="Combined Criteria", academic_threshold=50, behavioral_threshold=2),
+                {"STU-1", "STU-2"}),
+            (make_rule(trigger_type="Custom Condition",
+                conditions="academic.average_score > 80 and attendance.attendance_percentage == 100"), {"STU-2"}),
+        ]
+        for rule, expected in cases:
+            self.assertEqual(set(rule.evaluate_frame(frame)), expected, msg=rule.trigger_type)
+    
+    def test_evaluate_frame_limits_to_group(self):
+        """Test a rule scoped to a student group only evaluates its members."""
+        frame = self.build_frame()
+        rule = make_rule(trigger_type="Behavioral Incidents", behavioral_threshold=0, grade_level="6A-GROUP")
+        
+        with patch.object(support_trigger_rule, "get_group_students", return_value={"STU-3"}):
+            self.assertEqual(set(rule.evaluate_frame(frame)), {"STU-3"})
+    
+    def test_batch_evaluation_keeps_frame_shared(self):
+        """Test details loaded for triggered students don't leak into the frame later rules reuse."""
+        frame = self.build_frame()
+        rule = make_rule(trigger_type="Grade Below Threshold", academic_threshold=50)
+        
+        with patch.object(rule, "get_date_range", return_value=list(DATE_RANGE)), \
+                patch.object(rule, "execute_action", return_value={"success": True}) as execute_action, \
+                patch.object(rule, "save"), \
+                patch.object(frappe, "get_all", return_value=[frappe._dict({"grade": 8})]):
+            results = rule.run_batch_evaluation(frame)
+        
+        self.assertEqual(results, {"triggered": 1, "evaluated": 3, "actions_executed": 1})
+        evaluation = execute_action.call_args.args[1]
+        self.assertEqual(evaluation["data"].academic.recent_assessments, [{"grade": 8}])
+        self.assertNotIn("recent_assessments", frame["STU-1"].academic)
+        self.assertNotIn("incidents", frame["STU-1"].behavioral)
+
+
+if __name__ == "__main__":
+    unittest.main()
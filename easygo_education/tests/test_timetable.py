@@ -0,0 +1,133 @@
+"""Test in-memory timetable conflict detection."""
+
+import time
+import unittest
+
+from easygo_education.scolarite.timetable.generator import TimetableSolver, make_synthetic_school
+from easygo_education.scolarite.timetable.interval_index import ScheduleIndex
+
+
+def make_slot(instructor, school_class, room_number, start_time, end_time, day_of_week="Monday"):
+    """Build a schedule slot dict."""
+    return {
+        "instructor": instructor,
+        "school_class": school_class,
+        "room_number": room_number,
+        "subject": "Mathématiques",
+        "day_of_week": day_of_week,
+        "start_time": start_time,
+        "end_time": end_time
+    }
+
+
+class TestScheduleIndex(unittest.TestCase):
+    """Test the schedule interval index."""
+    
+    def test_batch_without_conflicts(self):
+        """Test back-to-back slots do not conflict."""
+        index = ScheduleIndex()
+        conflicts = index.validate_batch([
+            make_slot("EMP-1", "6A", "R1", "08:00:00", "09:00:00"),
+            make_slot("EMP-1", "6A", "R1", "09:00:00", "10:00:00"),
+            make_slot("EMP-1", "6A", "R1", "08:00:00", "09:00:00", day_of_week="Tuesday"),
+        ])
+        
+        self.assertEqual(conflicts, [])
+    
+    def test_reports_every_conflict_in_batch(self):
+        """Test instructor, class and room clashes are all reported."""
+        index = ScheduleIndex()
+        conflicts = index.validate_batch([
+            make_slot("EMP-1", "6A", "R1", "08:00:00", "10:00:00"),
+            make_slot("EMP-1", "6B", "R2", "09:00:00", "11:00:00"),
+            make_slot("EMP-2", "6A", "R1", "09:30:00", "10:30:00"),
+        ])
+        
+        self.assertEqual(
+            sorted((c.row, c.resource_type) for c in conflicts),
+            [(2, "Instructor"), (3, "Class"), (3, "Room")]
+        )
+    
+    def test_conflict_with_stored_slot(self):
+        """Test a new slot clashes with an already indexed schedule."""
+        index = ScheduleIndex()
+        index.add(dict(make_slot("EMP-1", "6A", "R1", "08:00:00", "09:00:00"), name="CS-0001"))
+        
+        conflicts = index.validate_batch([make_slot("EMP-1", "5C", "R3", "08:30:00", "09:30:00")])
+        
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(conflicts[0].conflicts_with, "CS-0001")
+    
+    def test_updated_slot_replaces_stored_slot(self):
+        """Test re-validating a stored slot by name does not clash with itself."""
+        index = ScheduleIndex()
+        index.add(dict(make_slot("EMP-1", "6A", "R1", "08:00:00", "09:00:00"), name="CS-0001"))
+        
+        conflicts = index.validate_batch([
+            dict(make_slot("EMP-1", "6A", "R1", "08:30:00", "09:30:00"), name="CS-0001")
+        ])
+        
+        self.assertEqual(conflicts, [])
+
+
+class TestTimetableSolver(unittest.TestCase):
+    """Test the timetable generator on a synthetic 60-class, 120-teacher school."""
+    
+    def setUp(self):
+        """Build the synthetic school."""
+        self.problem = make_synthetic_school(classes=60, teachers=120, seed=7)
+        self.solver = TimetableSolver(
+            self.problem["lessons"], self.problem["rooms"],
+            class_sizes=self.problem["class_sizes"],
+            preferred_rooms=self.problem["preferred_rooms"],
+            unavailable=self.problem["unavailable"],
+            seed=7
+        )
+    
+    def assert_valid_timetable(self):
+        """Assert every lesson is placed without conflicts or unavailable slots."""
+        self.assertEqual(len(self.solver.assignment), len(self.problem["lessons"]))
+        self.assertEqual(ScheduleIndex().validate_batch(self.solver.to_schedules()), [])
+        
+        for lesson_id, (slot, room) in self.solver.assignment.items():
+            lesson = self.problem["lessons"][lesson_id]
+            self.assertNotIn(slot, self.solver.unavailable.get(lesson["instructor"], ()))
+            self.assertGreaterEqual(self.problem["rooms"][room], self.problem["class_sizes"][lesson["school_class"]])
+    
+    def test_generates_conflict_free_timetable(self):
+        """Test the full school is scheduled within the time budget."""
+        start = time.monotonic()
+        unplaced = self.solver.solve(time_budget=30)
+        
+        self.assertEqual(unplaced, [])
+        self.assertLess(time.monotonic() - start, 30)
+        self.assert_valid_timetable()
+    
+    def test_incremental_resolve_keeps_other_teachers(self):
+        """Test re-solving one teacher leaves other teachers' lessons in place."""
+        self.solver.solve(time_budget=30)
+        previous = dict(self.solver.assignment)
+        
+        teacher = self.problem["lessons"][0]["instructor"]
+        self.solver.unavailable[teacher] = {(0, period) for period in range(len(self.solver.periods))}
+        unplaced = self.solver.resolve_instructor(previous, teacher, time_budget=10)
+        
+        self.assertEqual(unplaced, [])
+        self.assert_valid_timetable()
+        for lesson_id, placement in previous.items():
+            if self.problem["lessons"][lesson_id]["instructor"] != teacher:
+                self.assertEqual(self.solver.assignment[lesson_id], placement)
+
+    
+    def test_repair_stops_when_no_lesson_can_move(self):
+        """Test repair returns before the deadline once no leftover lesson has any slot."""
+        lessons = [{"school_class": "6A", "subject": "Maths", "instructor": "T1"} for _ in range(3)]
+        solver = TimetableSolver(lessons, {"R1": 10}, class_sizes={"6A": 30}, seed=1)
+        
+        start = time.monotonic()
+        self.assertEqual(sorted(solver.solve(time_budget=20)), [0, 1, 2])
+        self.assertLess(time.monotonic() - start, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
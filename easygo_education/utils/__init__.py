@@ -0,0 +1 @@
+"""Shared utilities for EasyGo Education."""
@@ -0,0 +1,276 @@
+"""Compiled, sandboxed conditions for rule DocTypes.
+
+Rule conditions are a small subset of Python: one expression, or a few
+``name = expression`` assignments optionally followed by an expression,
+e.g.::
+
+    attendance.attendance_percentage < 80 and behavioral.incident_count >= 2
+
+or::
+
+    low = academic.average_score < 50
+    triggered = low and attendance.absent_days > 3
+    reason = "Low grades and absences"
+
+Sources are parsed and checked against a whitelist of syntax once, then
+the compiled code object is cached by source text, so editing a rule
+naturally gets a new entry. Imports, attribute names starting with an
+underscore, calls to anything but the helpers in ``FUNCTIONS``, keyword
+arguments (``max(..., key=doc.delete)`` would call a record's method),
+lambdas, comprehensions and exponentiation are rejected, as are
+assignments that would rebind a helper or a reserved record name such as
+``doc``, and calls through any assigned variable (including the result
+name, which scripts may assign but never call). Repeating or joining
+strings and lists is checked at run time against ``MAX_SEQUENCE_LENGTH``.
+"""
+
+import ast
+from functools import lru_cache
+
+import frappe
+from frappe import _
+from frappe.model.base_document import BaseDocument
+from frappe.utils import add_days, cint, date_diff, flt, getdate, today
+
+
+MAX_SOURCE_LENGTH = 2000
+
+# Longest string or list a condition may build with ``*`` or ``+``
+MAX_SEQUENCE_LENGTH = 10000
+
+SEQUENCE_TYPES = (str, bytes, list, tuple)
+
+# Names bound to the record itself, which conditions may read but not rebind
+RESERVED_NAMES = ("doc",)
+
+FUNCTIONS = {
+    "abs": abs,
+    "all": all,
+    "any": any,
+    "bool": bool,
+    "float": float,
+    "int": int,
+    "len": len,
+    "max": max,
+    "min": min,
+    "round": round,
+    "str": str,
+    "sum": sum,
+    "add_days": add_days,
+    "cint": cint,
+    "date_diff": date_diff,
+    "flt": flt,
+    "getdate": getdate,
+    "today": today,
+}
+
+ALLOWED_NODES = (
+    ast.Module, ast.Expression, ast.Expr, ast.Assign,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.IfExp, ast.Call,
+    ast.Name, ast.Load, ast.Store, ast.Constant,
+    ast.Attribute, ast.Subscript, ast.Slice,
+    ast.List, ast.Tuple, ast.Set, ast.Dict,
+)
+
+
+class ConditionError(Exception):
+    """Raised when a condition uses syntax outside the allowed subset."""
+
+
+def guarded_mult(left, right):
+    """Multiply, refusing to repeat a sequence past ``MAX_SEQUENCE_LENGTH``."""
+    for sequence, count in ((left, right), (right, left)):
+        if isinstance(sequence, SEQUENCE_TYPES) and isinstance(count, int):
+            if len(sequence) * count > MAX_SEQUENCE_LENGTH:
+                raise ConditionError(f"Sequences longer than {MAX_SEQUENCE_LENGTH} are not allowed")
+    return left * right
+
+
+def guarded_add(left, right):
+    """Add, refusing to join sequences past ``MAX_SEQUENCE_LENGTH``."""
+    if isinstance(left, SEQUENCE_TYPES) and isinstance(right, SEQUENCE_TYPES):
+        if len(left) + len(right) > MAX_SEQUENCE_LENGTH:
+            raise ConditionError(f"Sequences longer than {MAX_SEQUENCE_LENGTH} are not allowed")
+    return left + right
+
+
+# Operators routed through a length check; the names can't clash with
+# condition names since those may not start with an underscore
+GUARDED_OPERATORS = {
+    ast.Mult: ("_mult", guarded_mult),
+    ast.Add: ("_add", guarded_add),
+}
+
+
+class GuardOperators(ast.NodeTransformer):
+    """Rewrite ``a * b`` and ``a + b`` into calls to the guarded helpers."""
+    
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        guard = GUARDED_OPERATORS.get(type(node.op))
+        if not guard:
+            return node
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id=guard[0], ctx=ast.Load()), args=[node.left, node.right], keywords=[]),
+            node
+        )
+
+
+def get_globals():
+    """Get the globals conditions run with: no builtins, only the helpers."""
+    return {
+        "__builtins__": {},
+        **FUNCTIONS,
+        **{name: function for name, function in GUARDED_OPERATORS.values()},
+    }
+
+
+class Condition:
+    """A validated, compiled rule condition."""
+    
+    def __init__(self, source, result="result"):
+        self.source = source
+        self.result = result
+        tree = parse(source)
+        
+        # A trailing bare expression is the condition's value
+        if tree.body and isinstance(tree.body[-1], ast.Expr):
+            tree.body[-1] = ast.copy_location(
+                ast.Assign(targets=[ast.Name(id=result, ctx=ast.Store())], value=tree.body[-1].value),
+                tree.body[-1]
+            )
+            ast.fix_missing_locations(tree)
+        
+        self.assigned = {
+            target.id for node in tree.body if isinstance(node, ast.Assign) for target in node.targets
+        }
+        self.names = {
+            node.id for node in ast.walk(tree)
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+        } - set(FUNCTIONS) - self.assigned
+        tree = ast.fix_missing_locations(GuardOperators().visit(tree))
+        self.code = compile(tree, "<condition>", "exec")
+    
+    def evaluate(self, record):
+        """Evaluate against one record and return the local variables.
+        
+        Names not present in the record resolve to None so rules keep
+        working when a field is empty.
+        """
+        namespace = {name: record.get(name) for name in self.names}
+        exec(self.code, get_globals(), namespace)
+        return namespace
+    
+    def __call__(self, record):
+        """Evaluate against one record and return the condition's value."""
+        return self.evaluate(record).get(self.result)
+    
+    def evaluate_batch(self, records):
+        """Evaluate against many records, returning one value per record."""
+        globals_ = get_globals()
+        names, code, result = self.names, self.code, self.result
+        
+        values = []
+        for record in records:
+            namespace = {name: record.get(name) for name in names}
+            exec(code, globals_, namespace)
+            values.append(namespace.get(result))
+        return values
+    
+    def filter(self, records):
+        """Get the records for which the condition is truthy."""
+        return [record for record, value in zip(records, self.evaluate_batch(records)) if value]
+
+
+def parse(source):
+    """Parse a condition and check it only uses allowed syntax."""
+    source = (source or "").strip()
+    if len(source) > MAX_SOURCE_LENGTH:
+        raise ConditionError(f"Condition is longer than {MAX_SOURCE_LENGTH} characters")
+    
+    try:
+        tree = ast.parse(source, "<condition>", "exec")
+    except SyntaxError as e:
+        raise ConditionError(f"Invalid syntax at line {e.lineno}: {e.msg}")
+    
+    protected = set(FUNCTIONS) | set(RESERVED_NAMES)
+    assigned = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ConditionError(f"{type(node).__name__} is not allowed in conditions")
+        
+        if isinstance(node, ast.Module):
+            for statement in node.body:
+                if not isinstance(statement, (ast.Assign, ast.Expr)):
+                    raise ConditionError("Only assignments and expressions are allowed")
+            # Only a trailing expression is the condition's value, any other would be ignored
+            if any(isinstance(statement, ast.Expr) for statement in node.body[:-1]):
+                raise ConditionError("Only the last line can be a bare expression")
+        elif isinstance(node, ast.Assign):
+            if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+                raise ConditionError("Only simple variable assignments are allowed")
+            if node.targets[0].id in protected:
+                raise ConditionError(f"Name '{node.targets[0].id}' can't be assigned to")
+            assigned.add(node.targets[0].id)
+        elif isinstance(node, ast.Name):
+            if node.id.startswith("_"):
+                raise ConditionError(f"Name '{node.id}' is not allowed")
+        elif isinstance(node, ast.Attribute):
+            if node.attr.startswith("_"):
+                raise ConditionError(f"Attribute '{node.attr}' is not allowed")
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ConditionError("Only these functions can be called: {0}".format(", ".join(sorted(FUNCTIONS))))
+    
+    # A call through a variable the condition assigned could reach any callable
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and node.func.id in assigned:
+            raise ConditionError(f"'{node.func.id}' is not a function that can be called")
+    
+    return tree
+
+
+@lru_cache(maxsize=512)
+def compile_condition(source, result="result"):
+    """Get the compiled condition for a source text, compiling it once per process."""
+    return Condition(source, result)
+
+
+def validate_condition(source, label, result="result"):
+    """Throw a validation error if the condition is not allowed."""
+    if not source:
+        return
+    try:
+        compile_condition(source, result)
+    except ConditionError as e:
+        frappe.throw(_("Invalid {0}: {1}").format(label, str(e)))
+
+
+class DocumentRecord:
+    """Expose a document to conditions both as ``doc`` and by its field names.
+    
+    Conditions get a plain copy of the document's values, never the live
+    Document, so its methods (``save``, ``delete``, ``submit``...) are out
+    of reach.
+    """
+    
+    def __init__(self, doc):
+        self.doc = doc.as_dict() if isinstance(doc, BaseDocument) else frappe._dict(doc)
+    
+    def get(self, name):
+        """Get the document itself or one of its field values."""
+        return self.doc if name == "doc" else self.doc.get(name)
+
+
+def to_record(data):
+    """Convert nested dicts to ``frappe._dict`` so conditions can use dotted access."""
+    if isinstance(data, dict):
+        return frappe._dict({key: to_record(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return [to_record(value) for value in data]
+    return data
@@ -0,0 +1,343 @@
+"""Pre-aggregated attendance counts.
+
+Two rollups are kept in step with Student Attendance:
+
+- Class Attendance Rollup: counts per class and day, used for school-wide
+  and per-class rates and trends.
+- Student Attendance Rollup: counts per student and calendar month, used
+  for per-student totals over terms and years.
+
+Document events apply +1/-1 deltas when attendance is inserted, changed,
+justified or deleted, and the bulk attendance path applies its own deltas.
+``rebuild_attendance_rollups`` recomputes both tables from raw records and
+``check_attendance_rollups`` reports (and optionally repairs) drift.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, add_months, cint, get_first_day, get_last_day, getdate, now, today
+
+
+STATUS_COLUMNS = {
+    "Present": "present_count",
+    "Absent": "absent_count",
+    "Late": "late_count",
+    "Absent Justifié": "justified_count",
+}
+COUNT_COLUMNS = ["total_count", *STATUS_COLUMNS.values()]
+
+CLASS_ROLLUP = "Class Attendance Rollup"
+STUDENT_ROLLUP = "Student Attendance Rollup"
+
+UPSERT_CHUNK_SIZE = 500
+
+
+def get_count_columns_sql():
+    """Get the SELECT expressions counting raw attendance rows per status."""
+    columns = ["COUNT(*) as total_count"]
+    for status, column in STATUS_COLUMNS.items():
+        columns.append(f"SUM(CASE WHEN status = {frappe.db.escape(status)} THEN 1 ELSE 0 END) as {column}")
+    return ", ".join(columns)
+
+
+def get_attendance_key(doc):
+    """Get the fields of an attendance record that the rollups depend on."""
+    return (doc.get("student"), doc.get("school_class") or "", str(getdate(doc.get("attendance_date"))), doc.get("status"))
+
+
+def on_attendance_change(doc, method=None):
+    """Apply the change of a Student Attendance record to the rollups (hooked on update and trash)."""
+    if method == "on_trash":
+        apply_attendance_changes([(*get_attendance_key(doc), -1)])
+        return
+    
+    previous = doc.get_doc_before_save()
+    new_key = get_attendance_key(doc)
+    old_key = get_attendance_key(previous) if previous else None
+    if old_key == new_key:
+        return
+    
+    changes = [(*new_key, 1)]
+    if old_key:
+        changes.append((*old_key, -1))
+    apply_attendance_changes(changes)
+
+
+def apply_attendance_changes(changes):
+    """Apply attendance deltas to both rollups.
+    
+    ``changes`` is an iterable of (student, school_class, attendance_date,
+    status, sign) tuples, where sign is 1 for an added record and -1 for a
+    removed one. Deltas are summed per rollup row first, so a batch costs
+    one upsert per table.
+    """
+    class_deltas = {}
+    student_deltas = {}
+    
+    for student, school_class, attendance_date, status, sign in changes:
+        attendance_date = getdate(attendance_date)
+        column = STATUS_COLUMNS.get(status)
+        
+        for deltas, key in (
+            (class_deltas, (school_class or "", str(attendance_date))),
+            (student_deltas, (student, str(get_first_day(attendance_date)))),
+        ):
+            counts = deltas.setdefault(key, dict.fromkeys(COUNT_COLUMNS, 0))
+            counts["total_count"] += sign
+            if column:
+                counts[column] += sign
+    
+    upsert_counts(CLASS_ROLLUP, ("school_class", "attendance_date"), class_deltas)
+    upsert_counts(STUDENT_ROLLUP, ("student", "period_start"), student_deltas)
+
+
+def upsert_counts(doctype, key_fields, deltas):
+    """Add count deltas to rollup rows, creating missing rows."""
+    rows = [(key, counts) for key, counts in deltas.items() if any(counts.values())]
+    if not rows:
+        return
+    
+    timestamp = now()
+    user = frappe.session.user
+    fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", *key_fields, *COUNT_COLUMNS]
+    updates = ", ".join(f"`{column}` = `{column}` + VALUES(`{column}`)" for column in COUNT_COLUMNS)
+    row_placeholder = f"({', '.join(['%s'] * len(fields))})"
+    
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        values = []
+        for key, counts in chunk:
+            # Matches the DocType autoname format:{key1}-{key2}
+            values.extend([f"{key[0]}-{key[1]}", timestamp, timestamp, user, user, 0, *key])
+            values.extend(counts[column] for column in COUNT_COLUMNS)
+        
+        frappe.db.sql(f"""
+            INSERT INTO `tab{doctype}` ({", ".join(f"`{field}`" for field in fields)})
+            VALUES {", ".join([row_placeholder] * len(chunk))}
+            ON DUPLICATE KEY UPDATE {updates}, modified = VALUES(modified)
+        """, values)
+
+
+def get_student_attendance_counts(students=None, from_date=None, to_date=None):
+    """Get attendance counts per student over a date range.
+    
+    Whole calendar months are read from Student Attendance Rollup and only
+    the partial months at either end of the range from raw records.
+    Returns ``{student: _dict(total_count, present_count, ...)}``.
+    """
+    if students is not None and not students:
+        return {}
+    
+    from_date = getdate(from_date) if from_date else None
+    to_date = getdate(to_date) if to_date else None
+    
+    # Whole months inside the range span [full_start, full_end)
+    full_start = full_end = None
+    if from_date:
+        full_start = from_date if from_date.day == 1 else get_first_day(add_months(from_date, 1))
+    if to_date:
+        full_end = add_days(to_date, 1) if add_days(to_date, 1).day == 1 else get_first_day(to_date)
+    
+    use_rollup = not (full_start and full_end and full_start >= full_end)
+    raw_ranges = []
+    if not use_rollup:
+        raw_ranges.append((from_date, to_date))
+    else:
+        if from_date and from_date < full_start:
+            raw_ranges.append((from_date, add_days(full_start, -1)))
+        if to_date and full_end <= to_date:
+            raw_ranges.append((full_end, to_date))
+    
+    values = {"students": list(students or [])}
+    student_condition = "AND student IN %(students)s" if students is not None else ""
+    totals = {}
+    
+    def add(rows):
+        for row in rows:
+            total = totals.setdefault(row.student, frappe._dict(dict.fromkeys(COUNT_COLUMNS, 0)))
+            for column in COUNT_COLUMNS:
+                total[column] += cint(row[column])
+    
+    if use_rollup:
+        conditions = []
+        if full_start:
+            conditions.append("AND period_start >= %(full_start)s")
+            values["full_start"] = full_start
+        if full_end:
+            conditions.append("AND period_start < %(full_end)s")
+            values["full_end"] = full_end
+        
+        add(frappe.db.sql(f"""
+            SELECT student, {", ".join(f"SUM({column}) as {column}" for column in COUNT_COLUMNS)}
+            FROM `tab{STUDENT_ROLLUP}`
+            WHERE 1 = 1 {student_condition} {" ".join(conditions)}
+            GROUP BY student
+        """, values, as_dict=True))
+    
+    if raw_ranges:
+        range_conditions = []
+        for idx, (start, end) in enumerate(raw_ranges):
+            range_conditions.append(f"attendance_date BETWEEN %(start_{idx})s AND %(end_{idx})s")
+            values[f"start_{idx}"] = start
+            values[f"end_{idx}"] = end
+        
+        add(frappe.db.sql(f"""
+            SELECT student, {get_count_columns_sql()}
+            FROM `tabStudent Attendance`
+            WHERE ({" OR ".join(range_conditions)}) {student_condition}
+            GROUP BY student
+        """, values, as_dict=True))
+    
+    return totals
+
+
+def get_month_bounds(from_date=None, to_date=None):
+    """Widen a date range to whole months so student rollups are rebuilt completely."""
+    return (
+        get_first_day(from_date) if from_date else None,
+        get_last_day(to_date) if to_date else None
+    )
+
+
+def get_range_conditions(fieldname, from_date, to_date, values):
+    """Build date range conditions for a field."""
+    conditions = []
+    if from_date:
+        conditions.append(f"{fieldname} >= %(from_date)s")
+        values["from_date"] = from_date
+    if to_date:
+        conditions.append(f"{fieldname} <= %(to_date)s")
+        values["to_date"] = to_date
+    return " AND ".join(conditions) or "1 = 1"
+
+
+def get_expected_rollups(from_date=None, to_date=None):
+    """Aggregate raw attendance into rollup rows as ``{doctype: {name: counts}}``."""
+    values = {}
+    where = get_range_conditions("attendance_date", from_date, to_date, values)
+    count_columns = get_count_columns_sql()
+    
+    class_rows = frappe.db.sql(f"""
+        SELECT CONCAT(IFNULL(school_class, ''), '-', attendance_date) as name,
+               IFNULL(school_class, '') as school_class, attendance_date, {count_columns}
+        FROM `tabStudent Attendance`
+        WHERE {where}
+        GROUP BY IFNULL(school_class, ''), attendance_date
+    """, values, as_dict=True)
+    
+    student_rows = frappe.db.sql(f"""
+        SELECT CONCAT(student, '-', DATE_FORMAT(attendance_date, '%%Y-%%m-01')) as name,
+               student, DATE_FORMAT(attendance_date, '%%Y-%%m-01') as period_start, {count_columns}
+        FROM `tabStudent Attendance`
+        WHERE {where}
+        GROUP BY student, DATE_FORMAT(attendance_date, '%%Y-%%m-01')
+    """, values, as_dict=True)
+    
+    return {
+        CLASS_ROLLUP: {row.name: row for row in class_rows},
+        STUDENT_ROLLUP: {row.name: row for row in student_rows}
+    }
+
+
+def get_stored_rollups(from_date=None, to_date=None):
+    """Get stored rollup rows as ``{doctype: {name: counts}}``."""
+    stored = {}
+    for doctype, fieldname in ((CLASS_ROLLUP, "attendance_date"), (STUDENT_ROLLUP, "period_start")):
+        values = {}
+        where = get_range_conditions(fieldname, from_date, to_date, values)
+        stored[doctype] = {row.name: row for row in frappe.db.sql(f"""
+            SELECT name, {", ".join(COUNT_COLUMNS)}
+            FROM `tab{doctype}`
+            WHERE {where}
+        """, values, as_dict=True)}
+    return stored
+
+
+@frappe.whitelist()
+def rebuild_attendance_rollups(from_date=None, to_date=None):
+    """Recompute attendance rollups from Student Attendance.
+    
+    The range is widened to whole months. Used to initialise the rollups for
+    existing data and to repair drift.
+    """
+    frappe.only_for("System Manager")
+    return rebuild_rollups(from_date, to_date)
+
+
+def rebuild_rollups(from_date=None, to_date=None):
+    """Recompute attendance rollups for a range without a permission check."""
+    from_date, to_date = get_month_bounds(from_date, to_date)
+    expected = get_expected_rollups(from_date, to_date)
+    
+    for doctype, fieldname in ((CLASS_ROLLUP, "attendance_date"), (STUDENT_ROLLUP, "period_start")):
+        values = {}
+        frappe.db.sql(f"""
+            DELETE FROM `tab{doctype}`
+            WHERE {get_range_conditions(fieldname, from_date, to_date, values)}
+        """, values)
+    
+    apply_rows(CLASS_ROLLUP, ("school_class", "attendance_date"), expected[CLASS_ROLLUP].values())
+    apply_rows(STUDENT_ROLLUP, ("student", "period_start"), expected[STUDENT_ROLLUP].values())
+    
+    count = sum(len(rows) for rows in expected.values())
+    return {"message": _("Rebuilt {0} attendance rollup rows").format(count), "count": count}
+
+
+def apply_rows(doctype, key_fields, rows):
+    """Insert aggregated rows into an emptied rollup range."""
+    upsert_counts(doctype, key_fields, {
+        tuple(str(row[field]) for field in key_fields): {column: cint(row[column]) for column in COUNT_COLUMNS}
+        for row in rows
+    })
+
+
+@frappe.whitelist()
+def check_attendance_rollups(from_date=None, to_date=None, repair=0):
+    """Compare attendance rollups with raw Student Attendance records.
+    
+    Returns the mismatching rows (capped at 100) and, when ``repair`` is set,
+    rebuilds the checked range if any were found.
+    """
+    frappe.only_for("System Manager")
+    return check_rollups(from_date, to_date, cint(repair))
+
+
+def check_rollups(from_date=None, to_date=None, repair=False):
+    """Compare and optionally repair attendance rollups without a permission check."""
+    from_date, to_date = get_month_bounds(from_date, to_date)
+    expected = get_expected_rollups(from_date, to_date)
+    stored = get_stored_rollups(from_date, to_date)
+    
+    mismatches = []
+    for doctype in (CLASS_ROLLUP, STUDENT_ROLLUP):
+        for name in set(expected[doctype]) | set(stored[doctype]):
+            expected_counts = [cint((expected[doctype].get(name) or {}).get(column)) for column in COUNT_COLUMNS]
+            stored_counts = [cint((stored[doctype].get(name) or {}).get(column)) for column in COUNT_COLUMNS]
+            if expected_counts != stored_counts:
+                mismatches.append({
+                    "doctype": doctype,
+                    "name": name,
+                    "expected": dict(zip(COUNT_COLUMNS, expected_counts)),
+                    "stored": dict(zip(COUNT_COLUMNS, stored_counts))
+                })
+    
+    if mismatches and repair:
+        rebuild_rollups(from_date, to_date)
+    
+    return {
+        "consistent": not mismatches,
+        "mismatch_count": len(mismatches),
+        "mismatches": mismatches[:100],
+        "repaired": bool(mismatches and repair)
+    }
+
+
+def verify_recent_attendance_rollups():
+    """Check and repair the rollups of the current and previous month (scheduled daily)."""
+    result = check_rollups(add_months(today(), -1), today(), repair=True)
+    if not result["consistent"]:
+        frappe.log_error(
+            f"Attendance rollups had {result['mismatch_count']} mismatching rows and were rebuilt",
+            "Attendance Rollup Drift"
+        )
+    frappe.db.commit()
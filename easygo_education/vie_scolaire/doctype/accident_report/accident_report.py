@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, get_datetime, now_datetime, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class AccidentReport(Document):
     """Accident Report management."""
@@ -83,7 +85,7 @@ class AccidentReport(Document):
             guardian = frappe.get_doc("Guardian", guardian_link.guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Accident Report - {0}").format(self.student_name),
                     message=self.get_parent_notification_message(),
@@ -113,7 +115,7 @@ class AccidentReport(Document):
         if management_emails:
             email_list = [email.strip() for email in management_emails.split(",")]
             
-            frappe.sendmail(
+            queue_notification(
                 recipients=email_list,
                 subject=_("Urgent: {0} Accident Report - {1}").format(self.severity_level, self.student_name),
                 message=self.get_management_notification_message(),
@@ -359,7 +361,7 @@ class AccidentReport(Document):
                 guardian = frappe.get_doc("Guardian", guardian_link.guardian)
                 
                 if guardian.email_address:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[guardian.email_address],
                         subject=_("Accident Case Closed - {0}").format(self.student_name),
                         message=self.get_case_closure_message(),
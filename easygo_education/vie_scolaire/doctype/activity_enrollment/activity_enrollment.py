@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class ActivityEnrollment(Document):
     """Activity Enrollment doctype controller."""
@@ -112,7 +114,7 @@ class ActivityEnrollment(Document):
             try:
                 parent_email = frappe.db.get_value("Student", self.student, "parent_email")
                 if parent_email:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[parent_email],
                         subject=subject,
                         message=message
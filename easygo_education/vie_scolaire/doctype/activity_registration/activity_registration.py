@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class ActivityRegistration(Document):
     """Activity Registration management."""
@@ -117,7 +119,7 @@ class ActivityRegistration(Document):
         coordinator = frappe.db.get_single_value("School Settings", "activities_coordinator")
         
         if coordinator:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[coordinator],
                 subject=_("Activity Registration Approval Required - {0}").format(self.name),
                 message=self.get_approval_request_message(),
@@ -177,7 +179,7 @@ class ActivityRegistration(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Activity Registration Confirmation - {0}").format(self.activity_name),
                 message=self.get_registration_confirmation_message(),
@@ -310,7 +312,7 @@ class ActivityRegistration(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Activity Registration Approved - {0}").format(self.activity_name),
                 message=self.get_approval_notification_message(),
@@ -385,7 +387,7 @@ class ActivityRegistration(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Activity Registration Update - {0}").format(self.activity_name),
                 message=self.get_rejection_notification_message(reason),
@@ -567,7 +569,7 @@ class ActivityRegistration(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Waitlist Update - Spot Available for {0}").format(self.activity_name),
                 message=self.get_waitlist_promotion_message(),
@@ -619,7 +621,7 @@ class ActivityRegistration(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Activity Registration Withdrawal Confirmation - {0}").format(self.activity_name),
                 message=self.get_withdrawal_confirmation_message(),
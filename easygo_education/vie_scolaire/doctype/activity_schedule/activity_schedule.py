@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, get_time, now_datetime, add_days, add_weeks, add_months
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class ActivitySchedule(Document):
     """Activity Schedule management."""
@@ -161,7 +163,7 @@ class ActivitySchedule(Document):
             recipients.append(student_doc.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Activity Schedule - {0}").format(self.activity_name),
                 message=self.get_schedule_notification_message(student_name),
@@ -311,7 +313,7 @@ class ActivitySchedule(Document):
             recipients.append(student_doc.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Activity Cancelled - {0}").format(self.activity_name),
                 message=self.get_cancellation_message(student_name, reason),
@@ -400,7 +402,7 @@ class ActivitySchedule(Document):
             recipients.append(student_doc.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Activity Rescheduled - {0}").format(self.activity_name),
                 message=self.get_reschedule_message(student_name, new_schedule, reason),
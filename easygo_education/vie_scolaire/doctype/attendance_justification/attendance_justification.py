@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class AttendanceJustification(Document):
     """Attendance Justification doctype controller for portal submissions."""
@@ -88,7 +90,7 @@ class AttendanceJustification(Document):
                     recipients.append(manager.email)
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=list(set(recipients)),  # Remove duplicates
                     subject=_("New Attendance Justification: {0}").format(self.student_name),
                     message=_("A new attendance justification has been submitted.\n\nStudent: {0}\nDate: {1}\nReason: {2}\nSubmitted by: {3}").format(
@@ -147,7 +149,7 @@ class AttendanceJustification(Document):
             if submitter_email:
                 status_text = "approved" if self.approval_status == "Approved" else "rejected"
                 
-                frappe.sendmail(
+                queue_notification(
                     recipients=[submitter_email],
                     subject=_("Attendance Justification {0}: {1}").format(status_text.title(), self.student_name),
                     message=_("Your attendance justification for {0} on {1} has been {2}.\n\nReview Comments: {3}").format(
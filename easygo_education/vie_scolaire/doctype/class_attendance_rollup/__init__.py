@@ -0,0 +1 @@
+# Class Attendance Rollup
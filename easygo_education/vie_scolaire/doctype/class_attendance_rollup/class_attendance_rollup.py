@@ -0,0 +1,12 @@
+"""Class Attendance Rollup doctype controller.
+
+Attendance counts per class and day, maintained incrementally from
+Student Attendance by easygo_education.vie_scolaire.attendance_rollup.
+"""
+
+from frappe.model.document import Document
+
+
+class ClassAttendanceRollup(Document):
+    """Class Attendance Rollup doctype controller (maintained by the system)."""
+    pass
@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate, date_diff
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class DisciplinaryAction(Document):
     """Disciplinary Action doctype controller."""
@@ -76,7 +78,7 @@ class DisciplinaryAction(Document):
             
             if guardian_emails:
                 for guardian in guardian_emails:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[guardian.email_address],
                         subject=_("Disciplinary Action Notice - {0}").format(self.student_name),
                         message=self.get_notification_message(guardian),
@@ -168,7 +170,7 @@ School Administration""").format(
             
             if guardian_emails:
                 for guardian in guardian_emails:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[guardian.email_address],
                         subject=_("Disciplinary Action Resolved - {0}").format(self.student_name),
                         message=_("""Dear {0},
@@ -314,7 +316,7 @@ School Administration""").format(
             
             if guardian_emails:
                 for guardian in guardian_emails:
-                    frappe.sendmail(
+                    queue_notification(
                         recipients=[guardian.email_address],
                         subject=_("Behavior Improvement Plan - {0}").format(self.student_name),
                         message=_("""Dear {0},
@@ -370,7 +372,7 @@ School Administration""").format(
             recipients = [admin.email for admin in admin_emails if admin.email]
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Disciplinary Action Appeal - {0}").format(self.student_name),
                     message=_("""A disciplinary action has been appealed.
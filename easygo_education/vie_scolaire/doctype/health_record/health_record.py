@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, getdate, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class HealthRecord(Document):
     """Health Record doctype controller."""
@@ -96,7 +98,7 @@ class HealthRecord(Document):
             recipients = [email[0] for email in guardian_emails if email[0]]
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Vaccination Reminder - {0}").format(self.student_name),
                     message=_("This is a reminder that {0} has a vaccination due on {1}. Please schedule an appointment with your healthcare provider.").format(
@@ -123,7 +125,7 @@ class HealthRecord(Document):
             recipients = [email[0] for email in guardian_emails if email[0]]
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Medical Clearance Expiry - {0}").format(self.student_name),
                     message=_("The medical clearance for {0} will expire on {1}. Please renew the clearance to continue participation in activities.").format(
@@ -170,7 +172,7 @@ class HealthRecord(Document):
             recipients = [email[0] for email in guardian_emails if email[0]]
             
             if recipients:
-                frappe.sendmail(
+                queue_notification(
                     recipients=recipients,
                     subject=_("Health Incident Report - {0}").format(self.student_name),
                     message=_("A health incident has been reported for {0}.\n\nIncident Details:\nDate: {1}\nType: {2}\nDescription: {3}\nAction Taken: {4}").format(
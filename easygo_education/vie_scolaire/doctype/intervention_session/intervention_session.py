@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class InterventionSession(Document):
     """Intervention Session management for student support."""
@@ -79,7 +81,7 @@ class InterventionSession(Document):
         counselor = frappe.get_doc("Employee", self.assigned_counselor)
         
         if counselor.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[counselor.user_id],
                 subject=_("Intervention Session Scheduled - {0}").format(self.student_name),
                 message=self.get_counselor_notification_message(),
@@ -143,7 +145,7 @@ class InterventionSession(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Support Session Scheduled - {0}").format(self.student_name),
                 message=self.get_student_notification_message(),
@@ -193,7 +195,7 @@ class InterventionSession(Document):
                 if instructor:
                     teacher = frappe.get_doc("Employee", instructor)
                     if teacher.user_id:
-                        frappe.sendmail(
+                        queue_notification(
                             recipients=[teacher.user_id],
                             subject=_("Student Intervention Session - {0}").format(self.student_name),
                             message=self.get_teacher_notification_message(),
@@ -335,7 +337,7 @@ class InterventionSession(Document):
                 recipients.append(guardian.email_address)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Session Update - {0}").format(self.student_name),
                 message=self.get_parent_completion_message(),
@@ -389,7 +391,7 @@ class InterventionSession(Document):
                 if instructor:
                     teacher = frappe.get_doc("Employee", instructor)
                     if teacher.user_id:
-                        frappe.sendmail(
+                        queue_notification(
                             recipients=[teacher.user_id],
                             subject=_("Session Coordination - {0}").format(self.student_name),
                             message=self.get_teacher_completion_message(),
@@ -473,7 +475,7 @@ class InterventionSession(Document):
         if self.assigned_counselor:
             counselor = frappe.get_doc("Employee", self.assigned_counselor)
             if counselor.user_id:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[counselor.user_id],
                     subject=_("Student No Show - {0}").format(self.student_name),
                     message=self.get_no_show_notification_message(),
@@ -495,7 +497,7 @@ class InterventionSession(Document):
                 recipients.append(guardian.email_address)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Missed Session - {0}").format(self.student_name),
                 message=self.get_guardian_no_show_message(),
@@ -610,7 +612,7 @@ class InterventionSession(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Session Cancelled - {0}").format(self.student_name),
                 message=self.get_cancellation_message(reason),
@@ -689,7 +691,7 @@ class InterventionSession(Document):
             recipients.append(student.student_email_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Session Rescheduled - {0}").format(self.student_name),
                 message=self.get_reschedule_message(new_session, reason),
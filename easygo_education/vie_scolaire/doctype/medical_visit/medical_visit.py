@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, get_time, flt
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class MedicalVisit(Document):
     """Medical Visit management."""
@@ -182,7 +184,7 @@ class MedicalVisit(Document):
             guardian = frappe.get_doc("Guardian", guardian_link.guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Medical Visit Update: {0}").format(self.student_name),
                     message=self.get_parent_notification_message(),
@@ -204,7 +206,7 @@ class MedicalVisit(Document):
             guardian = frappe.get_doc("Guardian", guardian_link.guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Medical Referral: {0}").format(self.student_name),
                     message=self.get_referral_message(specialist, reason),
@@ -215,7 +217,7 @@ class MedicalVisit(Document):
     def notify_follow_up_scheduled(self, follow_up_name):
         """Notify about scheduled follow-up."""
         if self.healthcare_provider:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[self.healthcare_provider],
                 subject=_("Follow-up Scheduled: {0}").format(self.student_name),
                 message=self.get_follow_up_message(follow_up_name),
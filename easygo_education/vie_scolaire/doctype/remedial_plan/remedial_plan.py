@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days, date_diff
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class RemedialPlan(Document):
     """Remedial Plan management for student support."""
@@ -113,7 +115,7 @@ class RemedialPlan(Document):
         counselor = frappe.get_doc("Employee", self.assigned_counselor)
         
         if counselor.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[counselor.user_id],
                 subject=_("New Remedial Plan Assignment - {0}").format(self.student_name),
                 message=self.get_counselor_notification_message(),
@@ -167,7 +169,7 @@ class RemedialPlan(Document):
         teacher = frappe.get_doc("Employee", self.class_teacher)
         
         if teacher.user_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[teacher.user_id],
                 subject=_("Student Remedial Plan - {0}").format(self.student_name),
                 message=self.get_teacher_notification_message(),
@@ -211,7 +213,7 @@ class RemedialPlan(Document):
             guardian = frappe.get_doc("Guardian", self.parent_guardian)
             
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Student Support Plan - {0}").format(self.student_name),
                     message=self.get_guardian_notification_message(),
@@ -262,7 +264,7 @@ class RemedialPlan(Document):
         student = frappe.get_doc("Student", self.student)
         
         if student.student_email_id:
-            frappe.sendmail(
+            queue_notification(
                 recipients=[student.student_email_id],
                 subject=_("Your Personal Learning Plan"),
                 message=self.get_student_notification_message(),
@@ -378,7 +380,7 @@ class RemedialPlan(Document):
                 recipients.append(teacher.user_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Progress Update - {0}").format(self.name),
                 message=self.get_progress_notification_message(),
@@ -472,7 +474,7 @@ class RemedialPlan(Document):
                 recipients.append(teacher.user_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Remedial Plan Completed - {0}").format(self.student_name),
                 message=self.get_completion_notification_message(),
@@ -484,7 +486,7 @@ class RemedialPlan(Document):
         if self.parent_guardian:
             guardian = frappe.get_doc("Guardian", self.parent_guardian)
             if guardian.email_address:
-                frappe.sendmail(
+                queue_notification(
                     recipients=[guardian.email_address],
                     subject=_("Support Plan Completed - {0}").format(self.student_name),
                     message=self.get_guardian_completion_message(),
@@ -647,7 +649,7 @@ class RemedialPlan(Document):
                 recipients.append(teacher.user_id)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Remedial Plan Cancelled - {0}").format(self.student_name),
                 message=self.get_cancellation_notification_message(reason),
@@ -3,7 +3,11 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import getdate, today
+from frappe.utils import get_time, getdate, today
+
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+from easygo_education.api.realtime import publish_attendance
+from easygo_education.vie_scolaire.attendance_rollup import apply_attendance_changes
 
 
 class StudentAttendance(Document):
@@ -54,6 +58,7 @@ class StudentAttendance(Document):
     def after_insert(self):
         """Actions after attendance is marked."""
         self.notify_guardian()
+        publish_attendance([self])
     
     def notify_guardian(self):
         """Send notification to guardian for absences or late arrivals."""
@@ -70,66 +75,259 @@ class StudentAttendance(Document):
         if not enable_notifications:
             return
             
-        try:
-            school_name = frappe.db.get_single_value("School Settings", "school_name") or "School"
-            
-            if self.status == "Absent":
-                subject = _("Absence Notification - {0}").format(self.student_name)
-                message = _("""
-                <p>Dear Parent,</p>
-                
-                <p>This is to inform you that {0} was marked absent on {1}.</p>
-                
-                <p>If this absence was due to illness or other valid reason, please submit a justification through the parent portal or contact the school.</p>
-                
-                <p>Best regards,<br>
-                {2} Administration</p>
-                """).format(
-                    self.student_name,
-                    frappe.utils.formatdate(self.attendance_date),
-                    school_name
-                )
-            else:  # Late
-                subject = _("Late Arrival Notification - {0}").format(self.student_name)
-                message = _("""
-                <p>Dear Parent,</p>
-                
-                <p>This is to inform you that {0} arrived late to school on {1}.</p>
-                
-                <p>Arrival time: {2}</p>
-                
-                <p>Please ensure punctual arrival to avoid disruption to learning.</p>
-                
-                <p>Best regards,<br>
-                {3} Administration</p>
-                """).format(
-                    self.student_name,
-                    frappe.utils.formatdate(self.attendance_date),
-                    self.time_in or "Not recorded",
-                    school_name
-                )
-            
-            frappe.sendmail(
-                recipients=[guardian_email],
-                subject=subject,
-                message=message
-            )
-            
-            # Log the notification
-            frappe.get_doc({
-                "doctype": "Communication Log",
-                "reference_doctype": "Student Attendance",
-                "reference_name": self.name,
-                "communication_type": "Email",
-                "subject": subject,
-                "status": "Sent"
-            }).insert(ignore_permissions=True)
-            
-        except Exception as e:
-            frappe.log_error(f"Failed to send attendance notification for {self.name}: {str(e)}")
+        school_name = frappe.db.get_single_value("School Settings", "school_name") or "School"
+        subject, message = get_guardian_notification(
+            self.student_name, self.status, self.attendance_date, self.time_in, school_name
+        )
+        
+        queue_notification(
+            recipients=[guardian_email],
+            subject=subject,
+            message=message,
+            reference_doctype="Student Attendance",
+            reference_name=self.name
+        )
+
+
+def get_guardian_notification(student_name, status, attendance_date, time_in, school_name):
+    """Build the guardian email subject and body for an absence or late arrival."""
+    if status == "Absent":
+        subject = _("Absence Notification - {0}").format(student_name)
+        message = _("""
+        <p>Dear Parent,</p>
+        
+        <p>This is to inform you that {0} was marked absent on {1}.</p>
+        
+        <p>If this absence was due to illness or other valid reason, please submit a justification through the parent portal or contact the school.</p>
+        
+        <p>Best regards,<br>
+        {2} Administration</p>
+        """).format(
+            student_name,
+            frappe.utils.formatdate(attendance_date),
+            school_name
+        )
+    else:  # Late
+        subject = _("Late Arrival Notification - {0}").format(student_name)
+        message = _("""
+        <p>Dear Parent,</p>
+        
+        <p>This is to inform you that {0} arrived late to school on {1}.</p>
+        
+        <p>Arrival time: {2}</p>
+        
+        <p>Please ensure punctual arrival to avoid disruption to learning.</p>
+        
+        <p>Best regards,<br>
+        {3} Administration</p>
+        """).format(
+            student_name,
+            frappe.utils.formatdate(attendance_date),
+            time_in or "Not recorded",
+            school_name
+        )
+    
+    return subject, message
 
 
 def notify_guardian(doc, method):
     """Hook function to notify guardian on attendance marking."""
     # This is called from hooks.py - the actual logic is in after_insert
     pass
+
+
+def bulk_upsert_attendance(records, marked_by=None):
+    """Insert or update attendance for many students with a fixed number of queries.
+    
+    Existing rows are looked up in one query, new rows are written with a
+    multi-row insert and changed rows (status, arrival or departure time)
+    with a single UPDATE. Guardians of absent or late students are notified
+    by one background job after commit. Returns the names of all affected
+    attendance records.
+    """
+    if not records:
+        return []
+    
+    # Raw inserts and updates skip Select validation, so check statuses here
+    statuses = frappe.get_meta("Student Attendance").get_options("status").split("\n")
+    
+    # Normalise input and reject duplicates within the batch, mirroring validate_duplicate
+    rows = {}
+    for record in records:
+        if record.get("status") not in statuses:
+            frappe.throw(_("Status {0} is not valid for {1}, it should be one of {2}").format(
+                record.get("status"), record["student"], ", ".join(statuses)
+            ))
+        key = (record["student"], str(getdate(record["attendance_date"])))
+        if key in rows:
+            frappe.throw(_("Attendance already marked for {0} on {1}").format(
+                key[0], frappe.utils.formatdate(key[1])
+            ))
+        if getdate(key[1]) > getdate(today()):
+            frappe.throw(_("Attendance Date cannot be in the future"))
+        rows[key] = record
+    
+    students = list({student for student, _date in rows})
+    dates = list({date for _student, date in rows})
+    
+    student_details = {
+        row.name: row for row in frappe.db.sql("""
+            SELECT name, student_name, school_class
+            FROM `tabStudent`
+            WHERE name IN %(students)s
+        """, {"students": students}, as_dict=True)
+    }
+    missing = [student for student in students if student not in student_details]
+    if missing:
+        frappe.throw(_("Student {0} not found").format(", ".join(missing)))
+    
+    existing = {
+        (row.student, str(row.attendance_date)): row for row in frappe.db.sql("""
+            SELECT name, student, school_class, attendance_date, status, is_justified, time_in, time_out
+            FROM `tabStudent Attendance`
+            WHERE student IN %(students)s
+            AND attendance_date IN %(dates)s
+        """, {"students": students, "dates": dates}, as_dict=True)
+    }
+    
+    now = frappe.utils.now()
+    user = frappe.session.user
+    new_values = []
+    changed = {}
+    rollup_changes = []
+    notify = []
+    pushed = []
+    affected = []
+    
+    for key, record in rows.items():
+        student, attendance_date = key
+        current = existing.get(key)
+        status = get_effective_status(record["status"], current.is_justified if current else 0)
+        
+        if current:
+            affected.append(current.name)
+            # Times left out of the record keep their stored value
+            stored_times = (get_time_value(current.time_in), get_time_value(current.time_out))
+            times = (
+                get_time_value(record.get("time_in")) or stored_times[0],
+                get_time_value(record.get("time_out")) or stored_times[1]
+            )
+            if current.status != status or times != stored_times:
+                changed[current.name] = (status, *times)
+            if current.status != status:
+                pushed.append({
+                    "name": current.name,
+                    "student": student,
+                    "student_name": student_details[student].student_name,
+                    "attendance_date": attendance_date,
+                    "status": status
+                })
+                rollup_changes.append((student, current.school_class, attendance_date, current.status, -1))
+                rollup_changes.append((student, current.school_class, attendance_date, status, 1))
+            continue
+        
+        # Matches the DocType autoname format:{student}-{attendance_date}
+        name = f"{student}-{attendance_date}"
+        details = student_details[student]
+        new_values.append((
+            name, now, now, user, user, 0,
+            student, details.student_name, details.school_class, attendance_date,
+            status, record.get("time_in"), record.get("time_out"), marked_by
+        ))
+        affected.append(name)
+        rollup_changes.append((student, details.school_class, attendance_date, status, 1))
+        pushed.append({
+            "name": name,
+            "student": student,
+            "student_name": details.student_name,
+            "attendance_date": attendance_date,
+            "status": status
+        })
+        if status in ("Absent", "Late"):
+            notify.append(name)
+    
+    if new_values:
+        frappe.db.bulk_insert(
+            "Student Attendance",
+            fields=[
+                "name", "creation", "modified", "owner", "modified_by", "docstatus",
+                "student", "student_name", "school_class", "attendance_date",
+                "status", "time_in", "time_out", "marked_by"
+            ],
+            values=new_values
+        )
+    
+    if changed:
+        case_sql = "CASE name " + " ".join(["WHEN %s THEN %s"] * len(changed)) + " END"
+        params = []
+        for index in range(3):
+            params.extend(value for name, values in changed.items() for value in (name, values[index]))
+        frappe.db.sql(f"""
+            UPDATE `tabStudent Attendance`
+            SET status = {case_sql}, time_in = {case_sql}, time_out = {case_sql},
+                modified = %s, modified_by = %s
+            WHERE name IN %s
+        """, (*params, now, user, tuple(changed)))
+    
+    apply_attendance_changes(rollup_changes)
+    
+    from easygo_education.api.portal_cache import invalidate_students
+    invalidate_students(students)
+    publish_attendance(pushed)
+    
+    if notify:
+        frappe.enqueue(
+            "easygo_education.vie_scolaire.doctype.student_attendance.student_attendance.notify_guardians",
+            queue="short",
+            attendance_names=notify,
+            enqueue_after_commit=True
+        )
+    
+    return affected
+
+
+def get_time_value(value):
+    """Get a time from a time string or the timedelta the database returns, or None."""
+    return get_time(value) if value else None
+
+
+def get_effective_status(status, is_justified):
+    """Apply the justification rules of update_justification_status to a raw status."""
+    if status == "Absent" and is_justified:
+        return "Absent Justifié"
+    if status == "Absent Justifié" and not is_justified:
+        return "Absent"
+    return status
+
+
+def notify_guardians(attendance_names):
+    """Notify guardians of many absences or late arrivals in one background job."""
+    if not attendance_names:
+        return
+    
+    if not frappe.db.get_single_value("School Settings", "enable_email_notifications"):
+        return
+    
+    school_name = frappe.db.get_single_value("School Settings", "school_name") or "School"
+    
+    records = frappe.db.sql("""
+        SELECT sa.name, sa.student_name, sa.status, sa.attendance_date, sa.time_in,
+               s.guardian_email
+        FROM `tabStudent Attendance` sa
+        JOIN `tabStudent` s ON s.name = sa.student
+        WHERE sa.name IN %(names)s
+        AND sa.status IN ('Absent', 'Late')
+        AND IFNULL(s.guardian_email, '') != ''
+    """, {"names": attendance_names}, as_dict=True)
+    
+    for record in records:
+        subject, message = get_guardian_notification(
+            record.student_name, record.status, record.attendance_date, record.time_in, school_name
+        )
+        queue_notification(
+            recipients=[record.guardian_email],
+            subject=subject,
+            message=message,
+            reference_doctype="Student Attendance",
+            reference_name=record.name
+        )
@@ -0,0 +1 @@
+# Student Attendance Rollup
@@ -0,0 +1,12 @@
+"""Student Attendance Rollup doctype controller.
+
+Attendance counts per student and calendar month, maintained incrementally
+from Student Attendance by easygo_education.vie_scolaire.attendance_rollup.
+"""
+
+from frappe.model.document import Document
+
+
+class StudentAttendanceRollup(Document):
+    """Student Attendance Rollup doctype controller (maintained by the system)."""
+    pass
@@ -6,6 +6,9 @@ from frappe.model.document import Document
 from frappe.utils import getdate, now_datetime, flt, cint, add_days
 import json
 
+from easygo_education.utils.condition_engine import compile_condition, to_record, validate_condition
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class SupportTriggerRule(Document):
     """Support Trigger Rule management for automatic student support detection."""
@@ -30,11 +33,7 @@ class SupportTriggerRule(Document):
     def validate_conditions(self):
         """Validate custom conditions if provided."""
         if self.conditions and self.trigger_type == "Custom Condition":
-            try:
-                # Basic syntax validation
-                compile(self.conditions, '<string>', 'exec')
-            except SyntaxError as e:
-                frappe.throw(_("Invalid Python syntax in conditions: {0}").format(str(e)))
+            validate_condition(self.conditions, _("Custom Conditions"), result="triggered")
     
     def set_defaults(self):
         """Set default values."""
@@ -76,13 +75,15 @@ class SupportTriggerRule(Document):
         else:
             # Test with sample students
             sample_students = frappe.get_all("Student", 
+                filters={"status": "Active"},
                 fields=["name", "student_name"], 
                 limit=5
             )
             
+            frame = build_feature_frame(self.get_date_range(), [s.name for s in sample_students])
             results = []
             for student_info in sample_students:
-                result = self.evaluate_student(student_info.name)
+                result = self.evaluate_student(student_info.name, frame)
                 results.append({
                     "student": student_info.name,
                     "student_name": student_info.student_name,
@@ -92,169 +93,73 @@ class SupportTriggerRule(Document):
             
             return results
     
-    def evaluate_student(self, student):
+    def evaluate_student(self, student, frame=None):
         """Evaluate if a student triggers this rule."""
         try:
-            # Get student data
-            student_data = self.get_student_data(student)
+            if frame is None:
+                frame = build_feature_frame(self.get_date_range(), [student])
+            
+            student_data = frame.get(student)
+            if not student_data:
+                return {"triggered": False, "reason": "Student not found or inactive", "data": {}}
             
             # Check if rule applies to this student
             if not self.student_matches_scope(student, student_data):
                 return {"triggered": False, "reason": "Student not in scope", "data": student_data}
             
-            # Evaluate based on trigger type
-            if self.trigger_type == "Grade Below Threshold":
-                return self.evaluate_academic_threshold(student, student_data)
-            elif self.trigger_type == "Attendance Below Threshold":
-                return self.evaluate_attendance_threshold(student, student_data)
-            elif self.trigger_type == "Missed Assignments":
-                return self.evaluate_missed_assignments(student, student_data)
-            elif self.trigger_type == "Behavioral Incidents":
-                return self.evaluate_behavioral_incidents(student, student_data)
-            elif self.trigger_type == "Combined Criteria":
-                return self.evaluate_combined_criteria(student, student_data)
-            elif self.trigger_type == "Custom Condition":
-                return self.evaluate_custom_condition(student, student_data)
-            
-            return {"triggered": False, "reason": "Unknown trigger type", "data": student_data}
+            return self.evaluate_features(student, student_data)
             
         except Exception as e:
             frappe.log_error(f"Error evaluating student {student} for rule {self.name}: {str(e)}")
             return {"triggered": False, "reason": f"Evaluation error: {str(e)}", "data": {}}
     
-    def get_student_data(self, student):
-        """Get comprehensive student data for evaluation."""
-        student_doc = frappe.get_doc("Student", student)
-        
-        # Get academic performance
-        academic_data = self.get_academic_performance(student)
-        
-        # Get attendance data
-        attendance_data = self.get_attendance_data(student)
-        
-        # Get behavioral data
-        behavioral_data = self.get_behavioral_data(student)
-        
-        # Get assignment data
-        assignment_data = self.get_assignment_data(student)
-        
-        return {
-            "student_info": {
-                "name": student_doc.name,
-                "student_name": student_doc.student_name,
-                "student_group": student_doc.student_group,
-                "program": student_doc.program
-            },
-            "academic": academic_data,
-            "attendance": attendance_data,
-            "behavioral": behavioral_data,
-            "assignments": assignment_data
-        }
-    
-    def get_academic_performance(self, student):
-        """Get student academic performance data."""
-        # Get recent assessment results
-        assessments = frappe.get_all("Assessment Result",
-            filters={
-                "student": student,
-                "docstatus": 1
-            },
-            fields=["assessment", "grade", "total_score", "maximum_score", "result_date"],
-            order_by="result_date desc",
-            limit=10
-        )
-        
-        if not assessments:
-            return {"average_score": 0, "grade_count": 0, "recent_assessments": []}
-        
-        # Calculate average score
-        total_percentage = 0
-        valid_scores = 0
-        
-        for assessment in assessments:
-            if assessment.total_score and assessment.maximum_score:
-                percentage = (assessment.total_score / assessment.maximum_score) * 100
-                total_percentage += percentage
-                valid_scores += 1
-        
-        average_score = total_percentage / valid_scores if valid_scores > 0 else 0
-        
-        return {
-            "average_score": average_score,
-            "grade_count": len(assessments),
-            "recent_assessments": assessments
-        }
-    
-    def get_attendance_data(self, student):
-        """Get student attendance data."""
-        # Calculate attendance percentage for the specified time period
-        date_range = self.get_date_range()
-        
-        total_days = frappe.db.count("Student Attendance", {
-            "student": student,
-            "attendance_date": ["between", date_range],
-            "docstatus": 1
-        })
-        
-        present_days = frappe.db.count("Student Attendance", {
-            "student": student,
-            "attendance_date": ["between", date_range],
-            "status": "Present",
-            "docstatus": 1
-        })
-        
-        attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 100
-        
-        return {
-            "attendance_percentage": attendance_percentage,
-            "total_days": total_days,
-            "present_days": present_days,
-            "absent_days": total_days - present_days
-        }
-    
-    def get_behavioral_data(self, student):
-        """Get student behavioral incident data."""
-        date_range = self.get_date_range()
+    def evaluate_features(self, student, student_data):
+        """Evaluate the trigger against a student's aggregated features."""
+        if self.trigger_type == "Grade Below Threshold":
+            return self.evaluate_academic_threshold(student, student_data)
+        elif self.trigger_type == "Attendance Below Threshold":
+            return self.evaluate_attendance_threshold(student, student_data)
+        elif self.trigger_type == "Missed Assignments":
+            return self.evaluate_missed_assignments(student, student_data)
+        elif self.trigger_type == "Behavioral Incidents":
+            return self.evaluate_behavioral_incidents(student, student_data)
+        elif self.trigger_type == "Combined Criteria":
+            return self.evaluate_combined_criteria(student, student_data)
+        elif self.trigger_type == "Custom Condition":
+            return self.evaluate_custom_condition(student, student_data)
+        
+        return {"triggered": False, "reason": "Unknown trigger type", "data": student_data}
+    
+    def evaluate_frame(self, frame):
+        """Evaluate the rule over a feature frame in memory.
+        
+        Returns ``{student: evaluation}`` for the students that trigger.
+        """
+        students = list(frame)
+        if self.grade_level:
+            members = get_group_students(self.grade_level)
+            students = [student for student in students if student in members]
         
-        incidents = frappe.get_all("Student Disciplinary Action",
-            filters={
-                "student": student,
-                "incident_date": ["between", date_range],
-                "docstatus": 1
-            },
-            fields=["incident_type", "severity", "incident_date"],
-            order_by="incident_date desc"
-        )
+        triggered = {}
+        for student in students:
+            try:
+                evaluation = self.evaluate_features(student, frame[student])
+            except Exception as e:
+                frappe.log_error(f"Error evaluating student {student} for rule {self.name}: {str(e)}")
+                continue
+            
+            if evaluation["triggered"]:
+                triggered[student] = evaluation
         
-        return {
-            "incident_count": len(incidents),
-            "incidents": incidents,
-            "severe_incidents": len([i for i in incidents if i.severity == "High"])
-        }
+        return triggered
     
-    def get_assignment_data(self, student):
-        """Get student assignment submission data."""
+    def get_student_data(self, student):
+        """Get comprehensive student data for evaluation, including recent records."""
         date_range = self.get_date_range()
-        
-        # Get assignments due in the period
-        assignments = frappe.get_all("Student Assignment",
-            filters={
-                "student": student,
-                "due_date": ["between", date_range]
-            },
-            fields=["assignment", "status", "submission_date", "due_date"]
-        )
-        
-        total_assignments = len(assignments)
-        submitted_assignments = len([a for a in assignments if a.status == "Submitted"])
-        missed_assignments = len([a for a in assignments if a.status in ["Not Submitted", "Late"]])
-        
-        return {
-            "total_assignments": total_assignments,
-            "submitted_assignments": submitted_assignments,
-            "missed_assignments": missed_assignments,
-            "submission_rate": (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 100
-        }
+        student_data = build_feature_frame(date_range, [student]).get(student)
+        if student_data:
+            add_student_details(student, student_data, date_range)
+        return student_data
     
     def get_date_range(self):
         """Get date range based on time period setting."""
@@ -288,8 +193,7 @@ class SupportTriggerRule(Document):
     def student_matches_scope(self, student, student_data):
         """Check if student matches the rule scope."""
         if self.grade_level:
-            if student_data["student_info"]["student_group"] != self.grade_level:
-                return False
+            return student in get_group_students(self.grade_level)
         
         return True
     
@@ -373,27 +277,21 @@ class SupportTriggerRule(Document):
         return {"triggered": False, "reason": "No criteria triggered", "data": student_data}
     
     def evaluate_custom_condition(self, student, student_data):
-        """Evaluate custom condition trigger."""
+        """Evaluate custom condition trigger.
+        
+        The condition sees ``student``, ``student_data`` and each section of
+        it (``academic``, ``attendance``, ...) and sets ``triggered`` and
+        optionally ``reason``, or is a single boolean expression.
+        """
         if not self.conditions:
             return {"triggered": False, "reason": "No custom conditions defined", "data": student_data}
         
         try:
-            # Create execution context
-            context = {
-                "student_data": student_data,
-                "student": student,
-                "frappe": frappe,
-                "getdate": getdate,
-                "flt": flt,
-                "cint": cint
-            }
-            
-            # Execute custom condition
-            exec(self.conditions, context)
+            condition = compile_condition(self.conditions, "triggered")
+            values = condition.evaluate(get_condition_record(student, student_data))
             
-            # Check if 'triggered' variable was set
-            if context.get("triggered"):
-                reason = context.get("reason", "Custom condition triggered")
+            if values.get("triggered"):
+                reason = values.get("reason") or "Custom condition triggered"
                 return {"triggered": True, "reason": reason, "data": student_data}
             
             return {"triggered": False, "reason": "Custom condition not met", "data": student_data}
@@ -467,7 +365,7 @@ class SupportTriggerRule(Document):
                     recipients.append(teacher_user)
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=f"Student Support Alert - {student_doc.student_name}",
                 message=self.get_notification_message(student_doc, trigger_data),
@@ -560,34 +458,34 @@ class SupportTriggerRule(Document):
         if not self.is_active:
             frappe.throw(_("Rule is not active"))
         
-        results = {"triggered": 0, "evaluated": 0, "actions_executed": 0}
+        return self.run_batch_evaluation()
+    
+    def run_batch_evaluation(self, frame=None):
+        """Evaluate all students from one feature frame and act on those that trigger.
         
-        # Get students in scope
-        filters = {}
-        if self.grade_level:
-            filters["student_group"] = self.grade_level
+        ``frame`` can be shared between rules using the same time period;
+        only triggered students are loaded in detail.
+        """
+        date_range = self.get_date_range()
+        if frame is None:
+            frame = build_feature_frame(date_range)
         
-        students = frappe.get_all("Student", filters=filters, pluck="name")
+        triggered = self.evaluate_frame(frame)
+        results = {"triggered": len(triggered), "evaluated": len(frame), "actions_executed": 0}
         
-        for student in students:
-            results["evaluated"] += 1
-            
-            evaluation = self.evaluate_student(student)
+        for student, evaluation in triggered.items():
+            # The frame is shared with later rules, so details go on a copy
+            evaluation["data"] = copy_features(evaluation["data"])
+            add_student_details(student, evaluation["data"], date_range)
             
-            if evaluation["triggered"]:
-                results["triggered"] += 1
-                
-                # Execute action
-                action_result = self.execute_action(student, evaluation)
-                
-                if action_result["success"]:
-                    results["actions_executed"] += 1
-                
-                # Update statistics
-                self.trigger_count = (self.trigger_count or 0) + 1
-                self.last_triggered = now_datetime()
-        
-        self.save()
+            action_result = self.execute_action(student, evaluation)
+            if action_result["success"]:
+                results["actions_executed"] += 1
+        
+        if triggered:
+            self.trigger_count = (self.trigger_count or 0) + len(triggered)
+            self.last_triggered = now_datetime()
+            self.save()
         
         return results
     
@@ -634,21 +532,37 @@ class SupportTriggerRule(Document):
         }
 
 
+def get_condition_record(student, student_data):
+    """Build the record custom conditions are evaluated against."""
+    record = to_record(student_data)
+    record.update({"student": student, "student_data": to_record(student_data)})
+    return record
+
+
 @frappe.whitelist()
 def evaluate_all_rules():
-    """Evaluate all active support trigger rules."""
+    """Evaluate all active support trigger rules.
+    
+    Feature frames are built once per time period and shared by every rule
+    using that period.
+    """
     active_rules = frappe.get_all("Support Trigger Rule",
         filters={"is_active": 1, "docstatus": 1},
         pluck="name"
     )
     
     total_results = {"rules_evaluated": 0, "students_triggered": 0, "actions_executed": 0}
+    frames = {}
     
     for rule_name in active_rules:
         rule = frappe.get_doc("Support Trigger Rule", rule_name)
         
         try:
-            results = rule.run_rule_evaluation()
+            date_range = tuple(rule.get_date_range())
+            if date_range not in frames:
+                frames[date_range] = build_feature_frame(date_range)
+            
+            results = rule.run_batch_evaluation(frames[date_range])
             total_results["rules_evaluated"] += 1
             total_results["students_triggered"] += results["triggered"]
             total_results["actions_executed"] += results["actions_executed"]
@@ -659,6 +573,163 @@ def evaluate_all_rules():
     return total_results
 
 
+def build_feature_frame(date_range, students=None):
+    """Build aggregated evaluation features for many students.
+    
+    Uses one grouped query per source (grades, attendance, disciplinary
+    actions and homework) whatever the number of students. Defaults to all
+    active students. Returns ``{student: _dict}`` shaped like
+    ``get_student_data`` without the per-record lists.
+    """
+    student_filters = {"status": "Active"}
+    if students is not None:
+        if not students:
+            return {}
+        student_filters["name"] = ["in", list(students)]
+    
+    student_rows = frappe.get_all("Student",
+        filters=student_filters,
+        fields=["name", "student_name", "school_class", "program"]
+    )
+    if not student_rows:
+        return {}
+    
+    values = {
+        "students": [row.name for row in student_rows],
+        "from_date": date_range[0],
+        "to_date": date_range[1]
+    }
+    
+    # Average percentage of the ten most recent grades
+    academic = {row.student: row for row in frappe.db.sql("""
+        SELECT student,
+               IFNULL(AVG(CASE WHEN max_grade > 0 THEN grade / max_grade * 100 END), 0) as average_score,
+               COUNT(*) as grade_count
+        FROM (
+            SELECT student, grade, max_grade,
+                   ROW_NUMBER() OVER (PARTITION BY student ORDER BY assessment_date DESC) as row_num
+            FROM `tabGrade`
+            WHERE student IN %(students)s
+            AND docstatus < 2
+        ) recent
+        WHERE row_num <= 10
+        GROUP BY student
+    """, values, as_dict=True)}
+    
+    attendance = {row.student: row for row in frappe.db.sql("""
+        SELECT student,
+               COUNT(*) as total_days,
+               SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) as present_days
+        FROM `tabStudent Attendance`
+        WHERE student IN %(students)s
+        AND attendance_date BETWEEN %(from_date)s AND %(to_date)s
+        AND docstatus < 2
+        GROUP BY student
+    """, values, as_dict=True)}
+    
+    behavioral = {row.student: row for row in frappe.db.sql("""
+        SELECT student,
+               COUNT(*) as incident_count,
+               SUM(CASE WHEN severity_level IN ('Major', 'Severe') THEN 1 ELSE 0 END) as severe_incidents
+        FROM `tabDisciplinary Action`
+        WHERE student IN %(students)s
+        AND incident_date BETWEEN %(from_date)s AND %(to_date)s
+        AND docstatus < 2
+        GROUP BY student
+    """, values, as_dict=True)}
+    
+    # Published homework of each student's class due in the period
+    assignments = {row.student: row for row in frappe.db.sql("""
+        SELECT s.name as student,
+               COUNT(h.name) as total_assignments,
+               SUM(CASE WHEN hs.status IN ('Submitted', 'Graded', 'Resubmitted') THEN 1 ELSE 0 END) as submitted_assignments,
+               SUM(CASE WHEN hs.name IS NULL OR hs.status = 'Late' THEN 1 ELSE 0 END) as missed_assignments
+        FROM `tabStudent` s
+        JOIN `tabHomework` h ON h.school_class = s.school_class
+        LEFT JOIN `tabHomework Submission` hs ON hs.homework = h.name AND hs.student = s.name
+        WHERE s.name IN %(students)s
+        AND h.is_published = 1
+        AND h.due_date BETWEEN %(from_date)s AND %(to_date)s
+        GROUP BY s.name
+    """, values, as_dict=True)}
+    
+    frame = {}
+    for row in student_rows:
+        grades = academic.get(row.name) or frappe._dict()
+        days = attendance.get(row.name) or frappe._dict()
+        incidents = behavioral.get(row.name) or frappe._dict()
+        homework = assignments.get(row.name) or frappe._dict()
+        
+        total_days = cint(days.total_days)
+        present_days = cint(days.present_days)
+        total_assignments = cint(homework.total_assignments)
+        submitted_assignments = cint(homework.submitted_assignments)
+        
+        frame[row.name] = frappe._dict({
+            "student_info": frappe._dict({
+                "name": row.name,
+                "student_name": row.student_name,
+                "school_class": row.school_class,
+                "program": row.program
+            }),
+            "academic": frappe._dict({
+                "average_score": flt(grades.average_score),
+                "grade_count": cint(grades.grade_count)
+            }),
+            "attendance": frappe._dict({
+                "attendance_percentage": (present_days / total_days * 100) if total_days > 0 else 100,
+                "total_days": total_days,
+                "present_days": present_days,
+                "absent_days": total_days - present_days
+            }),
+            "behavioral": frappe._dict({
+                "incident_count": cint(incidents.incident_count),
+                "severe_incidents": cint(incidents.severe_incidents)
+            }),
+            "assignments": frappe._dict({
+                "total_assignments": total_assignments,
+                "submitted_assignments": submitted_assignments,
+                "missed_assignments": cint(homework.missed_assignments),
+                "submission_rate": (submitted_assignments / total_assignments * 100) if total_assignments > 0 else 100
+            })
+        })
+    
+    return frame
+
+
+def copy_features(student_data):
+    """Copy a student's features down to their sections so they can be changed safely."""
+    return frappe._dict({section: frappe._dict(values) for section, values in student_data.items()})
+
+
+def add_student_details(student, student_data, date_range):
+    """Add recent grades and incidents to a triggered student's features."""
+    student_data["academic"]["recent_assessments"] = frappe.get_all("Grade",
+        filters={"student": student, "docstatus": ["<", 2]},
+        fields=["assessment", "subject", "grade", "max_grade", "percentage", "assessment_date"],
+        order_by="assessment_date desc",
+        limit=10
+    )
+    student_data["behavioral"]["incidents"] = frappe.get_all("Disciplinary Action",
+        filters={
+            "student": student,
+            "incident_date": ["between", list(date_range)],
+            "docstatus": ["<", 2]
+        },
+        fields=["incident_type", "severity_level", "incident_date"],
+        order_by="incident_date desc"
+    )
+    return student_data
+
+
+def get_group_students(student_group):
+    """Get the active members of a student group."""
+    return set(frappe.get_all("Student Group Member",
+        filters={"parent": student_group, "parenttype": "Student Group", "status": "Active"},
+        pluck="student"
+    ))
+
+
 @frappe.whitelist()
 def get_student_support_dashboard(student):
     """Get comprehensive support dashboard for a student."""
@@ -670,9 +741,13 @@ def get_student_support_dashboard(student):
         pluck="name"
     )
     
+    frames = {}
     for rule_name in active_rules:
         rule = frappe.get_doc("Support Trigger Rule", rule_name)
-        evaluation = rule.evaluate_student(student)
+        date_range = tuple(rule.get_date_range())
+        if date_range not in frames:
+            frames[date_range] = build_feature_frame(date_range, [student])
+        evaluation = rule.evaluate_student(student, frames[date_range])
         
         if evaluation["triggered"]:
             triggered_rules.append({
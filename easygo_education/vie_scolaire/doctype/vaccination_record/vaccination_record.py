@@ -5,6 +5,8 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate, add_days
 
+from easygo_education.administration_comms.notification_dispatcher import queue_notification
+
 
 class VaccinationRecord(Document):
     """Vaccination Record management."""
@@ -127,7 +129,7 @@ class VaccinationRecord(Document):
         recipients = [emp.user_id for emp in healthcare_team if emp.user_id]
         
         if recipients:
-            frappe.sendmail(
+            queue_notification(
                 recipients=recipients,
                 subject=_("Adverse Reaction Reported: {0}").format(self.student_name),
                 message=self.get_adverse_reaction_message(),
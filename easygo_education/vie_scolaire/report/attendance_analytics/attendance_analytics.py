@@ -75,23 +75,23 @@ def get_columns():
 
 
 def get_data(filters):
-    """Get report data."""
-    conditions = get_conditions(filters)
+    """Get report data from the daily class attendance rollup."""
+    filters = frappe._dict(filters or {})
+    conditions, values = get_conditions(filters)
     
     data = frappe.db.sql(f"""
         SELECT 
-            sa.attendance_date,
-            sa.school_class,
-            COUNT(*) as total_students,
-            COUNT(CASE WHEN sa.status = 'Present' THEN 1 END) as present_count,
-            COUNT(CASE WHEN sa.status = 'Absent' THEN 1 END) as absent_count,
-            COUNT(CASE WHEN sa.status = 'Late' THEN 1 END) as late_count,
-            COUNT(CASE WHEN sa.status = 'Excused' THEN 1 END) as excused_count
-        FROM `tabStudent Attendance` sa
-        WHERE sa.docstatus = 1 {conditions}
-        GROUP BY sa.attendance_date, sa.school_class
-        ORDER BY sa.attendance_date DESC, sa.school_class
-    """, as_dict=True)
+            attendance_date,
+            school_class,
+            total_count as total_students,
+            present_count,
+            absent_count,
+            late_count,
+            justified_count as excused_count
+        FROM `tabClass Attendance Rollup`
+        WHERE total_count > 0 {conditions}
+        ORDER BY attendance_date DESC, school_class
+    """, values, as_dict=True)
     
     # Calculate rates
     for row in data:
@@ -114,22 +114,31 @@ def get_data(filters):
 
 
 def get_conditions(filters):
-    """Get query conditions based on filters."""
+    """Get query conditions and values based on filters."""
     conditions = ""
+    values = {}
     
     if filters.get('from_date'):
-        conditions += f" AND sa.attendance_date >= '{filters['from_date']}'"
+        conditions += " AND attendance_date >= %(from_date)s"
+        values["from_date"] = filters.from_date
     
     if filters.get('to_date'):
-        conditions += f" AND sa.attendance_date <= '{filters['to_date']}'"
+        conditions += " AND attendance_date <= %(to_date)s"
+        values["to_date"] = filters.to_date
     
     if filters.get('school_class'):
-        conditions += f" AND sa.school_class = '{filters['school_class']}'"
+        conditions += " AND school_class = %(school_class)s"
+        values["school_class"] = filters.school_class
     
     if filters.get('academic_year'):
-        conditions += f" AND sa.academic_year = '{filters['academic_year']}'"
+        # Attendance has no academic year, so filter on the year's dates
+        year_start, year_end = frappe.db.get_value("Academic Year", filters.academic_year,
+            ["year_start_date", "year_end_date"]) or (None, None)
+        if year_start and year_end:
+            conditions += " AND attendance_date BETWEEN %(year_start)s AND %(year_end)s"
+            values.update({"year_start": year_start, "year_end": year_end})
     
-    return conditions
+    return conditions, values
 
 
 def get_chart_data(data, filters):
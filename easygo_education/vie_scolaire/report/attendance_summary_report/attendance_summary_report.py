@@ -4,6 +4,8 @@ import frappe
 from frappe import _
 from frappe.utils import getdate, add_days
 
+from easygo_education.vie_scolaire.attendance_rollup import COUNT_COLUMNS, get_student_attendance_counts
+
 
 def execute(filters=None):
     """Execute Attendance Summary Report."""
@@ -84,32 +86,36 @@ def get_columns():
 
 
 def get_data(filters):
-    """Get report data."""
-    conditions = get_conditions(filters)
-    
-    query = f"""
-        SELECT 
-            s.name as student_id,
-            s.student_name,
-            s.school_class,
-            COUNT(sa.name) as total_days,
-            SUM(CASE WHEN sa.status = 'Present' THEN 1 ELSE 0 END) as present_days,
-            SUM(CASE WHEN sa.status = 'Absent' THEN 1 ELSE 0 END) as absent_days,
-            SUM(CASE WHEN sa.status = 'Late' THEN 1 ELSE 0 END) as late_days,
-            SUM(CASE WHEN sa.status = 'Excused' THEN 1 ELSE 0 END) as excused_days,
-            CASE 
-                WHEN COUNT(sa.name) > 0 THEN 
-                    (SUM(CASE WHEN sa.status IN ('Present', 'Late') THEN 1 ELSE 0 END) * 100.0 / COUNT(sa.name))
-                ELSE 0 
-            END as attendance_percentage
-        FROM `tabStudent` s
-        LEFT JOIN `tabStudent Attendance` sa ON s.name = sa.student
-        WHERE s.status = 'Active' {conditions}
-        GROUP BY s.name, s.student_name, s.school_class
-        ORDER BY s.school_class, s.student_name
-    """
-    
-    data = frappe.db.sql(query, as_dict=1)
+    """Get report data from the attendance rollups."""
+    filters = frappe._dict(filters or {})
+    from_date, to_date = get_date_range(filters)
+    
+    student_filters = {"status": "Active"}
+    if filters.get("school_class"):
+        student_filters["school_class"] = filters.school_class
+    if filters.get("student"):
+        student_filters["name"] = filters.student
+    
+    data = frappe.get_all("Student",
+        filters=student_filters,
+        fields=["name as student_id", "student_name", "school_class"],
+        order_by="school_class, student_name"
+    )
+    counts = get_student_attendance_counts([row.student_id for row in data], from_date, to_date)
+    
+    for row in data:
+        student_counts = counts.get(row.student_id) or frappe._dict(dict.fromkeys(COUNT_COLUMNS, 0))
+        row.update({
+            "total_days": student_counts.total_count,
+            "present_days": student_counts.present_count,
+            "absent_days": student_counts.absent_count,
+            "late_days": student_counts.late_count,
+            "excused_days": student_counts.justified_count,
+            "attendance_percentage": (
+                (student_counts.present_count + student_counts.late_count) * 100.0 / student_counts.total_count
+                if student_counts.total_count else 0
+            )
+        })
     
     # Add attendance status based on percentage
     for row in data:
@@ -128,26 +134,21 @@ def get_data(filters):
     return data
 
 
-def get_conditions(filters):
-    """Build query conditions based on filters."""
-    conditions = []
+def get_date_range(filters):
+    """Get the reporting period from the date and academic year filters."""
+    from_date = getdate(filters.from_date) if filters.get("from_date") else None
+    to_date = getdate(filters.to_date) if filters.get("to_date") else None
     
     if filters.get("academic_year"):
-        conditions.append(f"AND sa.academic_year = '{filters.get('academic_year')}'")
-    
-    if filters.get("school_class"):
-        conditions.append(f"AND s.school_class = '{filters.get('school_class')}'")
-    
-    if filters.get("student"):
-        conditions.append(f"AND s.name = '{filters.get('student')}'")
-    
-    if filters.get("from_date"):
-        conditions.append(f"AND sa.attendance_date >= '{filters.get('from_date')}'")
-    
-    if filters.get("to_date"):
-        conditions.append(f"AND sa.attendance_date <= '{filters.get('to_date')}'")
-    
-    return " ".join(conditions)
+        # Attendance has no academic year, so narrow the range to the year's dates
+        year_start, year_end = frappe.db.get_value("Academic Year", filters.academic_year,
+            ["year_start_date", "year_end_date"]) or (None, None)
+        if year_start:
+            from_date = max(from_date, getdate(year_start)) if from_date else getdate(year_start)
+        if year_end:
+            to_date = min(to_date, getdate(year_end)) if to_date else getdate(year_end)
+    
+    return from_date, to_date
 
 
 def get_chart_data(data, filters):